@@ -111,6 +111,20 @@ class Settings(BaseSettings):
         description="Dimensão dos embeddings",
     )
 
+    embedding_batch_size: int = Field(
+        default=32,
+        ge=1,
+        le=4096,
+        description="Textos por lote do modelo de embedding (agrupados por tamanho em tokens)",
+    )
+
+    embedding_threads: int = Field(
+        default=0,
+        ge=0,
+        le=256,
+        description="Threads do PyTorch para gerar embeddings (0 = padrão do PyTorch)",
+    )
+
     llm_model: str = Field(
         default="gemini-2.5-flash",
         description="Modelo LLM para usar",
@@ -139,9 +153,16 @@ class Settings(BaseSettings):
         description="Número de documentos a recuperar na busca",
     )
 
-    search_type: Literal["similarity", "mmr", "similarity_score_threshold"] = Field(
+    search_type: Literal["similarity", "mmr", "similarity_score_threshold", "hybrid"] = Field(
         default="mmr",
-        description="Tipo de busca no vector store",
+        description="Tipo de busca no vector store (hybrid = FAISS + BM25 com RRF)",
+    )
+
+    search_score_threshold: float = Field(
+        default=0.5,
+        ge=0.0,
+        le=1.0,
+        description="Relevância mínima (0-1) para search_type=similarity_score_threshold",
     )
 
     mmr_diversity_score: float = Field(
@@ -151,6 +172,27 @@ class Settings(BaseSettings):
         description="Score de diversidade para MMR (0.0 = só relevância, 1.0 = só diversidade)",
     )
 
+    mmr_fetch_k: int = Field(
+        default=20,
+        ge=1,
+        le=500,
+        description="Busca MMR: candidatos mais próximos reordenados pelo MMR (no mínimo k)",
+    )
+
+    hybrid_fetch_k: int = Field(
+        default=40,
+        ge=1,
+        le=500,
+        description="Busca hybrid: candidatos de cada busca (FAISS e BM25) antes da fusão",
+    )
+
+    hybrid_rrf_k: int = Field(
+        default=60,
+        ge=1,
+        le=1000,
+        description="Busca hybrid: constante da reciprocal rank fusion (1 / (k + posição))",
+    )
+
     # =============================================================================
     # Configurações RAG v3 (Similarity Search Variant)
     # =============================================================================
@@ -160,7 +202,7 @@ class Settings(BaseSettings):
         description="Habilitar RAG v3 (variante com similarity search)",
     )
 
-    rag_v3_search_type: Literal["similarity", "mmr"] = Field(
+    rag_v3_search_type: Literal["similarity", "mmr", "hybrid"] = Field(
         default="similarity",
         description="Tipo de busca para RAG v3 (padrão: similarity, diferente do v2)",
     )
@@ -172,6 +214,150 @@ class Settings(BaseSettings):
         description="Número de documentos a recuperar no RAG v3",
     )
 
+    # =============================================================================
+    # Configurações do Índice Vetorial (FAISS)
+    # =============================================================================
+
+    vector_db_mmap: bool = Field(
+        default=True,
+        description="Servir índice FAISS via mmap e docstore SQLite (compartilhados entre workers)",
+    )
+
+    vector_db_sharded: bool = Field(
+        default=False,
+        description="Um índice FAISS por lei (<vector_db_path>/shards/<lei>), com busca roteada",
+    )
+
+    vector_db_shard_routing: bool = Field(
+        default=True,
+        description="No modo particionado, buscar só nas leis citadas na pergunta (se houver)",
+    )
+
+    faiss_index_type: Literal["flat", "hnsw", "ivf_flat", "ivf_pq"] = Field(
+        default="flat",
+        description="Tipo de índice FAISS (flat = busca exata; hnsw/ivf_* = busca aproximada)",
+    )
+
+    faiss_metric: Literal["l2", "ip"] = Field(
+        default="l2",
+        description="Métrica de índices novos (ip = produto interno/cosseno, embeddings normalizados)",
+    )
+
+    faiss_hnsw_m: int = Field(
+        default=32,
+        ge=4,
+        le=128,
+        description="HNSW: vizinhos por nó do grafo (maior = mais recall e memória)",
+    )
+
+    faiss_hnsw_ef_construction: int = Field(
+        default=200,
+        ge=16,
+        le=2048,
+        description="HNSW: largura da busca durante a construção do grafo",
+    )
+
+    faiss_hnsw_ef_search: int = Field(
+        default=64,
+        ge=1,
+        le=4096,
+        description="HNSW: largura da busca nas consultas (maior = mais recall, mais lento)",
+    )
+
+    faiss_ivf_nlist: int = Field(
+        default=1024,
+        ge=1,
+        le=262144,
+        description="IVF: número de listas invertidas (limitado ao volume de treino)",
+    )
+
+    faiss_ivf_nprobe: int = Field(
+        default=16,
+        ge=1,
+        le=262144,
+        description="IVF: listas visitadas por consulta (maior = mais recall, mais lento)",
+    )
+
+    faiss_pq_m: int = Field(
+        default=48,
+        ge=1,
+        le=1024,
+        description="IVF-PQ: subquantizadores por vetor (deve dividir a dimensão)",
+    )
+
+    faiss_pq_nbits: int = Field(
+        default=8,
+        ge=4,
+        le=12,
+        description="IVF-PQ: bits por código de subquantizador",
+    )
+
+    # =============================================================================
+    # Configurações de Cache
+    # =============================================================================
+
+    answer_cache_enabled: bool = Field(
+        default=True,
+        description="Reutilizar respostas de perguntas idênticas (mesma versão RAG e índice)",
+    )
+
+    answer_cache_max_entries: int = Field(
+        default=1024,
+        ge=1,
+        le=1_000_000,
+        description="Número máximo de respostas mantidas em memória (LRU)",
+    )
+
+    answer_cache_ttl_seconds: int = Field(
+        default=86400,
+        ge=1,
+        description="Validade de cada resposta em cache, em segundos",
+    )
+
+    answer_cache_persist: bool = Field(
+        default=False,
+        description="Persistir o cache de respostas em data/metrics/answer_cache.db",
+    )
+
+    semantic_cache_enabled: bool = Field(
+        default=False,
+        description="Reutilizar respostas de perguntas parecidas (similaridade de embedding)",
+    )
+
+    semantic_cache_threshold: float = Field(
+        default=0.95,
+        ge=0.5,
+        le=1.0,
+        description="Similaridade de cosseno mínima entre perguntas para reutilizar a resposta",
+    )
+
+    semantic_cache_max_entries: int = Field(
+        default=512,
+        ge=1,
+        le=100_000,
+        description="Número máximo de perguntas no cache semântico",
+    )
+
+    query_embedding_cache_size: int = Field(
+        default=2048,
+        ge=0,
+        le=1_000_000,
+        description="Embeddings de consultas mantidos em cache LRU (0 = desabilitado)",
+    )
+
+    query_embedding_cache_max_mb: float = Field(
+        default=32.0,
+        gt=0,
+        description="Orçamento de memória do cache de embeddings de consultas, em MB",
+    )
+
+    retrieval_cache_size: int = Field(
+        default=512,
+        ge=0,
+        le=100_000,
+        description="Contextos recuperados (v2/v3) mantidos em cache LRU (0 = desabilitado)",
+    )
+
     # =============================================================================
     # Configurações de Artigo 0 (Contexto Hierárquico)
     # =============================================================================
@@ -189,6 +375,38 @@ class Settings(BaseSettings):
             return self.project_root / path
         return path
 
+    artigos_0_index_path: str = Field(
+        default="data/processed/v1_artigos_0.json",
+        description="Árvore de artigos 0 em JSON compacto (regerada do CSV quando desatualizada)",
+    )
+
+    @property
+    def artigos_0_index_path_absolute(self) -> Path:
+        """Retorna o caminho absoluto do índice JSON de artigos 0."""
+        path = Path(self.artigos_0_index_path)
+        if not path.is_absolute():
+            return self.project_root / path
+        return path
+
+    article_lookup_enabled: bool = Field(
+        default=True,
+        description="Resolve artigos citados na pergunta (ex: 'art. 75 da Lei 14.133') "
+        "direto de split_docs, sem busca vetorial (RAGs v2 e v3)",
+    )
+
+    article_index_path: str = Field(
+        default="data/processed/v1_artigos_index.json",
+        description="Índice (lei, artigo) → textos em JSON compacto (regerado de split_docs)",
+    )
+
+    @property
+    def article_index_path_absolute(self) -> Path:
+        """Retorna o caminho absoluto do índice JSON de artigos."""
+        path = Path(self.article_index_path)
+        if not path.is_absolute():
+            return self.project_root / path
+        return path
+
     processed_articles_csv_path: str = Field(
         default="data/processed/v1_processed_articles.csv",
         description="Caminho para CSV com todos os artigos processados",
@@ -228,6 +446,50 @@ class Settings(BaseSettings):
         description="Versão padrão do RAG para consultas via API",
     )
 
+    rag_max_workers: int = Field(
+        default=4,
+        ge=1,
+        le=64,
+        description="Threads dedicadas à execução de consultas RAG na API",
+    )
+
+    rag_max_queue: int = Field(
+        default=16,
+        ge=0,
+        le=1000,
+        description="Consultas RAG que podem aguardar na fila além das em execução",
+    )
+
+    rag_retry_after_seconds: int = Field(
+        default=5,
+        ge=1,
+        le=300,
+        description="Valor do header Retry-After quando a fila RAG está cheia",
+    )
+
+    # =============================================================================
+    # Configurações de Processamento de Documentos (Jobs)
+    # =============================================================================
+
+    process_worker_embedded: bool = Field(
+        default=True,
+        description="Inicia o worker de processamento (processo separado) junto com a API",
+    )
+
+    process_worker_poll_seconds: float = Field(
+        default=1.0,
+        ge=0.1,
+        le=60.0,
+        description="Intervalo (s) entre consultas do worker à fila de jobs",
+    )
+
+    process_embed_batch_size: int = Field(
+        default=64,
+        ge=1,
+        le=4096,
+        description="Chunks por lote de embeddings (granularidade do progresso dos jobs)",
+    )
+
     # =============================================================================
     # Configurações de Ambiente
     # =============================================================================
@@ -265,6 +527,34 @@ class Settings(BaseSettings):
         description="Overlap entre chunks",
     )
 
+    extraction_workers: int = Field(
+        default=0,
+        ge=0,
+        le=256,
+        description="Processos para extração paralela de texto dos PDFs (0 = número de CPUs)",
+    )
+
+    extraction_pages_per_task: int = Field(
+        default=50,
+        ge=1,
+        le=10000,
+        description="Páginas por tarefa de extração (PDFs maiores são divididos em faixas)",
+    )
+
+    index_build_batch_size: int = Field(
+        default=1024,
+        ge=1,
+        le=1_000_000,
+        description="Artigos lidos do JSONL por lote na indexação em streaming (amldo-build-index)",
+    )
+
+    index_checkpoint_every: int = Field(
+        default=10,
+        ge=1,
+        le=100_000,
+        description="Lotes entre checkpoints da indexação em streaming",
+    )
+
     # =============================================================================
     # Métodos Utilitários
     # =============================================================================
@@ -287,8 +577,9 @@ class Settings(BaseSettings):
         """
         Retorna se deve permitir desserialização perigosa do FAISS.
 
-        IMPORTANTE: Isso é necessário para carregar índices FAISS baseados em pickle,
-        mas só deve ser usado com fontes confiáveis.
+        IMPORTANTE: O AMLDO grava o docstore em SQLite (`docstore.sqlite`); isso só é
+        usado para migrar, uma única vez, vector stores legados baseados em pickle
+        (`index.pkl`) e só deve ser permitido com fontes confiáveis.
 
         Returns:
             True em development/testing, False em production (por segurança)
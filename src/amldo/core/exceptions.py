@@ -98,6 +98,12 @@ class LLMError(RAGError):
     pass
 
 
+class RAGOverloadedError(RAGError):
+    """Fila de consultas RAG cheia; a requisição deve ser repetida mais tarde."""
+
+    pass
+
+
 # =============================================================================
 # Exceções de Agentes
 # =============================================================================
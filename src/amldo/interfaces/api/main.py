@@ -16,6 +16,8 @@ from fastapi.responses import HTMLResponse
 
 from amldo.core.config import settings
 from amldo.interfaces.api.routers import query, upload, metrics
+from amldo.pipeline.worker import start_worker_process, stop_worker_process
+from amldo.utils.executor import shutdown_rag_executor
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -112,6 +114,10 @@ async def startup_event():
     except Exception:
         pass
 
+    # Processamento de documentos roda fora dos processos da API
+    if settings.process_worker_embedded:
+        start_worker_process()
+
     print("🚀 AMLDO API iniciada com sucesso!")
     print(f"📊 Documentação: http://{settings.api_host}:{settings.api_port}/docs")
     print(f"🔍 ReDoc: http://{settings.api_host}:{settings.api_port}/redoc")
@@ -122,6 +128,8 @@ async def shutdown_event():
     """
     Executado quando a aplicação é encerrada.
     """
+    shutdown_rag_executor()
+    stop_worker_process()
     print("👋 AMLDO API encerrada")
 
 
@@ -3,7 +3,14 @@ Modelos Pydantic para requisições e respostas da API.
 """
 
 from .request import QueryRequest, UploadRequest
-from .response import QueryResponse, UploadResponse, ProcessResponse, MetricsResponse
+from .response import (
+    QueryResponse,
+    UploadResponse,
+    ProcessResponse,
+    ProcessJobResponse,
+    ProcessJobStatus,
+    MetricsResponse,
+)
 
 __all__ = [
     "QueryRequest",
@@ -11,5 +18,7 @@ __all__ = [
     "QueryResponse",
     "UploadResponse",
     "ProcessResponse",
+    "ProcessJobResponse",
+    "ProcessJobStatus",
     "MetricsResponse",
 ]
@@ -46,7 +46,7 @@ class ProcessResponse(BaseModel):
     """Resposta de processamento de documentos."""
 
     processed: int = Field(..., description="Número de arquivos processados")
-    total_chunks: int = Field(..., description="Total de chunks indexados")
+    total_chunks: int = Field(..., description="Total de chunks com embeddings gerados")
     files: List[Dict[str, Any]] = Field(..., description="Detalhes dos arquivos processados")
     duration_seconds: Optional[float] = Field(None, description="Duração do processamento")
 
@@ -56,15 +56,77 @@ class ProcessResponse(BaseModel):
                 "processed": 3,
                 "total_chunks": 450,
                 "files": [
-                    {"file": "lei.pdf", "chunks": 150},
-                    {"file": "decreto.pdf", "chunks": 200},
-                    {"file": "portaria.pdf", "chunks": 100},
+                    {"file": "lei.pdf", "status": "indexed", "chunks": 150},
+                    {"file": "decreto.pdf", "status": "indexed", "chunks": 200},
+                    {"file": "portaria.pdf", "status": "unchanged", "chunks": 0},
                 ],
                 "duration_seconds": 45.5,
             }
         }
 
 
+class ProcessJobResponse(BaseModel):
+    """Job de processamento enfileirado por POST /api/process."""
+
+    job_id: str = Field(..., description="ID do job")
+    status: str = Field(..., description="Estado do job (queued, running, done, failed)")
+    status_url: str = Field(..., description="URL para acompanhar o andamento")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "3f2a9c1e8b7d4e6fa0c5b2d1e9f8a7b6",
+                "status": "queued",
+                "status_url": "/api/process/3f2a9c1e8b7d4e6fa0c5b2d1e9f8a7b6",
+            }
+        }
+
+
+class ProcessJobStatus(BaseModel):
+    """Andamento de um job de processamento (GET /api/process/{job_id})."""
+
+    job_id: str = Field(..., description="ID do job")
+    status: str = Field(..., description="Estado do job (queued, running, done, failed)")
+    created_at: float = Field(..., description="Criação do job (epoch, segundos)")
+    started_at: Optional[float] = Field(None, description="Início da execução (epoch)")
+    finished_at: Optional[float] = Field(None, description="Fim da execução (epoch)")
+    progress: Optional[Dict[str, Any]] = Field(
+        None, description="Fase, arquivos, chunks/s e ETA (enquanto executa e ao final)"
+    )
+    result: Optional[ProcessResponse] = Field(None, description="Resultado (status done)")
+    error: Optional[str] = Field(None, description="Mensagem de erro (status failed)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "3f2a9c1e8b7d4e6fa0c5b2d1e9f8a7b6",
+                "status": "running",
+                "created_at": 1760790000.0,
+                "started_at": 1760790001.2,
+                "finished_at": None,
+                "progress": {
+                    "phase": "embedding",
+                    "files_total": 3,
+                    "files_done": 1,
+                    "chunks_embedded": 192,
+                    "chunks_per_second": 38.4,
+                    "eta_seconds": 12.5,
+                    "elapsed_seconds": 5.0,
+                    "files": [
+                        {"file": "lei.pdf", "status": "indexed", "size": 120000,
+                         "chunks_total": 150, "chunks_done": 150},
+                        {"file": "decreto.pdf", "status": "embedding", "size": 98000,
+                         "chunks_total": 120, "chunks_done": 42},
+                        {"file": "portaria.pdf", "status": "pending", "size": 40000,
+                         "chunks_total": None, "chunks_done": 0},
+                    ],
+                },
+                "result": None,
+                "error": None,
+            }
+        }
+
+
 class MetricsResponse(BaseModel):
     """Resposta de métricas do sistema."""
 
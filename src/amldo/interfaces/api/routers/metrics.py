@@ -4,17 +4,16 @@ Router para métricas e estatísticas.
 Endpoints para consultar métricas do sistema (queries, processamento, etc).
 """
 
-from pathlib import Path
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 
 from amldo.interfaces.api.models.response import MetricsResponse
 from amldo.interfaces.api.dependencies import SettingsDep
 from amldo.utils.metrics import get_metrics_manager
-
-# Importar FAISS para contar chunks
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
+from amldo.rag.cache import get_answer_cache, get_semantic_cache
+from amldo.rag.embedding_cache import get_query_embedding_cache
+from amldo.rag.retrieval_cache import get_retrieval_cache
+from amldo.rag.runtime import get_rag_runtime
 
 router = APIRouter()
 
@@ -45,22 +44,11 @@ async def get_statistics(settings: SettingsDep = None):
     manager = get_metrics_manager()
     stats = manager.get_stats()
 
-    # Contar chunks no FAISS para validação cruzada
-    vector_db_path = Path("data/vector_db/v1_faiss_vector_db")
-    faiss_chunks = 0
-
-    if vector_db_path.exists():
-        try:
-            embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-                encode_kwargs={"normalize_embeddings": True},
-            )
-            vector_db = FAISS.load_local(
-                str(vector_db_path), embeddings=embeddings, allow_dangerous_deserialization=True
-            )
-            faiss_chunks = len(vector_db.docstore._dict)
-        except Exception:
-            faiss_chunks = 0
+    # Contar chunks no FAISS para validação cruzada (sem carregar o modelo de embedding)
+    try:
+        faiss_chunks = get_rag_runtime().count_indexed_chunks()
+    except Exception:
+        faiss_chunks = 0
 
     # Usar contagem do FAISS se maior (mais preciso)
     total_chunks = max(stats["total_chunks_indexed"], faiss_chunks)
@@ -130,6 +118,43 @@ async def get_query_history(limit: int = 100, rag_version: str = None):
     return JSONResponse(content={"history": history})
 
 
+@router.get("/cache", summary="Estatísticas dos caches RAG")
+async def get_cache_stats(settings: SettingsDep = None):
+    """
+    Retorna estatísticas de uso dos caches do pipeline RAG.
+
+    **Retorna:**
+    - answer_cache: entradas, hits, misses e hit_rate do cache de respostas
+      (null se desabilitado via `ANSWER_CACHE_ENABLED=false`)
+    - semantic_cache: idem para o cache semântico, incluindo o threshold
+      (null se desabilitado via `SEMANTIC_CACHE_ENABLED=false`)
+    - query_embedding_cache: entradas, memória usada, hits e misses do cache de
+      embeddings de consultas (null se `QUERY_EMBEDDING_CACHE_SIZE=0`)
+    - retrieval_cache: entradas, hits e misses do cache de contexto v2/v3
+      (null se `RETRIEVAL_CACHE_SIZE=0`)
+
+    **Exemplo de uso:**
+    ```bash
+    curl "http://localhost:8000/api/metrics/cache"
+    ```
+    """
+    answer_cache = get_answer_cache()
+    semantic_cache = get_semantic_cache()
+    retrieval_cache = get_retrieval_cache()
+    query_embedding_stats = None
+    if settings.query_embedding_cache_size > 0:
+        query_embedding_stats = get_query_embedding_cache().stats()
+
+    return JSONResponse(
+        content={
+            "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+            "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+            "query_embedding_cache": query_embedding_stats,
+            "retrieval_cache": retrieval_cache.stats() if retrieval_cache is not None else None,
+        }
+    )
+
+
 @router.get("/health", summary="Health Check das Métricas")
 async def metrics_health():
     """
@@ -4,20 +4,24 @@ Router para consultas RAG.
 Endpoints para fazer perguntas ao sistema RAG usando as versões v1, v2 ou v3.
 """
 
+import json
 import time
+from typing import AsyncIterator
+
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from amldo.interfaces.api.models.request import QueryRequest
 from amldo.interfaces.api.models.response import QueryResponse
 from amldo.interfaces.api.dependencies import SettingsDep
-from amldo.core.exceptions import RetrievalError, LLMError, VectorStoreError
+from amldo.core.exceptions import RetrievalError, LLMError, VectorStoreError, RAGOverloadedError
 from amldo.utils.metrics import track_query_metrics
 
-# Importar funções RAG
-from amldo.rag.v1.tools import consultar_base_rag as rag_v1
-from amldo.rag.v2.tools import consultar_base_rag as rag_v2
-from amldo.rag.v3.tools import consultar_base_rag as rag_v3
+# Importar funções RAG (versões assíncronas)
+from amldo.rag.v1.tools import consultar_base_rag_async as rag_v1
+from amldo.rag.v2.tools import consultar_base_rag_async as rag_v2
+from amldo.rag.v3.tools import consultar_base_rag_async as rag_v3
+from amldo.rag.v2.tools import consultar_base_rag_stream as rag_v2_stream
 
 router = APIRouter()
 
@@ -48,6 +52,12 @@ async def ask_question(payload: QueryRequest, settings: SettingsDep):
     - rag_version: Versão do RAG utilizada
     - question: Pergunta original
     - response_time_ms: Tempo de resposta em milissegundos
+
+    **Concorrência:**
+    O pipeline é assíncrono: a recuperação (embedding + FAISS) roda em um pool de
+    threads dedicado (`RAG_MAX_WORKERS`) e a chamada ao LLM é aguardada sem ocupar
+    thread. Se houver mais de `RAG_MAX_WORKERS + RAG_MAX_QUEUE` recuperações em
+    andamento, retorna 503 com header `Retry-After`.
     """
     question = payload.question.strip()
     rag_version = payload.rag_version or settings.default_rag_version
@@ -65,7 +75,7 @@ async def ask_question(payload: QueryRequest, settings: SettingsDep):
 
     try:
         start_time = time.time()
-        answer = rag_functions[rag_version](question)
+        answer = await rag_functions[rag_version](question)
         response_time_ms = (time.time() - start_time) * 1000
 
         # Registrar métrica de sucesso
@@ -83,6 +93,20 @@ async def ask_question(payload: QueryRequest, settings: SettingsDep):
             response_time_ms=round(response_time_ms, 2),
         )
 
+    except RAGOverloadedError as e:
+        # Registrar métrica de falha
+        track_query_metrics(
+            rag_version=rag_version,
+            question=question,
+            response_time=0,
+            success=False,
+            error_message=f"Overloaded: {str(e)}",
+        )
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, tente novamente em instantes",
+            headers={"Retry-After": str(settings.rag_retry_after_seconds)},
+        ) from e
     except (RetrievalError, VectorStoreError) as e:
         # Registrar métrica de falha
         track_query_metrics(
@@ -94,7 +118,7 @@ async def ask_question(payload: QueryRequest, settings: SettingsDep):
         )
         raise HTTPException(
             status_code=500, detail=f"Erro ao recuperar documentos: {str(e)}"
-        )
+        ) from e
     except LLMError as e:
         # Registrar métrica de falha
         track_query_metrics(
@@ -104,7 +128,7 @@ async def ask_question(payload: QueryRequest, settings: SettingsDep):
             success=False,
             error_message=f"LLM error: {str(e)}",
         )
-        raise HTTPException(status_code=500, detail=f"Erro no LLM: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro no LLM: {str(e)}") from e
     except Exception as e:
         # Registrar métrica de falha
         track_query_metrics(
@@ -114,7 +138,115 @@ async def ask_question(payload: QueryRequest, settings: SettingsDep):
             success=False,
             error_message=str(e),
         )
-        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}") from e
+
+
+def _sse(event: str, data) -> str:
+    """Formata um evento Server-Sent Events com payload JSON."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/ask/stream", summary="Consulta RAG em streaming (SSE)")
+async def ask_question_stream(payload: QueryRequest, settings: SettingsDep):
+    """
+    Consulta o RAG v2 e transmite a resposta como Server-Sent Events.
+
+    Usa o mesmo pipeline de `/api/ask` com `rag_version="v2"`, mas devolve o
+    resultado à medida que fica pronto: os dispositivos recuperados chegam logo
+    após a busca no FAISS e os tokens do LLM são enviados conforme gerados.
+
+    **Eventos (`text/event-stream`, `data` sempre em JSON):**
+    - `sources`: lista de {lei, titulo, capitulo, artigo} recuperados (uma vez)
+    - `token`: trecho de texto da resposta (vários)
+    - `done`: {"response_time_ms": ...} ao final
+    - `error`: {"detail": ...} se o LLM falhar no meio da geração
+
+    **Exemplo de uso:**
+    ```bash
+    curl -N -X POST "http://localhost:8000/api/ask/stream" \\
+      -H "Content-Type: application/json" \\
+      -d '{"question": "Qual é o limite para dispensa?"}'
+    ```
+
+    Erros de recuperação ou executor saturado (503 com `Retry-After`) são
+    retornados como HTTP normal, antes de o stream começar.
+    """
+    question = payload.question.strip()
+    rag_version = "v2"
+
+    if not question:
+        raise HTTPException(status_code=400, detail="Pergunta vazia")
+
+    start_time = time.time()
+    events = rag_v2_stream(question)
+
+    # A recuperação acontece no primeiro evento; falhas aqui ainda viram HTTP
+    try:
+        first_event = await events.__anext__()
+    except RAGOverloadedError as e:
+        track_query_metrics(
+            rag_version=rag_version,
+            question=question,
+            response_time=0,
+            success=False,
+            error_message=f"Overloaded: {str(e)}",
+        )
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, tente novamente em instantes",
+            headers={"Retry-After": str(settings.rag_retry_after_seconds)},
+        ) from e
+    except (RetrievalError, VectorStoreError) as e:
+        track_query_metrics(
+            rag_version=rag_version,
+            question=question,
+            response_time=0,
+            success=False,
+            error_message=f"Retrieval error: {str(e)}",
+        )
+        raise HTTPException(
+            status_code=500, detail=f"Erro ao recuperar documentos: {str(e)}"
+        ) from e
+    except Exception as e:
+        track_query_metrics(
+            rag_version=rag_version,
+            question=question,
+            response_time=0,
+            success=False,
+            error_message=str(e),
+        )
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}") from e
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield _sse(first_event["event"], first_event["data"])
+        try:
+            async for item in events:
+                yield _sse(item["event"], item["data"])
+        except Exception as e:
+            track_query_metrics(
+                rag_version=rag_version,
+                question=question,
+                response_time=0,
+                success=False,
+                error_message=f"LLM error: {str(e)}",
+            )
+            yield _sse("error", {"detail": f"Erro no LLM: {str(e)}"})
+            return
+
+        response_time_ms = (time.time() - start_time) * 1000
+        track_query_metrics(
+            rag_version=rag_version,
+            question=question,
+            response_time=response_time_ms,
+            success=True,
+        )
+        yield _sse("done", {"response_time_ms": round(response_time_ms, 2)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/health", summary="Health Check")
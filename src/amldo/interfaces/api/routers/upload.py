@@ -4,24 +4,20 @@ Router para upload e processamento de documentos.
 Endpoints para fazer upload de PDFs e processar documentos para indexação no FAISS.
 """
 
-import time
 from pathlib import Path
 from typing import List
 from fastapi import APIRouter, File, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
 
-from amldo.interfaces.api.models.response import UploadResponse, ProcessResponse
+from amldo.interfaces.api.models.response import (
+    UploadResponse,
+    ProcessJobResponse,
+    ProcessJobStatus,
+)
 from amldo.interfaces.api.dependencies import SettingsDep
-from amldo.core.exceptions import VectorStoreError
-from amldo.utils.metrics import track_processing_metrics
-import json
-
-# Importar pipeline de processamento
-import fitz  # PyMuPDF
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
+from amldo.pipeline.processing import has_pending_work
+from amldo.pipeline.worker import RAW_DIR
+from amldo.utils.jobs import PROCESS_JOB, get_job_queue
 
 router = APIRouter()
 
@@ -84,131 +80,85 @@ async def upload_documents(files: List[UploadFile] = File(...), settings: Settin
     return UploadResponse(saved=saved, failed=failed)
 
 
-@router.post("/process", response_model=ProcessResponse, summary="Processar PDFs")
+@router.post(
+    "/process",
+    response_model=ProcessJobResponse,
+    status_code=202,
+    summary="Processar PDFs (job em background)",
+)
 async def process_documents(settings: SettingsDep = None):
     """
-    Processa todos os PDFs em `data/raw/` e atualiza o índice FAISS.
+    Enfileira o processamento dos PDFs novos ou alterados em `data/raw/`.
+
+    O processamento roda em um worker separado da API (fila SQLite local); o
+    endpoint responde imediatamente com o ID do job. Acompanhe o andamento em
+    `GET /api/process/{job_id}`.
 
-    **Workflow:**
-    1. Lê todos os arquivos .pdf em data/raw/
-    2. Extrai texto de cada página usando PyMuPDF
-    3. Divide texto em chunks usando RecursiveCharacterTextSplitter
-    4. Cria embeddings com sentence-transformers
-    5. Adiciona chunks ao índice FAISS existente
-    6. Salva índice atualizado
+    **Workflow do job:**
+    1. Compara o hash SHA-256 de cada .pdf em data/raw/ com o manifesto do índice
+    2. Extrai texto (PyMuPDF) e divide em chunks só dos PDFs novos ou alterados
+    3. Cria embeddings apenas dos chunks cujo texto mudou (os demais são reaproveitados)
+    4. Remove do índice os chunks antigos de PDFs alterados e de PDFs apagados
+    5. Salva índice e manifesto atualizados (a API recarrega o índice em seguida)
 
     **Parâmetros:**
-    - Nenhum (processa todos os PDFs em data/raw/)
+    - Nenhum (sincroniza o índice com os PDFs em data/raw/)
 
     **Exemplo de uso:**
     ```bash
     curl -X POST "http://localhost:8000/api/process"
     ```
 
-    **Retorna:**
-    - processed: Número de arquivos processados
-    - total_chunks: Total de chunks criados neste processamento
-    - files: Lista de arquivos processados com número de chunks
-    - duration_seconds: Tempo de processamento
+    **Retorna (202):**
+    - job_id: ID do job
+    - status: queued (ou o estado do job já enfileirado que foi reaproveitado)
+    - status_url: URL de acompanhamento
 
     **Notas:**
-    - Este endpoint pode demorar vários minutos para PDFs grandes
-    - O índice FAISS é atualizado incrementalmente (não sobrescreve)
-    - Arquivos que falham são ignorados silenciosamente
+    - Pedidos feitos enquanto um job aguarda na fila reutilizam esse job
+    - Jobs são executados um por vez
     """
-    start_time = time.time()
-
-    upload_dir = Path("data/raw")
-    pdf_files = list(upload_dir.glob("*.pdf"))
-
-    if not pdf_files:
+    if not has_pending_work(RAW_DIR):
         raise HTTPException(status_code=404, detail="Nenhum arquivo PDF encontrado em data/raw/")
 
-    # Configurar splitter
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000, chunk_overlap=100, length_function=len
+    job = get_job_queue().submit(PROCESS_JOB)
+    return ProcessJobResponse(
+        job_id=job["id"], status=job["status"], status_url=f"/api/process/{job['id']}"
     )
 
-    # Processar cada PDF
-    new_documents = []
-    files_info = []
-
-    for pdf_path in pdf_files:
-        try:
-            # Extrair texto com PyMuPDF
-            doc = fitz.open(str(pdf_path))
-            pages_text = []
-
-            for page_num in range(doc.page_count):
-                page = doc.load_page(page_num)
-                pages_text.append(page.get_text("text"))
-
-            full_text = "\n".join(pages_text)
-            doc.close()
-
-            # Dividir em chunks
-            chunks = splitter.split_text(full_text)
-
-            # Criar documentos LangChain
-            for idx, chunk in enumerate(chunks):
-                new_documents.append(
-                    Document(
-                        page_content=chunk,
-                        metadata={"path": str(pdf_path), "file": pdf_path.name, "chunk_idx": idx},
-                    )
-                )
-
-            files_info.append({"file": pdf_path.name, "chunks": len(chunks)})
 
-        except Exception as e:
-            # Ignorar arquivos com erro
-            files_info.append({"file": pdf_path.name, "chunks": 0, "error": str(e)})
-            continue
-
-    if not new_documents:
-        raise HTTPException(
-            status_code=500, detail="Falha ao processar todos os PDFs - nenhum chunk criado"
-        )
-
-    # Carregar ou criar índice FAISS
-    vector_db_path = Path("data/vector_db/v1_faiss_vector_db")
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-        encode_kwargs={"normalize_embeddings": True},
-    )
+@router.get(
+    "/process/{job_id}",
+    response_model=ProcessJobStatus,
+    summary="Andamento de um processamento",
+)
+async def process_status(job_id: str):
+    """
+    Retorna o estado e o andamento de um job de processamento.
 
-    try:
-        if vector_db_path.exists():
-            # Carregar índice existente
-            vector_db = FAISS.load_local(
-                str(vector_db_path), embeddings=embeddings, allow_dangerous_deserialization=True
-            )
-            # Adicionar novos documentos
-            vector_db.add_documents(new_documents)
-        else:
-            # Criar novo índice
-            vector_db = FAISS.from_documents(new_documents, embeddings)
-
-        # Salvar índice atualizado
-        vector_db.save_local(str(vector_db_path))
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao atualizar índice FAISS: {str(e)}")
-
-    duration_seconds = time.time() - start_time
-
-    # Registrar métricas
-    successful_files = len([f for f in files_info if f.get("chunks", 0) > 0])
-    track_processing_metrics(
-        files=successful_files,
-        chunks=len(new_documents),
-        duration=duration_seconds,
-        details=json.dumps(files_info),
-    )
+    **Retorna:**
+    - status: queued, running, done ou failed
+    - progress: fase, estado por arquivo (pending, extracting, embedding, indexed,
+      unchanged, removed, error), chunks gerados, chunks/s e ETA em segundos
+    - result: resumo final (mesmo formato da resposta antiga de /api/process)
+    - error: mensagem de erro se o job falhou
 
-    return ProcessResponse(
-        processed=successful_files,
-        total_chunks=len(new_documents),
-        files=files_info,
-        duration_seconds=round(duration_seconds, 2),
+    **Exemplo de uso:**
+    ```bash
+    curl "http://localhost:8000/api/process/3f2a9c1e8b7d4e6fa0c5b2d1e9f8a7b6"
+    ```
+    """
+    job = get_job_queue().get(job_id)
+    if job is None or job["kind"] != PROCESS_JOB:
+        raise HTTPException(status_code=404, detail=f"Job não encontrado: {job_id}")
+
+    return ProcessJobStatus(
+        job_id=job["id"],
+        status=job["status"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        progress=job["progress"],
+        result=job["result"],
+        error=job["error"],
     )
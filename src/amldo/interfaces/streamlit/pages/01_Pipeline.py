@@ -134,7 +134,7 @@ st.header("3. Indexação Vetorial FAISS")
 structured_path = st.session_state.get("structured_path")
 
 index_path = "vector_store/normas.index"
-metadata_path = "vector_store/normas_metadata.json"
+metadata_path = "vector_store/normas_metadata.sqlite"
 
 if structured_path:
     st.write(f"Base estruturada atual: `{structured_path}`")
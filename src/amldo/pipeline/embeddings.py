@@ -3,11 +3,17 @@ Gerenciador de embeddings para o pipeline AMLDO.
 
 Este módulo fornece embeddings REAIS (não dummy) usando sentence-transformers,
 substituindo os embeddings aleatórios usados no POC LicitAI original.
+
+Os textos são ordenados por tamanho em tokens e enviados ao modelo em lotes de
+`settings.embedding_batch_size`: cada lote reúne textos de tamanho parecido,
+o que reduz o padding. Os vetores de cada lote são gravados diretamente em um
+array float32 pré-alocado, na ordem original, sem passar por listas Python.
 """
 
 from __future__ import annotations
 
-from typing import List
+import threading
+from typing import List, Optional
 
 import numpy as np
 from sentence_transformers import SentenceTransformer
@@ -27,6 +33,8 @@ class EmbeddingManager:
         self,
         model_name: str | None = None,
         normalize: bool = True,
+        batch_size: int | None = None,
+        num_threads: int | None = None,
     ):
         """
         Inicializa o gerenciador de embeddings.
@@ -34,12 +42,20 @@ class EmbeddingManager:
         Args:
             model_name: Nome do modelo sentence-transformers. Usa settings se None.
             normalize: Se True, normaliza os embeddings (recomendado para cosine similarity)
+            batch_size: Textos por lote (default: settings.embedding_batch_size)
+            num_threads: Threads do PyTorch (default: settings.embedding_threads;
+                0 mantém o padrão do PyTorch)
 
         Raises:
             EmbeddingError: Se falhar ao carregar o modelo
         """
         self.model_name = model_name or settings.embedding_model
         self.normalize = normalize
+        self.batch_size = batch_size or settings.embedding_batch_size
+
+        threads = settings.embedding_threads if num_threads is None else num_threads
+        if threads > 0:
+            set_torch_threads(threads)
 
         try:
             self.model = SentenceTransformer(self.model_name)
@@ -57,24 +73,84 @@ class EmbeddingManager:
             texts: Lista de textos para embedar
 
         Returns:
-            Array numpy (n_texts, dimension) com embeddings
+            Array numpy float32 (n_texts, dimension) com embeddings
+
+        Raises:
+            EmbeddingError: Se falhar ao gerar embeddings
+        """
+        return self.embed_into(texts)
+
+    def embed_into(self, texts: List[str], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Gera embeddings gravando-os em um array float32 pré-alocado.
+
+        Os textos são ordenados por tamanho em tokens e processados em lotes de
+        `batch_size`; os vetores de cada lote são gravados nas linhas
+        correspondentes de `out` (na ordem original de `texts`).
+
+        Args:
+            texts: Lista de textos para embedar
+            out: Array float32 (len(texts), dimension), por exemplo uma fatia
+                de uma matriz maior. Se None, é alocado no primeiro lote.
+
+        Returns:
+            Array com os embeddings (o próprio `out`, se fornecido)
 
         Raises:
             EmbeddingError: Se falhar ao gerar embeddings
         """
+        if out is not None and out.shape[0] != len(texts):
+            raise ValueError(f"out tem {out.shape[0]} linhas para {len(texts)} textos")
         if not texts:
-            raise ValueError("Lista de textos está vazia")
+            return out if out is not None else np.empty((0, self.dimension or 0), np.float32)
 
         try:
-            embeddings = self.model.encode(
-                texts,
-                normalize_embeddings=self.normalize,
-                show_progress_bar=False,
-            )
-            return embeddings.astype("float32")
+            order = np.argsort(self.token_lengths(texts), kind="stable")
+            for start in range(0, len(order), self.batch_size):
+                rows = order[start : start + self.batch_size]
+                batch = self.model.encode(
+                    [texts[i] for i in rows],
+                    batch_size=len(rows),
+                    convert_to_numpy=True,
+                    normalize_embeddings=False,
+                    show_progress_bar=False,
+                )
+                if out is None:
+                    out = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+                out[rows] = batch
         except Exception as e:
             raise EmbeddingError(f"Falha ao gerar embeddings: {e}") from e
 
+        if self.normalize:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    def token_lengths(self, texts: List[str]) -> np.ndarray:
+        """
+        Tamanho de cada texto em tokens (limitado ao comprimento máximo do modelo).
+
+        Usa o tokenizer do modelo; se ele não estiver disponível, usa o número
+        de caracteres como aproximação.
+
+        Args:
+            texts: Lista de textos
+
+        Returns:
+            Array int com o tamanho de cada texto
+        """
+        max_length = getattr(self.model, "max_seq_length", None)
+        try:
+            encoded = self.model.tokenizer(
+                list(texts),
+                add_special_tokens=False,
+                truncation=isinstance(max_length, int),
+                max_length=max_length if isinstance(max_length, int) else None,
+            )
+            return np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64)
+        except Exception:
+            return np.fromiter((len(str(t)) for t in texts), dtype=np.int64)
+
     def embed_single(self, text: str) -> np.ndarray:
         """
         Gera embedding para um único texto.
@@ -90,7 +166,7 @@ class EmbeddingManager:
         """
         return self.embed([text])[0]
 
-    def __call__(self, texts: List[str]) -> List[List[float]]:
+    def __call__(self, texts: List[str]) -> np.ndarray:
         """
         Torna a classe callable, compatível com assinatura EmbeddingFn do indexer.
 
@@ -98,24 +174,39 @@ class EmbeddingManager:
             texts: Lista de textos
 
         Returns:
-            Lista de listas de floats (compatível com indexer legado)
+            Array numpy float32 (n_texts, dimension)
         """
-        embeddings = self.embed(texts)
-        return embeddings.tolist()
+        return self.embed(texts)
 
     def __repr__(self) -> str:
         return (
             f"EmbeddingManager(model='{self.model_name}', "
-            f"dimension={self.dimension}, normalize={self.normalize})"
+            f"dimension={self.dimension}, normalize={self.normalize}, "
+            f"batch_size={self.batch_size})"
         )
 
 
+def set_torch_threads(num_threads: int) -> None:
+    """
+    Define o número de threads do PyTorch usadas para gerar embeddings.
+
+    Args:
+        num_threads: Número de threads (afeta todo o processo)
+    """
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(num_threads)
+
+
 # =============================================================================
 # Instância Global para uso direto
 # =============================================================================
 
-# Instância global configurada com settings
-embedding_manager = EmbeddingManager()
+# Instância global configurada com settings (carregada no primeiro uso)
+_embedding_manager: Optional[EmbeddingManager] = None
+_embedding_manager_lock = threading.Lock()
 
 
 # =============================================================================
@@ -127,10 +218,24 @@ def get_embedding_function() -> EmbeddingManager:
     """
     Retorna uma função de embedding configurada.
 
+    O modelo é carregado na primeira chamada e reutilizado nas seguintes.
+
     Returns:
         EmbeddingManager configurado com settings globais
     """
-    return embedding_manager
+    global _embedding_manager
+    if _embedding_manager is None:
+        with _embedding_manager_lock:
+            if _embedding_manager is None:
+                _embedding_manager = EmbeddingManager()
+    return _embedding_manager
+
+
+def reset_embedding_function() -> None:
+    """Descarta a instância global (ex: após alterar settings em testes)."""
+    global _embedding_manager
+    with _embedding_manager_lock:
+        _embedding_manager = None
 
 
 def embed_texts(texts: List[str]) -> np.ndarray:
@@ -143,4 +248,4 @@ def embed_texts(texts: List[str]) -> np.ndarray:
     Returns:
         Array numpy com embeddings
     """
-    return embedding_manager.embed(texts)
+    return get_embedding_function().embed(texts)
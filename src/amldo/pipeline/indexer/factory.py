@@ -0,0 +1,424 @@
+"""
+Fábrica de índices FAISS (Flat, HNSW, IVF-Flat, IVF-PQ).
+
+O índice plano (`IndexFlatL2`) compara a consulta com todos os vetores, então o
+custo da busca cresce linearmente com o número de chunks. Este módulo monta o
+tipo de índice configurado em `Settings.faiss_index_type`:
+
+- flat: busca exata (baseline)
+- hnsw: grafo HNSW, sem treino; ótimo recall com latência sublinear
+- ivf_flat: listas invertidas com vetores completos (requer treino)
+- ivf_pq: listas invertidas com Product Quantization (requer treino; menor memória)
+
+Todos os tipos aceitam as métricas `Settings.faiss_metric`:
+
+- l2: distância euclidiana ao quadrado (menor = mais parecido)
+- ip: produto interno; com embeddings normalizados é a similaridade de cosseno
+  (maior = mais parecido), diretamente utilizável como score de relevância
+
+Também expõe `benchmark_index`, que mede recall@k e latência de um índice
+contra a busca exata.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from amldo.core.config import settings
+from amldo.core.exceptions import IndexingError
+
+try:
+    import faiss  # type: ignore
+except ImportError:
+    faiss = None  # type: ignore
+
+
+# Tipos de índice suportados (valores de `Settings.faiss_index_type`)
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Métricas suportadas (valores de `Settings.faiss_metric`)
+METRICS = ("l2", "ip")
+
+# Pontos de treino por centróide abaixo dos quais o k-means do FAISS degrada
+MIN_POINTS_PER_CENTROID = 39
+
+
+def _require_faiss() -> None:
+    if faiss is None:
+        raise IndexingError("FAISS não está instalado. Instale com: pip install faiss-cpu")
+
+
+def faiss_metric(metric: Optional[str] = None) -> int:
+    """
+    Converte o nome da métrica na constante do FAISS.
+
+    Args:
+        metric: "l2" ou "ip" (default: settings.faiss_metric)
+
+    Returns:
+        faiss.METRIC_L2 ou faiss.METRIC_INNER_PRODUCT
+
+    Raises:
+        IndexingError: Se a métrica for desconhecida
+    """
+    _require_faiss()
+    metric = metric or settings.faiss_metric
+    if metric == "l2":
+        return faiss.METRIC_L2
+    if metric == "ip":
+        return faiss.METRIC_INNER_PRODUCT
+    raise IndexingError(f"Métrica FAISS desconhecida: {metric!r}. Use uma de {METRICS}")
+
+
+def metric_of(index) -> str:
+    """
+    Retorna a métrica de um índice FAISS ("l2" ou "ip").
+
+    Args:
+        index: Índice FAISS
+
+    Returns:
+        "ip" para produto interno, "l2" caso contrário
+    """
+    return "ip" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2"
+
+
+def cosine_relevance_score(similarity: float) -> float:
+    """
+    Converte a similaridade de cosseno (produto interno de vetores normalizados)
+    em score de relevância no intervalo [0, 1] esperado pelo LangChain.
+
+    Args:
+        similarity: Produto interno retornado pelo FAISS
+
+    Returns:
+        Similaridade limitada a [0, 1] (similaridades negativas viram 0)
+    """
+    return max(0.0, min(1.0, float(similarity)))
+
+
+def effective_nlist(n_train: int, nlist: int) -> int:
+    """
+    Ajusta o número de listas IVF ao volume de vetores de treino.
+
+    Args:
+        n_train: Número de vetores disponíveis para treino
+        nlist: Número de listas configurado
+
+    Returns:
+        nlist limitado a `n_train // MIN_POINTS_PER_CENTROID` (mínimo 1)
+    """
+    return max(1, min(nlist, n_train // MIN_POINTS_PER_CENTROID))
+
+
+def index_factory_string(dim: int, index_type: str, n_train: int) -> str:
+    """
+    Monta a string de `faiss.index_factory` para o tipo de índice.
+
+    IVF-PQ cai para IVF-Flat quando não há vetores suficientes para treinar os
+    codebooks do PQ (`MIN_POINTS_PER_CENTROID * 2**faiss_pq_nbits`).
+
+    Args:
+        dim: Dimensão dos vetores
+        index_type: Um de INDEX_TYPES
+        n_train: Número de vetores disponíveis para treino
+
+    Returns:
+        String da fábrica (ex: "HNSW32,Flat", "IVF256,PQ48x8")
+
+    Raises:
+        IndexingError: Se o tipo for desconhecido ou a configuração de PQ for inválida
+    """
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{settings.faiss_hnsw_m},Flat"
+
+    if index_type not in INDEX_TYPES:
+        raise IndexingError(
+            f"Tipo de índice FAISS desconhecido: {index_type!r}. Use um de {INDEX_TYPES}"
+        )
+
+    nlist = effective_nlist(n_train, settings.faiss_ivf_nlist)
+    if index_type == "ivf_pq":
+        pq_m, nbits = settings.faiss_pq_m, settings.faiss_pq_nbits
+        if dim % pq_m:
+            raise IndexingError(
+                f"faiss_pq_m ({pq_m}) deve dividir a dimensão dos embeddings ({dim})"
+            )
+        if n_train >= MIN_POINTS_PER_CENTROID * 2**nbits:
+            return f"IVF{nlist},PQ{pq_m}x{nbits}"
+    return f"IVF{nlist},Flat"
+
+
+def make_index(
+    dim: int, index_type: Optional[str] = None, n_train: int = 0, metric: Optional[str] = None
+):
+    """
+    Cria um índice FAISS vazio (ainda não treinado, se for IVF).
+
+    Args:
+        dim: Dimensão dos vetores
+        index_type: Um de INDEX_TYPES (default: settings.faiss_index_type)
+        n_train: Número de vetores que serão usados no treino (dimensiona o IVF)
+        metric: "l2" ou "ip" (default: settings.faiss_metric)
+
+    Returns:
+        Índice FAISS com os parâmetros de construção e busca aplicados
+
+    Raises:
+        IndexingError: Se FAISS não estiver instalado ou a configuração for inválida
+    """
+    _require_faiss()
+    index_type = index_type or settings.faiss_index_type
+
+    index = faiss.index_factory(
+        dim, index_factory_string(dim, index_type, n_train), faiss_metric(metric)
+    )
+    if index_type == "hnsw":
+        index.hnsw.efConstruction = settings.faiss_hnsw_ef_construction
+    configure_search_params(index)
+    return index
+
+
+def build_index(vectors, index_type: Optional[str] = None, metric: Optional[str] = None):
+    """
+    Cria, treina (se necessário) e popula um índice FAISS.
+
+    A ordem dos vetores é preservada (o i-ésimo vetor recebe o ID i), de modo
+    que mapeamentos posição → documento continuam válidos.
+
+    Args:
+        vectors: Matriz (n, dim) de embeddings
+        index_type: Um de INDEX_TYPES (default: settings.faiss_index_type)
+        metric: "l2" ou "ip" (default: settings.faiss_metric)
+
+    Returns:
+        Índice FAISS populado
+
+    Raises:
+        IndexingError: Se não houver vetores ou falhar ao criar o índice
+    """
+    _require_faiss()
+    arr = np.ascontiguousarray(vectors, dtype=np.float32)
+    if arr.ndim != 2 or arr.shape[0] == 0:
+        raise IndexingError("Lista de vetores está vazia.")
+
+    try:
+        index = make_index(arr.shape[1], index_type, n_train=arr.shape[0], metric=metric)
+        if not index.is_trained:
+            index.train(arr)
+        index.add(arr)
+        return index
+    except IndexingError:
+        raise
+    except Exception as e:
+        raise IndexingError(f"Falha ao criar índice FAISS: {e}") from e
+
+
+def rebuild_index(index, index_type: Optional[str] = None, metric: Optional[str] = None):
+    """
+    Reconstrói um índice existente com outro tipo/métrica, preservando a ordem dos vetores.
+
+    Usado para converter o índice plano de um vector store LangChain (cujo
+    `index_to_docstore_id` é posicional) para HNSW/IVF ou para produto interno.
+
+    Args:
+        index: Índice FAISS de origem (precisa suportar `reconstruct_n`, ex: Flat)
+        index_type: Tipo de destino (default: settings.faiss_index_type)
+        metric: Métrica de destino (default: settings.faiss_metric)
+
+    Returns:
+        Novo índice FAISS populado
+
+    Raises:
+        IndexingError: Se não for possível extrair os vetores do índice de origem
+    """
+    _require_faiss()
+    try:
+        vectors = index.reconstruct_n(0, index.ntotal)
+    except Exception as e:
+        raise IndexingError(f"Não foi possível extrair os vetores do índice: {e}") from e
+    return build_index(vectors, index_type, metric)
+
+
+def configure_search_params(
+    index, ef_search: Optional[int] = None, nprobe: Optional[int] = None
+) -> None:
+    """
+    Aplica os parâmetros de busca (efSearch do HNSW, nprobe do IVF).
+
+    Parâmetros de busca não são salvos de forma confiável no arquivo do índice,
+    então devem ser reaplicados após `faiss.read_index` / `FAISS.load_local`.
+    Não faz nada para índices planos.
+
+    Args:
+        index: Índice FAISS
+        ef_search: efSearch do HNSW (default: settings.faiss_hnsw_ef_search)
+        nprobe: Listas visitadas no IVF (default: settings.faiss_ivf_nprobe)
+    """
+    if faiss is None:
+        return
+
+    hnsw = getattr(faiss.downcast_index(index), "hnsw", None)
+    if hnsw is not None:
+        hnsw.efSearch = ef_search or settings.faiss_hnsw_ef_search
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe or settings.faiss_ivf_nprobe, ivf.nlist)
+
+
+def search_parameters(index, selector=None):
+    """
+    Monta os parâmetros de busca por consulta, preservando efSearch/nprobe do índice.
+
+    Passar `params` para `index.search` substitui os parâmetros do índice (os
+    defaults do FAISS, não os configurados), então os valores atuais são copiados.
+
+    Args:
+        index: Índice FAISS
+        selector: `faiss.IDSelector` restringindo os IDs candidatos (opcional)
+
+    Returns:
+        SearchParameters (HNSW, IVF ou genérico) com o seletor aplicado
+    """
+    _require_faiss()
+    hnsw = getattr(faiss.downcast_index(index), "hnsw", None)
+    if hnsw is not None:
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=hnsw.efSearch)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def configure_vector_store(vector_db) -> None:
+    """
+    Ajusta um vector store LangChain FAISS ao índice que ele carrega.
+
+    Reaplica os parâmetros de busca e, para índices de produto interno, troca a
+    estratégia de distância (scores maiores = mais relevantes) e a função de
+    relevância para a similaridade de cosseno, de modo que
+    `similarity_score_threshold` compare scores em [0, 1] com significado direto.
+
+    Args:
+        vector_db: Instância de `langchain_community.vectorstores.FAISS`
+    """
+    configure_search_params(vector_db.index)
+    if faiss is None:
+        return
+
+    # MMR reconstrói os vetores candidatos; IVF precisa do mapa ID → lista para isso
+    ivf = faiss.try_extract_index_ivf(vector_db.index)
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.make_direct_map()
+
+    if metric_of(vector_db.index) == "ip":
+        from langchain_community.vectorstores.utils import DistanceStrategy
+
+        vector_db.distance_strategy = DistanceStrategy.MAX_INNER_PRODUCT
+        vector_db.override_relevance_score_fn = cosine_relevance_score
+
+
+def describe_index(index) -> str:
+    """
+    Retorna uma descrição curta do índice (classe e parâmetros relevantes).
+
+    Args:
+        index: Índice FAISS
+
+    Returns:
+        String como "IndexHNSWFlat(ip, M=32, efSearch=64)" ou "IndexIVFPQ(l2, nlist=256, nprobe=16)"
+    """
+    _require_faiss()
+    index = faiss.downcast_index(index)
+    name = f"{type(index).__name__}({metric_of(index)}"
+
+    hnsw = getattr(index, "hnsw", None)
+    if hnsw is not None:
+        return f"{name}, M={index.hnsw.nb_neighbors(1)}, efSearch={hnsw.efSearch})"
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return f"{name}, nlist={ivf.nlist}, nprobe={ivf.nprobe})"
+    return f"{name})"
+
+
+# =============================================================================
+# Benchmark (recall e latência contra busca exata)
+# =============================================================================
+
+
+def _timed_search(index, queries: np.ndarray, k: int):
+    """Busca uma consulta por vez (como na API) e retorna (ids, latências em ms)."""
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries), dtype=np.float64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, found = index.search(query[None, :], k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        ids[i] = found[0]
+    return ids, latencies
+
+
+def benchmark_index(
+    index,
+    vectors,
+    k: int = 10,
+    n_queries: int = 200,
+    noise: float = 0.01,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Mede recall@k e latência de um índice contra a busca exata na mesma métrica.
+
+    As consultas são vetores do próprio corpus com ruído gaussiano, o que
+    aproxima perguntas próximas de chunks existentes.
+
+    Args:
+        index: Índice avaliado (populado com `vectors`, na mesma ordem)
+        vectors: Matriz (n, dim) de embeddings indexados
+        k: Número de vizinhos
+        n_queries: Número de consultas amostradas
+        noise: Desvio padrão do ruído adicionado às consultas
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Dict com index, ntotal, k, n_queries, recall_at_k e latências
+        (p50/p95 em ms) do índice e do baseline plano
+    """
+    _require_faiss()
+    arr = np.ascontiguousarray(vectors, dtype=np.float32)
+    k = min(k, arr.shape[0])
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(arr.shape[0], size=min(n_queries, arr.shape[0]), replace=False)
+    queries = arr[sample] + rng.normal(0, noise, size=(len(sample), arr.shape[1]))
+    queries = queries.astype(np.float32)
+
+    flat = faiss.IndexFlat(arr.shape[1], index.metric_type)
+    flat.add(arr)
+
+    exact_ids, flat_ms = _timed_search(flat, queries, k)
+    found_ids, index_ms = _timed_search(index, queries, k)
+
+    hits = sum(
+        len(np.intersect1d(exact, found)) for exact, found in zip(exact_ids, found_ids, strict=True)
+    )
+
+    return {
+        "index": describe_index(index),
+        "ntotal": int(index.ntotal),
+        "k": k,
+        "n_queries": len(queries),
+        "recall_at_k": round(hits / (len(queries) * k), 4),
+        "index_ms_p50": round(float(np.percentile(index_ms, 50)), 4),
+        "index_ms_p95": round(float(np.percentile(index_ms, 95)), 4),
+        "flat_ms_p50": round(float(np.percentile(flat_ms, 50)), 4),
+        "flat_ms_p95": round(float(np.percentile(flat_ms, 95)), 4),
+    }
@@ -15,12 +15,15 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Callable, Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple, Union
 
 import numpy as np
 
 from amldo.core.exceptions import IndexingError
 from amldo.pipeline.embeddings import EmbeddingManager, get_embedding_function
+from amldo.pipeline.indexer.factory import build_index
+from amldo.pipeline.indexer.metadata import MetadataWriter
+from amldo.pipeline.indexer.streaming import index_jsonl_streaming
 
 try:
     import faiss  # type: ignore
@@ -29,8 +32,8 @@ except ImportError:
 
 
 # Type alias para função de embedding
-# Aceita lista de strings, retorna lista de listas de floats
-EmbeddingFn = Callable[[List[str]], List[List[float]]]
+# Aceita lista de strings, retorna matriz (n, dim) ou lista de listas de floats
+EmbeddingFn = Callable[[List[str]], Union[np.ndarray, List[List[float]]]]
 
 
 def load_artigos_from_jsonl(path: str) -> List[Dict]:
@@ -67,10 +70,13 @@ def load_artigos_from_jsonl(path: str) -> List[Dict]:
 def build_embeddings(
     artigos: List[Dict],
     embedding_fn: EmbeddingFn,
-) -> Tuple[List[str], List[List[float]]]:
+) -> Tuple[List[str], np.ndarray]:
     """
     Gera embeddings para os artigos usando a função fornecida.
 
+    Com o EmbeddingManager, os vetores já chegam como array float32 e não são
+    copiados; funções legadas que retornam listas são convertidas uma única vez.
+
     Args:
         artigos: Lista de artigos (dicts com keys 'id' e 'text')
         embedding_fn: Função que gera embeddings
@@ -78,7 +84,7 @@ def build_embeddings(
     Returns:
         Tupla (ids, vectors):
             - ids: Lista de IDs dos artigos
-            - vectors: Lista de embeddings (lista de floats)
+            - vectors: Matriz float32 (n_artigos, dim) de embeddings
 
     Raises:
         IndexingError: Se falhar ao gerar embeddings
@@ -87,7 +93,7 @@ def build_embeddings(
         texts = [a.get("text", "") for a in artigos]
         ids = [a.get("id", "") for a in artigos]
 
-        vectors = embedding_fn(texts)
+        vectors = np.asarray(embedding_fn(texts), dtype=np.float32)
 
         if len(vectors) != len(texts):
             raise IndexingError(
@@ -102,12 +108,18 @@ def build_embeddings(
         raise IndexingError(f"Falha ao gerar embeddings: {e}") from e
 
 
-def create_faiss_index(vectors: List[List[float]]):
+def create_faiss_index(
+    vectors: Union[np.ndarray, List[List[float]]],
+    index_type: str | None = None,
+    metric: str | None = None,
+):
     """
     Cria um índice FAISS a partir dos vetores.
 
     Args:
-        vectors: Lista de embeddings
+        vectors: Matriz (n, dim) ou lista de embeddings
+        index_type: flat, hnsw, ivf_flat ou ivf_pq (default: settings.faiss_index_type)
+        metric: l2 ou ip (default: settings.faiss_metric)
 
     Returns:
         Índice FAISS
@@ -118,17 +130,10 @@ def create_faiss_index(vectors: List[List[float]]):
     if faiss is None:
         raise IndexingError("FAISS não está instalado. Instale com: pip install faiss-cpu")
 
-    if not vectors:
+    if len(vectors) == 0:
         raise IndexingError("Lista de vetores está vazia.")
 
-    try:
-        arr = np.array(vectors, dtype="float32")
-        dim = arr.shape[1]
-        index = faiss.IndexFlatL2(dim)
-        index.add(arr)
-        return index
-    except Exception as e:
-        raise IndexingError(f"Falha ao criar índice FAISS: {e}") from e
+    return build_index(vectors, index_type, metric)
 
 
 def save_index(index, index_path: str) -> str:
@@ -159,10 +164,12 @@ def save_index(index, index_path: str) -> str:
 
 def save_metadata(ids: List[str], artigos: List[Dict], meta_path: str) -> str:
     """
-    Salva metadados dos artigos (IDs e conteúdos) em JSON.
+    Salva metadados dos artigos em SQLite, indexados pela posição no índice.
+
+    Ver `amldo.pipeline.indexer.metadata` (leitura com `NormasMetadata`).
 
     Args:
-        ids: Lista de IDs dos artigos
+        ids: Lista de IDs dos artigos (na ordem dos vetores no índice)
         artigos: Lista de artigos completos
         meta_path: Caminho para salvar metadados
 
@@ -175,12 +182,10 @@ def save_metadata(ids: List[str], artigos: List[Dict], meta_path: str) -> str:
     try:
         p = Path(meta_path)
         p.parent.mkdir(parents=True, exist_ok=True)
+        p.unlink(missing_ok=True)
 
-        data = {
-            "ids": ids,
-            "artigos": artigos,
-        }
-        p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        with MetadataWriter(p) as writer:
+            writer.append(artigos, ids)
         return str(p)
     except Exception as e:
         raise IndexingError(f"Falha ao salvar metadados em {meta_path}: {e}") from e
@@ -190,7 +195,13 @@ def indexar_normas(
     artigos_jsonl_path: str,
     embedding_fn: EmbeddingFn | None = None,
     index_path: str = "vector_store/normas.index",
-    metadata_path: str = "vector_store/normas_metadata.json",
+    metadata_path: str = "vector_store/normas_metadata.sqlite",
+    index_type: str | None = None,
+    metric: str | None = None,
+    batch_size: int | None = None,
+    checkpoint_every: int | None = None,
+    resume: bool = True,
+    on_batch: Callable[[int], None] | None = None,
 ) -> Tuple[str, str]:
     """
     Pipeline completo de indexação: carrega artigos → gera embeddings → cria índice → salva.
@@ -198,12 +209,22 @@ def indexar_normas(
     IMPORTANTE: Por padrão, usa embeddings REAIS (não dummy).
     Se embedding_fn=None, usa EmbeddingManager configurado globalmente.
 
+    O JSONL é processado em lotes, com checkpoints (ver
+    `amldo.pipeline.indexer.streaming`): o corpus não precisa caber em memória
+    e uma execução interrompida é retomada do último checkpoint.
+
     Args:
         artigos_jsonl_path: Caminho do arquivo JSONL com artigos
         embedding_fn: Função de embedding customizada (opcional).
                       Se None, usa embeddings reais via EmbeddingManager.
         index_path: Caminho para salvar o índice FAISS
-        metadata_path: Caminho para salvar metadados
+        metadata_path: Caminho para salvar metadados (SQLite, ver NormasMetadata)
+        index_type: Tipo de índice FAISS (default: settings.faiss_index_type)
+        metric: Métrica do índice, l2 ou ip (default: settings.faiss_metric)
+        batch_size: Artigos por lote (default: settings.index_build_batch_size)
+        checkpoint_every: Lotes entre checkpoints (default: settings.index_checkpoint_every)
+        resume: Se True, retoma de um checkpoint compatível
+        on_batch: Chamado com o total de vetores indexados após cada lote
 
     Returns:
         Tupla (index_path, metadata_path) dos arquivos salvos
@@ -217,9 +238,15 @@ def indexar_normas(
         embedding_manager = get_embedding_function()
         embedding_fn = embedding_manager  # EmbeddingManager é callable
 
-    artigos = load_artigos_from_jsonl(artigos_jsonl_path)
-    ids, vectors = build_embeddings(artigos, embedding_fn)
-    index = create_faiss_index(vectors)
-    idx_path = save_index(index, index_path)
-    meta_path = save_metadata(ids, artigos, metadata_path)
-    return idx_path, meta_path
+    return index_jsonl_streaming(
+        artigos_jsonl_path,
+        embedding_fn,
+        index_path,
+        metadata_path,
+        index_type=index_type,
+        metric=metric,
+        batch_size=batch_size,
+        checkpoint_every=checkpoint_every,
+        resume=resume,
+        on_batch=on_batch,
+    )
@@ -0,0 +1,346 @@
+"""
+Manifesto de arquivos indexados pelo `/api/process` (indexação incremental).
+
+O manifesto (`manifest.json`, no diretório do vector store) guarda, para cada
+PDF de `data/raw/`, o hash SHA-256 do conteúdo e a lista de chunks indexados
+(ID no docstore + hash do texto):
+
+    {
+      "version": 1,
+      "files": {
+        "lei.pdf": {"sha256": "...", "size": 1234,
+                    "chunks": [{"id": "...", "sha256": "..."}, ...]}
+      }
+    }
+
+Com ele, cada processamento:
+
+- ignora PDFs cujo hash não mudou (nem extrai o texto);
+- para PDFs alterados, reaproveita os vetores dos chunks cujo texto e posição
+  não mudaram e só gera embeddings dos demais, removendo os antigos;
+- remove do índice os chunks de PDFs apagados de `data/raw/`.
+
+O manifesto é reconciliado com o docstore a cada carga (`reconcile`), então
+chunks adicionados por versões antigas do endpoint (que duplicavam o corpus a
+cada execução) ou por uma execução interrompida são substituídos na próxima.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from amldo.core.exceptions import IndexingError
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Tamanho dos blocos lidos ao calcular o hash dos arquivos
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha256(path: Path) -> str:
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos.
+
+    Args:
+        path: Caminho do arquivo
+
+    Returns:
+        Hash hexadecimal
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    """
+    Calcula o SHA-256 do texto de um chunk.
+
+    Args:
+        text: Texto do chunk
+
+    Returns:
+        Hash hexadecimal
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# =============================================================================
+# Manifesto
+# =============================================================================
+
+
+class IndexManifest:
+    """Arquivos indexados no vector store, com hashes de conteúdo e IDs dos chunks."""
+
+    def __init__(self, files: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            files: Mapeamento nome do arquivo → {"sha256", "size", "chunks"}
+        """
+        self.files: Dict[str, Dict[str, Any]] = files or {}
+
+    @classmethod
+    def load(cls, folder: Path) -> "IndexManifest":
+        """
+        Lê o manifesto do diretório do vector store.
+
+        Um manifesto ausente, corrompido ou de outra versão resulta em um
+        manifesto vazio (todos os PDFs serão tratados como novos e `reconcile`
+        substitui os chunks já indexados).
+
+        Args:
+            folder: Diretório do vector store
+
+        Returns:
+            IndexManifest
+        """
+        try:
+            with open(Path(folder) / MANIFEST_FILE, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+
+        if payload.get("version") != MANIFEST_VERSION:
+            return cls()
+        return cls(payload.get("files", {}))
+
+    def save(self, folder: Path) -> Path:
+        """
+        Grava o manifesto de forma atômica (arquivo temporário + `os.replace`).
+
+        Args:
+            folder: Diretório do vector store
+
+        Returns:
+            Caminho do manifesto gravado
+        """
+        path = Path(folder) / MANIFEST_FILE
+        payload = {"version": MANIFEST_VERSION, "files": self.files}
+
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return path
+
+    def chunk_ids(self, name: str) -> List[str]:
+        """IDs no docstore dos chunks indexados de um arquivo."""
+        return [chunk["id"] for chunk in self.files.get(name, {}).get("chunks", [])]
+
+    def reconcile(self, vector_db) -> None:
+        """
+        Alinha o manifesto ao conteúdo real do vector store.
+
+        - IDs do manifesto que não existem mais no docstore são descartados;
+        - documentos com `metadata["file"]` que o manifesto não conhece (de
+          versões antigas do endpoint ou de uma execução interrompida) são
+          atribuídos ao arquivo com hash desconhecido, o que força sua
+          substituição no próximo `plan`.
+
+        Args:
+            vector_db: Vector store LangChain FAISS carregado em memória
+        """
+        indexed = set(vector_db.index_to_docstore_id.values())
+        known = set()
+        for entry in self.files.values():
+            chunks = [chunk for chunk in entry["chunks"] if chunk["id"] in indexed]
+            if len(chunks) != len(entry["chunks"]):
+                entry["sha256"] = None
+            entry["chunks"] = chunks
+            known.update(chunk["id"] for chunk in chunks)
+
+        for doc_id in vector_db.index_to_docstore_id.values():
+            if doc_id in known:
+                continue
+            doc = vector_db.docstore.search(doc_id)
+            name = getattr(doc, "metadata", {}).get("file")
+            if name is None:
+                # Chunks da indexação original das leis (fora do /api/process)
+                continue
+            entry = self.files.setdefault(name, {"sha256": None, "size": None, "chunks": []})
+            entry["sha256"] = None
+            entry["chunks"].append({"id": doc_id, "sha256": None})
+
+
+@dataclass
+class ManifestPlan:
+    """Resultado da comparação entre `data/raw/` e o manifesto."""
+
+    unchanged: List[str] = field(default_factory=list)
+    changed: Dict[str, str] = field(default_factory=dict)
+    deleted: List[str] = field(default_factory=list)
+
+
+def plan(manifest: IndexManifest, pdf_files: Iterable[Path]) -> ManifestPlan:
+    """
+    Classifica os PDFs em inalterados, novos/alterados e removidos.
+
+    Args:
+        manifest: Manifesto atual (já reconciliado)
+        pdf_files: PDFs presentes em `data/raw/`
+
+    Returns:
+        ManifestPlan com `changed` mapeando nome → hash atual do arquivo
+    """
+    result = ManifestPlan()
+    present = set()
+    for path in pdf_files:
+        present.add(path.name)
+        sha = file_sha256(path)
+        entry = manifest.files.get(path.name)
+        if entry is not None and entry.get("sha256") == sha:
+            result.unchanged.append(path.name)
+        else:
+            result.changed[path.name] = sha
+
+    result.deleted = sorted(name for name in manifest.files if name not in present)
+    return result
+
+
+# =============================================================================
+# Atualização do vector store
+# =============================================================================
+
+
+def delete_documents(vector_db, ids: List[str]) -> None:
+    """
+    Remove documentos do vector store, inclusive de índices sem `remove_ids`.
+
+    Só o índice plano remove os vetores no próprio índice (`FAISS.delete`): ele
+    renumera os IDs restantes sem lacunas, como o `index_to_docstore_id`
+    posicional do LangChain. O IVF mantém os IDs originais após `remove_ids` e o
+    HNSW não suporta remoção; nesses casos o índice é recriado (mesmo tipo e
+    parâmetros, via `faiss.clone_index`) com os vetores restantes, na mesma ordem.
+
+    Args:
+        vector_db: Vector store LangChain FAISS carregado em memória
+        ids: IDs no docstore dos documentos a remover
+
+    Raises:
+        IndexingError: Se não for possível remover os vetores
+    """
+    if not ids:
+        return
+
+    import faiss
+
+    if isinstance(faiss.downcast_index(vector_db.index), faiss.IndexFlat):
+        vector_db.delete(ids)
+        return
+
+    to_delete = set(ids)
+    positions = sorted(vector_db.index_to_docstore_id)
+    keep = [pos for pos in positions if vector_db.index_to_docstore_id[pos] not in to_delete]
+    try:
+        # `reconstruct_n` no IVF precisa do mapa ID → lista
+        ivf = faiss.try_extract_index_ivf(vector_db.index)
+        if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()
+        vectors = vector_db.index.reconstruct_n(0, vector_db.index.ntotal)
+        index = faiss.clone_index(vector_db.index)
+        index.reset()
+        if keep:
+            index.add(np.ascontiguousarray(vectors[keep]))
+    except Exception as e:
+        raise IndexingError(f"Falha ao remover documentos do índice: {e}") from e
+
+    vector_db.docstore.delete(list(to_delete))
+    vector_db.index = index
+    vector_db.index_to_docstore_id = {
+        i: vector_db.index_to_docstore_id[pos] for i, pos in enumerate(keep)
+    }
+
+
+def apply_file_chunks(
+    vector_db,
+    manifest: IndexManifest,
+    name: str,
+    sha: str,
+    size: int,
+    documents: List[Any],
+    batch_size: Optional[int] = None,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> Dict[str, int]:
+    """
+    Substitui os chunks de um arquivo no vector store, reaproveitando os inalterados.
+
+    Um chunk é reaproveitado (mantém o vetor e o ID) quando o texto na mesma
+    posição (`chunk_idx`) tem o mesmo hash que o indexado anteriormente; os
+    demais recebem embeddings novos e os chunks antigos que sobraram são removidos.
+
+    Args:
+        vector_db: Vector store LangChain FAISS carregado em memória
+        manifest: Manifesto a atualizar
+        name: Nome do arquivo em `data/raw/`
+        sha: Hash SHA-256 atual do arquivo
+        size: Tamanho do arquivo em bytes
+        documents: Chunks do arquivo (Documents), na ordem de `chunk_idx`
+        batch_size: Chunks por chamada ao modelo de embedding (default: todos de uma vez)
+        on_batch: Chamado com o número de chunks de cada lote adicionado (progresso)
+
+    Returns:
+        Dict com "added" (embeddings gerados), "reused" e "removed"
+    """
+    old_chunks = manifest.files.get(name, {}).get("chunks", [])
+    chunks: List[Dict[str, Any]] = []
+    to_add = []
+    reused = set()
+
+    for idx, doc in enumerate(documents):
+        chunk_sha = text_sha256(doc.page_content)
+        old = old_chunks[idx] if idx < len(old_chunks) else None
+        if old is not None and old["sha256"] == chunk_sha:
+            chunks.append(old)
+            reused.add(old["id"])
+        else:
+            chunks.append({"id": None, "sha256": chunk_sha})
+            to_add.append((idx, doc))
+
+    stale = [chunk["id"] for chunk in old_chunks if chunk["id"] not in reused]
+    delete_documents(vector_db, stale)
+
+    step = batch_size or len(to_add) or 1
+    for start in range(0, len(to_add), step):
+        batch = to_add[start : start + step]
+        new_ids = vector_db.add_documents([doc for _, doc in batch])
+        for (idx, _), doc_id in zip(batch, new_ids, strict=True):
+            chunks[idx]["id"] = doc_id
+        if on_batch is not None:
+            on_batch(len(batch))
+
+    manifest.files[name] = {"sha256": sha, "size": size, "chunks": chunks}
+    return {"added": len(to_add), "reused": len(reused), "removed": len(stale)}
+
+
+def remove_file(vector_db, manifest: IndexManifest, name: str) -> int:
+    """
+    Remove do vector store e do manifesto todos os chunks de um arquivo.
+
+    Args:
+        vector_db: Vector store LangChain FAISS carregado em memória
+        manifest: Manifesto a atualizar
+        name: Nome do arquivo removido de `data/raw/`
+
+    Returns:
+        Número de chunks removidos
+    """
+    ids = manifest.chunk_ids(name)
+    delete_documents(vector_db, ids)
+    manifest.files.pop(name, None)
+    return len(ids)
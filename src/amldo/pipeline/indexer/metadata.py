@@ -0,0 +1,214 @@
+"""
+Metadados dos artigos indexados por `indexar_normas` (SQLite indexado por posição).
+
+O formato antigo (`normas_metadata.json`, `{"ids": [...], "artigos": [...]}`
+com `indent=2`) precisava ser lido e desserializado inteiro para acessar
+qualquer artigo. Os metadados agora ficam em um SQLite, na mesma linha do
+`docstore.sqlite` do vector store:
+
+    artigos(pos INTEGER PRIMARY KEY, id TEXT, artigo TEXT)
+
+- `pos` é a linha do vetor no índice FAISS: um resultado da busca é resolvido
+  com uma consulta por chave primária, sem carregar os demais artigos;
+- `artigo` é o registro original do JSONL, em JSON compacto.
+
+`convert_json_metadata` converte arquivos no formato antigo.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from amldo.core.exceptions import IndexingError
+
+# Janela de mmap do SQLite (limite superior; o SO só mapeia o tamanho do arquivo)
+SQLITE_MMAP_SIZE = 1 << 30
+
+# Parâmetros por consulta em get_many (limite do SQLite é 32766)
+_MAX_QUERY_PARAMS = 900
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS artigos ("
+    "pos INTEGER PRIMARY KEY, id TEXT NOT NULL, artigo TEXT NOT NULL)"
+)
+
+
+def _dumps(artigo: Dict[str, Any]) -> str:
+    return json.dumps(artigo, ensure_ascii=False, separators=(",", ":"))
+
+
+class MetadataWriter:
+    """
+    Grava metadados de artigos em ordem de posição no índice.
+
+    Usado pela indexação em streaming: `append` a cada lote, `commit` a cada
+    checkpoint e `truncate` ao retomar de um checkpoint.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Caminho do arquivo SQLite (criado se não existir)
+        """
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(_SCHEMA)
+        self.count = self.conn.execute("SELECT COUNT(*) FROM artigos").fetchone()[0]
+
+    def append(
+        self, artigos: Iterable[Dict[str, Any]], ids: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Adiciona artigos nas próximas posições.
+
+        Args:
+            artigos: Registros do JSONL (dicts com 'id')
+            ids: IDs dos artigos (default: campo 'id' de cada registro)
+
+        Raises:
+            ValueError: Se `ids` e `artigos` tiverem tamanhos diferentes
+        """
+        artigos = list(artigos)
+        ids = [a.get("id", "") for a in artigos] if ids is None else list(ids)
+        rows = []
+        for artigo_id, artigo in zip(ids, artigos, strict=True):
+            rows.append((self.count, str(artigo_id), _dumps(artigo)))
+            self.count += 1
+        self.conn.executemany("INSERT INTO artigos VALUES (?, ?, ?)", rows)
+
+    def truncate(self, size: int) -> None:
+        """
+        Remove os artigos a partir da posição `size`.
+
+        Args:
+            size: Número de artigos a manter
+        """
+        self.conn.execute("DELETE FROM artigos WHERE pos >= ?", (size,))
+        self.conn.commit()
+        self.count = min(self.count, size)
+
+    def commit(self) -> None:
+        """Grava as alterações pendentes."""
+        self.conn.commit()
+
+    def close(self) -> None:
+        """Cria o índice por ID, grava e fecha o arquivo."""
+        self.conn.execute("CREATE INDEX IF NOT EXISTS artigos_id ON artigos(id)")
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self) -> "MetadataWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.conn.close()
+
+
+class NormasMetadata:
+    """
+    Leitura somente leitura dos metadados, por posição no índice FAISS.
+
+    Cada thread usa sua própria conexão; nada é carregado na abertura.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Caminho do arquivo SQLite de metadados
+
+        Raises:
+            IndexingError: Se o arquivo não existir
+        """
+        self.path = Path(path)
+        if not self.path.exists():
+            raise IndexingError(f"Metadados não encontrados: {self.path}")
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM artigos").fetchone()[0]
+
+    def __getitem__(self, pos: int) -> Dict[str, Any]:
+        row = self.conn.execute("SELECT artigo FROM artigos WHERE pos = ?", (int(pos),)).fetchone()
+        if row is None:
+            raise KeyError(pos)
+        return json.loads(row[0])
+
+    def get_many(self, positions: Sequence[int]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Resolve as posições retornadas por uma busca no índice FAISS.
+
+        Args:
+            positions: Posições no índice (-1, retornado pelo FAISS quando há
+                menos de k resultados, vira None)
+
+        Returns:
+            Artigo de cada posição, na mesma ordem (None se não existir)
+        """
+        wanted = sorted({int(p) for p in positions if int(p) >= 0})
+        found: Dict[int, Dict[str, Any]] = {}
+        for start in range(0, len(wanted), _MAX_QUERY_PARAMS):
+            chunk = wanted[start : start + _MAX_QUERY_PARAMS]
+            marks = ",".join("?" * len(chunk))
+            for pos, artigo in self.conn.execute(
+                f"SELECT pos, artigo FROM artigos WHERE pos IN ({marks})", chunk
+            ):
+                found[pos] = json.loads(artigo)
+        return [found.get(int(p)) for p in positions]
+
+    def get_by_id(self, artigo_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca um artigo pelo ID.
+
+        Args:
+            artigo_id: Campo 'id' do registro
+
+        Returns:
+            Artigo, ou None se não existir
+        """
+        row = self.conn.execute(
+            "SELECT artigo FROM artigos WHERE id = ? ORDER BY pos LIMIT 1", (artigo_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+def convert_json_metadata(json_path: Path, sqlite_path: Path) -> Path:
+    """
+    Converte metadados no formato JSON antigo para SQLite.
+
+    Args:
+        json_path: Arquivo `{"ids": [...], "artigos": [...]}`
+        sqlite_path: Arquivo SQLite de destino (substituído se existir)
+
+    Returns:
+        Caminho do arquivo SQLite
+
+    Raises:
+        IndexingError: Se o JSON não tiver o formato esperado
+    """
+    try:
+        data = json.loads(Path(json_path).read_text(encoding="utf-8"))
+        artigos, ids = data["artigos"], data.get("ids")
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise IndexingError(f"Metadados JSON inválidos em {json_path}: {e}") from e
+
+    sqlite_path = Path(sqlite_path)
+    sqlite_path.unlink(missing_ok=True)
+    with MetadataWriter(sqlite_path) as writer:
+        writer.append(artigos, ids)
+    return sqlite_path
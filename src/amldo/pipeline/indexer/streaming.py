@@ -0,0 +1,316 @@
+"""
+Indexação em streaming: JSONL → embeddings → FAISS, com checkpoints.
+
+`indexar_normas` usava `load_artigos_from_jsonl` e gerava todos os embeddings de
+uma vez antes de montar o índice, então o pico de memória era o texto do corpus
+mais todos os vetores. Aqui o JSONL é lido em lotes, cada lote vira embeddings
+e é adicionado ao índice, e o texto dos artigos não fica em memória:
+
+- Índices IVF (ivf_flat, ivf_pq) são treinados com os primeiros vetores do
+  arquivo (até `training_size` vetores); os demais são só adicionados.
+- Os metadados de cada lote são gravados no SQLite de metadados
+  (`amldo.pipeline.indexer.metadata`), na posição do vetor no índice.
+- A cada `settings.index_checkpoint_every` lotes o índice parcial, os
+  metadados e o estado (offset em bytes no JSONL de entrada) são gravados em
+  disco. Uma execução interrompida retoma do último checkpoint, desde que o
+  arquivo de entrada e os parâmetros do índice não tenham mudado.
+
+Arquivos de trabalho (removidos ao final):
+
+    <index_path>.partial            índice parcial
+    <index_path>.checkpoint.json    estado do checkpoint
+    <metadata_path>.partial         metadados já indexados (SQLite)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from amldo.core.config import settings
+from amldo.core.exceptions import IndexingError
+from amldo.pipeline.indexer.factory import MIN_POINTS_PER_CENTROID, make_index
+from amldo.pipeline.indexer.metadata import MetadataWriter
+
+try:
+    import faiss  # type: ignore
+except ImportError:
+    faiss = None  # type: ignore
+
+CHECKPOINT_VERSION = 2
+
+# Tipos de índice que precisam de treino antes de receber vetores
+TRAINED_INDEX_TYPES = ("ivf_flat", "ivf_pq")
+
+
+def iter_jsonl_batches(
+    path: Path, batch_size: int, offset: int = 0
+) -> Iterator[Tuple[List[Dict], int]]:
+    """
+    Lê um JSONL em lotes, a partir de um offset em bytes.
+
+    Args:
+        path: Caminho do arquivo JSONL
+        batch_size: Registros por lote
+        offset: Posição (em bytes) onde começar a leitura
+
+    Yields:
+        Tupla (registros, offset em bytes logo após o último registro do lote)
+
+    Raises:
+        IndexingError: Se uma linha não for JSON válido
+    """
+    batch: List[Dict] = []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in iter(f.readline, b""):
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                batch.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise IndexingError(f"Linha inválida em {path} (byte {offset}): {e}") from e
+            if len(batch) >= batch_size:
+                yield batch, offset
+                batch = []
+    if batch:
+        yield batch, offset
+
+
+def training_size(index_type: str) -> int:
+    """
+    Número de vetores usados para treinar um índice IVF.
+
+    Args:
+        index_type: Um de INDEX_TYPES
+
+    Returns:
+        Vetores de treino (0 para índices que não precisam de treino)
+    """
+    if index_type not in TRAINED_INDEX_TYPES:
+        return 0
+    size = settings.faiss_ivf_nlist * MIN_POINTS_PER_CENTROID
+    if index_type == "ivf_pq":
+        size = max(size, MIN_POINTS_PER_CENTROID * 2**settings.faiss_pq_nbits)
+    return size
+
+
+# =============================================================================
+# Checkpoints
+# =============================================================================
+
+
+def _write_atomic(path: Path, write: Callable[[str], None]) -> None:
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    os.close(fd)
+    try:
+        write(tmp_name)
+        os.replace(tmp_name, path)
+    finally:
+        Path(tmp_name).unlink(missing_ok=True)
+
+
+def _source_signature(path: Path) -> Dict[str, Any]:
+    stat = path.stat()
+    return {"source": str(path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class _Checkpoint:
+    """Arquivos de trabalho de uma indexação em streaming."""
+
+    def __init__(self, index_path: Path, metadata_path: Path, params: Dict[str, Any]):
+        self.index_file = index_path.with_name(index_path.name + ".partial")
+        self.state_file = index_path.with_name(index_path.name + ".checkpoint.json")
+        self.metadata_file = metadata_path.with_name(metadata_path.name + ".partial")
+        self.params = params
+
+    def load(self) -> Optional[Tuple[Any, int]]:
+        """Retorna (índice parcial, offset) se houver checkpoint compatível."""
+        try:
+            state = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != CHECKPOINT_VERSION or state.get("params") != self.params:
+            return None
+        if not self.metadata_file.exists():
+            return None
+
+        try:
+            index = faiss.read_index(str(self.index_file))
+        except RuntimeError:
+            return None
+        if index.ntotal != state["ntotal"]:
+            # Interrompido entre a gravação do índice e a do estado
+            return None
+        return index, state["offset"]
+
+    def save(self, index, offset: int) -> None:
+        """Grava índice parcial e estado (nessa ordem, ambos atômicos)."""
+        _write_atomic(self.index_file, lambda tmp: faiss.write_index(index, tmp))
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "params": self.params,
+            "offset": offset,
+            "ntotal": index.ntotal,
+        }
+        _write_atomic(
+            self.state_file,
+            lambda tmp: Path(tmp).write_text(json.dumps(state), encoding="utf-8"),
+        )
+
+    def clear(self) -> None:
+        for path in (self.state_file, self.index_file, self.metadata_file):
+            path.unlink(missing_ok=True)
+
+
+# =============================================================================
+# Pipeline
+# =============================================================================
+
+
+def index_jsonl_streaming(
+    artigos_jsonl_path: str,
+    embedding_fn: Callable[[List[str]], Any],
+    index_path: str,
+    metadata_path: str,
+    index_type: Optional[str] = None,
+    metric: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    checkpoint_every: Optional[int] = None,
+    resume: bool = True,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> Tuple[str, str]:
+    """
+    Indexa um JSONL de artigos em lotes, com checkpoints para retomada.
+
+    Args:
+        artigos_jsonl_path: Caminho do arquivo JSONL com artigos
+        embedding_fn: Função de embedding (lista de textos → matriz (n, dim))
+        index_path: Caminho para salvar o índice FAISS
+        metadata_path: Caminho para salvar metadados
+        index_type: Tipo de índice FAISS (default: settings.faiss_index_type)
+        metric: Métrica do índice, l2 ou ip (default: settings.faiss_metric)
+        batch_size: Artigos por lote (default: settings.index_build_batch_size)
+        checkpoint_every: Lotes entre checkpoints (default: settings.index_checkpoint_every)
+        resume: Se True, retoma de um checkpoint compatível
+        on_batch: Chamado com o total de vetores indexados após cada lote
+
+    Returns:
+        Tupla (index_path, metadata_path) dos arquivos salvos
+
+    Raises:
+        FileNotFoundError: Se arquivo de entrada não existir
+        IndexingError: Se falhar em qualquer etapa
+    """
+    if faiss is None:
+        raise IndexingError("FAISS não está instalado. Instale com: pip install faiss-cpu")
+
+    source = Path(artigos_jsonl_path)
+    if not source.exists():
+        raise FileNotFoundError(f"Arquivo JSONL de artigos não encontrado: {source}")
+
+    index_type = index_type or settings.faiss_index_type
+    metric = metric or settings.faiss_metric
+    batch_size = batch_size or settings.index_build_batch_size
+    checkpoint_every = checkpoint_every or settings.index_checkpoint_every
+
+    idx_path, meta_path = Path(index_path), Path(metadata_path)
+    idx_path.parent.mkdir(parents=True, exist_ok=True)
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+
+    params = {**_source_signature(source), "index_type": index_type, "metric": metric}
+    checkpoint = _Checkpoint(idx_path, meta_path, params)
+
+    index, offset = None, 0
+    restored = checkpoint.load() if resume else None
+    if restored is not None:
+        index, offset = restored
+    else:
+        checkpoint.clear()
+
+    # Vetores e artigos aguardando o treino do índice IVF
+    pending_vectors: List[np.ndarray] = []
+    pending_artigos: List[Dict] = []
+    n_pending = 0
+    train_size = training_size(index_type)
+
+    def embed(artigos: List[Dict]) -> np.ndarray:
+        vectors = np.asarray(
+            embedding_fn([a.get("text", "") for a in artigos]), dtype=np.float32
+        )
+        if len(vectors) != len(artigos):
+            raise IndexingError(
+                f"embedding_fn deve retornar um vetor por texto. "
+                f"Recebeu {len(vectors)} vetores para {len(artigos)} textos."
+            )
+        return vectors
+
+    def create_index(vectors: np.ndarray):
+        new_index = make_index(vectors.shape[1], index_type, len(vectors), metric)
+        if not new_index.is_trained:
+            new_index.train(vectors)
+        return new_index
+
+    try:
+        with MetadataWriter(checkpoint.metadata_file) as writer:
+            if index is not None:
+                # Descarta artigos gravados depois do último checkpoint
+                writer.truncate(index.ntotal)
+                if writer.count != index.ntotal:
+                    raise IndexingError(
+                        f"Checkpoint inconsistente ({writer.count} artigos para "
+                        f"{index.ntotal} vetores); rode novamente sem retomar."
+                    )
+
+            batches = 0
+            for artigos, end in iter_jsonl_batches(source, batch_size, offset):
+                vectors = embed(artigos)
+
+                if index is None:
+                    pending_vectors.append(vectors)
+                    pending_artigos.extend(artigos)
+                    n_pending += len(vectors)
+                    if n_pending < train_size:
+                        continue
+                    vectors, artigos = np.concatenate(pending_vectors), pending_artigos
+                    pending_vectors, pending_artigos = [], []
+                    index = create_index(vectors)
+
+                index.add(vectors)
+                writer.append(artigos)
+                batches += 1
+                if on_batch is not None:
+                    on_batch(index.ntotal)
+                if batches % checkpoint_every == 0:
+                    writer.commit()
+                    checkpoint.save(index, end)
+
+            # Corpus menor que a amostra de treino
+            if pending_vectors:
+                vectors = np.concatenate(pending_vectors)
+                index = create_index(vectors)
+                index.add(vectors)
+                writer.append(pending_artigos)
+                if on_batch is not None:
+                    on_batch(index.ntotal)
+
+        if index is None:
+            checkpoint.clear()
+            raise IndexingError(f"Nenhum artigo encontrado em {source}.")
+
+        _write_atomic(idx_path, lambda tmp: faiss.write_index(index, tmp))
+        os.replace(checkpoint.metadata_file, meta_path)
+    except IndexingError:
+        raise
+    except Exception as e:
+        raise IndexingError(f"Falha na indexação de {source}: {e}") from e
+
+    checkpoint.clear()
+    return str(idx_path), str(meta_path)
@@ -18,6 +18,9 @@ def _read_pdf(path: Path) -> str:
     """
     Lê um arquivo PDF e extrai todo o texto.
 
+    PDFs com mais de `settings.extraction_pages_per_task` páginas são divididos
+    em faixas extraídas em paralelo (ver `amldo.pipeline.ingestion.parallel`).
+
     Args:
         path: Caminho para o arquivo PDF
 
@@ -28,24 +31,16 @@ def _read_pdf(path: Path) -> str:
         IngestionError: Se falhar ao ler o PDF
     """
     try:
-        import PyPDF2  # type: ignore
+        import PyPDF2  # type: ignore  # noqa: F401
     except ImportError as exc:
         raise IngestionError(
             "A leitura de PDF requer a biblioteca PyPDF2.\n"
             "Instale com: pip install PyPDF2"
         ) from exc
 
-    try:
-        text_parts = []
-        with path.open("rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                page_text = page.extract_text() or ""
-                text_parts.append(page_text)
-
-        return "\n".join(text_parts)
-    except Exception as e:
-        raise IngestionError(f"Falha ao ler PDF {path}: {e}") from e
+    from amldo.pipeline.ingestion.parallel import extract_pdf_text
+
+    return extract_pdf_text(path, backend="pypdf2")
 
 
 def _read_txt(path: Path) -> str:
@@ -0,0 +1,255 @@
+"""
+Extração paralela de texto de PDFs em um pool de processos.
+
+A extração de texto (PyMuPDF ou PyPDF2) é limitada por CPU e, em Python puro,
+presa ao GIL; extrair página a página em uma única thread não escala com o
+número de núcleos. Este módulo divide o trabalho em tarefas (arquivos inteiros,
+ou faixas de páginas de arquivos grandes), distribui entre processos e
+remonta o texto de cada arquivo na ordem das páginas.
+
+- `settings.extraction_workers`: processos do pool (0 = número de CPUs)
+- `settings.extraction_pages_per_task`: tamanho das faixas de páginas
+
+Com um único worker, ou uma única tarefa, tudo roda no processo atual, sem o
+custo de iniciar o pool. O mesmo vale dentro de um processo daemon, que não pode
+ter processos filhos.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from amldo.core.config import settings
+from amldo.core.exceptions import IngestionError
+
+# Bibliotecas de extração suportadas
+BACKENDS = ("pymupdf", "pypdf2")
+
+
+@dataclass
+class ExtractedPDF:
+    """Texto extraído de um PDF (ou o erro da extração)."""
+
+    path: Path
+    text: Optional[str] = None
+    pages: int = 0
+    error: Optional[str] = None
+
+
+# =============================================================================
+# Leitura de páginas (executada nos processos do pool)
+# =============================================================================
+
+
+def _open_pymupdf(path: str):
+    import fitz  # PyMuPDF
+
+    return fitz.open(path)
+
+
+def _open_pypdf2(path: str):
+    try:
+        import PyPDF2  # type: ignore
+    except ImportError as exc:
+        raise IngestionError(
+            "A leitura de PDF requer a biblioteca PyPDF2.\n"
+            "Instale com: pip install PyPDF2"
+        ) from exc
+
+    return PyPDF2.PdfReader(path)
+
+
+def page_count(path: Path, backend: str = "pymupdf") -> int:
+    """
+    Retorna o número de páginas de um PDF.
+
+    Args:
+        path: Caminho do PDF
+        backend: "pymupdf" ou "pypdf2"
+
+    Returns:
+        Número de páginas
+    """
+    if backend == "pymupdf":
+        with _open_pymupdf(str(path)) as doc:
+            return doc.page_count
+    return len(_open_pypdf2(str(path)).pages)
+
+
+def extract_page_range(path: str, start: int, stop: int, backend: str = "pymupdf") -> List[str]:
+    """
+    Extrai o texto das páginas [start, stop) de um PDF.
+
+    Args:
+        path: Caminho do PDF
+        start: Primeira página (0-based)
+        stop: Página final (exclusiva)
+        backend: "pymupdf" ou "pypdf2"
+
+    Returns:
+        Texto de cada página, em ordem
+    """
+    if backend == "pymupdf":
+        with _open_pymupdf(path) as doc:
+            return [doc.load_page(i).get_text("text") for i in range(start, stop)]
+
+    reader = _open_pypdf2(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+# =============================================================================
+# Planejamento e execução
+# =============================================================================
+
+
+def resolve_workers(max_workers: Optional[int] = None) -> int:
+    """
+    Número de processos de extração a usar.
+
+    Args:
+        max_workers: Valor explícito (default: settings.extraction_workers; 0 = CPUs)
+
+    Returns:
+        Número de processos (>= 1)
+    """
+    workers = settings.extraction_workers if max_workers is None else max_workers
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def plan_tasks(counts: Dict[Path, int], pages_per_task: int) -> List[Tuple[Path, int, int]]:
+    """
+    Divide os arquivos em faixas de no máximo `pages_per_task` páginas.
+
+    Args:
+        counts: Número de páginas de cada arquivo
+        pages_per_task: Tamanho máximo de cada faixa
+
+    Returns:
+        Lista de (arquivo, página inicial, página final exclusiva), maiores primeiro
+    """
+    tasks = []
+    for path, pages in counts.items():
+        for start in range(0, pages, pages_per_task):
+            tasks.append((path, start, min(start + pages_per_task, pages)))
+    # Faixas maiores primeiro: reduz a cauda do pool
+    tasks.sort(key=lambda task: task[2] - task[1], reverse=True)
+    return tasks
+
+
+def extract_pdfs(
+    paths: Iterable[Path],
+    backend: str = "pymupdf",
+    max_workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None,
+) -> Iterator[ExtractedPDF]:
+    """
+    Extrai o texto de vários PDFs em paralelo.
+
+    Os arquivos são entregues à medida que todas as suas faixas terminam (não
+    necessariamente na ordem de entrada), de modo que o chamador pode, por
+    exemplo, gerar embeddings de um arquivo enquanto os demais são extraídos.
+    O texto de cada arquivo une as páginas com "\\n", na ordem original.
+
+    Args:
+        paths: PDFs a extrair
+        backend: "pymupdf" ou "pypdf2"
+        max_workers: Processos do pool (default: settings.extraction_workers)
+        pages_per_task: Páginas por tarefa (default: settings.extraction_pages_per_task)
+
+    Yields:
+        ExtractedPDF de cada arquivo (com `error` preenchido se a extração falhar)
+    """
+    if backend not in BACKENDS:
+        raise IngestionError(f"Backend de extração desconhecido: {backend}. Use {BACKENDS}.")
+
+    pages_per_task = pages_per_task or settings.extraction_pages_per_task
+    workers = resolve_workers(max_workers)
+
+    counts: Dict[Path, int] = {}
+    for path in paths:
+        path = Path(path)
+        try:
+            counts[path] = page_count(path, backend)
+        except Exception as e:
+            yield ExtractedPDF(path, error=str(e))
+
+    tasks = plan_tasks(counts, pages_per_task)
+    # Arquivos sem páginas não geram tarefas
+    for path, pages in counts.items():
+        if pages == 0:
+            yield ExtractedPDF(path, text="", pages=0)
+
+    parts: Dict[Path, Dict[int, List[str]]] = {path: {} for path in counts}
+    remaining = dict.fromkeys(counts, 0)
+    for path, _, _ in tasks:
+        remaining[path] += 1
+    failed: Dict[Path, str] = {}
+
+    def finish(path: Path) -> ExtractedPDF:
+        if path in failed:
+            return ExtractedPDF(path, pages=counts[path], error=failed[path])
+        pages = [text for start in sorted(parts[path]) for text in parts[path][start]]
+        return ExtractedPDF(path, text="\n".join(pages), pages=counts[path])
+
+    # Processos daemon não podem iniciar o pool (AssertionError do multiprocessing)
+    if workers <= 1 or len(tasks) <= 1 or multiprocessing.current_process().daemon:
+        for path, start, stop in tasks:
+            try:
+                parts[path][start] = extract_page_range(str(path), start, stop, backend)
+            except Exception as e:
+                failed[path] = str(e)
+            remaining[path] -= 1
+            if remaining[path] == 0:
+                yield finish(path)
+        return
+
+    # spawn: não herda threads/estado do processo pai (API, modelo de embedding)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as pool:
+        pending = {
+            pool.submit(extract_page_range, str(path), start, stop, backend): (path, start)
+            for path, start, stop in tasks
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, start = pending.pop(future)
+                try:
+                    parts[path][start] = future.result()
+                except Exception as e:
+                    failed[path] = str(e)
+                remaining[path] -= 1
+                if remaining[path] == 0:
+                    yield finish(path)
+
+
+def extract_pdf_text(
+    path: Path,
+    backend: str = "pymupdf",
+    max_workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None,
+) -> str:
+    """
+    Extrai o texto de um único PDF, dividindo arquivos grandes em faixas de páginas.
+
+    Args:
+        path: Caminho do PDF
+        backend: "pymupdf" ou "pypdf2"
+        max_workers: Processos do pool (default: settings.extraction_workers)
+        pages_per_task: Páginas por tarefa (default: settings.extraction_pages_per_task)
+
+    Returns:
+        Texto de todas as páginas unidas por "\\n"
+
+    Raises:
+        IngestionError: Se a extração falhar
+    """
+    result = next(extract_pdfs([path], backend, max_workers, pages_per_task))
+    if result.error is not None:
+        raise IngestionError(f"Falha ao ler PDF {path}: {result.error}")
+    return result.text
@@ -0,0 +1,416 @@
+"""
+Processamento incremental dos PDFs de `data/raw/` para o vector store FAISS.
+
+Executado pelo worker de jobs (`amldo.pipeline.worker`), fora dos processos da
+API: extrai o texto dos PDFs novos ou alterados (PyMuPDF, em um pool de
+processos — `amldo.pipeline.ingestion.parallel`), divide em chunks,
+gera os embeddings em lotes e sincroniza índice e manifesto
+(`amldo.pipeline.indexer.manifest`). O andamento é reportado por
+`ProcessingProgress`, que o worker grava no job a cada lote.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from amldo.core.config import Settings, settings
+from amldo.core.exceptions import IndexingError, IngestionError
+
+# Estados de arquivo ainda em andamento (os demais são finais)
+ACTIVE_STATUSES = ("pending", "extracting", "embedding")
+
+
+class ProcessingProgress:
+    """
+    Andamento de um processamento: estado por arquivo, throughput e ETA.
+
+    `snapshot()` gera o dicionário exposto em `/api/process/{job_id}`. O
+    callback (se houver) é chamado a cada mudança com esse snapshot.
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            callback: Função chamada com o snapshot a cada atualização
+        """
+        self.callback = callback
+        self.phase = "starting"
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.chunks_embedded = 0
+        self._started = time.monotonic()
+
+    def add_file(self, name: str, status: str, size: Optional[int] = None) -> None:
+        """Registra um arquivo com seu estado inicial (pending, unchanged, removed)."""
+        self.files[name] = {
+            "file": name,
+            "status": status,
+            "size": size,
+            "chunks_total": None,
+            "chunks_done": 0,
+        }
+
+    def update(self, name: Optional[str] = None, phase: Optional[str] = None, **fields) -> None:
+        """
+        Atualiza o estado de um arquivo e/ou a fase global e notifica o callback.
+
+        Args:
+            name: Nome do arquivo a atualizar (opcional)
+            phase: Nova fase do processamento (opcional)
+            **fields: Campos do arquivo (status, chunks_total, chunks_done, error...)
+        """
+        if phase is not None:
+            self.phase = phase
+        if name is not None:
+            self.files[name].update(fields)
+        self._notify()
+
+    def add_embedded(self, name: str, count: int) -> None:
+        """Contabiliza `count` chunks com embedding gerado para o arquivo."""
+        self.chunks_embedded += count
+        self.files[name]["chunks_done"] += count
+        self._notify()
+
+    def _remaining_chunks(self) -> Optional[float]:
+        """Chunks que faltam gerar; arquivos ainda não extraídos são estimados por bytes."""
+        pending = [f for f in self.files.values() if f["status"] in ("pending", "extracting")]
+        known = [f for f in self.files.values() if f["chunks_total"] is not None and f["size"]]
+        active = [f for f in self.files.values() if f["status"] == "embedding"]
+
+        remaining = float(sum(f["chunks_total"] - f["chunks_done"] for f in active))
+        if pending:
+            if not known:
+                return None
+            chunks_per_byte = sum(f["chunks_total"] for f in known) / sum(f["size"] for f in known)
+            remaining += sum((f["size"] or 0) * chunks_per_byte for f in pending)
+        return remaining
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Retorna o estado atual do processamento.
+
+        Returns:
+            Dict com fase, arquivos, chunks gerados, chunks/s e ETA em segundos
+            (None enquanto não houver throughput para estimar)
+        """
+        elapsed = time.monotonic() - self._started
+        rate = self.chunks_embedded / elapsed if elapsed > 0 else 0.0
+        remaining = self._remaining_chunks()
+        eta = remaining / rate if rate > 0 and remaining is not None else None
+        files = list(self.files.values())
+        return {
+            "phase": self.phase,
+            "files_total": len(files),
+            "files_done": len([f for f in files if f["status"] not in ACTIVE_STATUSES]),
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_per_second": round(rate, 2),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "elapsed_seconds": round(elapsed, 2),
+            "files": files,
+        }
+
+    def _notify(self) -> None:
+        if self.callback is not None:
+            self.callback(self.snapshot())
+
+
+def empty_vector_store(embeddings):
+    """
+    Cria um vector store FAISS vazio (índice plano L2) para a primeira indexação.
+
+    Args:
+        embeddings: Modelo de embedding
+
+    Returns:
+        Instância de `langchain_community.vectorstores.FAISS` sem documentos
+    """
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    dim = len(embeddings.embed_query("dimensão"))
+    return FAISS(embeddings, faiss.IndexFlatL2(dim), InMemoryDocstore(), {})
+
+
+def split_chunks(pdf_path: Path, text: str, splitter) -> List[Any]:
+    """
+    Divide o texto extraído de um PDF em chunks.
+
+    Args:
+        pdf_path: Caminho do PDF de origem
+        text: Texto do PDF
+        splitter: Text splitter do LangChain
+
+    Returns:
+        Lista de Documents com metadados path, file e chunk_idx
+    """
+    from langchain_core.documents import Document
+
+    return [
+        Document(
+            page_content=chunk,
+            metadata={"path": str(pdf_path), "file": pdf_path.name, "chunk_idx": idx},
+        )
+        for idx, chunk in enumerate(splitter.split_text(text))
+    ]
+
+
+def _write_changed_shards(vector_db, vector_db_path: Path, files_info, config: Settings) -> None:
+    """
+    Atualiza as partições por lei (`settings.vector_db_sharded`) após uma sincronização.
+
+    Só as leis dos PDFs indexados ou removidos são regravadas; na primeira vez
+    (sem partições em disco) todas são criadas.
+    """
+    from amldo.rag.shards import SHARDS_DIR, write_shards
+
+    shards_dir = vector_db_path / SHARDS_DIR
+    laws = None
+    if shards_dir.exists():
+        laws = {
+            Path(f["file"]).stem for f in files_info if f["status"] in ("indexed", "removed")
+        }
+    write_shards(vector_db, shards_dir, laws=laws, index_type=config.faiss_index_type)
+
+
+def has_pending_work(raw_dir: Path, config: Settings | None = None) -> bool:
+    """
+    Indica se há algo a sincronizar (PDFs em `raw_dir` ou arquivos no manifesto).
+
+    Args:
+        raw_dir: Diretório dos PDFs
+        config: Configurações (default: settings globais)
+
+    Returns:
+        False se não houver PDFs nem arquivos indexados pelo manifesto
+    """
+    from amldo.pipeline.indexer.manifest import IndexManifest
+
+    config = config or settings
+    if any(Path(raw_dir).glob("*.pdf")):
+        return True
+    return bool(IndexManifest.load(config.vector_db_path_absolute).files)
+
+
+def build_lookup_indexes(config: Settings | None = None) -> None:
+    """
+    Gera os JSONs derivados usados pelos RAGs (não versionados no git).
+
+    Árvore de artigos 0 (a partir do CSV) e índice (lei, artigo) → textos (a
+    partir de `split_docs`). Cada um só é reconstruído se estiver ausente ou
+    desatualizado em relação à fonte; fontes ausentes são ignoradas.
+
+    Args:
+        config: Configurações (default: settings globais)
+    """
+    from amldo.rag.articles import load_article_index
+    from amldo.rag.context import load_hierarchy_index
+
+    config = config or settings
+    for build, source, index_path in (
+        (
+            load_hierarchy_index,
+            config.artigos_0_csv_path_absolute,
+            config.artigos_0_index_path_absolute,
+        ),
+        (load_article_index, config.split_docs_dir, config.article_index_path_absolute),
+    ):
+        try:
+            build(source, index_path)
+        except FileNotFoundError:
+            pass
+
+
+def process_raw_documents(
+    raw_dir: Path,
+    embeddings,
+    config: Settings | None = None,
+    progress: Optional[ProcessingProgress] = None,
+) -> Dict[str, Any]:
+    """
+    Sincroniza o vector store com os PDFs de `raw_dir`.
+
+    PDFs inalterados (mesmo SHA-256 no manifesto) são ignorados; PDFs novos ou
+    alterados são extraídos e só os chunks com texto novo recebem embeddings;
+    chunks de PDFs apagados são removidos. Índice e manifesto são salvos de
+    forma atômica; os processos da API recarregam o índice ao detectar o
+    arquivo novo.
+
+    Args:
+        raw_dir: Diretório dos PDFs (ex: data/raw)
+        embeddings: Modelo de embedding
+        config: Configurações (default: settings globais)
+        progress: Acompanhamento do andamento (opcional)
+
+    Returns:
+        Dict com processed, total_chunks, files e duration_seconds
+        (formato de `ProcessResponse`)
+
+    Raises:
+        IngestionError: Se não houver PDFs nem arquivos indexados
+        IndexingError: Se todos os PDFs falharem ou o índice não puder ser salvo
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from amldo.pipeline.indexer.factory import rebuild_index
+    from amldo.pipeline.ingestion.parallel import extract_pdfs
+    from amldo.pipeline.indexer.manifest import (
+        IndexManifest,
+        apply_file_chunks,
+        plan,
+        remove_file,
+    )
+    from amldo.rag.cache import clear_answer_caches
+    from amldo.rag.lexical import LEXICAL_FILE, build_lexical_index
+    from amldo.rag.vector_store import (
+        INDEX_FILE,
+        load_vector_store,
+        migrate_docstores,
+        save_vector_store,
+    )
+    from amldo.utils.metrics import track_processing_metrics
+
+    config = config or settings
+    progress = progress or ProcessingProgress()
+    start_time = time.time()
+
+    pdf_files = sorted(Path(raw_dir).glob("*.pdf"))
+    vector_db_path = config.vector_db_path_absolute
+    manifest = IndexManifest.load(vector_db_path)
+
+    if not pdf_files and not manifest.files:
+        raise IngestionError(f"Nenhum arquivo PDF encontrado em {raw_dir}")
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=100, length_function=len
+    )
+
+    files_info = []
+    total_chunks = 0
+    created = False
+
+    try:
+        progress.update(phase="loading")
+        if (vector_db_path / INDEX_FILE).exists():
+            # Migra um index.pkl legado (aqui, fora dos processos da API) e
+            # carrega o índice existente em memória (gravável)
+            migrate_docstores(vector_db_path, config.get_faiss_allow_dangerous_deserialization())
+            vector_db = load_vector_store(vector_db_path, embeddings, mmap=False)
+        else:
+            vector_db = empty_vector_store(embeddings)
+            created = True
+
+        manifest.reconcile(vector_db)
+        progress.update(phase="planning")
+        changes = plan(manifest, pdf_files)
+
+        for name in changes.unchanged:
+            progress.add_file(name, "unchanged")
+            files_info.append({"file": name, "status": "unchanged", "chunks": 0})
+        for name in changes.deleted:
+            progress.add_file(name, "removed")
+        for pdf_path in pdf_files:
+            if pdf_path.name in changes.changed:
+                progress.add_file(pdf_path.name, "pending", pdf_path.stat().st_size)
+
+        progress.update(phase="removing")
+        for name in changes.deleted:
+            removed = remove_file(vector_db, manifest, name)
+            files_info.append({"file": name, "status": "removed", "chunks": 0, "removed": removed})
+
+        # Extração em um pool de processos; cada PDF é indexado assim que
+        # termina de ser extraído, enquanto os demais continuam no pool
+        progress.update(phase="embedding")
+        changed_paths = [path for path in pdf_files if path.name in changes.changed]
+        for path in changed_paths:
+            progress.update(path.name, status="extracting")
+
+        for extracted in extract_pdfs(changed_paths, backend="pymupdf"):
+            pdf_path = extracted.path
+            name = pdf_path.name
+            sha = changes.changed[name]
+            if extracted.error is not None:
+                # Mantém os chunks da versão indexada anteriormente
+                progress.update(name, status="error", error=extracted.error)
+                files_info.append(
+                    {"file": name, "status": "error", "chunks": 0, "error": extracted.error}
+                )
+                continue
+
+            documents = split_chunks(pdf_path, extracted.text, splitter)
+            progress.update(name, status="embedding", chunks_total=len(documents))
+            stats = apply_file_chunks(
+                vector_db,
+                manifest,
+                name,
+                sha,
+                pdf_path.stat().st_size,
+                documents,
+                batch_size=config.process_embed_batch_size,
+                on_batch=lambda count, name=name: progress.add_embedded(name, count),
+            )
+            # Chunks reaproveitados não geram embedding, mas contam como concluídos
+            progress.update(name, status="indexed", chunks_done=len(documents))
+            total_chunks += stats["added"]
+            files_info.append(
+                {
+                    "file": name,
+                    "status": "indexed",
+                    "chunks": stats["added"],
+                    "reused": stats["reused"],
+                    "removed": stats["removed"],
+                }
+            )
+    except (IngestionError, IndexingError):
+        raise
+    except Exception as e:
+        raise IndexingError(f"Erro ao atualizar índice FAISS: {e}") from e
+
+    successful_files = len([f for f in files_info if f["status"] == "indexed"])
+    failed_files = len([f for f in files_info if f["status"] == "error"])
+
+    if failed_files and not successful_files and not changes.deleted:
+        raise IndexingError("Falha ao processar todos os PDFs - nenhum chunk criado")
+
+    if successful_files or changes.deleted:
+        progress.update(phase="saving")
+        try:
+            if created:
+                # Converte o índice recém-criado para o tipo/métrica configurados
+                index_type = config.faiss_index_type
+                metric = config.faiss_metric
+                if (index_type != "flat" or metric != "l2") and vector_db.index.ntotal:
+                    vector_db.index = rebuild_index(vector_db.index, index_type, metric)
+
+            save_vector_store(vector_db, vector_db_path)
+            # Índice BM25 da busca hybrid, alinhado às posições do índice salvo
+            build_lexical_index(vector_db).save(vector_db_path / LEXICAL_FILE)
+            if config.vector_db_sharded:
+                _write_changed_shards(vector_db, vector_db_path, files_info, config)
+            manifest.save(vector_db_path)
+            # Respostas persistidas com o índice anterior deixam de valer
+            clear_answer_caches()
+        except Exception as e:
+            raise IndexingError(f"Erro ao salvar índice FAISS: {e}") from e
+
+    build_lookup_indexes(config)
+
+    duration_seconds = time.time() - start_time
+    progress.update(phase="done")
+
+    # Registrar métricas
+    track_processing_metrics(
+        files=successful_files,
+        chunks=total_chunks,
+        duration=duration_seconds,
+        details=json.dumps(files_info),
+    )
+
+    return {
+        "processed": successful_files,
+        "total_chunks": total_chunks,
+        "files": files_info,
+        "duration_seconds": round(duration_seconds, 2),
+    }
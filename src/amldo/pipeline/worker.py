@@ -0,0 +1,151 @@
+"""
+Worker de processamento de documentos.
+
+Consome a fila de jobs (`amldo.utils.jobs`) e executa
+`amldo.pipeline.processing.process_raw_documents` em um processo separado da
+API, com seu próprio modelo de embedding. Pode rodar:
+
+- embutido: a API inicia um processo worker no startup
+  (`settings.process_worker_embedded`);
+- standalone: `amldo-worker` (ex: em outra máquina/container com o mesmo
+  diretório de dados, com `PROCESS_WORKER_EMBEDDED=false` na API).
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from amldo.core.config import settings
+from amldo.utils.jobs import JobQueue, get_job_queue
+
+# Diretório dos PDFs enviados por /api/upload
+RAW_DIR = Path("data/raw")
+
+
+def run_job(job: Dict[str, Any], queue: JobQueue, raw_dir: Path = RAW_DIR) -> None:
+    """
+    Executa um job de processamento e grava andamento e resultado na fila.
+
+    Args:
+        job: Job reservado por `JobQueue.claim`
+        queue: Fila de jobs
+        raw_dir: Diretório dos PDFs
+    """
+    from amldo.pipeline.processing import ProcessingProgress, process_raw_documents
+    from amldo.rag.runtime import get_rag_runtime
+
+    job_id = job["id"]
+    progress = ProcessingProgress(lambda snapshot: queue.update_progress(job_id, snapshot))
+    try:
+        result = process_raw_documents(raw_dir, get_rag_runtime().embeddings, progress=progress)
+    except Exception as e:
+        queue.update_progress(job_id, progress.snapshot())
+        queue.fail(job_id, str(e))
+        return
+    queue.update_progress(job_id, progress.snapshot())
+    queue.complete(job_id, result)
+
+
+def run_worker(
+    queue: Optional[JobQueue] = None,
+    poll_seconds: Optional[float] = None,
+    stop_event: Optional[threading.Event] = None,
+    once: bool = False,
+    raw_dir: Path = RAW_DIR,
+) -> None:
+    """
+    Laço do worker: reserva e executa jobs até `stop_event` ser sinalizado.
+
+    Args:
+        queue: Fila de jobs (default: singleton)
+        poll_seconds: Intervalo entre consultas à fila (default: settings)
+        stop_event: Evento de parada (opcional)
+        once: Executa no máximo um job e retorna (usado em testes)
+        raw_dir: Diretório dos PDFs
+    """
+    queue = queue or get_job_queue()
+    poll_seconds = poll_seconds or settings.process_worker_poll_seconds
+    stop_event = stop_event or threading.Event()
+
+    while not stop_event.is_set():
+        job = queue.claim(os.getpid())
+        if job is not None:
+            run_job(job, queue, raw_dir)
+        if once:
+            return
+        if job is None:
+            stop_event.wait(poll_seconds)
+
+
+def _worker_main() -> None:
+    # Processo filho: ignora Ctrl+C (o processo pai encerra o worker)
+    import signal
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Não é daemon: sem isto sobreviveria a uma queda da API. O job em andamento
+    # volta para a fila, como no `terminate` de `stop_worker_process`
+    parent = multiprocessing.parent_process()
+    if parent is not None:
+        threading.Thread(target=_exit_with_parent, args=(parent,), daemon=True).start()
+    run_worker()
+
+
+def _exit_with_parent(parent: multiprocessing.process.BaseProcess) -> None:
+    parent.join()
+    os._exit(0)
+
+
+# =============================================================================
+# Worker embutido na API
+# =============================================================================
+
+_worker_process: Optional[multiprocessing.process.BaseProcess] = None
+
+
+def start_worker_process() -> multiprocessing.process.BaseProcess:
+    """
+    Inicia o worker em um processo separado (idempotente).
+
+    Usa o contexto `spawn`: o processo filho não herda o estado do uvicorn e
+    carrega o próprio modelo de embedding. O processo não é daemon, para poder
+    abrir o pool de extração paralela de PDFs; `stop_worker_process` o encerra
+    no shutdown da API, e ele termina sozinho se o processo pai morrer.
+
+    Returns:
+        Processo do worker
+    """
+    global _worker_process
+    if _worker_process is None or not _worker_process.is_alive():
+        context = multiprocessing.get_context("spawn")
+        _worker_process = context.Process(
+            target=_worker_main, name="amldo-process-worker", daemon=False
+        )
+        _worker_process.start()
+    return _worker_process
+
+
+def stop_worker_process(timeout: float = 5.0) -> None:
+    """
+    Encerra o worker embutido, se estiver rodando.
+
+    Um job interrompido volta para a fila e é retomado no próximo start (o
+    índice só é gravado ao final, de forma atômica).
+
+    Args:
+        timeout: Segundos aguardando o término antes de forçar
+    """
+    global _worker_process
+    if _worker_process is None:
+        return
+    if _worker_process.is_alive():
+        _worker_process.terminate()
+        _worker_process.join(timeout)
+        if _worker_process.is_alive():
+            _worker_process.kill()
+    _worker_process = None
+
@@ -0,0 +1,339 @@
+"""
+Atalho de consulta direta a artigos citados na pergunta.
+
+Perguntas como "o que diz o art. 75 da Lei 14.133?" não precisam de busca
+semântica: o dispositivo citado é conhecido. Este módulo mantém um índice
+(lei, artigo) → textos, derivado de `data/split_docs`:
+
+    data/split_docs/<LEI>/<TITULO>/capitulos/<CAPITULO>/artigos/artigo_<N>.txt
+
+e resolve as citações da pergunta diretamente nele, sem modelo de embedding
+nem FAISS. O resultado passa pelo mesmo renderizador hierárquico dos RAGs v2
+e v3 (`HierarchyIndex.render`), com os artigos 0 do título e do capítulo.
+
+O índice é persistido em JSON compacto (`settings.article_index_path`) e
+reconstruído quando os arquivos de `split_docs` mudam (quantidade ou mtime).
+Perguntas sem citação de artigo, sem lei identificável ou com artigo
+inexistente retornam None e seguem para a busca normal.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from amldo.core.config import settings
+from amldo.rag.context import get_sources, sort_rows
+from amldo.rag.retrieval_cache import CachedRetrieval
+from amldo.rag.shards import route_question
+
+# Versão do formato JSON do índice de artigos
+INDEX_FORMAT_VERSION = 1
+
+# Padrão dos arquivos de artigo dentro de split_docs
+ARTICLE_GLOB = "*/*/capitulos/*/artigos/artigo_*.txt"
+
+# Perguntas que citam mais artigos que isso seguem para a busca semântica
+MAX_ARTICLES = 8
+
+# "art. 75", "arts. 74 e 75", "artigo 18-A", "art. 1º"
+_CITATION = re.compile(
+    r"\bart(?:igo)?s?\b\.?\s*((?:\d+\s*[o°]?(?:\s*-\s*[a-z]\b)?(?:\s*(?:,|\be\b)\s*)?)+)"
+)
+_NUMBER = re.compile(r"(\d+)\s*[o°]?(?:\s*-\s*([a-z])\b)?")
+# Nome do arquivo: "artigo_75-A.txt", "artigo_1o.txt"
+_FILE_KEY = re.compile(r"^artigo_(\d+)o?(?:-([A-Za-z]))?\.txt$")
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _key(number: str, suffix: Optional[str]) -> str:
+    """Chave do artigo: número sem zeros à esquerda e sufixo em maiúscula ("75", "18-A")."""
+    key = str(int(number))
+    return f"{key}-{suffix.upper()}" if suffix else key
+
+
+def article_key(filename: str) -> Optional[str]:
+    """
+    Converte o nome do arquivo de um artigo na chave do índice.
+
+    Args:
+        filename: Nome do arquivo (ex: "artigo_75-A.txt", "artigo_1o.txt")
+
+    Returns:
+        Chave ("75-A", "1") ou None se o nome não seguir o padrão
+    """
+    match = _FILE_KEY.match(filename)
+    if match is None:
+        return None
+    return _key(match.group(1), match.group(2))
+
+
+def parse_article_citations(question: str) -> List[str]:
+    """
+    Extrai os artigos citados na pergunta.
+
+    Args:
+        question: Pergunta do usuário
+
+    Returns:
+        Chaves dos artigos citados, sem repetição e na ordem da pergunta
+    """
+    keys: Dict[str, None] = {}
+    for citation in _CITATION.finditer(_normalize(question)):
+        for number, suffix in _NUMBER.findall(citation.group(1)):
+            keys[_key(number, suffix or None)] = None
+    return list(keys)
+
+
+def _source_signature(split_docs_dir: Path, files: Optional[List[Path]] = None) -> List[int]:
+    """Identidade dos arquivos de split_docs: [quantidade, maior mtime em ns]."""
+    if files is None:
+        files = list(Path(split_docs_dir).glob(ARTICLE_GLOB))
+    return [len(files), max((f.stat().st_mtime_ns for f in files), default=0)]
+
+
+# =============================================================================
+# Índice (lei, artigo) → textos
+# =============================================================================
+
+
+class ArticleIndex:
+    """
+    Índice (lei, artigo) → linhas com texto e posição hierárquica do artigo.
+
+    Cada linha tem lei, titulo, capitulo, artigo (nome do arquivo), path
+    (relativo a split_docs) e texto, no formato aceito por `HierarchyIndex.render`.
+    Um mesmo número pode aparecer mais de uma vez na lei (ex: artigos repetidos
+    em títulos diferentes), por isso cada chave guarda uma lista.
+    """
+
+    def __init__(
+        self,
+        articles: Dict[str, Dict[str, List[Dict[str, str]]]],
+        signature: Optional[List[int]] = None,
+    ):
+        """
+        Inicializa o índice.
+
+        Args:
+            articles: Mapeamento lei → chave do artigo → linhas
+            signature: Identidade dos arquivos de origem (ver `_source_signature`)
+        """
+        self.articles = articles
+        self.signature = signature
+
+    @property
+    def laws(self) -> List[str]:
+        """Leis indexadas, em ordem alfabética."""
+        return sorted(self.articles)
+
+    def __len__(self) -> int:
+        return sum(len(rows) for by_key in self.articles.values() for rows in by_key.values())
+
+    @classmethod
+    def from_split_docs(cls, split_docs_dir: Path) -> "ArticleIndex":
+        """
+        Constrói o índice lendo os artigos de `split_docs` (artigos 0 são ignorados).
+
+        Args:
+            split_docs_dir: Diretório `data/split_docs`
+
+        Returns:
+            ArticleIndex
+
+        Raises:
+            FileNotFoundError: Se o diretório não existir
+        """
+        split_docs_dir = Path(split_docs_dir)
+        if not split_docs_dir.is_dir():
+            raise FileNotFoundError(f"Diretório split_docs não encontrado: {split_docs_dir}")
+
+        files = sorted(split_docs_dir.glob(ARTICLE_GLOB))
+        articles: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
+        for path in files:
+            key = article_key(path.name)
+            if key is None or key == "0":
+                continue
+            relative = path.relative_to(split_docs_dir)
+            lei, titulo, _, capitulo = relative.parts[:4]
+            articles.setdefault(lei, {}).setdefault(key, []).append(
+                {
+                    "lei": lei,
+                    "titulo": titulo,
+                    "capitulo": capitulo,
+                    "artigo": path.name,
+                    "path": relative.as_posix(),
+                    "texto": path.read_text(encoding="utf-8").strip(),
+                }
+            )
+        return cls(articles, _source_signature(split_docs_dir, files))
+
+    @classmethod
+    def load(cls, path: Path) -> "ArticleIndex":
+        """
+        Carrega o índice do JSON compacto gerado por `save`.
+
+        Args:
+            path: Arquivo JSON
+
+        Returns:
+            ArticleIndex
+
+        Raises:
+            ValueError: Se o arquivo tiver formato incompatível
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Formato de índice de artigos não suportado: {path}")
+        return cls(data["articles"], data.get("signature"))
+
+    def save(self, path: Path) -> None:
+        """
+        Salva o índice como JSON compacto (escrita atômica).
+
+        Args:
+            path: Arquivo JSON de destino
+        """
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": INDEX_FORMAT_VERSION,
+                    "signature": self.signature,
+                    "articles": self.articles,
+                },
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, path)
+
+    def get(self, lei: str, artigo: str) -> List[Dict[str, str]]:
+        """
+        Obtém as linhas de um artigo.
+
+        Args:
+            lei: Lei (ex: "L14133")
+            artigo: Chave do artigo (ex: "75", "18-A")
+
+        Returns:
+            Linhas do artigo (vazio se não existir)
+        """
+        return self.articles.get(lei, {}).get(artigo, [])
+
+    def lookup(self, question: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Resolve os artigos citados na pergunta.
+
+        Cada artigo é procurado em todas as leis citadas; basta que exista em
+        uma delas.
+
+        Args:
+            question: Pergunta do usuário
+
+        Returns:
+            Linhas dos artigos citados, ou None se a pergunta não citar artigo
+            e lei, citar artigos demais ou algum artigo não existir
+        """
+        keys = parse_article_citations(question)
+        if not keys or len(keys) > MAX_ARTICLES:
+            return None
+        laws = route_question(question, self.laws)
+        if not laws:
+            return None
+
+        rows: List[Dict[str, str]] = []
+        for key in keys:
+            found = [row for lei in laws for row in self.get(lei, key)]
+            if not found:
+                return None
+            rows.extend(found)
+        return rows
+
+
+def load_article_index(split_docs_dir: Path, index_path: Path) -> ArticleIndex:
+    """
+    Carrega o índice de artigos, preferindo o JSON compacto.
+
+    O JSON é usado se `split_docs` não existir ou se a identidade dos seus
+    arquivos não tiver mudado; caso contrário o índice é reconstruído e o JSON
+    é regravado (se possível).
+
+    Args:
+        split_docs_dir: Diretório `data/split_docs` (fonte)
+        index_path: JSON compacto do índice
+
+    Returns:
+        ArticleIndex
+
+    Raises:
+        FileNotFoundError: Se nem o JSON nem o diretório existirem
+    """
+    split_docs_dir, index_path = Path(split_docs_dir), Path(index_path)
+    has_source = split_docs_dir.is_dir()
+
+    if index_path.exists():
+        try:
+            index = ArticleIndex.load(index_path)
+        except (ValueError, KeyError, json.JSONDecodeError):
+            if not has_source:
+                raise
+        else:
+            if not has_source or index.signature == _source_signature(split_docs_dir):
+                return index
+
+    index = ArticleIndex.from_split_docs(split_docs_dir)
+    try:
+        index.save(index_path)
+    except OSError:
+        pass
+    return index
+
+
+# =============================================================================
+# Atalho de recuperação
+# =============================================================================
+
+
+def article_lookup(question: str, runtime=None) -> Optional[CachedRetrieval]:
+    """
+    Monta o contexto hierárquico direto dos artigos citados, sem busca vetorial.
+
+    Args:
+        question: Pergunta do usuário
+        runtime: RAGRuntime a usar. Usa o runtime compartilhado se None.
+
+    Returns:
+        CachedRetrieval com os caminhos dos artigos, contexto e fontes, ou None
+        se o atalho estiver desativado ou a pergunta não puder ser resolvida
+        (segue para a busca normal)
+    """
+    if not settings.article_lookup_enabled or not parse_article_citations(question):
+        return None
+
+    if runtime is None:
+        from amldo.rag.runtime import get_rag_runtime
+
+        runtime = get_rag_runtime()
+
+    rows = runtime.article_index.lookup(question)
+    if rows is None:
+        return None
+
+    linhas = sort_rows(rows)
+    return CachedRetrieval(
+        chunk_ids=tuple(row["path"] for row in linhas),
+        context=runtime.hierarchy.render(linhas),
+        sources=get_sources(linhas),
+    )
+
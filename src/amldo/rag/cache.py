@@ -0,0 +1,650 @@
+"""
+Caches de respostas RAG.
+
+Perguntas repetidas ("limite para dispensa de licitação", ...) pagam embedding,
+busca FAISS e chamada ao LLM a cada consulta. Este módulo guarda a resposta final
+em dois níveis:
+
+- AnswerCache: correspondência exata, LRU em memória com TTL e, opcionalmente,
+  SQLite (ao lado do banco de métricas) para sobreviver a reinícios da API
+- SemanticAnswerCache: correspondência por similaridade de cosseno entre o
+  embedding da pergunta e perguntas já respondidas (paráfrases)
+
+A chave exata combina:
+- Pergunta normalizada (caixa, acentos, espaços e pontuação final)
+- Versão do RAG
+- Parâmetros de busca (k, search_type)
+- Fingerprint do índice FAISS
+
+O cache semântico só compara perguntas com a mesma versão do RAG, parâmetros de
+busca, fingerprint e os mesmos artigos e números citados ("art. 74" e "art. 75"
+têm embeddings quase idênticos, mas respostas diferentes). Quando `/api/process` reescreve o índice o fingerprint muda,
+de modo que entradas antigas deixam de ser encontradas mesmo sem limpeza explícita.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from amldo.core.config import settings
+from amldo.rag.articles import parse_article_citations
+from amldo.rag.runtime import get_rag_runtime
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normaliza a pergunta para comparação exata.
+
+    Remove acentos, ignora caixa, colapsa espaços e descarta pontuação final,
+    de modo que "Qual o limite?" e "  qual o LIMITE " geram o mesmo texto.
+
+    Args:
+        question: Pergunta original
+
+    Returns:
+        Pergunta normalizada
+    """
+    text = unicodedata.normalize("NFKD", question)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"\s+", " ", text.casefold()).strip()
+    return text.rstrip(" ?!.;:")
+
+
+def question_specifics(question: str) -> str:
+    """
+    Extrai o que a similaridade de embedding não distingue: artigos e números citados.
+
+    Números são comparados sem separadores ("14.133" == "14133"); a ordem das
+    citações não importa.
+
+    Args:
+        question: Pergunta original
+
+    Returns:
+        Artigos e números citados, ordenados e separados por vírgula ("" se nenhum)
+    """
+    numbers = (re.sub(r"[.,]", "", n) for n in re.findall(r"\d+(?:[.,]\d+)*", question))
+    return ",".join(sorted(set(parse_article_citations(question)) | set(numbers)))
+
+
+def index_fingerprint(vector_db_path: Path, extra_files: Iterable[Path] = ()) -> str:
+    """
+    Calcula um fingerprint barato do índice FAISS salvo em disco.
+
+    Usa tamanho e mtime dos arquivos do índice (e das partições por lei em
+    `shards/`), sem lê-los.
+
+    Args:
+        vector_db_path: Diretório do vector store
+        extra_files: Outras fontes das respostas (ex: CSV de artigos 0 e
+            índice de artigos); ausentes são ignoradas
+
+    Returns:
+        Hash hexadecimal curto ("missing" se o índice não existir)
+    """
+    h = hashlib.sha1()
+    found = False
+    folder = Path(vector_db_path)
+    names = ["index.faiss", "docstore.sqlite", "index.pkl"]
+    for shard in sorted(folder.glob("shards/*/index.faiss")):
+        shard_dir = f"shards/{shard.parent.name}"
+        names += [f"{shard_dir}/index.faiss", f"{shard_dir}/docstore.sqlite"]
+    for name in names:
+        path = folder / name
+        if path.exists():
+            stat = path.stat()
+            h.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+            found = True
+    for path in extra_files:
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            continue
+        h.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return h.hexdigest()[:16] if found else "missing"
+
+
+class AnswerCache:
+    """
+    Cache LRU com TTL para respostas RAG, com persistência opcional em SQLite.
+
+    Thread-safe: usado tanto pelo executor RAG quanto pelo event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 86400,
+        db_path: Optional[Path] = None,
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Número máximo de respostas em memória
+            ttl_seconds: Validade de cada resposta em segundos
+            db_path: Banco SQLite para persistência (None = apenas memória)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = Path(db_path) if db_path else None
+
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        if self.db_path:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._init_db()
+
+    def _init_db(self):
+        """Cria a tabela de respostas persistidas."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS answer_cache (
+                key TEXT PRIMARY KEY,
+                rag_version TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    # =========================================================================
+    # Chave
+    # =========================================================================
+
+    @staticmethod
+    def make_key(
+        question: str, rag_version: str, k: int, search_type: str, fingerprint: str
+    ) -> str:
+        """
+        Monta a chave do cache.
+
+        Args:
+            question: Pergunta do usuário (será normalizada)
+            rag_version: Versão do RAG ("v1", "v2", "v3")
+            k: Número de documentos recuperados
+            search_type: Tipo de busca
+            fingerprint: Fingerprint do índice FAISS
+
+        Returns:
+            Hash SHA-256 hexadecimal
+        """
+        raw = json.dumps(
+            [normalize_question(question), rag_version, k, search_type, fingerprint],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # =========================================================================
+    # Operações
+    # =========================================================================
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Busca uma resposta válida no cache.
+
+        Args:
+            key: Chave gerada por `make_key`
+
+        Returns:
+            Resposta armazenada ou None (ausente ou expirada)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                answer, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return answer
+                del self._entries[key]
+
+        entry = self._db_get(key, now)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._store(key, *entry)
+            return entry[0]
+
+    def set(self, key: str, answer: str, rag_version: str = "") -> None:
+        """
+        Armazena uma resposta.
+
+        Args:
+            key: Chave gerada por `make_key`
+            answer: Resposta do LLM
+            rag_version: Versão do RAG (apenas informativo na persistência)
+        """
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, answer, expires_at)
+
+        if self.db_path:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute(
+                "INSERT OR REPLACE INTO answer_cache (key, rag_version, answer, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, rag_version, answer, expires_at),
+            )
+            conn.commit()
+            conn.close()
+
+    def clear(self) -> None:
+        """Remove todas as respostas (memória e SQLite)."""
+        with self._lock:
+            self._entries.clear()
+
+        if self.db_path:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("DELETE FROM answer_cache")
+            conn.commit()
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas de uso do cache.
+
+        Returns:
+            Dict com entries, max_entries, hits, misses e hit_rate
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0,
+                "persistent": self.db_path is not None,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # =========================================================================
+    # Internos
+    # =========================================================================
+
+    def _store(self, key: str, answer: str, expires_at: float) -> None:
+        """Insere no LRU em memória (lock já adquirido)."""
+        self._entries[key] = (answer, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _db_get(self, key: str, now: float) -> Optional[tuple[str, float]]:
+        """Busca uma resposta não expirada no SQLite."""
+        if not self.db_path:
+            return None
+
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT answer, expires_at FROM answer_cache WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        conn.close()
+        return (row[0], row[1]) if row else None
+
+
+class SemanticAnswerCache:
+    """
+    Cache de respostas por similaridade de embedding das perguntas.
+
+    Os embeddings (normalizados) ficam em uma matriz float32 pré-alocada usada
+    como buffer circular: acima de `max_entries`, as entradas mais antigas são
+    sobrescritas. A busca é um único produto matriz-vetor.
+
+    Cada grupo (`make_partition`) recebe um ID numérico enquanto alguma posição
+    do buffer o referenciar; ao ser sobrescrito pela última vez, o grupo é
+    esquecido, então o mapa de grupos também fica limitado a `max_entries`.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 512, ttl_seconds: float = 86400):
+        """
+        Inicializa o cache semântico.
+
+        Args:
+            threshold: Similaridade de cosseno mínima para reutilizar uma resposta
+            max_entries: Número máximo de perguntas armazenadas
+            ttl_seconds: Validade de cada resposta em segundos
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._partition_ids = np.full(max_entries, -1, dtype=np.int64)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._answers: list[Optional[str]] = [None] * max_entries
+        self._slot_partitions: list[Optional[str]] = [None] * max_entries
+        self._partitions: Dict[str, int] = {}
+        self._partition_refs: Dict[str, int] = {}
+        self._next_partition_id = 0
+        self._next = 0
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_partition(
+        rag_version: str, k: int, search_type: str, fingerprint: str, question: str = ""
+    ) -> str:
+        """
+        Monta o identificador do grupo de perguntas comparáveis entre si.
+
+        Perguntas só são comparáveis se citarem os mesmos artigos e números (ver
+        `question_specifics`).
+
+        Returns:
+            String com versão, parâmetros de busca, fingerprint do índice e
+            citações da pergunta
+        """
+        return f"{rag_version}|{k}|{search_type}|{fingerprint}|{question_specifics(question)}"
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def get(self, partition: str, vector) -> Optional[str]:
+        """
+        Busca a resposta da pergunta mais similar no mesmo grupo.
+
+        Args:
+            partition: Grupo gerado por `make_partition`
+            vector: Embedding da pergunta
+
+        Returns:
+            Resposta armazenada se a similaridade for >= threshold, senão None
+        """
+        vec = self._normalize(vector)
+        with self._lock:
+            pid = self._partitions.get(partition)
+            if pid is None or self._vectors is None:
+                self._misses += 1
+                return None
+
+            valid = (self._partition_ids == pid) & (self._expires_at > time.time())
+            if not valid.any():
+                self._misses += 1
+                return None
+
+            scores = np.where(valid, self._vectors @ vec, -np.inf)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            return self._answers[best]
+
+    def add(self, partition: str, vector, answer: str) -> None:
+        """
+        Armazena a resposta de uma pergunta.
+
+        Args:
+            partition: Grupo gerado por `make_partition`
+            vector: Embedding da pergunta
+            answer: Resposta do LLM
+        """
+        vec = self._normalize(vector)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+
+            slot = self._next
+            previous = self._slot_partitions[slot]
+            if previous is not None:
+                self._release(previous)
+
+            pid = self._partitions.get(partition)
+            if pid is None:
+                pid = self._partitions[partition] = self._next_partition_id
+                self._next_partition_id += 1
+            self._partition_refs[partition] = self._partition_refs.get(partition, 0) + 1
+
+            self._vectors[slot] = vec
+            self._partition_ids[slot] = pid
+            self._slot_partitions[slot] = partition
+            self._expires_at[slot] = time.time() + self.ttl_seconds
+            self._answers[slot] = answer
+            self._next = (slot + 1) % self.max_entries
+
+    def _release(self, partition: str) -> None:
+        """Desconta uma posição do grupo e o esquece quando nenhuma o referencia."""
+        refs = self._partition_refs[partition] - 1
+        if refs:
+            self._partition_refs[partition] = refs
+        else:
+            del self._partition_refs[partition]
+            del self._partitions[partition]
+
+    def clear(self) -> None:
+        """Remove todas as respostas."""
+        with self._lock:
+            self._partition_ids[:] = -1
+            self._answers = [None] * self.max_entries
+            self._slot_partitions = [None] * self.max_entries
+            self._partitions.clear()
+            self._partition_refs.clear()
+            self._next = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas de uso do cache.
+
+        Returns:
+            Dict com entries, max_entries, threshold, hits, misses e hit_rate
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": int((self._partition_ids >= 0).sum()),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            }
+
+
+# =============================================================================
+# Integração com as ferramentas RAG
+# =============================================================================
+
+
+def _embed_question(question: str) -> np.ndarray:
+    """Gera o embedding da pergunta com o modelo de consultas do runtime."""
+    return np.asarray(get_rag_runtime().embeddings.embed_query(question), dtype=np.float32)
+
+
+def _semantic_get(partition: str, question: str) -> tuple[Optional[str], np.ndarray]:
+    """Embeda a pergunta e consulta o cache semântico (etapa limitada por CPU)."""
+    vector = _embed_question(question)
+    return get_semantic_cache().get(partition, vector), vector
+
+
+def cached_answer(rag_version: str) -> Callable:
+    """
+    Decorator que consulta os caches antes de executar um pipeline `_rag_answer`.
+
+    Ordem: cache exato, depois cache semântico (se habilitado). Funciona com
+    funções síncronas e assíncronas de assinatura `(question, search_type, k)`;
+    `None` em search_type/k equivale aos valores de settings. Só respostas
+    bem-sucedidas são armazenadas.
+
+    Args:
+        rag_version: Versão do RAG que compõe a chave ("v1", "v2", "v3")
+
+    Returns:
+        Decorator
+    """
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+
+        def resolve(args, kwargs) -> tuple[str, str, str]:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = bound.arguments
+            k = params["k"] or settings.search_k
+            search_type = params["search_type"] or settings.search_type
+            # Conferido contra o índice em disco a cada chamada (inclusive em acertos)
+            fingerprint = get_rag_runtime().index_fingerprint
+
+            question = params["question"]
+            key = AnswerCache.make_key(question, rag_version, k, search_type, fingerprint)
+            partition = SemanticAnswerCache.make_partition(
+                rag_version, k, search_type, fingerprint, question
+            )
+            return question, key, partition
+
+        def exact_get(key: str) -> Optional[str]:
+            cache = get_answer_cache()
+            return cache.get(key) if cache is not None else None
+
+        def store(key: str, partition: str, vector, answer: str, exact: bool = True) -> None:
+            cache = get_answer_cache()
+            if exact and cache is not None:
+                cache.set(key, answer, rag_version)
+            semantic = get_semantic_cache()
+            if semantic is not None and vector is not None:
+                semantic.add(partition, vector, answer)
+
+        def lookup(args, kwargs) -> tuple[str, str, str, Optional[str]]:
+            question, key, partition = resolve(args, kwargs)
+            return question, key, partition, exact_get(key)
+
+        if inspect.iscoroutinefunction(fn):
+            # fingerprint (stat dos arquivos), SQLite do cache e embedding da
+            # pergunta rodam fora do event loop, mas fora do executor RAG: com
+            # ele saturado, perguntas já respondidas continuam sendo atendidas
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                question, key, partition, answer = await asyncio.to_thread(lookup, args, kwargs)
+                if answer is not None:
+                    return answer
+
+                vector = None
+                if get_semantic_cache() is not None:
+                    answer, vector = await asyncio.to_thread(_semantic_get, partition, question)
+                    if answer is not None:
+                        await asyncio.to_thread(store, key, partition, None, answer)
+                        return answer
+
+                answer = await fn(*args, **kwargs)
+                await asyncio.to_thread(store, key, partition, vector, answer)
+                return answer
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            question, key, partition, answer = lookup(args, kwargs)
+            if answer is not None:
+                return answer
+
+            vector = None
+            if get_semantic_cache() is not None:
+                answer, vector = _semantic_get(partition, question)
+                if answer is not None:
+                    store(key, partition, None, answer)
+                    return answer
+
+            answer = fn(*args, **kwargs)
+            store(key, partition, vector, answer)
+            return answer
+
+        return wrapper
+
+    return decorator
+
+
+# =============================================================================
+# Singleton e Funções Helper
+# =============================================================================
+
+_answer_cache: Optional[AnswerCache] = None
+_semantic_cache: Optional[SemanticAnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """
+    Retorna o cache de respostas singleton, configurado via settings.
+
+    Returns:
+        Instância do AnswerCache, ou None se `answer_cache_enabled` for False
+    """
+    global _answer_cache
+    if not settings.answer_cache_enabled:
+        return None
+    if _answer_cache is None:
+        with _cache_lock:
+            if _answer_cache is None:
+                db_path = None
+                if settings.answer_cache_persist:
+                    db_path = settings.data_dir / "metrics" / "answer_cache.db"
+                _answer_cache = AnswerCache(
+                    max_entries=settings.answer_cache_max_entries,
+                    ttl_seconds=settings.answer_cache_ttl_seconds,
+                    db_path=db_path,
+                )
+    return _answer_cache
+
+
+def get_semantic_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Retorna o cache semântico singleton, configurado via settings.
+
+    Returns:
+        Instância do SemanticAnswerCache, ou None se `semantic_cache_enabled` for False
+    """
+    global _semantic_cache
+    if not settings.semantic_cache_enabled:
+        return None
+    if _semantic_cache is None:
+        with _cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticAnswerCache(
+                    threshold=settings.semantic_cache_threshold,
+                    max_entries=settings.semantic_cache_max_entries,
+                    ttl_seconds=settings.answer_cache_ttl_seconds,
+                )
+    return _semantic_cache
+
+
+def clear_answer_caches() -> None:
+    """Esvazia os caches de respostas (chamado quando o índice é reescrito)."""
+    for cache in (get_answer_cache(), get_semantic_cache()):
+        if cache is not None:
+            cache.clear()
+
+
+def reset_answer_cache() -> None:
+    """Descarta as instâncias singleton dos caches de respostas (usado em testes)."""
+    global _answer_cache, _semantic_cache
+    with _cache_lock:
+        _answer_cache = None
+        _semantic_cache = None
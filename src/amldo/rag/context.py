@@ -0,0 +1,348 @@
+"""
+Montagem do contexto hierárquico dos RAGs v2 e v3.
+
+O contexto enviado ao LLM agrupa os chunks recuperados em
+Lei → Título → Capítulo → Artigo e injeta os "artigos 0" (introduções de
+títulos e capítulos):
+
+    <LEI L14133>
+    [artigo 0 do título]
+    <TITULO: TITULO_II>
+    [artigo 0 do capítulo]
+    <CAPITULO: CAPITULO_III>
+    <ARTIGO: artigo_15>
+    [texto do chunk]
+    </ARTIGO: artigo_15>
+    </CAPITULO: CAPITULO_III>
+    </TITULO: TITULO_II>
+    </LEI L14133>
+
+A árvore de artigos 0 é pré-computada uma única vez (HierarchyIndex) e o
+renderizador agrupa os chunks em dicts aninhados e gera o texto com um único
+`"".join`, sem DataFrames, máscaras booleanas ou concatenação repetida.
+
+A árvore é persistida em JSON compacto ao lado do CSV de artigos 0
+(`load_hierarchy_index`), de modo que a API não precisa de pandas para
+carregá-la.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+# Versão do formato JSON da árvore de artigos 0
+INDEX_FORMAT_VERSION = 1
+
+# Chaves de ordenação hierárquica dos chunks recuperados
+HIERARCHY_KEYS = ("lei", "titulo", "capitulo", "artigo", "chunk_idx")
+
+# Campos que identificam um dispositivo (usados nas fontes)
+SOURCE_KEYS = ("lei", "titulo", "capitulo", "artigo")
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _sort_key(row: Mapping[str, Any]) -> tuple:
+    """Chave de ordenação equivalente a `sort_values(HIERARCHY_KEYS)` (ausentes por último)."""
+    key = []
+    for name in HIERARCHY_KEYS:
+        value = row.get(name)
+        missing = _is_missing(value)
+        key.append((missing, None if missing else value))
+    return tuple(key)
+
+
+def documents_to_rows(documents: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Converte documentos LangChain em linhas ordenadas hierarquicamente.
+
+    Args:
+        documents: Documentos recuperados do FAISS
+
+    Returns:
+        Lista de dicts {"texto": ..., **metadata} ordenada por Lei/Título/Capítulo/Artigo/chunk
+    """
+    rows = [{"texto": doc.page_content, **doc.metadata} for doc in documents]
+    return sort_rows(rows)
+
+
+def sort_rows(rows: Iterable[Mapping[str, Any]]) -> List[Mapping[str, Any]]:
+    """
+    Ordena linhas por Lei/Título/Capítulo/Artigo/chunk_idx.
+
+    Args:
+        rows: Linhas com texto e metadados
+
+    Returns:
+        Nova lista ordenada
+    """
+    return sorted(rows, key=_sort_key)
+
+
+def get_sources(rows: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Lista os dispositivos (Lei/Título/Capítulo/Artigo) presentes nas linhas.
+
+    Args:
+        rows: Linhas ordenadas (ver `documents_to_rows`)
+
+    Returns:
+        Lista de dicts com lei, titulo, capitulo e artigo, sem duplicatas,
+        na mesma ordem hierárquica do contexto
+    """
+    seen = set()
+    sources = []
+    for row in rows:
+        source = {}
+        for name in SOURCE_KEYS:
+            value = row.get(name)
+            source[name] = None if _is_missing(value) else value
+        if source["artigo"] is not None:
+            source["artigo"] = source["artigo"].replace(".txt", "")
+
+        key = tuple(source.values())
+        if key not in seen:
+            seen.add(key)
+            sources.append(source)
+    return sources
+
+
+class HierarchyIndex:
+    """
+    Árvore Lei → Título → Capítulo pré-computada com os textos dos artigos 0.
+
+    Construída uma vez (no carregamento do runtime) e compartilhada por todas as
+    consultas; a renderização só faz buscas em dicts.
+    """
+
+    def __init__(self, art_0: Mapping[tuple, str]):
+        """
+        Inicializa a árvore.
+
+        Args:
+            art_0: Mapeamento (lei, titulo, capitulo) → texto do artigo 0
+        """
+        self.tree: Dict[str, Dict[str, Dict[str, str]]] = {}
+        for (lei, titulo, capitulo), texto in art_0.items():
+            self.tree.setdefault(lei, {}).setdefault(titulo, {})[capitulo] = texto
+
+    @classmethod
+    def _from_rows(cls, rows: Iterable[tuple]) -> "HierarchyIndex":
+        """Cria a árvore a partir de tuplas (lei, titulo, capitulo, texto)."""
+        grouped: Dict[tuple, List[str]] = {}
+        for lei, titulo, capitulo, texto in rows:
+            if _is_missing(texto):
+                texto = ""
+            grouped.setdefault((lei, titulo, capitulo), []).append(str(texto))
+        return cls({key: "\n".join(textos) for key, textos in grouped.items()})
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "HierarchyIndex":
+        """
+        Cria a árvore a partir do CSV de artigos 0, sem pandas.
+
+        Args:
+            path: CSV com colunas lei, titulo, capitulo e texto
+
+        Returns:
+            HierarchyIndex
+
+        Raises:
+            FileNotFoundError: Se o CSV não existir
+        """
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            return cls._from_rows(
+                (row["lei"], row["titulo"], row["capitulo"], row["texto"]) for row in reader
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "HierarchyIndex":
+        """
+        Carrega a árvore do JSON compacto gerado por `save`.
+
+        Args:
+            path: Arquivo JSON
+
+        Returns:
+            HierarchyIndex
+
+        Raises:
+            ValueError: Se o arquivo tiver formato incompatível
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Formato de índice de artigos 0 não suportado: {path}")
+
+        index = cls({})
+        index.tree = data["tree"]
+        return index
+
+    def save(self, path: Path) -> None:
+        """
+        Salva a árvore como JSON compacto (escrita atômica).
+
+        Args:
+            path: Arquivo JSON de destino
+        """
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": INDEX_FORMAT_VERSION, "tree": self.tree},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return sum(
+            len(capitulos) for titulos in self.tree.values() for capitulos in titulos.values()
+        )
+
+    @classmethod
+    def from_dataframe(cls, df_art_0) -> "HierarchyIndex":
+        """
+        Cria a árvore a partir do DataFrame de artigos 0 (colunas lei, titulo, capitulo, texto).
+
+        Textos do mesmo (lei, titulo, capitulo) são unidos por quebra de linha,
+        na ordem do arquivo.
+
+        Args:
+            df_art_0: DataFrame com artigos 0
+
+        Returns:
+            HierarchyIndex
+        """
+        return cls._from_rows(
+            zip(
+                df_art_0["lei"],
+                df_art_0["titulo"],
+                df_art_0["capitulo"],
+                df_art_0["texto"],
+                strict=True,
+            )
+        )
+
+    def get_art_0(self, lei: str, titulo: str, capitulo: str) -> Optional[str]:
+        """
+        Obtém o texto do artigo 0 de um título/capítulo.
+
+        Args:
+            lei: Lei (ex: "L14133")
+            titulo: Título (ex: "TITULO_II")
+            capitulo: Capítulo (ex: "CAPITULO_III"); "CAPITULO_0" para o título
+
+        Returns:
+            Texto do artigo 0 ou None se não existir
+        """
+        return self.tree.get(lei, {}).get(titulo, {}).get(capitulo)
+
+    def render(self, rows: Iterable[Mapping[str, Any]]) -> str:
+        """
+        Renderiza o contexto hierárquico para linhas já ordenadas.
+
+        Args:
+            rows: Linhas ordenadas (ver `documents_to_rows`)
+
+        Returns:
+            Contexto estruturado em XML
+        """
+        # Agrupamento Lei → Título → Capítulo → Artigo → [textos]
+        grouped: Dict[Any, Dict[Any, Dict[Any, Dict[Any, List[str]]]]] = {}
+        for row in rows:
+            (
+                grouped.setdefault(row.get("lei"), {})
+                .setdefault(row.get("titulo"), {})
+                .setdefault(row.get("capitulo"), {})
+                .setdefault(row.get("artigo"), [])
+                .append(row["texto"])
+            )
+
+        parts: List[str] = []
+        append = parts.append
+        for lei, titulos in grouped.items():
+            append(f"\n\n<LEI {lei}>\n")
+            art_0_lei = self.tree.get(lei, {})
+
+            for titulo, capitulos in titulos.items():
+                art_0_titulo = art_0_lei.get(titulo, {})
+
+                # Artigo 0 no nível de título
+                art_0 = art_0_titulo.get("CAPITULO_0")
+                if art_0:
+                    append(f"{art_0}\n")
+
+                if titulo != "TITULO_0":
+                    append(f"<TITULO: {titulo}>\n")
+
+                for capitulo, artigos in capitulos.items():
+                    # Artigo 0 no nível de capítulo
+                    art_0 = art_0_titulo.get(capitulo)
+                    if art_0:
+                        append(f"{art_0}\n")
+
+                    if capitulo != "CAPITULO_0":
+                        append(f"<CAPITULO: {capitulo}>\n")
+
+                    for artigo, textos in artigos.items():
+                        nome = str(artigo).replace(".txt", "")
+                        append(f"<ARTIGO: {nome}>\n")
+                        for texto in textos:
+                            append(f"{texto}\n")
+                        append(f"</ARTIGO: {nome}>\n")
+
+                    if capitulo != "CAPITULO_0":
+                        append(f"</CAPITULO: {capitulo}>\n")
+
+                if titulo != "TITULO_0":
+                    append(f"</TITULO: {titulo}>\n")
+
+            append(f"</LEI {lei}>\n")
+
+        return "".join(parts).replace("\n[[SECTION:", "[[SECTION:")
+
+
+def load_hierarchy_index(csv_path: Path, index_path: Path) -> HierarchyIndex:
+    """
+    Carrega a árvore de artigos 0, preferindo o JSON compacto.
+
+    O JSON é usado se existir e não for mais antigo que o CSV; caso contrário a
+    árvore é reconstruída a partir do CSV e o JSON é regravado (se possível).
+
+    Args:
+        csv_path: CSV de artigos 0 (fonte)
+        index_path: JSON compacto da árvore
+
+    Returns:
+        HierarchyIndex
+
+    Raises:
+        FileNotFoundError: Se nem o JSON nem o CSV existirem
+    """
+    csv_path, index_path = Path(csv_path), Path(index_path)
+
+    if index_path.exists() and (
+        not csv_path.exists() or index_path.stat().st_mtime >= csv_path.stat().st_mtime
+    ):
+        try:
+            return HierarchyIndex.load(index_path)
+        except (ValueError, KeyError, json.JSONDecodeError):
+            if not csv_path.exists():
+                raise
+
+    index = HierarchyIndex.from_csv(csv_path)
+    try:
+        index.save(index_path)
+    except OSError:
+        pass
+    return index
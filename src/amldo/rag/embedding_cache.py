@@ -0,0 +1,192 @@
+"""
+Cache LRU de embeddings de consultas.
+
+Cada chamada `retriever.invoke(question)` passa a pergunta pelo transformer, mesmo
+quando a mesma string acabou de ser embedada por outra versão do RAG, por um
+retry ou pelo cache semântico. Este módulo envolve o modelo de embedding do
+runtime com um LRU limitado por número de entradas e por memória, compartilhado
+pelos RAGs v1, v2 e v3.
+
+Apenas `embed_query` é cacheado; `embed_documents` (indexação) é repassado
+diretamente ao modelo.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from amldo.core.config import settings
+
+
+class QueryEmbeddingCache:
+    """
+    LRU thread-safe de texto → embedding (float32).
+
+    Descarta as entradas menos usadas quando excede `max_entries` ou
+    `max_bytes` (somando vetores e textos das chaves).
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Número máximo de embeddings armazenados
+            max_bytes: Orçamento de memória em bytes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _entry_size(text: str, vector: np.ndarray) -> int:
+        return vector.nbytes + len(text.encode("utf-8"))
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Busca o embedding de um texto.
+
+        Args:
+            text: Texto da consulta (comparação exata)
+
+        Returns:
+            Embedding armazenado ou None
+        """
+        with self._lock:
+            vector = self._entries.get(text)
+            if vector is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(text)
+            self._hits += 1
+            return vector
+
+    def put(self, text: str, vector) -> None:
+        """
+        Armazena o embedding de um texto.
+
+        Args:
+            text: Texto da consulta
+            vector: Embedding (qualquer sequência numérica)
+        """
+        vec = np.asarray(vector, dtype=np.float32)
+        vec.setflags(write=False)
+        size = self._entry_size(text, vec)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(text, None)
+            if old is not None:
+                self._bytes -= self._entry_size(text, old)
+
+            self._entries[text] = vec
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                evicted_text, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(evicted_text, evicted)
+
+    def clear(self) -> None:
+        """Remove todos os embeddings."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas de uso do cache.
+
+        Returns:
+            Dict com entries, max_entries, bytes, max_bytes, hits, misses e hit_rate
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wrapper de `Embeddings` do LangChain que cacheia `embed_query`.
+
+    Pode ser passado a `FAISS.load_local` / `FAISS.from_documents` no lugar do
+    modelo original.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: QueryEmbeddingCache):
+        """
+        Args:
+            embeddings: Modelo de embedding original
+            cache: Cache de embeddings de consultas
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_query(self, text: str) -> List[float]:
+        """Retorna o embedding da consulta, usando o cache quando possível."""
+        vector = self.cache.get(text)
+        if vector is None:
+            vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+            self.cache.put(text, vector)
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Repassa a indexação de documentos ao modelo original (sem cache)."""
+        return self.embeddings.embed_documents(texts)
+
+    def __repr__(self) -> str:
+        return f"CachedQueryEmbeddings({self.embeddings!r}, entries={len(self.cache)})"
+
+
+# =============================================================================
+# Singleton e Funções Helper
+# =============================================================================
+
+_query_embedding_cache: Optional[QueryEmbeddingCache] = None
+_query_embedding_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """
+    Retorna o cache singleton de embeddings de consultas, configurado via settings.
+
+    Returns:
+        Instância do QueryEmbeddingCache
+    """
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        with _query_embedding_cache_lock:
+            if _query_embedding_cache is None:
+                _query_embedding_cache = QueryEmbeddingCache(
+                    max_entries=settings.query_embedding_cache_size,
+                    max_bytes=int(settings.query_embedding_cache_max_mb * 1024 * 1024),
+                )
+    return _query_embedding_cache
+
+
+def reset_query_embedding_cache() -> None:
+    """Descarta a instância singleton (usado em testes)."""
+    global _query_embedding_cache
+    with _query_embedding_cache_lock:
+        _query_embedding_cache = None
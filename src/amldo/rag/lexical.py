@@ -0,0 +1,409 @@
+"""
+Busca lexical (BM25) e busca híbrida com reciprocal rank fusion.
+
+Perguntas jurídicas dependem de tokens exatos ("art. 75", "inciso II",
+"R$ 50.000") que o embedding MiniLM aproxima de artigos vizinhos. Este módulo
+mantém um índice invertido BM25 sobre os mesmos chunks do vector store
+(posição i do BM25 = posição i do índice FAISS), gravado ao lado dele:
+
+    <vector_db_path>/bm25.npz
+
+Os pesos BM25 de cada par (termo, documento) são calculados na indexação;
+uma consulta só soma as listas dos seus termos (alguns microssegundos por
+termo), sem percorrer o corpus.
+
+`search_type="hybrid"` combina a busca densa (FAISS) e a lexical pela
+reciprocal rank fusion: score(d) = Σ 1 / (hybrid_rrf_k + posição de d em
+cada lista), sobre os `hybrid_fetch_k` primeiros de cada busca.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, Field
+
+from amldo.core.config import settings
+
+# Arquivo do índice BM25 dentro do vector store
+LEXICAL_FILE = "bm25.npz"
+
+# Parâmetros do BM25 (saturação da frequência e normalização pelo tamanho)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    "a as o os ao aos de da das do dos e em na nas no nos um uma uns umas por pela pelas "
+    "pelo pelos para com sem que se ou como mais seu sua seus suas ser sao foi qual quais "
+    "quando onde".split()
+)
+
+# "14.133" → "14133", "R$ 50.000" → "50000"
+_THOUSANDS = re.compile(r"(?<=\d)\.(?=\d{3}(?!\d))")
+# "1º", "2°" → "1", "2"
+_ORDINAL = re.compile(r"(?<=\d)[o°](?![a-z])")
+# Citações de dispositivo viram um token próprio: "art. 75" → "art_75", "§ 2º" → "par_2"
+_CITATION = re.compile(r"(?:\b(art)(?:igo)?s?\b\.?|(§)|\b(par)agrafo\b)\s*(\d+)")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide um texto em termos para o BM25.
+
+    Minúsculas, sem acentos e sem stopwords; números sem separador de milhar e
+    sem indicador ordinal; citações de artigo e parágrafo geram também um termo
+    composto ("art_75"), que distingue "art. 75" de um 75 qualquer.
+
+    Args:
+        text: Texto do chunk ou da pergunta
+
+    Returns:
+        Lista de termos (com repetições)
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _ORDINAL.sub("", _THOUSANDS.sub("", text))
+
+    terms = [t for t in _TOKEN.findall(text) if t not in STOPWORDS]
+    for match in _CITATION.finditer(text):
+        kind = "art" if match.group(1) else "par"
+        terms.append(f"{kind}_{match.group(4)}")
+    return terms
+
+
+# =============================================================================
+# Índice BM25
+# =============================================================================
+
+
+class BM25Index:
+    """
+    Índice invertido com pesos BM25 pré-calculados.
+
+    Listas de postings no formato CSR: os documentos do termo t são
+    `doc_ids[indptr[t]:indptr[t + 1]]`, com pesos em `weights`.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Sequence[str],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        weights: np.ndarray,
+        size: int,
+    ):
+        """
+        Args:
+            vocabulary: Termos, na ordem dos IDs de termo
+            indptr: Início das postings de cada termo (len(vocabulary) + 1)
+            doc_ids: Posições dos documentos (int32)
+            weights: Peso BM25 de cada posting (float32)
+            size: Número de documentos
+        """
+        self.terms = {term: i for i, term in enumerate(vocabulary)}
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.size = size
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        """
+        Indexa os textos (o i-ésimo texto recebe a posição i).
+
+        Args:
+            texts: Textos dos documentos, em ordem de posição
+            k1: Saturação da frequência do termo
+            b: Peso da normalização pelo tamanho do documento
+
+        Returns:
+            BM25Index
+        """
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for pos, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((pos, tf))
+
+        size = len(lengths)
+        lengths_arr = np.asarray(lengths, dtype=np.float32)
+        avg_length = float(lengths_arr.mean()) if size else 0.0
+        norm = k1 * (1 - b + b * lengths_arr / max(avg_length, 1.0))
+
+        vocabulary = sorted(postings)
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        doc_ids, weights = [], []
+        for i, term in enumerate(vocabulary):
+            docs = np.fromiter((p for p, _ in postings[term]), dtype=np.int32)
+            tf = np.fromiter((t for _, t in postings[term]), dtype=np.float32)
+            idf = np.log1p((size - len(docs) + 0.5) / (len(docs) + 0.5))
+            doc_ids.append(docs)
+            weights.append((idf * tf * (k1 + 1) / (tf + norm[docs])).astype(np.float32))
+            indptr[i + 1] = indptr[i] + len(docs)
+
+        return cls(
+            vocabulary,
+            indptr,
+            np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype=np.int32),
+            np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32),
+            size,
+        )
+
+    def search(
+        self, query: str, n: Optional[int] = None, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca os documentos com maior score BM25 para a consulta.
+
+        Args:
+            query: Texto da consulta
+            n: Número de resultados (None = todos com score > 0)
+            mask: Máscara booleana (size,) das posições permitidas
+
+        Returns:
+            Tupla (posições, scores), em ordem decrescente de score
+        """
+        ids = [self.terms[t] for t in set(tokenize(query)) if t in self.terms]
+        if not ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        docs = np.concatenate([self.doc_ids[self.indptr[t] : self.indptr[t + 1]] for t in ids])
+        weights = np.concatenate([self.weights[self.indptr[t] : self.indptr[t + 1]] for t in ids])
+        if mask is not None:
+            keep = mask[docs]
+            docs, weights = docs[keep], weights[keep]
+
+        positions, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        if n is not None and len(scores) > n:
+            top = np.argpartition(-scores, n - 1)[:n]
+            positions, scores = positions[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return positions[order].astype(np.int64), scores[order]
+
+    def save(self, path: Path) -> None:
+        """
+        Grava o índice em um .npz (escrita atômica).
+
+        Args:
+            path: Caminho do arquivo
+        """
+        path = Path(path)
+        vocabulary = np.array(sorted(self.terms, key=self.terms.get), dtype=str)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".npz", dir=path.parent)
+        os.close(fd)
+        try:
+            np.savez(
+                tmp_name,
+                vocabulary=vocabulary,
+                indptr=self.indptr,
+                doc_ids=self.doc_ids,
+                weights=self.weights,
+                size=np.array(self.size),
+            )
+            os.replace(tmp_name, path)
+        finally:
+            Path(tmp_name).unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        """
+        Lê um índice gravado por `save`.
+
+        Args:
+            path: Caminho do arquivo
+
+        Returns:
+            BM25Index
+        """
+        with np.load(path) as data:
+            return cls(
+                data["vocabulary"].tolist(),
+                data["indptr"],
+                data["doc_ids"],
+                data["weights"],
+                int(data["size"]),
+            )
+
+
+def build_lexical_index(vector_db: Any) -> BM25Index:
+    """
+    Indexa no BM25 os documentos de um vector store LangChain FAISS.
+
+    Args:
+        vector_db: Instância de `langchain_community.vectorstores.FAISS`
+
+    Returns:
+        BM25Index alinhado às posições do índice FAISS
+    """
+    mapping = vector_db.index_to_docstore_id
+    return BM25Index.build(
+        vector_db.docstore.search(mapping[pos]).page_content
+        for pos in range(vector_db.index.ntotal)
+    )
+
+
+# =============================================================================
+# Busca lexical sobre o vector store
+# =============================================================================
+
+
+class LexicalIndex:
+    """BM25 com os documentos e filtros de metadados do vector store."""
+
+    def __init__(self, bm25: BM25Index, docstore: Any, index_to_docstore_id: Any):
+        """
+        Args:
+            bm25: Índice BM25 (posições = posições do índice FAISS)
+            docstore: Docstore do vector store
+            index_to_docstore_id: Mapeamento posição → chave no docstore
+        """
+        self.bm25 = bm25
+        self.docstore = docstore
+        self.index_to_docstore_id = index_to_docstore_id
+        self._metadata_index = None
+        self._lock = threading.Lock()
+
+    @property
+    def metadata_index(self):
+        """Índice invertido de metadados para os filtros (montado sob demanda)."""
+        if self._metadata_index is None:
+            from amldo.rag.metadata_filter import MetadataIndex
+
+            with self._lock:
+                if self._metadata_index is None:
+                    self._metadata_index = MetadataIndex.from_docstore(
+                        self.bm25.size, self.docstore, self.index_to_docstore_id
+                    )
+        return self._metadata_index
+
+    def search(self, query: str, n: int, search_filter: Any = None) -> List[Document]:
+        """
+        Busca os n documentos com maior score BM25.
+
+        Args:
+            query: Pergunta
+            n: Número de documentos
+            search_filter: Filtro de metadados no formato do LangChain FAISS
+
+        Returns:
+            Documentos em ordem decrescente de score
+        """
+        mask, keep = None, None
+        if search_filter is not None:
+            mask = None if callable(search_filter) else self.metadata_index.mask(search_filter)
+            if mask is None:
+                from langchain_community.vectorstores import FAISS
+
+                keep = FAISS._create_filter_func(search_filter)
+
+        positions, _ = self.bm25.search(query, n if keep is None else None, mask)
+        docs = []
+        for pos in positions:
+            doc = self.docstore.search(self.index_to_docstore_id[int(pos)])
+            if keep is not None and not keep(doc.metadata):
+                continue
+            docs.append(doc)
+            if len(docs) == n:
+                break
+        return docs
+
+
+def load_lexical_index(folder: Path) -> LexicalIndex:
+    """
+    Carrega o índice BM25 do vector store, indexando os documentos se preciso.
+
+    O `bm25.npz` é refeito (e gravado, se o diretório permitir) quando não
+    existe, é mais antigo que o docstore ou tem outro número de documentos.
+
+    Args:
+        folder: Diretório do vector store
+
+    Returns:
+        LexicalIndex sobre o `docstore.sqlite` do vector store
+    """
+    from amldo.rag.vector_store import PositionMap, SQLiteDocstore, docstore_path
+
+    folder = Path(folder)
+    sqlite_path = docstore_path(folder)
+    docstore = SQLiteDocstore(sqlite_path)
+    size = len(docstore)
+
+    path = folder / LEXICAL_FILE
+    bm25 = None
+    if path.exists() and path.stat().st_mtime_ns >= sqlite_path.stat().st_mtime_ns:
+        bm25 = BM25Index.load(path)
+        if bm25.size != size:
+            bm25 = None
+    if bm25 is None:
+        bm25 = BM25Index.build(text for _, text in docstore.iter_texts())
+        try:
+            bm25.save(path)
+        except OSError:
+            pass  # Diretório somente leitura: usa o índice em memória
+    return LexicalIndex(bm25, docstore, PositionMap(size))
+
+
+# =============================================================================
+# Busca híbrida
+# =============================================================================
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]], k: int, rrf_k: int = 60
+) -> List[Document]:
+    """
+    Combina listas ordenadas de documentos pela reciprocal rank fusion.
+
+    Args:
+        rankings: Resultados de cada busca, do mais ao menos relevante
+        k: Número de documentos a retornar
+        rrf_k: Constante de suavização (maior = menos peso para o topo de cada lista)
+
+    Returns:
+        Os k documentos com maior Σ 1 / (rrf_k + posição)
+    """
+    scores: Dict[Any, float] = {}
+    docs: Dict[Any, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in best]
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever que funde a busca densa (FAISS) e a lexical (BM25) por RRF."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_db: Any
+    lexical: Any
+    k: int = 4
+    search_filter: Optional[dict] = None
+    fetch_k: int = Field(default_factory=lambda: settings.hybrid_fetch_k)
+    rrf_k: int = Field(default_factory=lambda: settings.hybrid_rrf_k)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        fetch_k = max(self.fetch_k, self.k)
+        dense = self.vector_db.similarity_search(query, k=fetch_k, filter=self.search_filter)
+        lexical = self.lexical.search(query, fetch_k, self.search_filter)
+        return reciprocal_rank_fusion([dense, lexical], self.k, self.rrf_k)
@@ -0,0 +1,297 @@
+"""
+Pré-filtro de metadados para a busca no FAISS.
+
+O `FAISS` do LangChain aplica `filter` depois da busca: recupera `fetch_k`
+candidatos, lê cada documento e descarta os que não passam no filtro. Com isso
+a busca pontua linhas que serão descartadas e, se muitas forem excluídas,
+retorna menos de `k` documentos.
+
+Este módulo mantém um índice invertido (valor → posições no índice FAISS) dos
+campos `lei`, `titulo`, `capitulo` e `artigo` e converte o filtro em um
+`faiss.IDSelectorBitmap`, passado para a busca: só as linhas permitidas são
+pontuadas, para qualquer `k`. Exemplos de filtros atendidos:
+
+    {"artigo": {"$nin": ["artigo_0.txt"]}}      # exclui os artigos 0
+    {"lei": "L14133"}                           # só a Lei 14.133
+    {"lei": {"$in": ["L14133", "D10024"]}, "titulo": "TITULO_II"}
+
+Filtros com outros campos ou operadores (ou callables) seguem pelo pós-filtro
+padrão do LangChain.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from amldo.rag.mmr import mmr_search_with_score_by_vector
+
+# Campos de metadados indexados
+FILTER_FIELDS = ("lei", "titulo", "capitulo", "artigo")
+
+# Seletores guardados por vector store (um por filtro distinto)
+MAX_CACHED_SELECTORS = 64
+
+
+class MetadataIndex:
+    """
+    Índice invertido campo → valor → posições no índice FAISS.
+
+    Os filtros suportados são conjunções de condições por campo: valor exato,
+    lista de valores, ou operadores `$eq`, `$neq`, `$in`, `$nin`.
+    """
+
+    def __init__(self, size: int, postings: Dict[str, Dict[Any, np.ndarray]]):
+        """
+        Args:
+            size: Número de vetores no índice FAISS
+            postings: {campo: {valor: posições (int64, ordenadas)}}
+        """
+        self.size = size
+        self.postings = postings
+        self._selectors: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, size: int, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> "MetadataIndex":
+        """
+        Monta o índice a partir de (posição, metadados) de cada documento.
+
+        Args:
+            size: Número de vetores no índice FAISS
+            rows: Pares (posição no índice, metadados)
+
+        Returns:
+            MetadataIndex
+        """
+        lists: Dict[str, Dict[Any, list]] = {field: {} for field in FILTER_FIELDS}
+        for pos, metadata in rows:
+            for field in FILTER_FIELDS:
+                lists[field].setdefault(metadata.get(field), []).append(pos)
+
+        postings = {
+            field: {value: np.sort(np.asarray(p, dtype=np.int64)) for value, p in values.items()}
+            for field, values in lists.items()
+        }
+        return cls(size, postings)
+
+    @classmethod
+    def from_vector_store(cls, vector_db) -> "MetadataIndex":
+        """
+        Monta o índice a partir do docstore de um vector store LangChain FAISS.
+
+        Args:
+            vector_db: Instância de `langchain_community.vectorstores.FAISS`
+
+        Returns:
+            MetadataIndex
+        """
+        return cls.from_docstore(
+            vector_db.index.ntotal, vector_db.docstore, vector_db.index_to_docstore_id
+        )
+
+    @classmethod
+    def from_docstore(cls, size: int, docstore, index_to_docstore_id) -> "MetadataIndex":
+        """
+        Monta o índice a partir de um docstore e do mapeamento posição → ID.
+
+        Com o `SQLiteDocstore` lê só as colunas de metadados, sem montar Documents.
+
+        Args:
+            size: Número de vetores no índice FAISS
+            docstore: Docstore do LangChain
+            index_to_docstore_id: Mapeamento posição no índice → chave no docstore
+
+        Returns:
+            MetadataIndex
+        """
+        if hasattr(docstore, "iter_metadata"):
+            return cls.from_rows(size, docstore.iter_metadata(FILTER_FIELDS))
+
+        def rows():
+            for pos, doc_id in index_to_docstore_id.items():
+                yield pos, docstore.search(doc_id).metadata
+
+        return cls.from_rows(size, rows())
+
+    def mask(self, search_filter: Any) -> Optional[np.ndarray]:
+        """
+        Converte um filtro em uma máscara booleana por posição.
+
+        Args:
+            search_filter: Filtro no formato do LangChain FAISS
+
+        Returns:
+            Máscara (size,) com as posições permitidas, ou None se o filtro não
+            for suportado pelo índice (usa-se o pós-filtro do LangChain)
+        """
+        if not isinstance(search_filter, dict) or not search_filter:
+            return None
+
+        allowed = np.ones(self.size, dtype=bool)
+        for field, condition in search_filter.items():
+            if field not in self.postings:
+                return None
+            if not isinstance(condition, dict):
+                condition = {"$in" if isinstance(condition, list) else "$eq": condition}
+            for op, value in condition.items():
+                if op in ("$eq", "$neq"):
+                    values = [value]
+                elif op in ("$in", "$nin") and isinstance(value, (list, tuple, set)):
+                    values = list(value)
+                else:
+                    return None
+                matches = self._positions(field, values)
+                if op in ("$eq", "$in"):
+                    allowed &= matches
+                else:
+                    allowed &= ~matches
+        return allowed
+
+    def selector(self, search_filter: Any) -> Optional[Tuple[Any, int]]:
+        """
+        Retorna um seletor de IDs do FAISS para o filtro (com cache por filtro).
+
+        Args:
+            search_filter: Filtro no formato do LangChain FAISS
+
+        Returns:
+            Tupla (faiss.IDSelectorBitmap, posições permitidas), ou None se o
+            filtro não for suportado
+        """
+        try:
+            key = json.dumps(search_filter, sort_keys=True)
+        except TypeError:
+            return None
+
+        with self._lock:
+            cached = self._selectors.get(key)
+            if cached is not None:
+                self._selectors.move_to_end(key)
+                return cached
+
+        allowed = self.mask(search_filter)
+        if allowed is None:
+            return None
+
+        import faiss
+
+        # O seletor guarda só o ponteiro: o bitmap vive enquanto o seletor viver,
+        # mesmo depois de a entrada sair do cache no meio de uma busca
+        bitmap = np.packbits(allowed, bitorder="little")
+        selector = faiss.IDSelectorBitmap(self.size, faiss.swig_ptr(bitmap))
+        selector.referenced_bitmap = bitmap
+        count = int(allowed.sum())
+        with self._lock:
+            self._selectors[key] = (selector, count)
+            if len(self._selectors) > MAX_CACHED_SELECTORS:
+                self._selectors.popitem(last=False)
+        return selector, count
+
+    def _positions(self, field: str, values: list) -> np.ndarray:
+        matches = np.zeros(self.size, dtype=bool)
+        for value in values:
+            positions = self.postings[field].get(value)
+            if positions is not None:
+                matches[positions] = True
+        return matches
+
+
+class _SelectedIndex:
+    """Índice FAISS com parâmetros de busca fixos (ex: seletor de IDs)."""
+
+    def __init__(self, index, params, selector=None):
+        self._index = index
+        self._params = params
+        # `params` referencia o seletor só no lado C++; mantém o objeto Python vivo
+        self._selector = selector
+
+    def search(self, x, k):
+        return self._index.search(x, k, params=self._params)
+
+    def __getattr__(self, name):
+        return getattr(self._index, name)
+
+
+class PrefilteredFAISS(FAISS):
+    """
+    `FAISS` do LangChain com pré-filtro de metadados.
+
+    Buscas com `filter` suportado pelo `MetadataIndex` (similarity, MMR e
+    similarity_score_threshold) pontuam só as linhas permitidas; os demais
+    filtros seguem pelo pós-filtro padrão. O índice de metadados é montado na
+    primeira busca filtrada e refeito se o índice FAISS mudar (add/delete).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metadata_lock = threading.Lock()
+        self._metadata_index: Optional[MetadataIndex] = None
+        self._metadata_signature = None
+
+    @property
+    def metadata_index(self) -> MetadataIndex:
+        """Índice invertido de metadados (montado sob demanda)."""
+        signature = (id(self.index), self.index.ntotal, id(self.index_to_docstore_id))
+        if self._metadata_index is None or self._metadata_signature != signature:
+            with self._metadata_lock:
+                if self._metadata_index is None or self._metadata_signature != signature:
+                    self._metadata_index = MetadataIndex.from_vector_store(self)
+                    self._metadata_signature = signature
+        return self._metadata_index
+
+    def _prefiltered(self, search_filter: Any):
+        """
+        Cópia rasa do store cuja busca só considera as linhas do filtro.
+
+        Returns:
+            Cópia (ou None se o filtro não for suportado) e o número de linhas permitidas
+        """
+        if search_filter is None or callable(search_filter):
+            return None, 0
+        selected = self.metadata_index.selector(search_filter)
+        if selected is None:
+            return None, 0
+
+        from amldo.pipeline.indexer.factory import search_parameters
+
+        selector, count = selected
+        view = copy.copy(self)
+        view.index = _SelectedIndex(
+            self.index, search_parameters(self.index, selector), selector
+        )
+        return view, count
+
+    def similarity_search_with_score_by_vector(
+        self, embedding, k: int = 4, filter=None, fetch_k: int = 20, **kwargs: Any
+    ):
+        view, count = self._prefiltered(filter)
+        if view is None:
+            return super().similarity_search_with_score_by_vector(
+                embedding, k, filter=filter, fetch_k=fetch_k, **kwargs
+            )
+        if count == 0:
+            return []
+        return FAISS.similarity_search_with_score_by_vector(
+            view, embedding, k, filter=None, fetch_k=fetch_k, **kwargs
+        )
+
+    def max_marginal_relevance_search_with_score_by_vector(
+        self, embedding, *, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter=None
+    ):
+        view, count = self._prefiltered(filter)
+        if view is None:
+            return mmr_search_with_score_by_vector(
+                self, embedding, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+            )
+        if count == 0:
+            return []
+        return mmr_search_with_score_by_vector(
+            view, embedding, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult
+        )
@@ -0,0 +1,234 @@
+"""
+Maximal marginal relevance (MMR) vetorizado.
+
+O MMR do LangChain reconstrói os candidatos do FAISS um a um
+(`index.reconstruct` por candidato) e, a cada documento escolhido, recalcula a
+similaridade de cosseno de todos os candidatos contra todos os já escolhidos,
+num laço Python: O(k² · fetch_k · d) e k · fetch_k iterações interpretadas.
+
+Aqui os candidatos são lidos em uma única chamada (`reconstruct_batch`) para
+uma matriz float32 contígua, as similaridades candidato × candidato saem de uma
+única multiplicação de matrizes e a redundância de cada candidato (máxima
+similaridade com os já escolhidos) é atualizada incrementalmente. Cada passo é
+um `argmax` vetorizado. A seleção é a mesma do LangChain (inclusive o
+desempate pelo primeiro candidato).
+
+Os parâmetros vêm de settings: `lambda_mult = 1 - mmr_diversity_score` e
+`fetch_k = mmr_fetch_k` (ver `mmr_search_kwargs`).
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from amldo.core.config import Settings, settings
+
+
+def mmr_search_kwargs(config: Optional[Settings] = None) -> Dict[str, Any]:
+    """
+    Parâmetros de `search_kwargs` para retrievers com `search_type="mmr"`.
+
+    Args:
+        config: Configurações a usar. Usa settings globais se None.
+
+    Returns:
+        Dict com `fetch_k` e `lambda_mult` (1 - mmr_diversity_score)
+    """
+    config = config or settings
+    return {"fetch_k": config.mmr_fetch_k, "lambda_mult": 1.0 - config.mmr_diversity_score}
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    """Normaliza as linhas (vetores nulos ficam nulos, com similaridade 0)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def maximal_marginal_relevance(
+    query_embedding, candidates, k: int = 4, lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Seleciona k candidatos por MMR (similaridade de cosseno).
+
+    score(c) = lambda_mult · sim(c, consulta) − (1 − lambda_mult) · max sim(c, escolhidos)
+
+    Args:
+        query_embedding: Vetor da consulta (d,) ou (1, d)
+        candidates: Matriz (n, d) com os vetores candidatos
+        k: Número de candidatos a escolher
+        lambda_mult: 1 = só relevância, 0 = só diversidade
+
+    Returns:
+        Posições dos candidatos escolhidos, na ordem de escolha
+    """
+    candidates = np.asarray(candidates, dtype=np.float32)
+    n = len(candidates)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    unit = _unit_rows(candidates.reshape(n, -1))
+    query = _unit_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+    query_similarity = unit @ query
+    relevance = lambda_mult * query_similarity
+    similarity = unit @ unit.T
+
+    selected = [int(np.argmax(query_similarity))]
+    redundancy = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < k:
+        scores = relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return selected
+
+
+def reconstruct_vectors(index, positions: Sequence[int]) -> np.ndarray:
+    """
+    Lê os vetores de várias posições do índice FAISS em uma única chamada.
+
+    Args:
+        index: Índice FAISS (IVF precisa do mapa direto, ver `configure_vector_store`)
+        positions: Posições no índice
+
+    Returns:
+        Matriz float32 contígua (len(positions), d)
+    """
+    ids = np.ascontiguousarray(positions, dtype=np.int64)
+    if len(ids) == 0:
+        return np.empty((0, index.d), dtype=np.float32)
+    return np.ascontiguousarray(index.reconstruct_batch(ids), dtype=np.float32)
+
+
+def mmr_search_with_score_by_vector(
+    vector_db,
+    embedding,
+    k: int = 4,
+    fetch_k: int = 20,
+    lambda_mult: float = 0.5,
+    filter: Any = None,
+) -> List[Tuple[Document, float]]:
+    """
+    MMR sobre os `fetch_k` vizinhos mais próximos de um vector store FAISS.
+
+    Mesma semântica de `FAISS.max_marginal_relevance_search_with_score_by_vector`
+    (filtros ainda não aplicados ao índice buscam 2 · fetch_k e filtram depois),
+    com leitura dos vetores em lote e seleção vetorizada. Sem filtro, o docstore
+    só é consultado para os k documentos escolhidos. Os scores retornados são os
+    da busca de cada documento escolhido.
+
+    Args:
+        vector_db: Instância de `langchain_community.vectorstores.FAISS`
+        embedding: Vetor da consulta
+        k: Número de documentos
+        fetch_k: Candidatos considerados pelo MMR (no mínimo k)
+        lambda_mult: 1 = só relevância, 0 = só diversidade
+        filter: Filtro de metadados (pós-filtro do LangChain)
+
+    Returns:
+        Lista de (Document, score) escolhidos
+    """
+    fetch_k = max(fetch_k, k)
+    query = np.array([embedding], dtype=np.float32)
+    scores, indices = vector_db.index.search(query, fetch_k if filter is None else fetch_k * 2)
+    # -1: menos vetores que fetch_k
+    hits = [
+        (float(score), int(pos)) for score, pos in zip(scores[0], indices[0], strict=True)
+        if pos != -1
+    ]
+
+    if filter is None:
+        # Sem filtro, só os k escolhidos são lidos do docstore
+        vectors = reconstruct_vectors(vector_db.index, [pos for _, pos in hits])
+        selected = maximal_marginal_relevance(query, vectors, k=k, lambda_mult=lambda_mult)
+        return [(_document(vector_db, hits[i][1]), hits[i][0]) for i in selected]
+
+    filter_func = vector_db._create_filter_func(filter)
+    candidates = []
+    for score, pos in hits:
+        doc = _document(vector_db, pos)
+        if filter_func(doc.metadata):
+            candidates.append((doc, score, pos))
+    if not candidates:
+        return []
+
+    vectors = reconstruct_vectors(vector_db.index, [pos for _, _, pos in candidates])
+    selected = maximal_marginal_relevance(query, vectors, k=k, lambda_mult=lambda_mult)
+    return [candidates[i][:2] for i in selected]
+
+
+def _document(vector_db, pos: int) -> Document:
+    """Lê do docstore o documento de uma posição do índice."""
+    _id = vector_db.index_to_docstore_id[pos]
+    doc = vector_db.docstore.search(_id)
+    if not isinstance(doc, Document):
+        raise ValueError(f"Could not find document for id {_id}, got {doc}")
+    return doc
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+
+def benchmark_mmr(
+    vector_db,
+    queries: np.ndarray,
+    k_values: Sequence[int] = (4, 12, 25, 50),
+    fetch_k: int = 50,
+    lambda_mult: float = 0.7,
+) -> List[Dict[str, Any]]:
+    """
+    Compara o MMR vetorizado com o do LangChain no mesmo vector store.
+
+    Args:
+        vector_db: Instância de `langchain_community.vectorstores.FAISS`
+        queries: Matriz (n_queries, d) de consultas
+        k_values: Valores de k a medir
+        fetch_k: Candidatos por consulta (no mínimo k)
+        lambda_mult: 1 = só relevância, 0 = só diversidade
+
+    Returns:
+        Uma linha por k: {"k", "fetch_k", "langchain_ms", "vectorized_ms",
+        "speedup", "agreement"} com tempos médios por consulta e a fração de
+        consultas com a mesma seleção
+    """
+    from langchain_community.vectorstores import FAISS
+
+    report = []
+    for k in k_values:
+        n_fetch = max(fetch_k, k)
+        results = {}
+        timings = {}
+        for name, search in (
+            ("langchain", FAISS.max_marginal_relevance_search_with_score_by_vector),
+            ("vectorized", mmr_search_with_score_by_vector),
+        ):
+            start = time.perf_counter()
+            runs = [
+                search(vector_db, q, k=k, fetch_k=n_fetch, lambda_mult=lambda_mult) for q in queries
+            ]
+            timings[name] = (time.perf_counter() - start) * 1000 / len(queries)
+            results[name] = [[doc.id for doc, _ in run] for run in runs]
+
+        same = sum(a == b for a, b in zip(results["langchain"], results["vectorized"], strict=True))
+        report.append(
+            {
+                "k": k,
+                "fetch_k": n_fetch,
+                "langchain_ms": timings["langchain"],
+                "vectorized_ms": timings["vectorized"],
+                "speedup": timings["langchain"] / max(timings["vectorized"], 1e-9),
+                "agreement": same / len(queries),
+            }
+        )
+    return report
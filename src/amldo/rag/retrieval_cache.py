@@ -0,0 +1,266 @@
+"""
+Cache de recuperação (retrieval) para os RAGs v2 e v3.
+
+Para perguntas frequentes, v2 e v3 refazem a busca FAISS e reconstroem o mesmo
+contexto XML hierárquico (`get_pos_processed_context`) a cada chamada. Este
+módulo guarda, por configuração de busca, os IDs dos chunks recuperados e o
+contexto já renderizado, de modo que consultas repetidas paguem apenas a
+chamada ao LLM.
+
+A chave combina:
+- Bucket do embedding da pergunta (vetor quantizado; perguntas com o mesmo
+  embedding caem no mesmo bucket, independentemente da grafia exata)
+- k, search_type e filtro de metadados
+- Renderizador do contexto
+- Fingerprint do índice FAISS
+
+A versão do RAG não faz parte da chave: v2 e v3 com a mesma configuração de
+busca reutilizam o mesmo contexto.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from amldo.core.config import settings
+from amldo.core.exceptions import RetrievalError
+from amldo.rag.runtime import get_rag_runtime
+
+# Casas decimais usadas na quantização do embedding (define o tamanho do bucket)
+BUCKET_DECIMALS = 4
+
+
+@dataclass(frozen=True)
+class CachedRetrieval:
+    """Resultado de uma recuperação: chunks, contexto renderizado e fontes."""
+
+    chunk_ids: tuple
+    context: str
+    sources: list = field(default_factory=list)
+
+
+def embedding_bucket(vector) -> str:
+    """
+    Quantiza o embedding da pergunta em um identificador de bucket.
+
+    Args:
+        vector: Embedding da pergunta
+
+    Returns:
+        Hash hexadecimal do vetor normalizado e arredondado
+    """
+    vec = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec = vec / norm
+    quantized = np.round(vec * 10**BUCKET_DECIMALS).astype(np.int32)
+    return hashlib.sha1(quantized.tobytes()).hexdigest()
+
+
+class RetrievalCache:
+    """
+    LRU thread-safe de configuração de busca → CachedRetrieval.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Número máximo de recuperações armazenadas
+        """
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, CachedRetrieval]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(
+        vector,
+        k: int,
+        search_type: str,
+        search_filter: Optional[dict],
+        renderer: str,
+        fingerprint: str,
+        terms: Optional[list] = None,
+    ) -> str:
+        """
+        Monta a chave do cache.
+
+        Args:
+            vector: Embedding da pergunta
+            k: Número de documentos recuperados
+            search_type: Tipo de busca
+            search_filter: Filtro de metadados passado ao FAISS
+            renderer: Identificador do formato do contexto
+            fingerprint: Fingerprint do índice FAISS
+            terms: Termos BM25 da pergunta (busca hybrid: embeddings quase iguais
+                podem citar artigos diferentes)
+
+        Returns:
+            Hash SHA-256 hexadecimal
+        """
+        parts = [embedding_bucket(vector), k, search_type, search_filter, renderer, fingerprint]
+        if terms is not None:
+            parts.append(sorted(set(terms)))
+        raw = json.dumps(parts, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedRetrieval]:
+        """
+        Busca uma recuperação armazenada.
+
+        Args:
+            key: Chave gerada por `make_key`
+
+        Returns:
+            CachedRetrieval ou None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: str, entry: CachedRetrieval) -> None:
+        """
+        Armazena uma recuperação.
+
+        Args:
+            key: Chave gerada por `make_key`
+            entry: Resultado da recuperação
+        """
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove todas as recuperações."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas de uso do cache.
+
+        Returns:
+            Dict com entries, max_entries, hits, misses e hit_rate
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# =============================================================================
+# Integração com as ferramentas RAG
+# =============================================================================
+
+
+def cached_retrieval(
+    question: str,
+    k: int,
+    search_type: str,
+    search_filter: Optional[dict],
+    renderer: str,
+    build: Callable[[], CachedRetrieval],
+) -> CachedRetrieval:
+    """
+    Retorna a recuperação em cache para a pergunta ou executa `build`.
+
+    O embedding da pergunta vem do runtime (e do cache de embeddings de
+    consultas), de modo que, em caso de miss, o retriever reaproveita o mesmo
+    vetor sem passar de novo pelo transformer.
+
+    Args:
+        question: Pergunta do usuário
+        k: Número de documentos a recuperar
+        search_type: Tipo de busca
+        search_filter: Filtro de metadados passado ao FAISS
+        renderer: Identificador do formato do contexto gerado por `build`
+        build: Função que executa a busca e renderiza o contexto
+
+    Returns:
+        CachedRetrieval
+
+    Raises:
+        RetrievalError: Se falhar ao embedar a pergunta ou ao recuperar documentos
+    """
+    cache = get_retrieval_cache()
+    if cache is None:
+        return build()
+
+    runtime = get_rag_runtime()
+    try:
+        vector = runtime.embeddings.embed_query(question)
+    except Exception as e:
+        raise RetrievalError(f"Falha ao gerar embedding da pergunta: {e}") from e
+
+    terms = None
+    if search_type == "hybrid":
+        from amldo.rag.lexical import tokenize
+
+        terms = tokenize(question)
+    # O fingerprint confere o índice em disco: um índice regravado vira miss
+    key = cache.make_key(
+        vector, k, search_type, search_filter, renderer, runtime.index_fingerprint, terms
+    )
+    entry = cache.get(key)
+    if entry is None:
+        entry = build()
+        cache.put(key, entry)
+    return entry
+
+
+# =============================================================================
+# Singleton e Funções Helper
+# =============================================================================
+
+_retrieval_cache: Optional[RetrievalCache] = None
+_retrieval_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache() -> Optional[RetrievalCache]:
+    """
+    Retorna o cache de recuperação singleton, configurado via settings.
+
+    Returns:
+        Instância do RetrievalCache, ou None se `retrieval_cache_size` for 0
+    """
+    global _retrieval_cache
+    if settings.retrieval_cache_size == 0:
+        return None
+    if _retrieval_cache is None:
+        with _retrieval_cache_lock:
+            if _retrieval_cache is None:
+                _retrieval_cache = RetrievalCache(max_entries=settings.retrieval_cache_size)
+    return _retrieval_cache
+
+
+def reset_retrieval_cache() -> None:
+    """Descarta a instância singleton (usado em testes)."""
+    global _retrieval_cache
+    with _retrieval_cache_lock:
+        _retrieval_cache = None
@@ -0,0 +1,415 @@
+"""
+Runtime compartilhado de recuperação para os RAGs v1, v2 e v3.
+
+Centraliza os recursos pesados usados pelas ferramentas RAG:
+- Modelo de embedding (HuggingFace / sentence-transformers)
+- Vector store FAISS carregado do disco e o índice BM25 dos mesmos chunks
+  (busca hybrid)
+- Tabela de artigos 0 (introduções de capítulos/títulos) e a árvore
+  hierárquica pré-computada a partir dela
+- Cliente LLM
+
+Cada recurso é construído uma única vez por processo, sob demanda, no primeiro
+uso. Assim, importar `amldo.rag.v1.tools`, `amldo.rag.v2.tools` e
+`amldo.rag.v3.tools` não carrega nada, e as três versões compartilham as
+mesmas instâncias.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Optional
+
+from amldo.core.config import Settings, settings
+from amldo.core.exceptions import VectorStoreError
+
+
+class RAGRuntime:
+    """
+    Recursos de recuperação compartilhados entre as versões do RAG.
+
+    Todos os atributos são inicializados de forma preguiçosa e protegidos por
+    lock, de modo que requisições concorrentes nunca constroem o mesmo recurso
+    duas vezes.
+    """
+
+    def __init__(self, config: Settings | None = None):
+        """
+        Inicializa o runtime sem carregar nenhum recurso.
+
+        Args:
+            config: Configurações a usar. Usa settings globais se None.
+        """
+        self.settings = config or settings
+        self._lock = threading.RLock()
+        self._embeddings = None
+        self._vector_db = None
+        self._lexical_index = None
+        self._df_art_0 = None
+        self._hierarchy = None
+        self._article_index = None
+        self._llm = None
+        self._index_fingerprint = None
+        self._index_fingerprint_signature = None
+        self._vector_db_signature = None
+
+    # =========================================================================
+    # Recursos (lazy)
+    # =========================================================================
+
+    @property
+    def embeddings(self):
+        """Modelo de embedding usado para consultas e indexação (consultas com cache LRU)."""
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    self._embeddings = self._build_embeddings()
+        return self._embeddings
+
+    @property
+    def vector_db(self):
+        """
+        Vector store FAISS carregado de `settings.vector_db_path_absolute`.
+
+        Se o `index.faiss` em disco foi substituído desde a carga (ex: pelo
+        worker de processamento, em outro processo), o store é recarregado.
+        """
+        self._refresh_if_changed()
+        if self._vector_db is None:
+            with self._lock:
+                if self._vector_db is None:
+                    signature = self._index_signature()
+                    self._vector_db = self._load_vector_db()
+                    self._vector_db_signature = signature
+        return self._vector_db
+
+    @property
+    def lexical_index(self):
+        """Índice BM25 do vector store (busca hybrid), recarregado junto com `vector_db`."""
+        self._refresh_if_changed()
+        if self._lexical_index is None:
+            with self._lock:
+                if self._lexical_index is None:
+                    self._lexical_index = self._load_lexical_index()
+        return self._lexical_index
+
+    @property
+    def df_art_0(self):
+        """DataFrame com artigos 0 (introduções de capítulos/títulos)."""
+        if self._df_art_0 is None:
+            with self._lock:
+                if self._df_art_0 is None:
+                    self._df_art_0 = self._load_df_art_0()
+        return self._df_art_0
+
+    @property
+    def hierarchy(self):
+        """Árvore Lei → Título → Capítulo com os artigos 0 (HierarchyIndex)."""
+        if self._hierarchy is None:
+            with self._lock:
+                if self._hierarchy is None:
+                    self._hierarchy = self._load_hierarchy()
+        return self._hierarchy
+
+    def hierarchy_for(self, df_art_0):
+        """
+        Árvore de artigos 0 de um DataFrame (usada pelas interfaces de compatibilidade).
+
+        Args:
+            df_art_0: DataFrame com artigos 0
+
+        Returns:
+            `hierarchy` se `df_art_0` for o próprio DataFrame do runtime; senão
+            uma árvore construída a partir de `df_art_0`
+        """
+        if df_art_0 is not None and df_art_0 is self._df_art_0:
+            return self.hierarchy
+
+        from amldo.rag.context import HierarchyIndex
+
+        return HierarchyIndex.from_dataframe(df_art_0)
+
+    @property
+    def article_index(self):
+        """Índice (lei, artigo) → textos de split_docs usado na consulta direta a artigos."""
+        if self._article_index is None:
+            with self._lock:
+                if self._article_index is None:
+                    self._article_index = self._load_article_index()
+        return self._article_index
+
+    @property
+    def llm(self):
+        """Cliente LLM usado para gerar as respostas."""
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    self._llm = self._build_llm()
+        return self._llm
+
+    @property
+    def index_fingerprint(self) -> str:
+        """
+        Fingerprint do índice FAISS em disco (muda quando o índice é reescrito).
+
+        A identidade dos arquivos é conferida a cada acesso: um índice gravado
+        por outro processo (ex: o worker de processamento) troca o fingerprint
+        e descarta o vector store carregado, mesmo que `vector_db` não seja lido
+        (acertos nos caches de resposta e de recuperação). O CSV de artigos 0,
+        `split_docs` e os JSONs derivados também compõem o fingerprint: regerá-los
+        (ex: `build_lookup_indexes`) invalida os caches e recarrega a árvore de
+        artigos 0 e o índice de artigos.
+        """
+        signature = (self._index_signature(), self._lookup_signature())
+        if self._index_fingerprint is None or signature != self._index_fingerprint_signature:
+            from amldo.rag.cache import index_fingerprint
+
+            with self._lock:
+                self._refresh_if_changed()
+                previous = self._index_fingerprint_signature
+                if previous is not None and previous[1] != signature[1]:
+                    self._df_art_0 = None
+                    self._hierarchy = None
+                    self._article_index = None
+                self._index_fingerprint = index_fingerprint(
+                    self.settings.vector_db_path_absolute, self._lookup_files()
+                )
+                self._index_fingerprint_signature = signature
+        return self._index_fingerprint
+
+    # =========================================================================
+    # Construção dos recursos
+    # =========================================================================
+
+    def _build_embeddings(self):
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        from amldo.pipeline.embeddings import set_torch_threads
+
+        if self.settings.embedding_threads > 0:
+            set_torch_threads(self.settings.embedding_threads)
+        embeddings = HuggingFaceEmbeddings(
+            model_name=self.settings.embedding_model,
+            encode_kwargs={
+                "normalize_embeddings": True,
+                "batch_size": self.settings.embedding_batch_size,
+            },
+        )
+        if self.settings.query_embedding_cache_size == 0:
+            return embeddings
+
+        from amldo.rag.embedding_cache import CachedQueryEmbeddings, get_query_embedding_cache
+
+        return CachedQueryEmbeddings(embeddings, get_query_embedding_cache())
+
+    def _load_vector_db(self):
+        from amldo.pipeline.indexer.factory import configure_vector_store
+        from amldo.rag.vector_store import load_vector_store
+
+        # O caminho de servir nunca desserializa index.pkl (ver migrate_docstores)
+        path = self.settings.vector_db_path_absolute
+        if self.settings.vector_db_sharded:
+            from amldo.rag.shards import SHARDS_DIR, load_sharded_vector_store
+
+            # Cada partição é ajustada ao seu índice na carga
+            try:
+                return load_sharded_vector_store(
+                    path / SHARDS_DIR,
+                    self.embeddings,
+                    mmap=self.settings.vector_db_mmap,
+                    route_by_question=self.settings.vector_db_shard_routing,
+                )
+            except Exception as e:
+                raise VectorStoreError(f"Falha ao carregar partições de {path}: {e}") from e
+
+        try:
+            vector_db = load_vector_store(path, self.embeddings, mmap=self.settings.vector_db_mmap)
+        except Exception as e:
+            raise VectorStoreError(f"Falha ao carregar vector store de {path}: {e}") from e
+
+        # efSearch/nprobe e a métrica do índice (L2 ou produto interno) não são
+        # guardados no docstore; ajusta o store ao índice carregado
+        configure_vector_store(vector_db)
+        return vector_db
+
+    def _load_lexical_index(self):
+        from amldo.rag.lexical import load_lexical_index
+
+        path = self.settings.vector_db_path_absolute
+        try:
+            return load_lexical_index(path)
+        except Exception as e:
+            raise VectorStoreError(f"Falha ao carregar índice BM25 de {path}: {e}") from e
+
+    def _refresh_if_changed(self) -> None:
+        """Descarta o vector store (e o BM25) se o índice em disco mudou desde a carga."""
+        if self._vector_db is not None and self._vector_db_signature is not None:
+            if self._index_signature() != self._vector_db_signature:
+                self.reload_vector_db()
+
+    def _index_files(self) -> list:
+        """Arquivos index.faiss servidos (um por partição no modo particionado)."""
+        from amldo.rag.vector_store import INDEX_FILE
+
+        path = self.settings.vector_db_path_absolute
+        if self.settings.vector_db_sharded:
+            from amldo.rag.shards import SHARDS_DIR, shard_index_files
+
+            return shard_index_files(path / SHARDS_DIR)
+        return [path / INDEX_FILE]
+
+    def _index_signature(self):
+        """Identidade dos index.faiss em disco (inode, tamanho, mtime) ou None se ausentes."""
+        signature = []
+        for index_file in self._index_files():
+            try:
+                stat = index_file.stat()
+            except OSError:
+                return None
+            signature.append((str(index_file), stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature) or None
+
+    def _lookup_files(self) -> list:
+        """Fontes da árvore de artigos 0 e do índice de artigos (CSV, split_docs e JSONs)."""
+        return [
+            self.settings.artigos_0_csv_path_absolute,
+            self.settings.artigos_0_index_path_absolute,
+            self.settings.split_docs_dir,
+            self.settings.article_index_path_absolute,
+        ]
+
+    def _lookup_signature(self):
+        """Identidade (tamanho, mtime) das fontes de `_lookup_files`; None para as ausentes."""
+        signature = []
+        for path in self._lookup_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                signature.append((str(path), None))
+                continue
+            signature.append((str(path), stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def _load_hierarchy(self):
+        from amldo.rag.context import HierarchyIndex, load_hierarchy_index
+
+        # DataFrame já carregado (ex: injetado em testes) dispensa o disco
+        if self._df_art_0 is not None:
+            return HierarchyIndex.from_dataframe(self._df_art_0)
+
+        csv_path = self.settings.artigos_0_csv_path_absolute
+        try:
+            return load_hierarchy_index(csv_path, self.settings.artigos_0_index_path_absolute)
+        except FileNotFoundError as e:
+            raise VectorStoreError(f"Arquivo artigos_0 não encontrado: {csv_path}") from e
+
+    def _load_article_index(self):
+        from amldo.rag.articles import ArticleIndex, load_article_index
+
+        try:
+            return load_article_index(
+                self.settings.split_docs_dir, self.settings.article_index_path_absolute
+            )
+        except FileNotFoundError:
+            # Sem split_docs nem JSON: o atalho não resolve nada e a busca segue normal
+            return ArticleIndex({})
+
+    def _load_df_art_0(self):
+        import pandas as pd
+
+        path = self.settings.artigos_0_csv_path_absolute
+        try:
+            return pd.read_csv(path)
+        except FileNotFoundError as e:
+            raise VectorStoreError(f"Arquivo artigos_0 não encontrado: {path}") from e
+
+    def _build_llm(self):
+        from langchain.chat_models import init_chat_model
+
+        llm_kwargs: dict[str, Any] = {}
+        if self.settings.llm_provider == "google_genai":
+            llm_kwargs["google_api_key"] = self.settings.google_api_key
+
+        return init_chat_model(
+            self.settings.llm_model, model_provider=self.settings.llm_provider, **llm_kwargs
+        )
+
+    # =========================================================================
+    # Manutenção
+    # =========================================================================
+
+    def reload_vector_db(self) -> None:
+        """
+        Descarta o vector store carregado.
+
+        O próximo acesso a `vector_db` relê o índice do disco. Acontece
+        automaticamente quando o `index.faiss` é substituído (ex.: por um job de
+        `/api/process`); chamar manualmente força a releitura.
+        """
+        with self._lock:
+            self._vector_db = None
+            self._lexical_index = None
+            self._vector_db_signature = None
+            self._index_fingerprint = None
+
+    def count_indexed_chunks(self) -> int:
+        """
+        Retorna o número de vetores no índice FAISS sem carregar o modelo de embedding.
+
+        Returns:
+            Total de vetores indexados (0 se o índice não existir)
+        """
+        if self._vector_db is not None:
+            if self.settings.vector_db_sharded:
+                return self._vector_db.ntotal
+            return self._vector_db.index.ntotal
+
+        from amldo.rag.vector_store import read_index_mmap
+
+        return sum(read_index_mmap(f).ntotal for f in self._index_files() if f.exists())
+
+    def __repr__(self) -> str:
+        loaded = [
+            name
+            for name, value in (
+                ("embeddings", self._embeddings),
+                ("vector_db", self._vector_db),
+                ("lexical_index", self._lexical_index),
+                ("df_art_0", self._df_art_0),
+                ("hierarchy", self._hierarchy),
+                ("article_index", self._article_index),
+                ("llm", self._llm),
+            )
+            if value is not None
+        ]
+        return f"RAGRuntime(loaded={loaded})"
+
+
+# =============================================================================
+# Singleton e Funções Helper
+# =============================================================================
+
+_rag_runtime: Optional[RAGRuntime] = None
+_rag_runtime_lock = threading.Lock()
+
+
+def get_rag_runtime() -> RAGRuntime:
+    """
+    Retorna a instância singleton do RAGRuntime.
+
+    Returns:
+        Instância compartilhada por todas as versões do RAG
+    """
+    global _rag_runtime
+    if _rag_runtime is None:
+        with _rag_runtime_lock:
+            if _rag_runtime is None:
+                _rag_runtime = RAGRuntime()
+    return _rag_runtime
+
+
+def reset_rag_runtime() -> None:
+    """Descarta a instância singleton (usado em testes e recarga completa)."""
+    global _rag_runtime
+    with _rag_runtime_lock:
+        _rag_runtime = None
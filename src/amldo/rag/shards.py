@@ -0,0 +1,595 @@
+"""
+Vector store particionado por lei (um índice FAISS por `lei`).
+
+Com um único vector store, toda consulta percorre os vetores de todas as leis
+e incluir uma lei nova regrava o índice inteiro. No modo particionado
+(`settings.vector_db_sharded`) cada lei tem o seu vector store, no formato de
+`amldo.rag.vector_store`:
+
+    <vector_db_path>/shards/L14133/{index.faiss, docstore.sqlite}
+    <vector_db_path>/shards/L13709/...
+
+A lei de um documento é o metadado `lei` ou, para chunks de PDF processados
+por `/api/process`, o nome do arquivo sem extensão (`L14133.pdf` → `L14133`).
+
+`ShardedVectorStore` roteia cada consulta só para as partições relevantes:
+
+- filtro explícito por lei (`{"lei": "L14133"}`, `$in`, `$nin`, ...);
+- senão, citação da lei na pergunta ("Lei 14.133", "LC 123", "LGPD");
+- senão, todas as partições.
+
+Os k melhores de cada partição são combinados por score (as partições usam o
+mesmo modelo de embedding e a mesma métrica). `write_shards` grava só as
+partições das leis indicadas: incluir uma lei não reescreve as demais.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+import shutil
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from amldo.core.config import settings
+from amldo.core.exceptions import VectorStoreError
+from amldo.rag.mmr import maximal_marginal_relevance, reconstruct_vectors
+
+# Subdiretório das partições dentro do vector store
+SHARDS_DIR = "shards"
+
+# Partição de documentos sem `lei` nem arquivo de origem
+DEFAULT_SHARD = "outros"
+
+# Termos que identificam uma lei na pergunta, além do número (sem acentos)
+LAW_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "L13709": ("lgpd", "protecao de dados pessoais"),
+    "Lcp123": ("simples nacional", "estatuto nacional da microempresa"),
+}
+
+
+def shard_key(metadata: Dict[str, Any]) -> str:
+    """
+    Retorna a partição (lei) de um documento.
+
+    Args:
+        metadata: Metadados do documento
+
+    Returns:
+        Valor de `lei`, nome do arquivo de origem sem extensão ou DEFAULT_SHARD
+    """
+    if metadata.get("lei"):
+        return str(metadata["lei"])
+    if metadata.get("file"):
+        return Path(metadata["file"]).stem
+    return DEFAULT_SHARD
+
+
+# =============================================================================
+# Roteamento
+# =============================================================================
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _law_patterns(law: str) -> List["re.Pattern[str]"]:
+    """Padrões que citam a lei: número (com ou sem ponto) e apelidos."""
+    patterns = [re.escape(alias) for alias in LAW_ALIASES.get(law, ())]
+    digits = re.sub(r"\D", "", law)
+    if len(digits) > 3:
+        number = rf"{digits[:-3]}\.?{digits[-3:]}"
+        patterns.append(rf"(?<![\d.]){number}(?!\d)")
+    elif digits:
+        # Números curtos só com o tipo da norma (evita "art. 123")
+        patterns.append(rf"\b(?:lei complementar|lc|lcp)\s*(?:n[oº°.]*\s*)?{digits}(?!\d)")
+    return [re.compile(p) for p in patterns]
+
+
+def route_question(question: str, laws: Iterable[str]) -> List[str]:
+    """
+    Classifica a pergunta pelas leis que ela cita.
+
+    Args:
+        question: Pergunta do usuário
+        laws: Leis disponíveis (nomes das partições)
+
+    Returns:
+        Leis citadas, na ordem de `laws` (vazio se nenhuma for citada)
+    """
+    text = _normalize(question)
+    return [law for law in laws if any(p.search(text) for p in _law_patterns(law))]
+
+
+def split_law_filter(
+    search_filter: Any, laws: Sequence[str]
+) -> Tuple[Optional[List[str]], Any]:
+    """
+    Separa a condição sobre `lei` do filtro de metadados.
+
+    Args:
+        search_filter: Filtro no formato do LangChain FAISS
+        laws: Leis disponíveis
+
+    Returns:
+        Tupla (leis permitidas pelo filtro ou None se ele não restringe a lei,
+        filtro restante para as partições ou None)
+    """
+    if not isinstance(search_filter, dict) or "lei" not in search_filter:
+        return None, search_filter
+
+    condition = search_filter["lei"]
+    if not isinstance(condition, dict):
+        condition = {"$in" if isinstance(condition, list) else "$eq": condition}
+
+    allowed = list(laws)
+    for op, value in condition.items():
+        values = set(value) if isinstance(value, (list, tuple, set)) else {value}
+        if op in ("$eq", "$in"):
+            allowed = [law for law in allowed if law in values]
+        elif op in ("$neq", "$nin"):
+            allowed = [law for law in allowed if law not in values]
+        else:
+            # Operador sem roteamento: as partições aplicam o filtro inteiro
+            return None, search_filter
+
+    rest = {field: cond for field, cond in search_filter.items() if field != "lei"}
+    return allowed, rest or None
+
+
+# =============================================================================
+# Vector store particionado
+# =============================================================================
+
+
+class ShardedVectorStore(VectorStore):
+    """
+    Vector store com uma partição FAISS por lei e busca roteada.
+
+    Compatível com `as_retriever` (similarity, mmr e similarity_score_threshold)
+    e com os filtros de metadados do LangChain FAISS.
+    """
+
+    def __init__(
+        self,
+        shards: Dict[str, FAISS],
+        embeddings: Any,
+        route_by_question: bool = True,
+    ):
+        """
+        Args:
+            shards: {lei: vector store FAISS da lei}
+            embeddings: Modelo de embedding das consultas
+            route_by_question: Se True, pergunta que cita leis busca só nelas
+
+        Raises:
+            VectorStoreError: Se não houver partições ou elas usarem métricas diferentes
+        """
+        if not shards:
+            raise VectorStoreError("Nenhuma partição no vector store particionado")
+        strategies = {shard.distance_strategy for shard in shards.values()}
+        if len(strategies) > 1:
+            raise VectorStoreError("Partições com métricas diferentes não podem ser combinadas")
+
+        self.shards = dict(sorted(shards.items()))
+        self._embeddings = embeddings
+        self.route_by_question = route_by_question
+        self.distance_strategy = strategies.pop()
+
+    @property
+    def embeddings(self):
+        return self._embeddings
+
+    @property
+    def laws(self) -> List[str]:
+        """Leis com partição carregada."""
+        return list(self.shards)
+
+    @property
+    def ntotal(self) -> int:
+        """Total de vetores em todas as partições."""
+        return sum(shard.index.ntotal for shard in self.shards.values())
+
+    def route(self, query: Optional[str], search_filter: Any = None) -> Tuple[List[str], Any]:
+        """
+        Escolhe as partições de uma consulta.
+
+        Args:
+            query: Pergunta (None para buscas por vetor)
+            search_filter: Filtro de metadados
+
+        Returns:
+            Tupla (leis a consultar, filtro restante para as partições)
+        """
+        allowed, rest = split_law_filter(search_filter, self.laws)
+        if allowed is not None:
+            return allowed, rest
+        if query and self.route_by_question:
+            cited = route_question(query, self.laws)
+            if cited:
+                return cited, rest
+        return self.laws, rest
+
+    def _embed_query(self, query: str) -> List[float]:
+        return next(iter(self.shards.values()))._embed_query(query)
+
+    def _ranked(self, results: Iterable[Tuple[Any, float]], n: int, key=None):
+        """Os n melhores resultados de todas as partições, pela métrica do índice."""
+        key = key or (lambda item: item[1])
+        if self.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+            return heapq.nlargest(n, results, key=key)
+        return heapq.nsmallest(n, results, key=key)
+
+    # -------------------------------------------------------------------------
+    # Similaridade
+    # -------------------------------------------------------------------------
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Any = None,
+        fetch_k: int = 20,
+        laws: Optional[Sequence[str]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Busca os k documentos mais próximos nas partições e combina por score.
+
+        Args:
+            embedding: Vetor da consulta
+            k: Número de documentos
+            filter: Filtro de metadados
+            fetch_k: Candidatos por partição antes do pós-filtro do LangChain
+            laws: Partições a consultar (default: roteadas pelo filtro)
+
+        Returns:
+            Lista de (Document, score) ordenada por relevância
+        """
+        if laws is None:
+            laws, filter = self.route(None, filter)
+        results: List[Tuple[Document, float]] = []
+        for law in laws:
+            results.extend(
+                self.shards[law].similarity_search_with_score_by_vector(
+                    embedding, k, filter=filter, fetch_k=fetch_k, **kwargs
+                )
+            )
+        return self._ranked(results, k)
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Any = None, fetch_k: int = 20, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        laws, rest = self.route(query, filter)
+        if not laws:
+            return []
+        return self.similarity_search_with_score_by_vector(
+            self._embed_query(query), k, filter=rest, fetch_k=fetch_k, laws=laws, **kwargs
+        )
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Any = None, fetch_k: int = 20, **kwargs: Any
+    ) -> List[Document]:
+        docs_and_scores = self.similarity_search_with_score(
+            query, k, filter=filter, fetch_k=fetch_k, **kwargs
+        )
+        return [doc for doc, _ in docs_and_scores]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Any = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Document]:
+        docs_and_scores = self.similarity_search_with_score_by_vector(
+            embedding, k, filter=filter, fetch_k=fetch_k, **kwargs
+        )
+        return [doc for doc, _ in docs_and_scores]
+
+    def _similarity_search_with_relevance_scores(
+        self, query: str, k: int = 4, filter: Any = None, fetch_k: int = 20, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        laws, rest = self.route(query, filter)
+        embedding = self._embed_query(query)
+        results: List[Tuple[Document, float]] = []
+        for law in laws:
+            shard = self.shards[law]
+            relevance = shard._select_relevance_score_fn()
+            for doc, score in shard.similarity_search_with_score_by_vector(
+                embedding, k, filter=rest, fetch_k=fetch_k, **kwargs
+            ):
+                results.append((doc, relevance(score)))
+        return heapq.nlargest(k, results, key=lambda item: item[1])
+
+    # -------------------------------------------------------------------------
+    # MMR
+    # -------------------------------------------------------------------------
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Any = None,
+        laws: Optional[Sequence[str]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        """
+        MMR sobre os `fetch_k` melhores candidatos de todas as partições roteadas.
+
+        Args:
+            embedding: Vetor da consulta
+            k: Número de documentos
+            fetch_k: Candidatos considerados pelo MMR
+            lambda_mult: 1 = só relevância, 0 = só diversidade
+            filter: Filtro de metadados
+            laws: Partições a consultar (default: roteadas pelo filtro)
+
+        Returns:
+            Documentos selecionados
+        """
+        if laws is None:
+            laws, filter = self.route(None, filter)
+        fetch_k = max(fetch_k, k)
+        query = np.array([embedding], dtype=np.float32)
+        candidates = []
+        for law in laws:
+            for score, pos, doc in _search_shard(self.shards[law], query, fetch_k, filter):
+                candidates.append((law, pos, doc, score))
+        candidates = self._ranked(candidates, fetch_k, key=lambda item: item[3])
+        if not candidates:
+            return []
+
+        # Vetores lidos em lote, uma chamada por partição
+        by_law: Dict[str, List[int]] = {}
+        for row, (law, _, _, _) in enumerate(candidates):
+            by_law.setdefault(law, []).append(row)
+        dim = self.shards[candidates[0][0]].index.d
+        vectors = np.empty((len(candidates), dim), dtype=np.float32)
+        for law, rows in by_law.items():
+            positions = [candidates[row][1] for row in rows]
+            vectors[rows] = reconstruct_vectors(self.shards[law].index, positions)
+        selected = maximal_marginal_relevance(query, vectors, k=k, lambda_mult=lambda_mult)
+        return [candidates[i][2] for i in selected]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Any = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        laws, rest = self.route(query, filter)
+        if not laws:
+            return []
+        return self.max_marginal_relevance_search_by_vector(
+            self._embed_query(query),
+            k=k,
+            fetch_k=fetch_k,
+            lambda_mult=lambda_mult,
+            filter=rest,
+            laws=laws,
+        )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: Iterable[str],
+        embedding: Any,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        route_by_question: bool = True,
+        **kwargs: Any,
+    ) -> "ShardedVectorStore":
+        """
+        Cria as partições em memória, agrupando os textos pela lei (`shard_key`).
+
+        Para gravar em disco, use `write_shards` a partir do vector store completo.
+
+        Args:
+            texts: Textos a indexar
+            embedding: Modelo de embedding
+            metadatas: Metadados de cada texto (definem a partição)
+            ids: IDs dos documentos (opcional)
+            route_by_question: Se True, pergunta que cita leis busca só nelas
+            **kwargs: Repassados a `FAISS.from_texts` de cada partição
+
+        Returns:
+            ShardedVectorStore
+
+        Raises:
+            VectorStoreError: Se não houver textos
+        """
+        texts = list(texts)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+
+        groups: Dict[str, List[int]] = {}
+        for i, (_, metadata) in enumerate(zip(texts, metadatas, strict=True)):
+            groups.setdefault(shard_key(metadata), []).append(i)
+
+        shards = {
+            law: FAISS.from_texts(
+                [texts[i] for i in members],
+                embedding,
+                metadatas=[metadatas[i] for i in members],
+                ids=[ids[i] for i in members] if ids is not None else None,
+                **kwargs,
+            )
+            for law, members in groups.items()
+        }
+        return cls(shards, embedding, route_by_question)
+
+
+def _search_shard(
+    shard: FAISS, query: np.ndarray, n: int, search_filter: Any
+) -> List[Tuple[float, int, Document]]:
+    """
+    Busca os n candidatos de uma partição, com pré-filtro quando suportado.
+
+    Returns:
+        Lista de (score, posição no índice, Document)
+    """
+    index, keep = shard.index, None
+    if search_filter is not None:
+        view, count = (None, 0)
+        if hasattr(shard, "_prefiltered"):
+            view, count = shard._prefiltered(search_filter)
+        if view is not None:
+            if count == 0:
+                return []
+            index = view.index
+        else:
+            keep = FAISS._create_filter_func(search_filter)
+            n *= 2
+
+    scores, positions = index.search(query, n)
+    results = []
+    for score, pos in zip(scores[0], positions[0], strict=True):
+        if pos == -1:
+            continue
+        doc = shard.docstore.search(shard.index_to_docstore_id[int(pos)])
+        if keep is not None and not keep(doc.metadata):
+            continue
+        results.append((float(score), int(pos), doc))
+    return results
+
+
+# =============================================================================
+# Gravação e carregamento
+# =============================================================================
+
+
+def write_shards(
+    vector_db: FAISS,
+    folder: Path,
+    laws: Optional[Iterable[str]] = None,
+    index_type: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Grava as partições por lei a partir de um vector store completo.
+
+    Só as partições de `laws` são gravadas; as demais ficam intactas. Partições
+    de leis sem documentos são removidas.
+
+    Args:
+        vector_db: Vector store com todas as leis (ex: o de `process_raw_documents`)
+        folder: Diretório das partições (`<vector_db_path>/shards`)
+        laws: Leis a gravar (default: todas, removendo partições de leis ausentes)
+        index_type: Tipo de índice das partições (default: settings.faiss_index_type)
+
+    Returns:
+        {lei: documentos gravados} (0 para partições removidas)
+
+    Raises:
+        VectorStoreError: Se um documento não existir no docstore
+    """
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    from amldo.pipeline.indexer.factory import build_index, configure_vector_store, metric_of
+    from amldo.rag.vector_store import save_vector_store
+
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    # Os vetores são extraídos com `reconstruct` (IVF precisa do mapa ID → lista)
+    configure_vector_store(vector_db)
+
+    groups: Dict[str, List[Tuple[int, Document]]] = {}
+    for pos, doc_id in vector_db.index_to_docstore_id.items():
+        doc = vector_db.docstore.search(doc_id)
+        if not isinstance(doc, Document):
+            raise VectorStoreError(f"Documento {doc_id} não encontrado no docstore")
+        if doc.id is None and isinstance(doc_id, str):
+            doc = Document(id=doc_id, page_content=doc.page_content, metadata=doc.metadata)
+        groups.setdefault(shard_key(doc.metadata), []).append((int(pos), doc))
+
+    if laws is None:
+        selected = set(groups) | {p.name for p in folder.iterdir() if p.is_dir()}
+    else:
+        selected = set(laws)
+
+    metric = metric_of(vector_db.index)
+    written: Dict[str, int] = {}
+    for law in sorted(selected):
+        members = groups.get(law)
+        if not members:
+            shutil.rmtree(folder / law, ignore_errors=True)
+            written[law] = 0
+            continue
+
+        vectors = np.vstack([vector_db.index.reconstruct(pos) for pos, _ in members])
+        docs = {doc.id: doc for _, doc in members}
+        shard = FAISS(
+            vector_db.embeddings,
+            build_index(vectors, index_type, metric),
+            InMemoryDocstore(docs),
+            {i: doc.id for i, (_, doc) in enumerate(members)},
+        )
+        save_vector_store(shard, folder / law)
+        written[law] = len(members)
+    return written
+
+
+def load_sharded_vector_store(
+    folder: Path,
+    embeddings: Any,
+    mmap: bool = True,
+    route_by_question: Optional[bool] = None,
+) -> ShardedVectorStore:
+    """
+    Carrega todas as partições de `folder`.
+
+    Args:
+        folder: Diretório das partições (`<vector_db_path>/shards`)
+        embeddings: Modelo de embedding das consultas
+        mmap: Modo de servir (ver `load_vector_store`)
+        route_by_question: Roteamento pela pergunta (default: settings.vector_db_shard_routing)
+
+    Returns:
+        ShardedVectorStore
+
+    Raises:
+        VectorStoreError: Se não houver partições
+    """
+    from amldo.pipeline.indexer.factory import configure_vector_store
+    from amldo.rag.vector_store import INDEX_FILE, load_vector_store
+
+    if route_by_question is None:
+        route_by_question = settings.vector_db_shard_routing
+
+    shards = {}
+    for path in shard_index_files(folder):
+        shard = load_vector_store(path.parent, embeddings, mmap=mmap)
+        configure_vector_store(shard)
+        shards[path.parent.name] = shard
+    if not shards:
+        raise VectorStoreError(f"Nenhuma partição ({INDEX_FILE}) encontrada em {folder}")
+    return ShardedVectorStore(shards, embeddings, route_by_question)
+
+
+def shard_index_files(folder: Path) -> List[Path]:
+    """
+    Arquivos de índice das partições em `folder`, ordenados pela lei.
+
+    Args:
+        folder: Diretório das partições
+
+    Returns:
+        Caminhos `<folder>/<lei>/index.faiss` existentes
+    """
+    from amldo.rag.vector_store import INDEX_FILE
+
+    return sorted(Path(folder).glob(f"*/{INDEX_FILE}"))
@@ -7,45 +7,16 @@ Implementação básica do RAG que:
 - Sem pós-processamento hierárquico
 """
 
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain.chat_models import init_chat_model
 
 from amldo.core.config import settings
-from amldo.core.exceptions import VectorStoreError, LLMError, RetrievalError
-
-
-# =============================================================================
-# Inicialização de Modelos
-# =============================================================================
-
-# LLM usado dentro do RAG
-_llm_kwargs: dict = {}
-if settings.llm_provider == "google_genai":
-    _llm_kwargs["google_api_key"] = settings.google_api_key
-
-llm = init_chat_model(settings.llm_model, model_provider=settings.llm_provider, **_llm_kwargs)
-
-# Modelo de embedding
-modelo_embedding = HuggingFaceEmbeddings(
-    model_name=settings.embedding_model,
-    encode_kwargs={"normalize_embeddings": True},
-)
-
-# FAISS index já salvo em disco
-try:
-    vector_db = FAISS.load_local(
-        str(settings.vector_db_path_absolute),
-        embeddings=modelo_embedding,
-        allow_dangerous_deserialization=settings.get_faiss_allow_dangerous_deserialization(),
-    )
-except Exception as e:
-    raise VectorStoreError(
-        f"Falha ao carregar vector store de {settings.vector_db_path_absolute}: {e}"
-    ) from e
+from amldo.core.exceptions import LLMError, RetrievalError
+from amldo.rag.cache import cached_answer
+from amldo.rag.mmr import mmr_search_kwargs
+from amldo.rag.runtime import get_rag_runtime
+from amldo.utils.executor import get_rag_executor
 
 
 # =============================================================================
@@ -53,27 +24,44 @@ except Exception as e:
 # =============================================================================
 
 
-def _get_retriever(vector_db=vector_db, search_type: str | None = None, k: int | None = None):
+def _get_retriever(vector_db=None, search_type: str | None = None, k: int | None = None):
     """
     Cria o retriever do FAISS.
 
     Args:
-        vector_db: Instância do FAISS vector store
-        search_type: Tipo de busca ("mmr", "similarity", etc). Usa settings se None.
+        vector_db: Instância do FAISS vector store. Usa o runtime compartilhado se None.
+        search_type: Tipo de busca ("mmr", "similarity", "hybrid", etc). Usa settings se None.
         k: Número de documentos a recuperar. Usa settings se None.
 
     Returns:
         Retriever configurado
     """
+    if vector_db is None:
+        vector_db = get_rag_runtime().vector_db
     search_type = search_type or settings.search_type
     k = k or settings.search_k
 
-    return vector_db.as_retriever(search_type=search_type, search_kwargs={"k": k})
+    if search_type == "hybrid":
+        from amldo.rag.lexical import HybridRetriever
 
+        return HybridRetriever(vector_db=vector_db, lexical=get_rag_runtime().lexical_index, k=k)
 
-def _rag_answer(question: str, search_type: str | None = None, k: int | None = None) -> str:
+    search_kwargs = {"k": k}
+    if search_type == "similarity_score_threshold":
+        search_kwargs["score_threshold"] = settings.search_score_threshold
+    elif search_type == "mmr":
+        search_kwargs.update(mmr_search_kwargs())
+
+    return vector_db.as_retriever(search_type=search_type, search_kwargs=search_kwargs)
+
+
+def _retrieve_documents(
+    question: str, search_type: str | None = None, k: int | None = None
+) -> list:
     """
-    Pipeline RAG básico: busca contexto no FAISS e gera resposta.
+    Recupera os documentos relevantes para a pergunta (embedding + busca FAISS).
+
+    Etapa síncrona e limitada por CPU; no caminho assíncrono roda no executor RAG.
 
     Args:
         question: Pergunta do usuário
@@ -81,30 +69,66 @@ def _rag_answer(question: str, search_type: str | None = None, k: int | None = N
         k: Número de docs a recuperar. Usa settings.search_k se None.
 
     Returns:
-        Resposta gerada pelo LLM baseada no contexto recuperado
+        Lista de documentos LangChain recuperados
 
     Raises:
         RetrievalError: Se falhar ao recuperar documentos
-        LLMError: Se falhar ao gerar resposta
     """
     try:
         retriever = _get_retriever(search_type=search_type, k=k)
     except Exception as e:
         raise RetrievalError(f"Falha ao criar retriever: {e}") from e
 
+    try:
+        return retriever.invoke(question)
+    except Exception as e:
+        raise RetrievalError(f"Falha ao recuperar documentos: {e}") from e
+
+
+def _build_chain(documentos: list):
+    """
+    Monta a chain prompt → LLM → texto com os documentos já recuperados.
+
+    Args:
+        documentos: Documentos recuperados do FAISS
+
+    Returns:
+        Runnable que recebe a pergunta e produz a resposta
+    """
     prompt = ChatPromptTemplate.from_template(
         "Use APENAS o contexto para responder.\n\n"
         "Contexto:\n{context}\n\n"
         "Pergunta:\n{question}"
     )
 
-    rag_chain = (
-        {"context": retriever, "question": RunnablePassthrough()}
+    return (
+        {"context": lambda _: documentos, "question": RunnablePassthrough()}
         | prompt
-        | llm
+        | get_rag_runtime().llm
         | StrOutputParser()
     )
 
+
+@cached_answer("v1")
+def _rag_answer(question: str, search_type: str | None = None, k: int | None = None) -> str:
+    """
+    Pipeline RAG básico: busca contexto no FAISS e gera resposta.
+
+    Args:
+        question: Pergunta do usuário
+        search_type: Tipo de busca. Usa settings.search_type se None.
+        k: Número de docs a recuperar. Usa settings.search_k se None.
+
+    Returns:
+        Resposta gerada pelo LLM baseada no contexto recuperado
+
+    Raises:
+        RetrievalError: Se falhar ao recuperar documentos
+        LLMError: Se falhar ao gerar resposta
+    """
+    documentos = _retrieve_documents(question, search_type=search_type, k=k)
+    rag_chain = _build_chain(documentos)
+
     try:
         resposta = rag_chain.invoke(question)
         return resposta
@@ -112,6 +136,32 @@ def _rag_answer(question: str, search_type: str | None = None, k: int | None = N
         raise LLMError(f"Falha ao gerar resposta: {e}") from e
 
 
+@cached_answer("v1")
+async def _rag_answer_async(
+    question: str, search_type: str | None = None, k: int | None = None
+) -> str:
+    """
+    Versão assíncrona de `_rag_answer`.
+
+    A recuperação (limitada por CPU) roda no executor RAG compartilhado e a chamada
+    ao LLM usa `ainvoke`, sem ocupar uma thread enquanto aguarda a resposta.
+
+    Raises:
+        RAGOverloadedError: Se o executor RAG estiver saturado
+        RetrievalError: Se falhar ao recuperar documentos
+        LLMError: Se falhar ao gerar resposta
+    """
+    documentos = await get_rag_executor().run(
+        _retrieve_documents, question, search_type=search_type, k=k
+    )
+    rag_chain = _build_chain(documentos)
+
+    try:
+        return await rag_chain.ainvoke(question)
+    except Exception as e:
+        raise LLMError(f"Falha ao gerar resposta: {e}") from e
+
+
 # =============================================================================
 # Ferramenta Pública (Tool para Google ADK)
 # =============================================================================
@@ -141,3 +191,21 @@ def consultar_base_rag(pergunta: str) -> str:
         LLMError: Se falhar ao gerar resposta
     """
     return _rag_answer(pergunta, search_type=settings.search_type, k=settings.search_k)
+
+
+async def consultar_base_rag_async(pergunta: str) -> str:
+    """
+    Versão assíncrona de `consultar_base_rag`, usada pela API FastAPI.
+
+    Args:
+        pergunta (str): Pergunta completa do usuário em linguagem natural.
+
+    Returns:
+        str: Texto de resposta gerado a partir do contexto recuperado.
+
+    Raises:
+        RAGOverloadedError: Se o executor RAG estiver saturado
+        RetrievalError: Se falhar ao recuperar documentos
+        LLMError: Se falhar ao gerar resposta
+    """
+    return await _rag_answer_async(pergunta, search_type=settings.search_type, k=settings.search_k)
@@ -9,58 +9,41 @@ Implementação avançada do RAG que:
 - Produz estrutura XML clara para o LLM
 """
 
-import pandas as pd
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, AsyncIterator
+
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain.chat_models import init_chat_model
 
 from amldo.core.config import settings
-from amldo.core.exceptions import VectorStoreError, LLMError, RetrievalError
+from amldo.core.exceptions import LLMError, RetrievalError
+from amldo.rag.articles import article_lookup
+from amldo.rag.cache import cached_answer
+from amldo.rag.context import documents_to_rows, get_sources
+from amldo.rag.mmr import mmr_search_kwargs
+from amldo.rag.retrieval_cache import CachedRetrieval, cached_retrieval
+from amldo.rag.runtime import get_rag_runtime
+from amldo.utils.executor import get_rag_executor
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # =============================================================================
-# Inicialização de Modelos e Dados
+# Configuração
 # =============================================================================
 
 # Parâmetros do RAG (agora vêm de settings)
 K = settings.search_k
 SEARCH_TYPE = settings.search_type
 
-# LLM
-_llm_kwargs: dict = {}
-if settings.llm_provider == "google_genai":
-    _llm_kwargs["google_api_key"] = settings.google_api_key
-
-llm = init_chat_model(settings.llm_model, model_provider=settings.llm_provider, **_llm_kwargs)
-
-# Dataframe com artigos 0 (introduções de capítulos/títulos)
-try:
-    df_art_0 = pd.read_csv(settings.artigos_0_csv_path_absolute)
-except FileNotFoundError as e:
-    raise VectorStoreError(
-        f"Arquivo artigos_0 não encontrado: {settings.artigos_0_csv_path_absolute}"
-    ) from e
-
-# Modelo de embedding
-modelo_embedding = HuggingFaceEmbeddings(
-    model_name=settings.embedding_model,
-    encode_kwargs={"normalize_embeddings": True},
-)
-
-# FAISS index já salvo em disco
-try:
-    vector_db = FAISS.load_local(
-        str(settings.vector_db_path_absolute),
-        embeddings=modelo_embedding,
-        allow_dangerous_deserialization=settings.get_faiss_allow_dangerous_deserialization(),
-    )
-except Exception as e:
-    raise VectorStoreError(
-        f"Falha ao carregar vector store de {settings.vector_db_path_absolute}: {e}"
-    ) from e
+# Filtro de metadados da busca (artigos 0 entram pelo CSV, não pelo FAISS)
+RETRIEVAL_FILTER = {"artigo": {"$nin": ["artigo_0.txt"]}}
+
+# Formato do contexto gerado; v2 e v3 com o mesmo formato compartilham o cache
+CONTEXT_RENDERER = "hierarquico-xml"
 
 
 # =============================================================================
@@ -68,28 +51,41 @@ except Exception as e:
 # =============================================================================
 
 
-def _get_retriever(vector_db=vector_db, search_type: str = SEARCH_TYPE, k: int = K):
+def _get_retriever(vector_db=None, search_type: str = SEARCH_TYPE, k: int = K):
     """
     Cria o retriever do FAISS com filtro para excluir artigo_0.txt.
 
     Args:
-        vector_db: Instância do FAISS vector store
-        search_type: Tipo de busca ("mmr", "similarity", etc)
+        vector_db: Instância do FAISS vector store. Usa o runtime compartilhado se None.
+        search_type: Tipo de busca ("mmr", "similarity", "hybrid", etc)
         k: Número de documentos a recuperar
 
     Returns:
         Retriever configurado
     """
-    return vector_db.as_retriever(
-        search_type=search_type,
-        search_kwargs={"k": k, "filter": {"artigo": {"$nin": ["artigo_0.txt"]}}},
-    )
+    if vector_db is None:
+        vector_db = get_rag_runtime().vector_db
+    if search_type == "hybrid":
+        from amldo.rag.lexical import HybridRetriever
+
+        lexical = get_rag_runtime().lexical_index
+        return HybridRetriever(
+            vector_db=vector_db, lexical=lexical, k=k, search_filter=RETRIEVAL_FILTER
+        )
+    search_kwargs = {"k": k, "filter": RETRIEVAL_FILTER}
+    if search_type == "mmr":
+        search_kwargs.update(mmr_search_kwargs())
+    return vector_db.as_retriever(search_type=search_type, search_kwargs=search_kwargs)
 
 
 def get_art_0(law: str, title: str, chapter: str, df_art_0: pd.DataFrame) -> str | None:
     """
     Obtém o texto do artigo 0 correspondente (introdução de capítulo/título).
 
+    Interface baseada em DataFrame mantida por compatibilidade; o pipeline usa a
+    árvore pré-computada em `get_rag_runtime().hierarchy`, reaproveitada aqui
+    quando `df_art_0` é o DataFrame do runtime.
+
     Args:
         law: Lei (ex: "L14133")
         title: Título (ex: "TITULO_II")
@@ -99,17 +95,16 @@ def get_art_0(law: str, title: str, chapter: str, df_art_0: pd.DataFrame) -> str
     Returns:
         Texto do artigo 0 ou None se não encontrado
     """
-    cond = (df_art_0["lei"] == law) & (df_art_0["titulo"] == title) & (df_art_0["capitulo"] == chapter)
-    resultados = df_art_0[cond]
-    if resultados.shape[0] > 0:
-        return "\n".join(resultados["texto"].tolist())
-    return None
+    return get_rag_runtime().hierarchy_for(df_art_0).get_art_0(law, title, chapter)
 
 
 def get_pos_processed_context(df_resultados: pd.DataFrame, df_art_0: pd.DataFrame) -> str:
     """
     Pós-processa o contexto recuperado, organizando hierarquicamente.
 
+    Interface baseada em DataFrame mantida por compatibilidade; delega para
+    `amldo.rag.context.HierarchyIndex.render`, usado diretamente pelo pipeline.
+
     Estrutura gerada:
     <LEI L14133>
       <TITULO: TITULO_II>
@@ -128,61 +123,80 @@ def get_pos_processed_context(df_resultados: pd.DataFrame, df_art_0: pd.DataFram
     Returns:
         String com contexto hierarquicamente estruturado
     """
-    df_cap = df_resultados[["lei", "titulo", "capitulo"]].drop_duplicates().reset_index(drop=True)
-    context = ""
+    index = get_rag_runtime().hierarchy_for(df_art_0)
+    return index.render(df_resultados.to_dict("records"))
 
-    for law in df_cap["lei"].unique():
-        context += f"\n\n<LEI {law}>\n"
-        df_law = df_cap[df_cap["lei"] == law].copy()
 
-        for title in df_law["titulo"].unique():
-            # Artigo 0 no nível de título
-            art_0 = get_art_0(law, title, "CAPITULO_0", df_art_0)
-            if art_0:
-                context += f"{art_0}\n"
+def _run_retrieval(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> CachedRetrieval:
+    """
+    Executa a busca no FAISS e renderiza o contexto hierárquico (sem cache).
 
-            if title != "TITULO_0":
-                context += f"<TITULO: {title}>\n"
+    Args:
+        question: Pergunta do usuário
+        search_type: Tipo de busca
+        k: Número de docs a recuperar
 
-            df_title = df_law[df_law["titulo"] == title].copy()
+    Returns:
+        CachedRetrieval com IDs dos chunks, contexto e fontes
 
-            for chapter in df_title["capitulo"].unique():
-                # Artigo 0 no nível de capítulo
-                art_0 = get_art_0(law, title, chapter, df_art_0)
-                if art_0:
-                    context += f"{art_0}\n"
+    Raises:
+        RetrievalError: Se falhar ao recuperar documentos
+    """
+    runtime = get_rag_runtime()
 
-                if chapter != "CAPITULO_0":
-                    context += f"<CAPITULO: {chapter}>\n"
+    try:
+        retriever = _get_retriever(search_type=search_type, k=k)
+        contexto = retriever.invoke(question)
+    except Exception as e:
+        raise RetrievalError(f"Falha ao recuperar documentos: {e}") from e
 
-                # Filtrar artigos deste capítulo
-                cond_lei = df_resultados["lei"] == law
-                cond_titulo = df_resultados["titulo"] == title
-                cond_capitulo = df_resultados["capitulo"] == chapter
-                mask = cond_lei & cond_titulo & cond_capitulo
-                df_chapter = df_resultados[mask].copy()
+    # Ordenação hierárquica e montagem do contexto (árvore pré-computada)
+    linhas = documents_to_rows(contexto)
+    return CachedRetrieval(
+        chunk_ids=tuple(doc.id for doc in contexto),
+        context=runtime.hierarchy.render(linhas),
+        sources=get_sources(linhas),
+    )
 
-                for artigo in df_chapter["artigo"].unique():
-                    df_article = df_chapter[df_chapter["artigo"] == artigo].copy()
-                    context += f'<ARTIGO: {artigo.replace(".txt", "")}>\n'
-                    for _, row in df_article.iterrows():
-                        context += f"{row['texto']}\n"
-                    context += f'</ARTIGO: {artigo.replace(".txt", "")}>\n'
 
-                if chapter != "CAPITULO_0":
-                    context += f"</CAPITULO: {chapter}>\n"
+def _retrieve_context_and_sources(
+    question: str, search_type: str = SEARCH_TYPE, k: int = K
+) -> tuple[str, list[dict]]:
+    """
+    Recupera documentos no FAISS e monta o contexto hierárquico e a lista de fontes.
 
-            if title != "TITULO_0":
-                context += f"</TITULO: {title}>\n"
+    Etapa síncrona e limitada por CPU; no caminho assíncrono roda no executor RAG.
+    Perguntas com o mesmo embedding e configuração de busca reutilizam o
+    resultado do cache de recuperação.
+    Perguntas que citam artigo e lei ("art. 75 da Lei 14.133") são resolvidas
+    direto no índice de artigos (`article_lookup`), sem busca vetorial.
 
-        context += f"</LEI {law}>\n"
+    Args:
+        question: Pergunta do usuário
+        search_type: Tipo de busca
+        k: Número de docs a recuperar
 
-    return context.replace("\n[[SECTION:", "[[SECTION:")
+    Returns:
+        Tupla (contexto estruturado em XML, fontes recuperadas)
 
+    Raises:
+        RetrievalError: Se falhar ao recuperar documentos
+    """
+    # Artigos citados explicitamente dispensam embedding e FAISS
+    resultado = article_lookup(question) or cached_retrieval(
+        question,
+        k=k,
+        search_type=search_type,
+        search_filter=RETRIEVAL_FILTER,
+        renderer=CONTEXT_RENDERER,
+        build=lambda: _run_retrieval(question, search_type=search_type, k=k),
+    )
+    return resultado.context, list(resultado.sources)
 
-def _rag_answer(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> str:
+
+def _retrieve_context(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> str:
     """
-    Pipeline RAG v2 com pós-processamento hierárquico.
+    Recupera documentos no FAISS e monta o contexto hierárquico.
 
     Args:
         question: Pergunta do usuário
@@ -190,38 +204,53 @@ def _rag_answer(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> st
         k: Número de docs a recuperar
 
     Returns:
-        Resposta gerada pelo LLM
+        Contexto estruturado em XML
 
     Raises:
         RetrievalError: Se falhar ao recuperar documentos
-        LLMError: Se falhar ao gerar resposta
     """
-    try:
-        retriever = _get_retriever(search_type=search_type, k=k)
-        contexto = retriever.invoke(question)
-    except Exception as e:
-        raise RetrievalError(f"Falha ao recuperar documentos: {e}") from e
+    context, _ = _retrieve_context_and_sources(question, search_type=search_type, k=k)
+    return context
 
-    # Separação dos resultados do retriever
-    linhas = []
-    for doc in contexto:
-        linhas.append({"texto": doc.page_content, **doc.metadata})
 
-    # Ordenação dos resultados hierarquicamente
-    df_resultados = pd.DataFrame(linhas).sort_values(
-        ["lei", "titulo", "capitulo", "artigo", "chunk_idx"]
-    ).reset_index(drop=True)
+def _build_chain(context: str):
+    """
+    Monta a chain prompt → LLM → texto com o contexto já pós-processado.
 
-    # Pós-processamento do contexto
-    context = get_pos_processed_context(df_resultados, df_art_0)
+    Args:
+        context: Contexto hierárquico gerado por `_retrieve_context`
 
+    Returns:
+        Runnable que recebe a pergunta e produz a resposta
+    """
     prompt = ChatPromptTemplate.from_template(
         "Use APENAS o contexto para responder.\n\n"
         f"<Contexto>:\n{context}\n</Contexto>\n\n"
         "<Pergunta>:\n{question}</Pergunta>\n\n"
     )
 
-    rag_chain = {"question": RunnablePassthrough()} | prompt | llm | StrOutputParser()
+    return {"question": RunnablePassthrough()} | prompt | get_rag_runtime().llm | StrOutputParser()
+
+
+@cached_answer("v2")
+def _rag_answer(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> str:
+    """
+    Pipeline RAG v2 com pós-processamento hierárquico.
+
+    Args:
+        question: Pergunta do usuário
+        search_type: Tipo de busca
+        k: Número de docs a recuperar
+
+    Returns:
+        Resposta gerada pelo LLM
+
+    Raises:
+        RetrievalError: Se falhar ao recuperar documentos
+        LLMError: Se falhar ao gerar resposta
+    """
+    context = _retrieve_context(question, search_type=search_type, k=k)
+    rag_chain = _build_chain(context)
 
     try:
         resposta = rag_chain.invoke(question)
@@ -230,6 +259,63 @@ def _rag_answer(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> st
         raise LLMError(f"Falha ao gerar resposta: {e}") from e
 
 
+@cached_answer("v2")
+async def _rag_answer_async(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> str:
+    """
+    Versão assíncrona de `_rag_answer`.
+
+    A recuperação e o pós-processamento (limitados por CPU) rodam no executor RAG
+    compartilhado e a chamada ao LLM usa `ainvoke`, sem ocupar uma thread enquanto
+    aguarda a resposta.
+
+    Raises:
+        RAGOverloadedError: Se o executor RAG estiver saturado
+        RetrievalError: Se falhar ao recuperar documentos
+        LLMError: Se falhar ao gerar resposta
+    """
+    context = await get_rag_executor().run(
+        _retrieve_context, question, search_type=search_type, k=k
+    )
+    rag_chain = _build_chain(context)
+
+    try:
+        return await rag_chain.ainvoke(question)
+    except Exception as e:
+        raise LLMError(f"Falha ao gerar resposta: {e}") from e
+
+
+async def _rag_answer_stream(
+    question: str, search_type: str = SEARCH_TYPE, k: int = K
+) -> AsyncIterator[dict]:
+    """
+    Versão em streaming do pipeline v2.
+
+    Emite primeiro um evento `sources` com os dispositivos recuperados (assim que
+    a recuperação termina) e depois um evento `token` por trecho gerado pelo LLM.
+
+    Yields:
+        Dicts {"event": "sources", "data": [...]} e {"event": "token", "data": "..."}
+
+    Raises:
+        RAGOverloadedError: Se o executor RAG estiver saturado
+        RetrievalError: Se falhar ao recuperar documentos
+        LLMError: Se falhar ao gerar resposta
+    """
+    context, sources = await get_rag_executor().run(
+        _retrieve_context_and_sources, question, search_type=search_type, k=k
+    )
+    yield {"event": "sources", "data": sources}
+
+    rag_chain = _build_chain(context)
+
+    try:
+        async for chunk in rag_chain.astream(question):
+            if chunk:
+                yield {"event": "token", "data": chunk}
+    except Exception as e:
+        raise LLMError(f"Falha ao gerar resposta: {e}") from e
+
+
 # =============================================================================
 # Ferramenta Pública (Tool para Google ADK)
 # =============================================================================
@@ -261,3 +347,35 @@ def consultar_base_rag(pergunta: str) -> str:
         LLMError: Se falhar ao gerar resposta
     """
     return _rag_answer(pergunta, search_type=SEARCH_TYPE, k=K)
+
+
+async def consultar_base_rag_async(pergunta: str) -> str:
+    """
+    Versão assíncrona de `consultar_base_rag`, usada pela API FastAPI.
+
+    Args:
+        pergunta (str): Pergunta completa do usuário em linguagem natural.
+
+    Returns:
+        str: Texto de resposta gerado a partir do contexto recuperado e estruturado.
+
+    Raises:
+        RAGOverloadedError: Se o executor RAG estiver saturado
+        RetrievalError: Se falhar ao recuperar documentos
+        LLMError: Se falhar ao gerar resposta
+    """
+    return await _rag_answer_async(pergunta, search_type=SEARCH_TYPE, k=K)
+
+
+def consultar_base_rag_stream(pergunta: str) -> AsyncIterator[dict]:
+    """
+    Versão em streaming de `consultar_base_rag`, usada por `/api/ask/stream`.
+
+    Args:
+        pergunta (str): Pergunta completa do usuário em linguagem natural.
+
+    Returns:
+        Iterador assíncrono de eventos `sources` (uma vez) e `token` (vários).
+        A recuperação só acontece ao consumir o primeiro evento.
+    """
+    return _rag_answer_stream(pergunta, search_type=SEARCH_TYPE, k=K)
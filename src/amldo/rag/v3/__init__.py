@@ -5,6 +5,6 @@ Versão experimental do RAG usando similarity search ao invés de MMR.
 """
 
 from . import agent
-from .tools import consultar_base_rag
+from .tools import consultar_base_rag, consultar_base_rag_async
 
-__all__ = ["agent", "consultar_base_rag"]
+__all__ = ["agent", "consultar_base_rag", "consultar_base_rag_async"]
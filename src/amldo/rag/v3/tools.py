@@ -12,58 +12,41 @@ Implementação experimental do RAG que:
 Diferença vs RAG v2: search_type default é "similarity" ao invés de "mmr"
 """
 
-import pandas as pd
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain.chat_models import init_chat_model
 
 from amldo.core.config import settings
-from amldo.core.exceptions import VectorStoreError, LLMError, RetrievalError
+from amldo.core.exceptions import LLMError, RetrievalError
+from amldo.rag.articles import article_lookup
+from amldo.rag.cache import cached_answer
+from amldo.rag.context import documents_to_rows, get_sources
+from amldo.rag.mmr import mmr_search_kwargs
+from amldo.rag.retrieval_cache import CachedRetrieval, cached_retrieval
+from amldo.rag.runtime import get_rag_runtime
+from amldo.utils.executor import get_rag_executor
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # =============================================================================
-# Inicialização de Modelos e Dados
+# Configuração
 # =============================================================================
 
 # Parâmetros do RAG v3 (vêm de settings)
 K = settings.rag_v3_k
 SEARCH_TYPE = settings.rag_v3_search_type
 
-# LLM
-_llm_kwargs: dict = {}
-if settings.llm_provider == "google_genai":
-    _llm_kwargs["google_api_key"] = settings.google_api_key
-
-llm = init_chat_model(settings.llm_model, model_provider=settings.llm_provider, **_llm_kwargs)
-
-# Dataframe com artigos 0 (introduções de capítulos/títulos)
-try:
-    df_art_0 = pd.read_csv(settings.artigos_0_csv_path_absolute)
-except FileNotFoundError as e:
-    raise VectorStoreError(
-        f"Arquivo artigos_0 não encontrado: {settings.artigos_0_csv_path_absolute}"
-    ) from e
-
-# Modelo de embedding
-modelo_embedding = HuggingFaceEmbeddings(
-    model_name=settings.embedding_model,
-    encode_kwargs={"normalize_embeddings": True},
-)
-
-# FAISS index já salvo em disco
-try:
-    vector_db = FAISS.load_local(
-        str(settings.vector_db_path_absolute),
-        embeddings=modelo_embedding,
-        allow_dangerous_deserialization=settings.get_faiss_allow_dangerous_deserialization(),
-    )
-except Exception as e:
-    raise VectorStoreError(
-        f"Falha ao carregar vector store de {settings.vector_db_path_absolute}: {e}"
-    ) from e
+# Filtro de metadados da busca (artigos 0 entram pelo CSV, não pelo FAISS)
+RETRIEVAL_FILTER = {"artigo": {"$nin": ["artigo_0.txt"]}}
+
+# Formato do contexto gerado; v2 e v3 com o mesmo formato compartilham o cache
+CONTEXT_RENDERER = "hierarquico-xml"
 
 
 # =============================================================================
@@ -71,28 +54,41 @@ except Exception as e:
 # =============================================================================
 
 
-def _get_retriever(vector_db=vector_db, search_type: str = SEARCH_TYPE, k: int = K):
+def _get_retriever(vector_db=None, search_type: str = SEARCH_TYPE, k: int = K):
     """
     Cria o retriever do FAISS com filtro para excluir artigo_0.txt.
 
     Args:
-        vector_db: Instância do FAISS vector store
-        search_type: Tipo de busca ("similarity", "mmr", etc)
+        vector_db: Instância do FAISS vector store. Usa o runtime compartilhado se None.
+        search_type: Tipo de busca ("similarity", "mmr", "hybrid", etc)
         k: Número de documentos a recuperar
 
     Returns:
         Retriever configurado
     """
-    return vector_db.as_retriever(
-        search_type=search_type,
-        search_kwargs={"k": k, "filter": {"artigo": {"$nin": ["artigo_0.txt"]}}},
-    )
+    if vector_db is None:
+        vector_db = get_rag_runtime().vector_db
+    if search_type == "hybrid":
+        from amldo.rag.lexical import HybridRetriever
+
+        lexical = get_rag_runtime().lexical_index
+        return HybridRetriever(
+            vector_db=vector_db, lexical=lexical, k=k, search_filter=RETRIEVAL_FILTER
+        )
+    search_kwargs = {"k": k, "filter": RETRIEVAL_FILTER}
+    if search_type == "mmr":
+        search_kwargs.update(mmr_search_kwargs())
+    return vector_db.as_retriever(search_type=search_type, search_kwargs=search_kwargs)
 
 
 def get_art_0(law: str, title: str, chapter: str, df_art_0: pd.DataFrame) -> str | None:
     """
     Obtém o texto do artigo 0 correspondente (introdução de capítulo/título).
 
+    Interface baseada em DataFrame mantida por compatibilidade; o pipeline usa a
+    árvore pré-computada em `get_rag_runtime().hierarchy`, reaproveitada aqui
+    quando `df_art_0` é o DataFrame do runtime.
+
     Args:
         law: Lei (ex: "L14133")
         title: Título (ex: "TITULO_II")
@@ -102,18 +98,16 @@ def get_art_0(law: str, title: str, chapter: str, df_art_0: pd.DataFrame) -> str
     Returns:
         Texto do artigo 0 ou None se não encontrado
     """
-    cond = (df_art_0["lei"] == law) & (df_art_0["titulo"] == title) & (df_art_0["capitulo"] == chapter)
-    resultados = df_art_0[cond]
-    if resultados.shape[0] > 0:
-        resultados = "\n".join(resultados["texto"].tolist())
-        return resultados
-    return None
+    return get_rag_runtime().hierarchy_for(df_art_0).get_art_0(law, title, chapter)
 
 
 def get_pos_processed_context(df_resultados: pd.DataFrame, df_art_0: pd.DataFrame) -> str:
     """
     Pós-processa contexto recuperado, organizando hierarquicamente.
 
+    Interface baseada em DataFrame mantida por compatibilidade; delega para
+    `amldo.rag.context.HierarchyIndex.render`, usado diretamente pelo pipeline.
+
     Estrutura de saída:
         <LEI L14133>
           [artigo 0 do título se houver]
@@ -134,59 +128,104 @@ def get_pos_processed_context(df_resultados: pd.DataFrame, df_art_0: pd.DataFram
     Returns:
         Contexto formatado em XML
     """
-    df_cap = df_resultados[["lei", "titulo", "capitulo"]].drop_duplicates().reset_index(drop=True)
-    context = ""
+    index = get_rag_runtime().hierarchy_for(df_art_0)
+    return index.render(df_resultados.to_dict("records"))
+
+
+def _run_retrieval(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> CachedRetrieval:
+    """
+    Etapas 1-4 do pipeline v3: busca, ordenação e pós-processamento do contexto.
+
+    Args:
+        question: Pergunta do usuário
+        search_type: Tipo de busca (similarity, mmr)
+        k: Número de documentos a recuperar
+
+    Returns:
+        CachedRetrieval com IDs dos chunks, contexto e fontes
+
+    Raises:
+        RetrievalError: Se falhar na busca
+    """
+    runtime = get_rag_runtime()
 
-    for law in df_cap["lei"].unique():
-        context += f"\n\n<LEI {law}>\n"
-        df_law = df_cap[df_cap["lei"] == law].copy()
+    try:
+        # 1. Buscar documentos
+        retriever = _get_retriever(search_type=search_type, k=k)
+        contexto = retriever.invoke(question)
+    except Exception as e:
+        raise RetrievalError(f"Erro ao buscar documentos: {e}") from e
 
-        for title in df_law["titulo"].unique():
-            # Artigo 0 do título (se houver)
-            art_0 = get_art_0(law, title, "CAPITULO_0", df_art_0)
-            if art_0:
-                context += f"{art_0}\n"
+    # 2-3. Extrair resultados e ordenar hierarquicamente
+    linhas = documents_to_rows(contexto)
 
-            if title != "TITULO_0":
-                context += f"<TITULO: {title}>\n"
+    # 4. Pós-processar contexto (árvore de artigos 0 pré-computada)
+    return CachedRetrieval(
+        chunk_ids=tuple(doc.id for doc in contexto),
+        context=runtime.hierarchy.render(linhas),
+        sources=get_sources(linhas),
+    )
 
-            df_title = df_law[df_law["titulo"] == title].copy()
 
-            for chapter in df_title["capitulo"].unique():
-                # Artigo 0 do capítulo (se houver)
-                art_0 = get_art_0(law, title, chapter, df_art_0)
-                if art_0:
-                    context += f"{art_0}\n"
+def _retrieve_context(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> str:
+    """
+    Recupera o contexto hierárquico, reutilizando o cache de recuperação.
 
-                if chapter != "CAPITULO_0":
-                    context += f"<CAPITULO: {chapter}>\n"
+    Etapa síncrona e limitada por CPU; no caminho assíncrono roda no executor RAG.
+    O cache é compartilhado com o v2 quando a configuração de busca coincide.
+    Perguntas que citam artigo e lei ("art. 75 da Lei 14.133") são resolvidas
+    direto no índice de artigos (`article_lookup`), sem busca vetorial.
 
-                # Filtrar artigos deste capítulo
-                cond_lei = df_resultados["lei"] == law
-                cond_titulo = df_resultados["titulo"] == title
-                cond_capitulo = df_resultados["capitulo"] == chapter
-                mask = cond_lei & cond_titulo & cond_capitulo
-                df_chapter = df_resultados[mask].copy()
+    Args:
+        question: Pergunta do usuário
+        search_type: Tipo de busca (similarity, mmr)
+        k: Número de documentos a recuperar
+
+    Returns:
+        Contexto formatado em XML
+
+    Raises:
+        RetrievalError: Se falhar na busca
+    """
+    # Artigos citados explicitamente dispensam embedding e FAISS
+    resultado = article_lookup(question) or cached_retrieval(
+        question,
+        k=k,
+        search_type=search_type,
+        search_filter=RETRIEVAL_FILTER,
+        renderer=CONTEXT_RENDERER,
+        build=lambda: _run_retrieval(question, search_type=search_type, k=k),
+    )
+    return resultado.context
 
-                for artigo in df_chapter["artigo"].unique():
-                    df_article = df_chapter[df_chapter["artigo"] == artigo].copy()
-                    context += f'<ARTIGO: {artigo.replace(".txt", "")}>\n'
-                    for _, row in df_article.iterrows():
-                        context += f"{row['texto']}\n"
-                    context += f'</ARTIGO: {artigo.replace(".txt", "")}>\n'
 
-                if chapter != "CAPITULO_0":
-                    context += f"</CAPITULO: {chapter}>\n"
+def _build_chain(context: str):
+    """
+    Etapas 5-6 do pipeline v3: prompt e chain até o LLM.
 
-            if title != "TITULO_0":
-                context += f"</TITULO: {title}>\n"
+    Args:
+        context: Contexto gerado por `_retrieve_context`
 
-        context += f"</LEI {law}>\n"
+    Returns:
+        Runnable que recebe a pergunta e produz a resposta
+    """
+    # 5. Criar prompt
+    prompt = ChatPromptTemplate.from_template(
+        "Use APENAS o contexto para responder.\n\n"
+        "<Contexto>:\n{context}\n</Contexto>\n\n"
+        "<Pergunta>:\n{question}</Pergunta>\n\n"
+    )
 
-    # Limpeza de formatação
-    return context.replace("\n[[SECTION:", "[[SECTION:")
+    # 6. Executar chain
+    return (
+        {"question": RunnablePassthrough(), "context": lambda _: context}
+        | prompt
+        | get_rag_runtime().llm
+        | StrOutputParser()
+    )
 
 
+@cached_answer("v3")
 def _rag_answer(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> str:
     """
     Pipeline RAG v3 completo: busca contexto no FAISS e gera resposta.
@@ -209,47 +248,38 @@ def _rag_answer(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> st
         RetrievalError: Se falhar na busca
         LLMError: Se falhar na geração de resposta
     """
-    try:
-        # 1. Buscar documentos
-        retriever = _get_retriever(search_type=search_type, k=k)
-        contexto = retriever.invoke(question)
-
-        # 2. Extrair e estruturar resultados
-        linhas = []
-        for doc in contexto:
-            linhas.append({"texto": doc.page_content, **doc.metadata})
+    context = _retrieve_context(question, search_type=search_type, k=k)
+    rag_chain = _build_chain(context)
 
-        # 3. Ordenar hierarquicamente
-        df_resultados = pd.DataFrame(linhas).sort_values(
-            ["lei", "titulo", "capitulo", "artigo", "chunk_idx"]
-        ).reset_index(drop=True)
+    try:
+        resposta = rag_chain.invoke(question)
+        return resposta
+    except Exception as e:
+        raise LLMError(f"Erro ao gerar resposta: {e}") from e
 
-        # 4. Pós-processar contexto
-        context = get_pos_processed_context(df_resultados, df_art_0)
 
-        # 5. Criar prompt
-        prompt = ChatPromptTemplate.from_template(
-            "Use APENAS o contexto para responder.\n\n"
-            "<Contexto>:\n{context}\n</Contexto>\n\n"
-            "<Pergunta>:\n{question}</Pergunta>\n\n"
-        )
+@cached_answer("v3")
+async def _rag_answer_async(question: str, search_type: str = SEARCH_TYPE, k: int = K) -> str:
+    """
+    Pipeline RAG v3 assíncrono.
 
-        # 6. Executar chain
-        rag_chain = (
-            {"question": RunnablePassthrough(), "context": lambda _: context}
-            | prompt
-            | llm
-            | StrOutputParser()
-        )
+    Mesmo workflow de `_rag_answer`: a busca e o pós-processamento rodam no
+    executor RAG compartilhado e o LLM é chamado via `ainvoke`.
 
-        resposta = rag_chain.invoke(question)
-        return resposta
+    Raises:
+        RAGOverloadedError: Se o executor RAG estiver saturado
+        RetrievalError: Se falhar na busca
+        LLMError: Se falhar na geração de resposta
+    """
+    context = await get_rag_executor().run(
+        _retrieve_context, question, search_type=search_type, k=k
+    )
+    rag_chain = _build_chain(context)
 
+    try:
+        return await rag_chain.ainvoke(question)
     except Exception as e:
-        if "retriever" in str(e).lower() or "faiss" in str(e).lower():
-            raise RetrievalError(f"Erro ao buscar documentos: {e}") from e
-        else:
-            raise LLMError(f"Erro ao gerar resposta: {e}") from e
+        raise LLMError(f"Erro ao gerar resposta: {e}") from e
 
 
 def consultar_base_rag(pergunta: str) -> str:
@@ -283,3 +313,21 @@ def consultar_base_rag(pergunta: str) -> str:
         "De acordo com a Lei 14.133/2021, o limite de dispensa..."
     """
     return _rag_answer(pergunta, search_type=SEARCH_TYPE, k=K)
+
+
+async def consultar_base_rag_async(pergunta: str) -> str:
+    """
+    Versão assíncrona de `consultar_base_rag`, usada pela API FastAPI.
+
+    Args:
+        pergunta (str): Pergunta completa do usuário em linguagem natural.
+
+    Returns:
+        str: Texto de resposta gerado a partir do contexto recuperado.
+
+    Raises:
+        RAGOverloadedError: Se o executor RAG estiver saturado
+        RetrievalError: Se falhar na busca de documentos
+        LLMError: Se falhar na geração de resposta
+    """
+    return await _rag_answer_async(pergunta, search_type=SEARCH_TYPE, k=K)
@@ -0,0 +1,485 @@
+"""
+Formato em disco e carregamento do vector store FAISS.
+
+O formato padrão do LangChain (`save_local`/`load_local`) guarda o docstore e o
+mapeamento posição → ID em `index.pkl`, que precisa ser desserializado inteiro
+(e com `allow_dangerous_deserialization=True`) em cada processo. O AMLDO usa:
+
+- `index.faiss`: índice FAISS (inalterado)
+- `docstore.sqlite`: tabela `docs(pos, doc_id, page_content, metadata)`, com a
+  posição no índice como chave primária
+
+No modo de servir (`settings.vector_db_mmap`), o índice é mapeado em memória
+somente leitura (`IO_FLAG_MMAP_IFC`) e o SQLite é aberto somente leitura com
+`mmap_size`: os workers do uvicorn compartilham uma única cópia física, o
+carregamento não depende do tamanho do índice e cada consulta lê do SQLite só
+os k documentos retornados pela busca (uma consulta por chave primária).
+
+Vector stores antigos (só `index.pkl`) são migrados por uma etapa explícita
+(`migrate_docstores`: `amldo-migrate-docstore`, o processamento e os scripts de
+índice), se `settings.get_faiss_allow_dangerous_deserialization()` permitir. O
+caminho de servir (`load_vector_store`) nunca desserializa o pickle.
+
+`save_vector_store` grava os arquivos de forma atômica (arquivo temporário +
+`os.replace`), de modo que workers com o índice mapeado nunca leem um arquivo
+truncado.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+from amldo.core.exceptions import VectorStoreError
+
+# Arquivos do vector store (os dois primeiros no formato do LangChain)
+INDEX_FILE = "index.faiss"
+PICKLE_FILE = "index.pkl"
+DOCSTORE_FILE = "docstore.sqlite"
+
+# Janela de mmap do SQLite (limite superior; o SO só mapeia o tamanho do arquivo)
+SQLITE_MMAP_SIZE = 1 << 30
+
+# Espera antes de reabrir um vector store lido no meio de uma gravação (segundos)
+LOAD_RETRY_DELAY = 0.2
+
+
+class _ReadOnlySQLite:
+    """
+    Conexão SQLite somente leitura, aberta na carga e compartilhada entre threads.
+
+    Abrir a conexão já na carga a prende ao arquivo carregado: um
+    `docstore.sqlite` novo, trocado por `save_vector_store` (`os.replace`),
+    não é visto por threads que ainda servem o índice antigo.
+    """
+
+    # Linhas lidas por vez nas varreduras (o lock é liberado entre os lotes)
+    BATCH_SIZE = 1000
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+
+    def fetchone(self, sql: str, params: Tuple = ()) -> Any:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def iterate(self, sql: str, params: Tuple = ()) -> Iterator[Tuple]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(self.BATCH_SIZE)
+            if not rows:
+                return
+            yield from rows
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Docstore somente leitura sobre `docstore.sqlite`.
+
+    Compatível com `langchain_community.vectorstores.FAISS`: `search` aceita a
+    posição no índice (via `PositionMap`) ou o ID do documento e retorna o
+    Document, ou uma mensagem de erro (como o InMemoryDocstore).
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Caminho do docstore.sqlite
+        """
+        self._db = _ReadOnlySQLite(path)
+
+    def search(self, search: Union[int, str]) -> Union[str, Document]:
+        """
+        Busca um documento pela posição no índice ou pelo ID.
+
+        Args:
+            search: Posição no índice FAISS (int) ou ID do documento (str)
+
+        Returns:
+            Document, ou mensagem de erro se não existir
+        """
+        if isinstance(search, str):
+            row = self._db.fetchone(
+                "SELECT doc_id, page_content, metadata FROM docs WHERE doc_id = ?", (search,)
+            )
+        else:
+            row = self._db.fetchone(
+                "SELECT doc_id, page_content, metadata FROM docs WHERE pos = ?", (int(search),)
+            )
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=row[0], page_content=row[1], metadata=json.loads(row[2]))
+
+    def __len__(self) -> int:
+        return self._db.fetchone("SELECT COUNT(*) FROM docs")[0]
+
+    def iter_metadata(self, fields: Tuple[str, ...]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Percorre os campos de metadados de todos os documentos, sem montar Documents.
+
+        Args:
+            fields: Campos de metadados a ler
+
+        Yields:
+            Tupla (posição no índice, {campo: valor})
+        """
+        columns = ", ".join(f"json_extract(metadata, '$.{field}')" for field in fields)
+        for row in self._db.iterate(f"SELECT pos, {columns} FROM docs"):
+            yield row[0], dict(zip(fields, row[1:], strict=True))
+
+    def iter_texts(self) -> Iterator[Tuple[int, str]]:
+        """
+        Percorre o texto de todos os documentos, em ordem de posição.
+
+        Yields:
+            Tupla (posição no índice, page_content)
+        """
+        yield from self._db.iterate("SELECT pos, page_content FROM docs ORDER BY pos")
+
+
+class PositionMap(Mapping):
+    """
+    Substituto somente leitura do dict `index_to_docstore_id` do LangChain.
+
+    Mapeia cada posição do índice para ela mesma; o `SQLiteDocstore` resolve a
+    posição direto pela chave primária, sem manter o mapeamento em memória.
+    """
+
+    def __init__(self, size: int):
+        """
+        Args:
+            size: Número de vetores no índice
+        """
+        self._size = size
+
+    def __getitem__(self, position: int) -> int:
+        position = int(position)
+        if not 0 <= position < self._size:
+            raise KeyError(position)
+        return position
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self._size))
+
+    def __len__(self) -> int:
+        return self._size
+
+
+# =============================================================================
+# Exportação do docstore
+# =============================================================================
+
+
+def export_docstore(docstore: Any, index_to_docstore_id: Dict[int, str], path: Path) -> Path:
+    """
+    Grava o docstore e o mapeamento posição → ID em SQLite (escrita atômica).
+
+    Args:
+        docstore: Docstore do LangChain (ex: InMemoryDocstore)
+        index_to_docstore_id: Mapeamento posição no índice → chave no docstore
+        path: Caminho do docstore.sqlite de destino
+
+    Returns:
+        Caminho gravado
+
+    Raises:
+        VectorStoreError: Se algum ID não existir no docstore
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    os.close(fd)
+    # mkstemp cria com 0600; o arquivo final é lido pelos processos que servem a API
+    os.chmod(tmp_name, 0o644)
+    try:
+        conn = sqlite3.connect(tmp_name)
+        try:
+            conn.execute(
+                "CREATE TABLE docs ("
+                "pos INTEGER PRIMARY KEY, doc_id TEXT NOT NULL UNIQUE, "
+                "page_content TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            rows = []
+            for pos, key in index_to_docstore_id.items():
+                doc = docstore.search(key)
+                if not isinstance(doc, Document):
+                    raise VectorStoreError(f"Documento {key} não encontrado no docstore")
+                # Em um store mmap (PositionMap) a chave é a posição; o ID vem do documento
+                doc_id = key if isinstance(key, str) else doc.id
+                metadata = json.dumps(doc.metadata, ensure_ascii=False)
+                rows.append((int(pos), doc_id, doc.page_content, metadata))
+            conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def read_docstore(path: Path) -> Tuple[InMemoryDocstore, Dict[int, str]]:
+    """
+    Lê o docstore.sqlite inteiro para um InMemoryDocstore (modo gravável).
+
+    Args:
+        path: Caminho do docstore.sqlite
+
+    Returns:
+        Tupla (docstore, index_to_docstore_id)
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT pos, doc_id, page_content, metadata FROM docs ORDER BY pos")
+        docs: Dict[str, Document] = {}
+        index_to_docstore_id: Dict[int, str] = {}
+        for pos, doc_id, page_content, metadata in rows:
+            metadata = json.loads(metadata)
+            docs[doc_id] = Document(id=doc_id, page_content=page_content, metadata=metadata)
+            index_to_docstore_id[pos] = doc_id
+    finally:
+        conn.close()
+    return InMemoryDocstore(docs), index_to_docstore_id
+
+
+def ensure_docstore(folder: Path, allow_dangerous_deserialization: bool) -> Path:
+    """
+    Garante que `docstore.sqlite` exista, migrando um `index.pkl` legado se preciso.
+
+    O pickle só é lido quando o SQLite não existe ou é mais antigo que ele (ex:
+    vector store regravado por `FAISS.save_local` em um notebook).
+
+    Args:
+        folder: Diretório do vector store
+        allow_dangerous_deserialization: Permite desserializar o `index.pkl` legado
+
+    Returns:
+        Caminho do docstore.sqlite
+
+    Raises:
+        VectorStoreError: Se não houver docstore ou a migração não for permitida
+    """
+    folder = Path(folder)
+    sqlite_path = folder / DOCSTORE_FILE
+    pickle_path = folder / PICKLE_FILE
+
+    if sqlite_path.exists() and (
+        not pickle_path.exists() or sqlite_path.stat().st_mtime >= pickle_path.stat().st_mtime
+    ):
+        return sqlite_path
+
+    if not pickle_path.exists():
+        raise VectorStoreError(f"Docstore não encontrado em {folder}")
+    if not allow_dangerous_deserialization:
+        raise VectorStoreError(
+            f"{DOCSTORE_FILE} ausente ou desatualizado e a desserialização do "
+            "index.pkl legado não é permitida"
+        )
+
+    with open(pickle_path, "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return export_docstore(docstore, index_to_docstore_id, sqlite_path)
+
+
+def migrate_docstores(folder: Path, allow_dangerous_deserialization: bool) -> List[Path]:
+    """
+    Migra o `index.pkl` legado do vector store e de cada partição por lei.
+
+    Etapa explícita (script `amldo-migrate-docstore`, processamento e scripts de
+    índice), executada fora dos processos que servem consultas.
+
+    Args:
+        folder: Diretório do vector store
+        allow_dangerous_deserialization: Permite desserializar `index.pkl` legados
+
+    Returns:
+        Caminhos dos docstore.sqlite (vector store e partições)
+
+    Raises:
+        VectorStoreError: Se algum docstore faltar ou a migração não for permitida
+    """
+    from amldo.rag.shards import SHARDS_DIR, shard_index_files
+
+    folder = Path(folder)
+    folders = [folder] if (folder / INDEX_FILE).exists() else []
+    folders += [path.parent for path in shard_index_files(folder / SHARDS_DIR)]
+    return [ensure_docstore(path, allow_dangerous_deserialization) for path in folders]
+
+
+def docstore_path(folder: Path) -> Path:
+    """
+    Caminho do docstore.sqlite do vector store, sem migrar pickles.
+
+    Args:
+        folder: Diretório do vector store
+
+    Returns:
+        Caminho do docstore.sqlite
+
+    Raises:
+        VectorStoreError: Se o docstore não existir (ex: vector store legado não migrado)
+    """
+    path = Path(folder) / DOCSTORE_FILE
+    if not path.exists():
+        raise VectorStoreError(
+            f"{DOCSTORE_FILE} não encontrado em {folder}; migre o index.pkl legado "
+            "com amldo-migrate-docstore"
+        )
+    return path
+
+
+# =============================================================================
+# Carregamento e gravação
+# =============================================================================
+
+
+def read_index_mmap(path: Path):
+    """
+    Lê um índice FAISS mapeado em memória, somente leitura.
+
+    Usa `IO_FLAG_MMAP_IFC` (Flat, HNSW e listas IVF sem cópia); se o tipo de
+    índice não suportar, lê normalmente.
+
+    Args:
+        path: Caminho do index.faiss
+
+    Returns:
+        Índice FAISS
+    """
+    import faiss
+
+    try:
+        return faiss.read_index(str(path), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(str(path))
+
+
+def write_index_atomic(index: Any, path: Path) -> None:
+    """
+    Grava um índice FAISS de forma atômica (temporário no mesmo diretório + `os.replace`).
+
+    Processos que mapearam o arquivo anterior continuam lendo o inode antigo;
+    nunca veem um índice truncado ou gravado pela metade.
+
+    Args:
+        index: Índice FAISS
+        path: Caminho do index.faiss de destino
+    """
+    import faiss
+
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    os.close(fd)
+    # mkstemp cria com 0600; o arquivo final é lido pelos processos que servem a API
+    os.chmod(tmp_name, 0o644)
+    try:
+        faiss.write_index(index, tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def load_vector_store(folder: Path, embeddings: Any, mmap: bool = True):
+    """
+    Carrega o vector store (index.faiss + docstore.sqlite).
+
+    Um vector store legado (só `index.pkl`) precisa ser migrado antes (ver
+    `migrate_docstores`).
+
+    Args:
+        folder: Diretório do vector store
+        embeddings: Modelo de embedding das consultas
+        mmap: True para o modo de servir (somente leitura, compartilhado entre
+            processos); False carrega índice e documentos em memória, permitindo
+            `add_documents` (usado na indexação)
+
+    Returns:
+        Instância de `langchain_community.vectorstores.FAISS` com pré-filtro de
+        metadados (`amldo.rag.metadata_filter.PrefilteredFAISS`)
+
+    Raises:
+        VectorStoreError: Se os arquivos não existirem ou estiverem inconsistentes
+    """
+    import faiss
+
+    from amldo.rag.metadata_filter import PrefilteredFAISS
+
+    folder = Path(folder)
+    index_path = folder / INDEX_FILE
+    if not index_path.exists():
+        raise VectorStoreError(f"Índice FAISS não encontrado: {index_path}")
+
+    sqlite_path = docstore_path(folder)
+
+    # `save_vector_store` troca o docstore antes do índice: uma carga entre as
+    # duas trocas vê o índice antigo com o docstore novo e é refeita uma vez
+    for attempt in range(2):
+        if mmap:
+            index = read_index_mmap(index_path)
+            docstore = SQLiteDocstore(sqlite_path)
+            index_to_docstore_id = PositionMap(index.ntotal)
+            size = len(docstore)
+        else:
+            index = faiss.read_index(str(index_path))
+            docstore, index_to_docstore_id = read_docstore(sqlite_path)
+            size = len(index_to_docstore_id)
+        if size == index.ntotal:
+            return PrefilteredFAISS(embeddings, index, docstore, index_to_docstore_id)
+        if attempt == 0:
+            time.sleep(LOAD_RETRY_DELAY)
+
+    raise VectorStoreError(
+        f"Docstore inconsistente com o índice: {size} documentos "
+        f"para {index.ntotal} vetores em {folder}"
+    )
+
+
+def save_vector_store(vector_db: Any, folder: Path) -> None:
+    """
+    Grava o vector store (index.faiss e docstore.sqlite) de forma atômica.
+
+    Cada arquivo é escrito em um temporário no mesmo diretório e movido com
+    `os.replace`; processos que já mapearam o índice antigo continuam lendo o
+    arquivo anterior até recarregarem. O docstore é trocado antes do índice (ver
+    `load_vector_store`). Um `index.pkl` legado é removido, pois
+    deixaria de refletir o conteúdo do índice.
+
+    Args:
+        vector_db: Instância de `langchain_community.vectorstores.FAISS` (em memória)
+        folder: Diretório do vector store
+    """
+    import faiss
+
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix=".save-", dir=folder) as tmp_dir:
+        tmp = Path(tmp_dir)
+        faiss.write_index(vector_db.index, str(tmp / INDEX_FILE))
+        export_docstore(vector_db.docstore, vector_db.index_to_docstore_id, tmp / DOCSTORE_FILE)
+        # Docstore antes do índice: os processos da API só recarregam quando o
+        # index.faiss muda, e aí o docstore correspondente já está no lugar
+        for name in (DOCSTORE_FILE, INDEX_FILE):
+            os.replace(tmp / name, folder / name)
+
+    (folder / PICKLE_FILE).unlink(missing_ok=True)
@@ -6,12 +6,17 @@ Uso:
     python -m amldo.scripts.build_index --source data/processed/ --output data/vector_db/
     # ou via entry point:
     amldo-build-index --source data/processed/ --output data/vector_db/
+
+O JSONL é indexado em lotes, com checkpoints: se a execução for interrompida,
+rodar o mesmo comando retoma do último checkpoint (--no-resume recomeça).
 """
 
 import argparse
 import sys
 from pathlib import Path
 
+from amldo.core.config import settings
+from amldo.pipeline.indexer.factory import INDEX_TYPES, METRICS
 from amldo.pipeline.indexer.indexer import indexar_normas
 from amldo.pipeline.embeddings import get_embedding_function
 from amldo.core.exceptions import IndexingError
@@ -39,9 +44,38 @@ def main():
     parser.add_argument(
         "--metadata-name",
         type=str,
-        default="normas_metadata.json",
+        default="normas_metadata.sqlite",
         help="Nome do arquivo de metadados",
     )
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default=settings.faiss_index_type,
+        help="Tipo de índice FAISS (default: FAISS_INDEX_TYPE)",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=METRICS,
+        default=settings.faiss_metric,
+        help="Métrica do índice: l2 ou ip/cosseno (default: FAISS_METRIC)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.index_build_batch_size,
+        help="Artigos por lote (default: INDEX_BUILD_BATCH_SIZE)",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=settings.index_checkpoint_every,
+        help="Lotes entre checkpoints (default: INDEX_CHECKPOINT_EVERY)",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Ignora checkpoints de uma execução interrompida e recomeça do início",
+    )
     parser.add_argument("--verbose", "-v", action="store_true", help="Modo verbose")
 
     args = parser.parse_args()
@@ -62,6 +96,8 @@ def main():
         print(f"Output dir: {output_dir}")
         print(f"Index path: {index_path}")
         print(f"Metadata path: {metadata_path}")
+        print(f"Index type: {args.index_type} ({args.metric})")
+        print(f"Batch size: {args.batch_size} (checkpoint a cada {args.checkpoint_every} lotes)")
         print()
 
     try:
@@ -79,6 +115,12 @@ def main():
             embedding_fn=embedding_fn,
             index_path=str(index_path),
             metadata_path=str(metadata_path),
+            index_type=args.index_type,
+            metric=args.metric,
+            batch_size=args.batch_size,
+            checkpoint_every=args.checkpoint_every,
+            resume=not args.no_resume,
+            on_batch=lambda total: print(f"   {total} artigos indexados", end="\r", flush=True),
         )
 
         print()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Script para migrar o docstore legado (`index.pkl`) do vector store para SQLite.
+
+A API nunca desserializa `index.pkl`: cada vector store (e cada partição por
+lei) precisa de `docstore.sqlite`. Execute este script depois de regravar o
+vector store com `FAISS.save_local` (ex: nos notebooks) e antes de subir a API.
+O processamento (`/api/process`) e os scripts de índice fazem a mesma migração.
+
+Uso:
+    python -m amldo.scripts.migrate_docstore
+    # ou via entry point:
+    amldo-migrate-docstore --vector-db data/vector_db/v1_faiss_vector_db
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from amldo.core.config import settings
+from amldo.core.exceptions import VectorStoreError
+from amldo.rag.vector_store import migrate_docstores
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migra index.pkl legados do vector store para docstore.sqlite"
+    )
+    parser.add_argument(
+        "--vector-db",
+        type=str,
+        default=str(settings.vector_db_path_absolute),
+        help="Diretório do vector store (default: VECTOR_DB_PATH)",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        paths = migrate_docstores(
+            Path(args.vector_db), settings.get_faiss_allow_dangerous_deserialization()
+        )
+    except VectorStoreError as e:
+        print(f"❌ Erro na migração: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not paths:
+        print(f"❌ Erro: Nenhum índice encontrado em {args.vector_db}", file=sys.stderr)
+        sys.exit(1)
+
+    for path in paths:
+        print(f"✅ {path}")
+
+
+if __name__ == "__main__":
+    main()
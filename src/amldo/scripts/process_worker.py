@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Worker standalone da fila de processamento de documentos.
+
+Executa os jobs enfileirados por `POST /api/process` (extração, chunking e
+embeddings dos PDFs em data/raw/). Use quando a API roda com
+PROCESS_WORKER_EMBEDDED=false, por exemplo em um container separado que
+compartilha o diretório de dados.
+
+Uso:
+    python -m amldo.scripts.process_worker
+    # ou via entry point:
+    amldo-worker --poll 2
+"""
+
+import argparse
+
+from amldo.core.config import settings
+from amldo.pipeline.worker import run_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Executa os jobs de processamento de documentos da fila da API"
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=settings.process_worker_poll_seconds,
+        help="Intervalo em segundos entre consultas à fila (default: PROCESS_WORKER_POLL_SECONDS)",
+    )
+
+    args = parser.parse_args()
+
+    print("👷 Worker de processamento aguardando jobs (Ctrl+C para sair)...")
+    try:
+        run_worker(poll_seconds=args.poll)
+    except KeyboardInterrupt:
+        print("👋 Worker encerrado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Script para converter o índice FAISS do vector store para outro tipo (HNSW, IVF).
+
+Lê `index.faiss` do vector store, reconstrói o índice com o tipo escolhido
+(preservando a ordem dos vetores, de modo que o docstore continua válido) e
+imprime recall@k e latência contra a busca exata. Partições por lei
+(`<vector_db>/shards/<lei>`, VECTOR_DB_SHARDED) são convertidas também.
+
+Cada `index.faiss` é substituído de forma atômica (`os.replace`), então workers
+que servem o índice mapeado em memória não leem um arquivo gravado pela metade.
+
+Uso:
+    python -m amldo.scripts.rebuild_index --index-type hnsw
+    # ou via entry point (só relatório, sem gravar):
+    amldo-rebuild-index --index-type ivf_pq --dry-run
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from amldo.core.config import settings
+from amldo.core.exceptions import IndexingError, VectorStoreError
+from amldo.pipeline.indexer.factory import INDEX_TYPES, METRICS, benchmark_index, rebuild_index
+from amldo.rag.shards import SHARDS_DIR, shard_index_files
+from amldo.rag.vector_store import migrate_docstores, write_index_atomic
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converte o índice FAISS do vector store e compara com a busca exata"
+    )
+    parser.add_argument(
+        "--vector-db",
+        type=str,
+        default=str(settings.vector_db_path_absolute),
+        help="Diretório do vector store (default: VECTOR_DB_PATH)",
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default=settings.faiss_index_type,
+        help="Tipo de índice de destino (default: FAISS_INDEX_TYPE)",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=METRICS,
+        default=settings.faiss_metric,
+        help="Métrica de destino: l2 ou ip/cosseno (default: FAISS_METRIC)",
+    )
+    parser.add_argument("--k", type=int, default=10, help="Vizinhos avaliados no recall@k")
+    parser.add_argument("--queries", type=int, default=200, help="Número de consultas de teste")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Só imprime o relatório, sem gravar o índice"
+    )
+
+    args = parser.parse_args()
+
+    index_file = Path(args.vector_db) / "index.faiss"
+    if not index_file.exists():
+        print(f"❌ Erro: Índice não encontrado: {index_file}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        import faiss
+
+        source = faiss.read_index(str(index_file))
+
+        print(
+            f"🔧 Construindo índice {args.index_type} ({args.metric}) "
+            f"com {source.ntotal} vetores..."
+        )
+        index = rebuild_index(source, args.index_type, args.metric)
+        vectors = source.reconstruct_n(0, source.ntotal)
+
+        report = benchmark_index(index, vectors, k=args.k, n_queries=args.queries)
+        print()
+        print(f"📊 {report['index']} — {report['ntotal']} vetores, {report['n_queries']} consultas")
+        print(f"   recall@{report['k']}: {report['recall_at_k']:.4f}")
+        print(f"   latência p50/p95: {report['index_ms_p50']:.3f} / {report['index_ms_p95']:.3f} ms")
+        print(f"   flat p50/p95:     {report['flat_ms_p50']:.3f} / {report['flat_ms_p95']:.3f} ms")
+
+        shard_files = shard_index_files(Path(args.vector_db) / SHARDS_DIR)
+        if args.dry_run:
+            if shard_files:
+                print(f"\n   {len(shard_files)} partições por lei também seriam convertidas")
+            return
+
+        # O docstore não muda, mas precisa estar em SQLite para a API servir o índice
+        migrate_docstores(
+            Path(args.vector_db), settings.get_faiss_allow_dangerous_deserialization()
+        )
+
+        shards = []
+        for shard_file in shard_files:
+            shard = rebuild_index(faiss.read_index(str(shard_file)), args.index_type, args.metric)
+            shards.append((shard_file, shard))
+
+        write_index_atomic(index, index_file)
+        print()
+        print(f"✅ Índice salvo em {index_file}")
+        for shard_file, shard in shards:
+            write_index_atomic(shard, shard_file)
+            print(f"   partição {shard_file.parent.name}: {shard.ntotal} vetores")
+
+    except (IndexingError, VectorStoreError) as e:
+        print(f"❌ Erro na conversão: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
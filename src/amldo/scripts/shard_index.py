@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Script para gravar as partições por lei do vector store (VECTOR_DB_SHARDED).
+
+Lê o vector store completo e grava um índice FAISS por lei em
+`<vector_db>/shards/<lei>`. Com `--lei`, só as partições indicadas são
+gravadas (ex: ao incluir uma lei nova), sem tocar nas demais.
+
+Uso:
+    python -m amldo.scripts.shard_index
+    # ou via entry point, só para uma lei:
+    amldo-shard-index --lei L14133
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+from amldo.core.config import settings
+from amldo.core.exceptions import IndexingError, VectorStoreError
+from amldo.pipeline.indexer.factory import INDEX_TYPES
+
+
+class _NoEmbeddings(Embeddings):
+    """Placeholder: as partições reaproveitam os vetores do índice, sem gerar embeddings."""
+
+    def embed_documents(self, texts):
+        raise VectorStoreError("amldo-shard-index não gera embeddings")
+
+    def embed_query(self, text):
+        raise VectorStoreError("amldo-shard-index não gera embeddings")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Grava um índice FAISS por lei a partir do vector store completo"
+    )
+    parser.add_argument(
+        "--vector-db",
+        type=str,
+        default=str(settings.vector_db_path_absolute),
+        help="Diretório do vector store (default: VECTOR_DB_PATH)",
+    )
+    parser.add_argument(
+        "--lei",
+        action="append",
+        help="Lei a gravar (repetível; default: todas, removendo partições sem documentos)",
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default=settings.faiss_index_type,
+        help="Tipo de índice das partições (default: FAISS_INDEX_TYPE)",
+    )
+
+    args = parser.parse_args()
+
+    folder = Path(args.vector_db)
+    if not (folder / "index.faiss").exists():
+        print(f"❌ Erro: Índice não encontrado: {folder / 'index.faiss'}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        from amldo.rag.shards import SHARDS_DIR, write_shards
+        from amldo.rag.vector_store import load_vector_store, migrate_docstores
+
+        migrate_docstores(folder, settings.get_faiss_allow_dangerous_deserialization())
+        vector_db = load_vector_store(folder, _NoEmbeddings())
+
+        print(f"🔧 Gravando partições ({args.index_type}) de {vector_db.index.ntotal} vetores...")
+        written = write_shards(
+            vector_db, folder / SHARDS_DIR, laws=args.lei, index_type=args.index_type
+        )
+        print()
+        for law, count in written.items():
+            status = f"{count} documentos" if count else "removida (sem documentos)"
+            print(f"   {law}: {status}")
+        print()
+        print(f"✅ Partições salvas em {folder / SHARDS_DIR}")
+
+    except (IndexingError, VectorStoreError) as e:
+        print(f"❌ Erro ao gravar partições: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Executor limitado para consultas RAG.
+
+A etapa de recuperação das consultas RAG (embedding da pergunta, busca FAISS e
+pós-processamento do contexto) é síncrona e limitada por CPU. Executá-la
+diretamente em um endpoint `async` bloqueia o event loop do uvicorn; este módulo
+a executa em um pool de threads dedicado, com limite de fila, para que
+requisições excedentes sejam recusadas imediatamente (backpressure) em vez de
+acumularem sem limite. A chamada ao LLM é feita fora do pool, via `ainvoke`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from amldo.core.config import settings
+from amldo.core.exceptions import RAGOverloadedError
+
+
+class BoundedExecutor:
+    """
+    Pool de threads com número máximo de tarefas em andamento.
+
+    Aceita até `max_workers + max_queue` tarefas simultâneas (executando ou
+    aguardando). Acima disso, `submit` levanta RAGOverloadedError sem enfileirar.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int = 0, thread_name_prefix: str = "amldo-rag"):
+        """
+        Inicializa o executor.
+
+        Args:
+            max_workers: Número de threads do pool
+            max_queue: Tarefas que podem aguardar além das em execução
+            thread_name_prefix: Prefixo dos nomes das threads
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers deve ser >= 1")
+        if max_queue < 0:
+            raise ValueError("max_queue deve ser >= 0")
+
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.capacity = max_workers + max_queue
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Submete uma tarefa ao pool se houver capacidade.
+
+        Args:
+            fn: Função a executar
+            *args, **kwargs: Argumentos da função
+
+        Returns:
+            Future da tarefa
+
+        Raises:
+            RAGOverloadedError: Se o executor estiver saturado
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise RAGOverloadedError(
+                    f"Fila de consultas cheia ({self._in_flight}/{self.capacity} em andamento)"
+                )
+            self._in_flight += 1
+
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executa `fn` no pool e aguarda o resultado sem bloquear o event loop.
+
+        Raises:
+            RAGOverloadedError: Se o executor estiver saturado
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    @property
+    def in_flight(self) -> int:
+        """Tarefas executando ou aguardando no momento."""
+        return self._in_flight
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna estatísticas de ocupação do executor.
+
+        Returns:
+            Dict com max_workers, max_queue, in_flight e rejected
+        """
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Encerra o pool de threads."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# =============================================================================
+# Singleton e Funções Helper
+# =============================================================================
+
+_rag_executor: Optional[BoundedExecutor] = None
+_rag_executor_lock = threading.Lock()
+
+
+def get_rag_executor() -> BoundedExecutor:
+    """
+    Retorna o executor singleton das consultas RAG, configurado via settings.
+
+    Returns:
+        Instância do BoundedExecutor
+    """
+    global _rag_executor
+    if _rag_executor is None:
+        with _rag_executor_lock:
+            if _rag_executor is None:
+                _rag_executor = BoundedExecutor(
+                    max_workers=settings.rag_max_workers,
+                    max_queue=settings.rag_max_queue,
+                )
+    return _rag_executor
+
+
+def shutdown_rag_executor(wait: bool = False) -> None:
+    """Encerra e descarta o executor singleton (chamado no shutdown da API)."""
+    global _rag_executor
+    with _rag_executor_lock:
+        if _rag_executor is not None:
+            _rag_executor.shutdown(wait=wait)
+            _rag_executor = None
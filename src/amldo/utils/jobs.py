@@ -0,0 +1,275 @@
+"""
+Fila de jobs local (SQLite) para o processamento de documentos.
+
+`/api/process` só enfileira um job e retorna seu ID; o processamento (extração,
+chunking e embeddings) roda em um processo worker separado
+(`amldo.pipeline.worker`), de modo que a ingestão não disputa CPU nem o event
+loop com as consultas. O worker grava o andamento no job, consultado por
+`GET /api/process/{job_id}`.
+
+Garantias:
+- No máximo um job `running` por vez (a atualização do índice não é concorrente),
+  mesmo com vários workers (ex: um por processo do uvicorn).
+- Enquanto há um job `queued`, novos pedidos reutilizam esse job.
+- Jobs `running` de um worker que morreu voltam para a fila.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from amldo.core.config import settings
+
+# Estados de um job
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Tipo do job de processamento de documentos
+PROCESS_JOB = "process"
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    """Indica se um processo local com esse PID ainda existe."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    Fila de jobs persistida em SQLite, compartilhada entre processos.
+
+    Cada operação abre a própria conexão (como o MetricsManager), então a
+    instância pode ser usada por várias threads e processos.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Inicializa a fila, criando o banco se necessário.
+
+        Args:
+            db_path: Caminho para o banco SQLite (default: data/jobs/jobs.db)
+        """
+        if db_path is None:
+            db_path = settings.data_dir / "jobs" / "jobs.db"
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._connect()
+        try:
+            # WAL: leituras de status não bloqueiam as gravações de progresso
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    worker_pid INTEGER,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        finally:
+            conn.close()
+
+    def submit(self, kind: str = PROCESS_JOB) -> Dict[str, Any]:
+        """
+        Enfileira um job, ou retorna o job do mesmo tipo que ainda aguarda na fila.
+
+        Args:
+            kind: Tipo do job
+
+        Returns:
+            Job (dict) enfileirado
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND status = ? ORDER BY created_at LIMIT 1",
+                (kind, JOB_QUEUED),
+            ).fetchone()
+            if row is None:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, status, created_at) VALUES (?, ?, ?, ?)",
+                    (job_id, kind, JOB_QUEUED, time.time()),
+                )
+            else:
+                job_id = row["id"]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(job_id)
+
+    def claim(self, worker_pid: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Reserva o job mais antigo da fila para o worker.
+
+        Não reserva nada se outro worker vivo já estiver executando um job.
+        Jobs `running` de workers mortos voltam para a fila antes da escolha.
+
+        Args:
+            worker_pid: PID do worker (default: processo atual)
+
+        Returns:
+            Job reservado (status running) ou None
+        """
+        worker_pid = worker_pid or os.getpid()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for row in conn.execute(
+                "SELECT id, worker_pid FROM jobs WHERE status = ?", (JOB_RUNNING,)
+            ).fetchall():
+                if _pid_alive(row["worker_pid"]):
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker_pid = NULL WHERE id = ?",
+                    (JOB_QUEUED, row["id"]),
+                )
+
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (JOB_QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, worker_pid = ? WHERE id = ?",
+                    (JOB_RUNNING, time.time(), worker_pid, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(row["id"]) if row is not None else None
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        try:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+        finally:
+            conn.close()
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        """
+        Grava o andamento de um job em execução.
+
+        Args:
+            job_id: ID do job
+            progress: Snapshot do andamento (serializável em JSON)
+        """
+        self._update(job_id, progress=json.dumps(progress, ensure_ascii=False))
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        """
+        Marca um job como concluído.
+
+        Args:
+            job_id: ID do job
+            result: Resultado do job (serializável em JSON)
+        """
+        self._update(
+            job_id,
+            status=JOB_DONE,
+            finished_at=time.time(),
+            result=json.dumps(result, ensure_ascii=False),
+        )
+
+    def fail(self, job_id: str, error: str) -> None:
+        """
+        Marca um job como falho.
+
+        Args:
+            job_id: ID do job
+            error: Mensagem de erro
+        """
+        self._update(job_id, status=JOB_FAILED, finished_at=time.time(), error=error)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna um job pelo ID.
+
+        Args:
+            job_id: ID do job
+
+        Returns:
+            Dict com id, kind, status, timestamps, progress, result e error,
+            ou None se não existir
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+
+        job = dict(row)
+        for name in ("progress", "result"):
+            job[name] = json.loads(job[name]) if job[name] else None
+        return job
+
+
+# =============================================================================
+# Singleton e Funções Helper
+# =============================================================================
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Retorna a instância singleton da JobQueue.
+
+    Returns:
+        Instância da JobQueue
+    """
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue()
+    return _job_queue
+
+
+def reset_job_queue() -> None:
+    """Descarta a instância singleton da JobQueue (usado em testes)."""
+    global _job_queue
+    with _job_queue_lock:
+        _job_queue = None
@@ -247,6 +247,54 @@ def mock_retriever_docs():
     return [doc1, doc2]
 
 
+@pytest.fixture
+def fake_rag_runtime(sample_art_0_df, sample_articles_df):
+    """
+    Runtime RAG em memória, sem modelo de embedding real nem chamada ao LLM.
+
+    Usa embeddings determinísticos, um FAISS construído a partir de
+    `sample_articles_df` e um chat model de respostas fixas. O runtime é
+    injetado como singleton e descartado ao final do teste.
+    """
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_core.language_models import FakeListChatModel
+
+    from amldo.rag import runtime as runtime_module
+    from amldo.rag.cache import reset_answer_cache
+    from amldo.rag.embedding_cache import (
+        CachedQueryEmbeddings,
+        get_query_embedding_cache,
+        reset_query_embedding_cache,
+    )
+    from amldo.rag.retrieval_cache import reset_retrieval_cache
+    from amldo.rag.runtime import RAGRuntime, reset_rag_runtime
+
+    reset_query_embedding_cache()
+    rt = RAGRuntime()
+    rt._embeddings = CachedQueryEmbeddings(
+        DeterministicFakeEmbedding(size=32), get_query_embedding_cache()
+    )
+    rt._vector_db = FAISS.from_texts(
+        sample_articles_df["texto"].tolist(),
+        rt._embeddings,
+        metadatas=sample_articles_df.drop(columns="texto").to_dict("records"),
+    )
+    rt._df_art_0 = sample_art_0_df
+    rt._llm = FakeListChatModel(responses=["resposta fake"])
+    rt._index_fingerprint = "fake"
+    rt._index_fingerprint_signature = (rt._index_signature(), rt._lookup_signature())
+
+    runtime_module._rag_runtime = rt
+    reset_answer_cache()
+    reset_retrieval_cache()
+    yield rt
+    reset_rag_runtime()
+    reset_answer_cache()
+    reset_retrieval_cache()
+    reset_query_embedding_cache()
+
+
 # =============================================================================
 # Fixtures de Métricas
 # =============================================================================
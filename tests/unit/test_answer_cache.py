@@ -0,0 +1,343 @@
+"""
+Testes unitários para o cache de respostas RAG (amldo.rag.cache).
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from amldo.core.exceptions import LLMError, RAGOverloadedError
+import numpy as np
+
+from amldo.rag.cache import (
+    AnswerCache,
+    SemanticAnswerCache,
+    get_semantic_cache,
+    index_fingerprint,
+    normalize_question,
+)
+from amldo.rag.v2 import tools as v2_tools
+
+
+def make_key(question="Qual o limite?", rag_version="v2", k=12, search_type="mmr", fp="abc"):
+    return AnswerCache.make_key(question, rag_version, k, search_type, fp)
+
+
+class TestNormalizeQuestion:
+    """Testes da normalização de perguntas."""
+
+    def test_case_accents_spaces_and_punctuation(self):
+        """Caixa, acentos, espaços e pontuação final não alteram a chave."""
+        assert normalize_question("  Qual o LIMITE para   dispensa de licitação? ") == (
+            "qual o limite para dispensa de licitacao"
+        )
+
+    def test_different_questions_differ(self):
+        """Perguntas diferentes continuam diferentes."""
+        assert normalize_question("limite de dispensa") != normalize_question("limite de pregão")
+
+
+class TestAnswerCache:
+    """Testes do AnswerCache em memória e com SQLite."""
+
+    def test_key_depends_on_all_parts(self):
+        """Versão, k, search_type e fingerprint compõem a chave."""
+        base = make_key()
+        assert make_key(question="qual o limite") == base
+        assert make_key(rag_version="v3") != base
+        assert make_key(k=4) != base
+        assert make_key(search_type="similarity") != base
+        assert make_key(fp="outro-indice") != base
+
+    def test_get_set_and_stats(self):
+        """Respostas armazenadas são retornadas e contabilizadas."""
+        cache = AnswerCache()
+        assert cache.get("k") is None
+        cache.set("k", "resposta")
+        assert cache.get("k") == "resposta"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self):
+        """Acima de max_entries, a entrada menos usada é descartada."""
+        cache = AnswerCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert len(cache) == 2
+
+    def test_ttl_expiration(self):
+        """Entradas expiradas não são retornadas."""
+        cache = AnswerCache(ttl_seconds=60)
+        cache.set("k", "resposta")
+        with patch("amldo.rag.cache.time.time", return_value=time.time() + 61):
+            assert cache.get("k") is None
+        assert len(cache) == 0
+
+    def test_sqlite_persistence(self, temp_dir):
+        """Com db_path, respostas sobrevivem a uma nova instância."""
+        db_path = temp_dir / "answer_cache.db"
+        AnswerCache(db_path=db_path).set("k", "resposta", "v2")
+
+        reopened = AnswerCache(db_path=db_path)
+        assert reopened.get("k") == "resposta"
+
+        reopened.clear()
+        assert AnswerCache(db_path=db_path).get("k") is None
+
+    def test_index_fingerprint_changes_on_rewrite(self, temp_dir):
+        """Reescrever o índice muda o fingerprint."""
+        assert index_fingerprint(temp_dir) == "missing"
+
+        (temp_dir / "index.faiss").write_bytes(b"a")
+        first = index_fingerprint(temp_dir)
+        (temp_dir / "index.faiss").write_bytes(b"ab")
+        assert index_fingerprint(temp_dir) != first
+
+    def test_index_fingerprint_includes_extra_files(self, temp_dir):
+        """Fontes extras (ex: CSV de artigos 0) também mudam o fingerprint."""
+        (temp_dir / "index.faiss").write_bytes(b"a")
+        csv = temp_dir / "artigos_0.csv"
+        without = index_fingerprint(temp_dir, [csv])
+
+        csv.write_text("lei,titulo,capitulo,texto\n")
+        first = index_fingerprint(temp_dir, [csv])
+        csv.write_text("lei,titulo,capitulo,texto\nL14133,TITULO_I,CAPITULO_I,novo\n")
+
+        assert first != without
+        assert index_fingerprint(temp_dir, [csv]) != first
+
+
+class TestSemanticAnswerCache:
+    """Testes do SemanticAnswerCache."""
+
+    def test_similar_vector_hits(self):
+        """Perguntas acima do threshold reutilizam a resposta."""
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.add("v2", [1.0, 0.0, 0.0], "resposta")
+
+        assert cache.get("v2", [0.95, 0.1, 0.0]) == "resposta"
+        assert cache.get("v2", [0.0, 1.0, 0.0]) is None
+        assert cache.stats()["hits"] == 1
+
+    def test_partitions_are_isolated(self):
+        """Respostas de outra versão RAG não são reutilizadas."""
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.add("v2", [1.0, 0.0], "resposta v2")
+
+        assert cache.get("v3", [1.0, 0.0]) is None
+
+    def test_best_match_wins(self):
+        """Entre várias candidatas, retorna a mais similar."""
+        cache = SemanticAnswerCache(threshold=0.5)
+        cache.add("v2", [1.0, 0.0], "a")
+        cache.add("v2", [0.6, 0.8], "b")
+
+        assert cache.get("v2", [0.5, 0.85]) == "b"
+
+    def test_ring_buffer_eviction(self):
+        """Acima de max_entries, as entradas mais antigas são sobrescritas."""
+        cache = SemanticAnswerCache(threshold=0.99, max_entries=2)
+        for i, vec in enumerate(np.eye(3)):
+            cache.add("v2", vec, f"r{i}")
+
+        assert cache.get("v2", [1.0, 0.0, 0.0]) is None
+        assert cache.get("v2", [0.0, 0.0, 1.0]) == "r2"
+        assert cache.stats()["entries"] == 2
+
+    def test_overwritten_partitions_are_forgotten(self):
+        """O mapa de grupos não cresce além das posições do buffer."""
+        cache = SemanticAnswerCache(threshold=0.99, max_entries=2)
+        for i in range(10):
+            cache.add(f"v2|art. {i}", [1.0, 0.0], f"r{i}")
+
+        assert set(cache._partitions) == {"v2|art. 8", "v2|art. 9"}
+        assert cache.get("v2|art. 0", [1.0, 0.0]) is None
+        assert cache.get("v2|art. 9", [1.0, 0.0]) == "r9"
+
+    def test_ttl_expiration(self):
+        """Entradas expiradas não são retornadas."""
+        cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=60)
+        cache.add("v2", [1.0, 0.0], "resposta")
+        with patch("amldo.rag.cache.time.time", return_value=time.time() + 61):
+            assert cache.get("v2", [1.0, 0.0]) is None
+
+
+class TestCachedAnswer:
+    """Testes da integração do cache com as ferramentas RAG."""
+
+    def test_repeated_question_skips_pipeline(self, fake_rag_runtime):
+        """A segunda consulta equivalente não chama retrieval nem LLM."""
+        v2_tools.consultar_base_rag("Qual o limite para dispensa?")
+
+        with patch.object(v2_tools, "_retrieve_context") as retrieve:
+            answer = asyncio.run(v2_tools.consultar_base_rag_async("qual o limite para DISPENSA"))
+
+        retrieve.assert_not_called()
+        assert answer == "resposta fake"
+
+    def test_fingerprint_change_invalidates(self, fake_rag_runtime):
+        """Após reescrever o índice, a resposta antiga não é reutilizada."""
+        v2_tools.consultar_base_rag("Pregão")
+        fake_rag_runtime._index_fingerprint = "novo-indice"
+
+        with patch.object(v2_tools, "_retrieve_context", return_value="ctx") as retrieve:
+            v2_tools.consultar_base_rag("Pregão")
+
+        retrieve.assert_called_once()
+
+    def test_index_rewritten_on_disk_invalidates(self, fake_rag_runtime, temp_dir, monkeypatch):
+        """Índice regravado por outro processo invalida a resposta sem reload_vector_db."""
+        monkeypatch.setattr(fake_rag_runtime.settings, "vector_db_path", str(temp_dir))
+        (temp_dir / "index.faiss").write_bytes(b"v1")
+        v2_tools.consultar_base_rag("Pregão")
+
+        (temp_dir / "novo.faiss").write_bytes(b"v2-maior")
+        (temp_dir / "novo.faiss").replace(temp_dir / "index.faiss")
+        with patch.object(v2_tools, "_retrieve_context", return_value="ctx") as retrieve:
+            v2_tools.consultar_base_rag("Pregão")
+
+        retrieve.assert_called_once()
+
+    def test_lookup_sources_rewritten_invalidate(
+        self, fake_rag_runtime, temp_dir, monkeypatch, sample_art_0_df
+    ):
+        """Regerar o CSV de artigos 0 invalida a resposta e recarrega a árvore."""
+        csv = temp_dir / "artigos_0.csv"
+        sample_art_0_df.to_csv(csv, index=False)
+        monkeypatch.setattr(fake_rag_runtime.settings, "artigos_0_csv_path", str(csv))
+        monkeypatch.setattr(
+            fake_rag_runtime.settings, "artigos_0_index_path", str(temp_dir / "artigos_0.json")
+        )
+        v2_tools.consultar_base_rag("Pregão")
+        old_hierarchy = fake_rag_runtime.hierarchy
+
+        sample_art_0_df.assign(texto="Texto regerado").to_csv(csv, index=False)
+        with patch.object(v2_tools, "_retrieve_context", return_value="ctx") as retrieve:
+            v2_tools.consultar_base_rag("Pregão")
+
+        retrieve.assert_called_once()
+        assert fake_rag_runtime.hierarchy is not old_hierarchy
+
+    def test_async_cache_io_runs_off_event_loop(self, fake_rag_runtime):
+        """No caminho assíncrono, fingerprint e get/set do cache rodam fora do event loop."""
+        from amldo.rag.cache import get_answer_cache
+
+        cache = get_answer_cache()
+        threads = {}
+
+        def record(name, method):
+            def wrapped(*args, **kwargs):
+                threads[name] = threading.current_thread()
+                return method(*args, **kwargs)
+            return wrapped
+
+        async def ask():
+            return threading.current_thread(), await v2_tools.consultar_base_rag_async("Pregão")
+
+        with patch.object(cache, "get", record("get", cache.get)), \
+                patch.object(cache, "set", record("set", cache.set)):
+            loop_thread, answer = asyncio.run(ask())
+
+        assert answer == "resposta fake"
+        assert set(threads) == {"get", "set"}
+        assert all(thread is not loop_thread for thread in threads.values())
+
+    def test_errors_are_not_cached(self, fake_rag_runtime, monkeypatch):
+        """Falhas não são armazenadas no cache."""
+        def broken(*args, **kwargs):
+            raise RuntimeError("quota excedida")
+
+        monkeypatch.setattr(type(fake_rag_runtime.llm), "invoke", broken)
+        with pytest.raises(LLMError):
+            v2_tools.consultar_base_rag("Pregão")
+
+        monkeypatch.undo()
+        assert v2_tools.consultar_base_rag("Pregão") == "resposta fake"
+
+    def test_paraphrase_uses_semantic_cache(self, fake_rag_runtime, monkeypatch):
+        """Com o cache semântico habilitado, paráfrases não chamam o pipeline."""
+        from amldo.core.config import settings
+
+        monkeypatch.setattr(settings, "semantic_cache_enabled", True)
+        vectors = {
+            "qual o valor máximo para dispensa?": [1.0, 0.0],
+            "até quanto posso dispensar licitação?": [0.98, 0.05],
+        }
+        monkeypatch.setattr("amldo.rag.cache._embed_question", lambda text: np.array(vectors[text]))
+
+        v2_tools.consultar_base_rag("qual o valor máximo para dispensa?")
+        with patch.object(v2_tools, "_retrieve_context") as retrieve:
+            answer = asyncio.run(
+                v2_tools.consultar_base_rag_async("até quanto posso dispensar licitação?")
+            )
+
+        retrieve.assert_not_called()
+        assert answer == "resposta fake"
+        assert get_semantic_cache().stats()["hits"] == 1
+
+    def test_semantic_hit_with_saturated_executor(self, fake_rag_runtime, monkeypatch):
+        """Com o executor RAG saturado, um acerto semântico ainda é respondido."""
+        from amldo.core.config import settings
+
+        monkeypatch.setattr(settings, "semantic_cache_enabled", True)
+        monkeypatch.setattr("amldo.rag.cache._embed_question", lambda text: np.array([1.0, 0.0]))
+        v2_tools.consultar_base_rag("qual o valor máximo para dispensa?")
+
+        def saturated():
+            raise RAGOverloadedError("fila cheia")
+
+        monkeypatch.setattr(v2_tools, "get_rag_executor", saturated)
+        answer = asyncio.run(
+            v2_tools.consultar_base_rag_async("até quanto posso dispensar licitação?")
+        )
+
+        assert answer == "resposta fake"
+        assert get_semantic_cache().stats()["hits"] == 1
+
+    def test_cited_articles_split_semantic_cache(self, fake_rag_runtime, monkeypatch):
+        """Perguntas sobre artigos diferentes nunca reutilizam a resposta uma da outra."""
+        from amldo.core.config import settings
+
+        monkeypatch.setattr(settings, "semantic_cache_enabled", True)
+        monkeypatch.setattr("amldo.rag.cache._embed_question", lambda text: np.array([1.0, 0.0]))
+        v2_tools.consultar_base_rag("O que diz o art. 74 da Lei 14.133?")
+
+        with patch.object(v2_tools, "_retrieve_context", return_value="ctx") as retrieve:
+            v2_tools.consultar_base_rag("O que diz o art. 75 da Lei 14.133?")
+            retrieve.assert_called_once()
+            v2_tools.consultar_base_rag("Qual o teor do artigo 74 da Lei nº 14133?")
+            retrieve.assert_called_once()
+
+        assert get_semantic_cache().stats()["hits"] == 1
+
+    def test_rewritten_index_skips_semantic_cache(self, fake_rag_runtime, temp_dir, monkeypatch):
+        """Paráfrase após regravar o índice em disco não reutiliza a resposta antiga."""
+        from amldo.core.config import settings
+
+        monkeypatch.setattr(settings, "semantic_cache_enabled", True)
+        monkeypatch.setattr(settings, "vector_db_path", str(temp_dir))
+        monkeypatch.setattr("amldo.rag.cache._embed_question", lambda text: np.array([1.0, 0.0]))
+        (temp_dir / "index.faiss").write_bytes(b"v1")
+        v2_tools.consultar_base_rag("qual o valor máximo para dispensa?")
+
+        (temp_dir / "novo.faiss").write_bytes(b"v2-maior")
+        (temp_dir / "novo.faiss").replace(temp_dir / "index.faiss")
+        with patch.object(v2_tools, "_retrieve_context", return_value="ctx") as retrieve:
+            v2_tools.consultar_base_rag("até quanto posso dispensar licitação?")
+
+        retrieve.assert_called_once()
+        assert get_semantic_cache().stats()["hits"] == 0
+
+    def test_cache_stats_endpoint(self, api_client, fake_rag_runtime):
+        """/api/metrics/cache expõe as estatísticas do cache de respostas."""
+        response = api_client.get("/api/metrics/cache")
+
+        assert response.status_code == 200
+        assert {"hits", "misses", "entries"} <= set(response.json()["answer_cache"])
@@ -0,0 +1,154 @@
+"""
+Testes unitários para a consulta direta a artigos citados (amldo.rag.articles).
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from amldo.rag.articles import (
+    ArticleIndex,
+    article_key,
+    article_lookup,
+    load_article_index,
+    parse_article_citations,
+)
+from amldo.rag.context import HierarchyIndex
+
+CAP_VIII = "L14133/TITULO_II/capitulos/CAPITULO_VIII/artigos"
+ARTICLES = {
+    f"{CAP_VIII}/artigo_0.txt": "CAPÍTULO VIII - DA CONTRATAÇÃO DIRETA",
+    f"{CAP_VIII}/artigo_74.txt": "Art. 74. É inexigível a licitação.",
+    f"{CAP_VIII}/artigo_75.txt": "Art. 75. É dispensável a licitação.",
+    "Lcp123/TITULO_0/capitulos/CAPITULO_IV/artigos/artigo_18-A.txt": "Art. 18-A. O MEI optará.",
+    "L13709/TITULO_0/capitulos/CAPITULO_I/artigos/artigo_1o.txt": "Art. 1º Esta Lei dispõe.",
+}
+
+
+@pytest.fixture
+def split_docs(temp_dir):
+    root = temp_dir / "split_docs"
+    for relative, texto in ARTICLES.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(texto + "\n", encoding="utf-8")
+    return root
+
+
+class TestParser:
+    """Testes da extração de citações."""
+
+    @pytest.mark.parametrize(
+        "question, expected",
+        [
+            ("O que diz o art. 75 da Lei 14.133?", ["75"]),
+            ("Compare os arts. 74, 75 e 76", ["74", "75", "76"]),
+            ("Artigo 18-A da LC 123", ["18-A"]),
+            ("Qual o objetivo do art 1º da LGPD?", ["1"]),
+            ("Quais são as hipóteses de dispensa?", []),
+        ],
+    )
+    def test_parse_article_citations(self, question, expected):
+        assert parse_article_citations(question) == expected
+
+    def test_article_key(self):
+        assert article_key("artigo_75-A.txt") == "75-A"
+        assert article_key("artigo_1o.txt") == "1"
+        assert article_key("notas.txt") is None
+
+
+class TestArticleIndex:
+    """Testes do índice (lei, artigo) → textos."""
+
+    def test_build_skips_art_0(self, split_docs):
+        index = ArticleIndex.from_split_docs(split_docs)
+
+        assert index.laws == ["L13709", "L14133", "Lcp123"]
+        assert len(index) == 4
+        assert index.get("L14133", "0") == []
+        row = index.get("L14133", "75")[0]
+        assert row["capitulo"] == "CAPITULO_VIII"
+        assert row["texto"] == "Art. 75. É dispensável a licitação."
+
+    def test_lookup(self, split_docs):
+        index = ArticleIndex.from_split_docs(split_docs)
+
+        rows = index.lookup("arts. 74 e 75 da Lei nº 14.133/2021")
+        assert [row["artigo"] for row in rows] == ["artigo_74.txt", "artigo_75.txt"]
+        assert index.lookup("art. 1º da LGPD")[0]["lei"] == "L13709"
+        # Sem lei, sem artigo ou com artigo inexistente: segue para a busca normal
+        assert index.lookup("o que diz o art. 75?") is None
+        assert index.lookup("dispensa na Lei 14.133") is None
+        assert index.lookup("arts. 75 e 999 da Lei 14.133") is None
+
+    def test_load_uses_json_until_source_changes(self, split_docs, temp_dir):
+        index_path = temp_dir / "artigos.json"
+        load_article_index(split_docs, index_path)
+        assert index_path.exists()
+
+        # JSON atual é usado mesmo sem split_docs
+        moved = temp_dir / "moved"
+        split_docs.rename(moved)
+        assert len(load_article_index(split_docs, index_path)) == 4
+        moved.rename(split_docs)
+
+        novo = split_docs / CAP_VIII / "artigo_76.txt"
+        novo.write_text("Art. 76. A alienação de bens.", encoding="utf-8")
+
+        assert load_article_index(split_docs, index_path).get("L14133", "76")
+        assert ArticleIndex.load(index_path).get("L14133", "76")
+
+    def test_load_missing(self, temp_dir):
+        with pytest.raises(FileNotFoundError):
+            load_article_index(temp_dir / "nada", temp_dir / "nada.json")
+
+
+class TestArticleLookup:
+    """Testes do atalho de recuperação."""
+
+    @pytest.fixture
+    def runtime(self, split_docs):
+        hierarchy = HierarchyIndex(
+            {("L14133", "TITULO_II", "CAPITULO_VIII"): "CAPÍTULO VIII - DA CONTRATAÇÃO DIRETA"}
+        )
+        return SimpleNamespace(
+            article_index=ArticleIndex.from_split_docs(split_docs), hierarchy=hierarchy
+        )
+
+    def test_renders_hierarchical_context(self, runtime):
+        resultado = article_lookup("o que diz o art. 75 da Lei 14.133?", runtime)
+
+        assert resultado.chunk_ids == (f"{CAP_VIII}/artigo_75.txt",)
+        assert "CAPÍTULO VIII - DA CONTRATAÇÃO DIRETA\n<CAPITULO: CAPITULO_VIII>" in (
+            resultado.context
+        )
+        assert "<ARTIGO: artigo_75>\nArt. 75. É dispensável a licitação.\n" in resultado.context
+        assert resultado.sources == [
+            {
+                "lei": "L14133",
+                "titulo": "TITULO_II",
+                "capitulo": "CAPITULO_VIII",
+                "artigo": "artigo_75",
+            }
+        ]
+
+    def test_falls_back_and_can_be_disabled(self, runtime, monkeypatch):
+        from amldo.core.config import settings
+
+        assert article_lookup("quais as hipóteses de dispensa?", runtime) is None
+        monkeypatch.setattr(settings, "article_lookup_enabled", False)
+        assert article_lookup("art. 75 da Lei 14.133", runtime) is None
+
+    def test_v2_skips_vector_search(self, fake_rag_runtime, runtime, monkeypatch):
+        from amldo.rag.v2 import tools
+
+        fake_rag_runtime._article_index = runtime.article_index
+
+        def fail(*args, **kwargs):
+            raise AssertionError("busca vetorial não deveria ser usada")
+
+        monkeypatch.setattr(tools, "cached_retrieval", fail)
+        context, sources = tools._retrieve_context_and_sources("art. 18-A da LC 123")
+
+        assert "Art. 18-A. O MEI optará." in context
+        assert sources[0]["artigo"] == "artigo_18-A"
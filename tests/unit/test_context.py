@@ -0,0 +1,220 @@
+"""
+Testes unitários para a montagem do contexto hierárquico (amldo.rag.context).
+"""
+
+import os
+
+import pandas as pd
+import pytest
+from langchain_core.documents import Document
+
+from amldo.rag.context import (
+    HierarchyIndex,
+    documents_to_rows,
+    get_sources,
+    load_hierarchy_index,
+    sort_rows,
+)
+
+
+def make_doc(texto, lei="L14133", titulo="TITULO_I", capitulo="CAPITULO_I", artigo="artigo_1.txt",
+             chunk_idx=0):
+    return Document(
+        page_content=texto,
+        metadata={"lei": lei, "titulo": titulo, "capitulo": capitulo, "artigo": artigo,
+                  "chunk_idx": chunk_idx},
+    )
+
+
+class TestHierarchyIndex:
+    """Testes da árvore de artigos 0 e do renderizador."""
+
+    def test_get_art_0(self, sample_art_0_df):
+        """Artigos 0 são indexados por (lei, titulo, capitulo)."""
+        index = HierarchyIndex.from_dataframe(sample_art_0_df)
+
+        assert index.get_art_0("L14133", "TITULO_I", "CAPITULO_0").startswith("TÍTULO I")
+        assert index.get_art_0("L14133", "TITULO_IX", "CAPITULO_0") is None
+        assert index.get_art_0("L99999", "TITULO_0", "CAPITULO_0") is None
+
+    def test_multiple_art_0_rows_are_joined(self):
+        """Linhas repetidas do mesmo capítulo são unidas por quebra de linha, na ordem."""
+        df = pd.DataFrame({
+            "lei": ["L1", "L1"],
+            "titulo": ["TITULO_I", "TITULO_I"],
+            "capitulo": ["CAPITULO_I", "CAPITULO_I"],
+            "texto": ["primeira", "segunda"],
+        })
+        assert HierarchyIndex.from_dataframe(df).get_art_0("L1", "TITULO_I", "CAPITULO_I") == (
+            "primeira\nsegunda"
+        )
+
+    def test_render_structure(self, sample_art_0_df):
+        """O contexto segue Lei → Título → Capítulo → Artigo com artigos 0 injetados."""
+        index = HierarchyIndex.from_dataframe(sample_art_0_df)
+        rows = documents_to_rows([
+            make_doc("Art. 2º ...", artigo="artigo_2.txt"),
+            make_doc("Art. 1º parte 2", chunk_idx=1),
+            make_doc("Art. 1º parte 1", chunk_idx=0),
+        ])
+
+        assert index.render(rows) == (
+            "\n\n<LEI L14133>\n"
+            "TÍTULO I - Das Licitações e Contratos Administrativos\n"
+            "<TITULO: TITULO_I>\n"
+            "<CAPITULO: CAPITULO_I>\n"
+            "<ARTIGO: artigo_1>\n"
+            "Art. 1º parte 1\n"
+            "Art. 1º parte 2\n"
+            "</ARTIGO: artigo_1>\n"
+            "<ARTIGO: artigo_2>\n"
+            "Art. 2º ...\n"
+            "</ARTIGO: artigo_2>\n"
+            "</CAPITULO: CAPITULO_I>\n"
+            "</TITULO: TITULO_I>\n"
+            "</LEI L14133>\n"
+        )
+
+    def test_render_title_and_chapter_zero(self, sample_art_0_df):
+        """TITULO_0/CAPITULO_0 não geram tags e o artigo 0 aparece nos dois níveis."""
+        index = HierarchyIndex.from_dataframe(sample_art_0_df)
+        rows = documents_to_rows([
+            make_doc("Art. 1º ...", lei="L13709", titulo="TITULO_0", capitulo="CAPITULO_0"),
+        ])
+        intro = "Lei 13709 de 2018 - Lei Geral de Proteção de Dados\n"
+
+        assert index.render(rows) == (
+            "\n\n<LEI L13709>\n"
+            + intro
+            + intro
+            + "<ARTIGO: artigo_1>\nArt. 1º ...\n</ARTIGO: artigo_1>\n</LEI L13709>\n"
+        )
+
+    def test_render_section_markers(self):
+        """Quebras antes de [[SECTION: são removidas, como no pós-processamento original."""
+        rows = documents_to_rows([make_doc("[[SECTION: Seção I]]\nTexto")])
+        context = HierarchyIndex({}).render(rows)
+
+        assert "\n[[SECTION:" not in context
+        assert "<ARTIGO: artigo_1>[[SECTION: Seção I]]" in context
+
+
+class TestHierarchyIndexPersistence:
+    """Testes do carregamento sem pandas e do JSON compacto."""
+
+    def test_from_csv_matches_dataframe(self, sample_art_0_df, temp_dir):
+        """Ler o CSV com o módulo csv produz a mesma árvore que o DataFrame."""
+        csv_path = temp_dir / "artigos_0.csv"
+        sample_art_0_df.to_csv(csv_path, index=False)
+
+        assert HierarchyIndex.from_csv(csv_path).tree == (
+            HierarchyIndex.from_dataframe(sample_art_0_df).tree
+        )
+
+    def test_save_and_load_roundtrip(self, sample_art_0_df, temp_dir):
+        """A árvore salva em JSON é recarregada sem perdas."""
+        index = HierarchyIndex.from_dataframe(sample_art_0_df)
+        index.save(temp_dir / "artigos_0.json")
+
+        loaded = HierarchyIndex.load(temp_dir / "artigos_0.json")
+        assert loaded.tree == index.tree
+        assert len(loaded) == len(index) == len(sample_art_0_df)
+
+    def test_load_rejects_unknown_version(self, temp_dir):
+        path = temp_dir / "artigos_0.json"
+        path.write_text('{"version": 99, "tree": {}}', encoding="utf-8")
+
+        with pytest.raises(ValueError):
+            HierarchyIndex.load(path)
+
+    def test_load_hierarchy_index_builds_and_reuses_json(self, sample_art_0_df, temp_dir):
+        """Sem JSON, a árvore vem do CSV e o JSON é gravado para as próximas cargas."""
+        csv_path = temp_dir / "artigos_0.csv"
+        json_path = temp_dir / "artigos_0.json"
+        sample_art_0_df.to_csv(csv_path, index=False)
+
+        index = load_hierarchy_index(csv_path, json_path)
+        assert json_path.exists()
+
+        # Com o JSON atualizado, o CSV não é mais necessário
+        csv_path.unlink()
+        assert load_hierarchy_index(csv_path, json_path).tree == index.tree
+
+    def test_load_hierarchy_index_rebuilds_stale_json(self, sample_art_0_df, temp_dir):
+        """JSON mais antigo que o CSV é regerado."""
+        csv_path = temp_dir / "artigos_0.csv"
+        json_path = temp_dir / "artigos_0.json"
+        HierarchyIndex({("L1", "TITULO_0", "CAPITULO_0"): "antigo"}).save(json_path)
+        sample_art_0_df.to_csv(csv_path, index=False)
+        stat = csv_path.stat()
+        os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+
+        index = load_hierarchy_index(csv_path, json_path)
+
+        assert index.get_art_0("L1", "TITULO_0", "CAPITULO_0") is None
+        assert HierarchyIndex.load(json_path).tree == index.tree
+
+    def test_load_hierarchy_index_missing_files(self, temp_dir):
+        with pytest.raises(FileNotFoundError):
+            load_hierarchy_index(temp_dir / "nao_existe.csv", temp_dir / "nao_existe.json")
+
+
+class TestRows:
+    """Testes de ordenação e fontes."""
+
+    def test_sort_matches_hierarchy(self):
+        """Linhas são ordenadas por lei, título, capítulo, artigo e chunk."""
+        rows = sort_rows([
+            {"lei": "L2", "titulo": "T", "capitulo": "C", "artigo": "a", "chunk_idx": 0},
+            {"lei": "L1", "titulo": "T", "capitulo": "C", "artigo": "b", "chunk_idx": 1},
+            {"lei": "L1", "titulo": "T", "capitulo": "C", "artigo": "b", "chunk_idx": 0},
+            {"lei": None, "titulo": "T", "capitulo": "C", "artigo": "a", "chunk_idx": 0},
+        ])
+
+        assert [(r["lei"], r["chunk_idx"]) for r in rows] == [
+            ("L1", 0), ("L1", 1), ("L2", 0), (None, 0)
+        ]
+
+    def test_get_sources(self):
+        """Fontes são únicas, sem extensão .txt e na ordem do contexto."""
+        rows = documents_to_rows([
+            make_doc("b", artigo="artigo_2.txt"),
+            make_doc("a1", chunk_idx=0),
+            make_doc("a2", chunk_idx=1),
+        ])
+
+        assert [s["artigo"] for s in get_sources(rows)] == ["artigo_1", "artigo_2"]
+
+    def test_dataframe_wrapper_matches_renderer(self, sample_articles_df, sample_art_0_df):
+        """get_pos_processed_context (v2) produz o mesmo texto que o renderizador."""
+        from amldo.rag.v2.tools import get_pos_processed_context
+
+        df = sample_articles_df.sort_values(["lei", "titulo", "capitulo", "artigo", "chunk_idx"])
+        expected = HierarchyIndex.from_dataframe(sample_art_0_df).render(sort_rows(
+            df.to_dict("records")
+        ))
+
+        assert get_pos_processed_context(df, sample_art_0_df) == expected
+
+    @pytest.mark.parametrize("version", ["v2", "v3"])
+    def test_dataframe_wrappers_reuse_runtime_hierarchy(
+        self, version, fake_rag_runtime, sample_articles_df, sample_art_0_df
+    ):
+        """Com o DataFrame do runtime, os wrappers usam a árvore pré-computada."""
+        import importlib
+        from unittest.mock import patch
+
+        tools = importlib.import_module(f"amldo.rag.{version}.tools")
+        hierarchy = fake_rag_runtime.hierarchy
+        df_art_0 = fake_rag_runtime.df_art_0
+
+        with patch.object(HierarchyIndex, "from_dataframe") as from_dataframe:
+            assert tools.get_art_0("L14133", "TITULO_I", "CAPITULO_0", df_art_0) == (
+                hierarchy.get_art_0("L14133", "TITULO_I", "CAPITULO_0")
+            )
+            tools.get_pos_processed_context(sample_articles_df, df_art_0)
+        from_dataframe.assert_not_called()
+
+        # DataFrame de fora do runtime: a árvore é construída a partir dele
+        foreign = sample_art_0_df.assign(texto="outro")
+        assert tools.get_art_0("L14133", "TITULO_I", "CAPITULO_0", foreign) == "outro"
@@ -0,0 +1,116 @@
+"""
+Testes unitários para o cache de embeddings de consultas (amldo.rag.embedding_cache).
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from amldo.core.config import settings
+from amldo.rag.embedding_cache import CachedQueryEmbeddings, QueryEmbeddingCache
+from amldo.rag.runtime import RAGRuntime
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Embeddings determinísticos que contam as chamadas a embed_query."""
+
+    calls: int = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+
+class TestQueryEmbeddingCache:
+    """Testes do LRU de embeddings."""
+
+    def test_get_put_and_counters(self):
+        """Embeddings armazenados são retornados e contabilizados."""
+        cache = QueryEmbeddingCache()
+        assert cache.get("pergunta") is None
+        cache.put("pergunta", [1.0, 2.0])
+
+        np.testing.assert_array_equal(cache.get("pergunta"), np.array([1.0, 2.0], dtype=np.float32))
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction_by_entries(self):
+        """Acima de max_entries, o menos usado é descartado."""
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.put("a", [1.0])
+        cache.put("b", [2.0])
+        cache.get("a")
+        cache.put("c", [3.0])
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert len(cache) == 2
+
+    def test_eviction_by_memory_budget(self):
+        """O orçamento de memória limita o total armazenado."""
+        vector = np.zeros(100, dtype=np.float32)  # 400 bytes
+        cache = QueryEmbeddingCache(max_entries=100, max_bytes=1000)
+        for i in range(5):
+            cache.put(f"q{i}", vector)
+
+        assert len(cache) == 2
+        assert cache.stats()["bytes"] <= 1000
+
+    def test_cached_vectors_are_read_only(self):
+        """Os vetores armazenados não podem ser alterados por quem os recebe."""
+        cache = QueryEmbeddingCache()
+        cache.put("q", [1.0])
+        assert not cache.get("q").flags.writeable
+
+
+class TestCachedQueryEmbeddings:
+    """Testes do wrapper de Embeddings."""
+
+    def test_repeated_query_hits_cache(self):
+        """A mesma consulta só passa pelo modelo uma vez."""
+        inner = CountingEmbeddings(size=8)
+        embeddings = CachedQueryEmbeddings(inner, QueryEmbeddingCache())
+
+        first = embeddings.embed_query("limite para dispensa")
+        second = embeddings.embed_query("limite para dispensa")
+
+        assert inner.calls == 1
+        np.testing.assert_allclose(first, second)
+        np.testing.assert_allclose(first, inner.embed_query("limite para dispensa"), rtol=1e-6)
+
+    def test_embed_documents_passthrough(self):
+        """Indexação de documentos não usa o cache."""
+        cache = QueryEmbeddingCache()
+        embeddings = CachedQueryEmbeddings(DeterministicFakeEmbedding(size=8), cache)
+
+        assert len(embeddings.embed_documents(["a", "b"])) == 2
+        assert len(cache) == 0
+
+    def test_runtime_wraps_embeddings(self, monkeypatch):
+        """O runtime aplica o cache conforme settings."""
+        fake_model = CountingEmbeddings(size=8)
+        with patch("langchain_huggingface.HuggingFaceEmbeddings", return_value=fake_model):
+            assert isinstance(RAGRuntime()._build_embeddings(), CachedQueryEmbeddings)
+
+            monkeypatch.setattr(settings, "query_embedding_cache_size", 0)
+            assert isinstance(RAGRuntime()._build_embeddings(), CountingEmbeddings)
+
+    def test_cache_shared_across_rag_versions(self, fake_rag_runtime):
+        """v1, v2 e v3 reutilizam o embedding da mesma pergunta."""
+        from amldo.rag.v1 import tools as v1_tools
+        from amldo.rag.v2 import tools as v2_tools
+        from amldo.rag.v3 import tools as v3_tools
+
+        for tools in (v1_tools, v2_tools, v3_tools):
+            tools._rag_answer("O que é pregão?", search_type="similarity", k=2)
+
+        stats = fake_rag_runtime.embeddings.cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] >= 2
+
+    def test_metrics_endpoint(self, api_client, fake_rag_runtime):
+        """/api/metrics/cache expõe hits e misses do cache de embeddings."""
+        response = api_client.get("/api/metrics/cache")
+
+        assert {"hits", "misses", "bytes"} <= set(response.json()["query_embedding_cache"])
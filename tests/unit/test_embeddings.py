@@ -413,3 +413,44 @@ class TestEmbeddingManagerMocked:
         # Verificar que foi normalizado
         norm = np.linalg.norm(embeddings[0])
         assert np.isclose(norm, 1.0, atol=1e-5)
+
+
+class TestEmbeddingBuckets:
+    """Testes dos lotes agrupados por tamanho (modelo mockado)."""
+
+    @pytest.fixture
+    def model(self):
+        """Modelo falso: o vetor de cada texto é (tamanho, 1)."""
+        model = Mock()
+        model.get_sentence_embedding_dimension.return_value = 2
+        model.tokenizer = None  # força a aproximação por caracteres
+        model.encode.side_effect = lambda texts, **kw: np.array(
+            [[len(t), 1.0] for t in texts]
+        )
+        return model
+
+    @patch("amldo.pipeline.embeddings.SentenceTransformer")
+    def test_batches_grouped_by_length(self, mock_st, model):
+        mock_st.return_value = model
+        manager = EmbeddingManager(batch_size=2, normalize=False)
+        texts = ["aaaa", "a", "aaaaaa", "aa", "aaa"]
+
+        embeddings = manager.embed(texts)
+
+        batches = [call.args[0] for call in model.encode.call_args_list]
+        assert batches == [["a", "aa"], ["aaa", "aaaa"], ["aaaaaa"]]
+        # Linhas na ordem original dos textos
+        assert embeddings.dtype == np.float32
+        assert embeddings[:, 0].tolist() == [4, 1, 6, 2, 3]
+
+    @patch("amldo.pipeline.embeddings.SentenceTransformer")
+    def test_embed_into_preallocated_slice(self, mock_st, model):
+        mock_st.return_value = model
+        manager = EmbeddingManager(batch_size=8)
+        matrix = np.zeros((4, 2), dtype=np.float32)
+
+        result = manager.embed_into(["aaa", "a"], matrix[1:3])
+
+        assert np.shares_memory(result, matrix)
+        assert np.allclose(np.linalg.norm(matrix[1:3], axis=1), 1.0)
+        assert not matrix[0].any() and not matrix[3].any()
@@ -0,0 +1,132 @@
+"""
+Testes unitários para o executor limitado de consultas RAG.
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from amldo.core.exceptions import RAGOverloadedError
+from amldo.utils.executor import BoundedExecutor
+
+
+@pytest.fixture
+def executor():
+    """Executor pequeno (1 worker + 1 na fila)."""
+    ex = BoundedExecutor(max_workers=1, max_queue=1)
+    yield ex
+    ex.shutdown(wait=False)
+
+
+class TestBoundedExecutor:
+    """Testes do BoundedExecutor."""
+
+    def test_submit_returns_result(self, executor):
+        """Tarefas submetidas retornam o resultado da função."""
+        assert executor.submit(lambda x: x * 2, 21).result(timeout=5) == 42
+
+    def test_rejects_when_saturated(self, executor):
+        """Acima de max_workers + max_queue, submit levanta RAGOverloadedError."""
+        gate = threading.Event()
+        running = executor.submit(gate.wait, 5)
+        queued = executor.submit(gate.wait, 5)
+
+        with pytest.raises(RAGOverloadedError):
+            executor.submit(gate.wait, 5)
+        assert executor.stats()["rejected"] == 1
+
+        gate.set()
+        running.result(timeout=5)
+        queued.result(timeout=5)
+
+    def test_slots_released_after_completion(self, executor):
+        """Capacidade é liberada quando as tarefas terminam (inclusive com erro)."""
+        def boom():
+            raise ValueError("erro")
+
+        for _ in range(5):
+            with pytest.raises(ValueError):
+                executor.submit(boom).result(timeout=5)
+
+        assert executor.in_flight == 0
+
+    def test_run_async(self, executor):
+        """run() aguarda o resultado sem bloquear o event loop."""
+        async def main():
+            return await executor.run(sum, [1, 2, 3])
+
+        assert asyncio.run(main()) == 6
+
+    def test_invalid_configuration(self):
+        """Parâmetros inválidos são recusados."""
+        with pytest.raises(ValueError):
+            BoundedExecutor(max_workers=0)
+        with pytest.raises(ValueError):
+            BoundedExecutor(max_workers=1, max_queue=-1)
+
+
+class TestAskBackpressure:
+    """Testes do endpoint /api/ask com executor saturado."""
+
+    def test_ask_returns_503_with_retry_after(self, api_client):
+        """Quando a fila está cheia, /api/ask responde 503 com Retry-After."""
+        saturated = BoundedExecutor(max_workers=1, max_queue=0)
+        gate = threading.Event()
+        saturated.submit(gate.wait, 5)
+
+        try:
+            with patch(
+                "amldo.rag.v2.tools.get_rag_executor", return_value=saturated
+            ), patch("amldo.interfaces.api.routers.query.track_query_metrics"):
+                response = api_client.post(
+                    "/api/ask", json={"question": "Qual o limite?", "rag_version": "v2"}
+                )
+        finally:
+            gate.set()
+            saturated.shutdown(wait=False)
+
+        assert response.status_code == 503
+        assert "retry-after" in {k.lower() for k in response.headers}
+
+    def test_cached_answer_served_when_saturated(self, api_client, fake_rag_runtime):
+        """Perguntas já respondidas não dependem do executor: 200 mesmo com a fila cheia."""
+        payload = {"question": "Qual o limite?", "rag_version": "v2"}
+        with patch("amldo.interfaces.api.routers.query.track_query_metrics"):
+            first = api_client.post("/api/ask", json=payload)
+
+        saturated = BoundedExecutor(max_workers=1, max_queue=0)
+        gate = threading.Event()
+        saturated.submit(gate.wait, 5)
+        try:
+            with patch(
+                "amldo.rag.v2.tools.get_rag_executor", return_value=saturated
+            ), patch("amldo.interfaces.api.routers.query.track_query_metrics"):
+                response = api_client.post("/api/ask", json=payload)
+        finally:
+            gate.set()
+            saturated.shutdown(wait=False)
+
+        assert first.status_code == 200
+        assert response.status_code == 200
+        assert response.json()["answer"] == first.json()["answer"]
+
+    def test_ask_runs_retrieval_in_executor(self, api_client, fake_rag_runtime):
+        """A recuperação roda em thread do pool, não no event loop."""
+        from amldo.rag.v2 import tools as v2_tools
+
+        threads = []
+        original = v2_tools._retrieve_context
+
+        def spy(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return original(*args, **kwargs)
+
+        with patch.object(v2_tools, "_retrieve_context", side_effect=spy), \
+             patch("amldo.interfaces.api.routers.query.track_query_metrics"):
+            response = api_client.post("/api/ask", json={"question": "Teste", "rag_version": "v2"})
+
+        assert response.status_code == 200
+        assert response.json()["answer"] == "resposta fake"
+        assert threads and threads[0].startswith("amldo-rag")
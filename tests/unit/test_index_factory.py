@@ -0,0 +1,187 @@
+"""
+Testes unitários para a fábrica de índices FAISS (amldo.pipeline.indexer.factory).
+"""
+
+import importlib.util
+
+import numpy as np
+import pytest
+
+from amldo.core.config import settings
+from amldo.core.exceptions import IndexingError
+from amldo.pipeline.indexer.factory import (
+    MIN_POINTS_PER_CENTROID,
+    benchmark_index,
+    build_index,
+    configure_search_params,
+    configure_vector_store,
+    cosine_relevance_score,
+    effective_nlist,
+    index_factory_string,
+    metric_of,
+    rebuild_index,
+)
+
+pytestmark = pytest.mark.skipif(
+    importlib.util.find_spec("faiss") is None, reason="faiss não instalado"
+)
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(42)
+    return rng.normal(size=(600, 32)).astype(np.float32)
+
+
+class TestIndexFactory:
+    """Testes da criação de índices por tipo."""
+
+    @pytest.mark.parametrize(
+        "index_type,expected",
+        [("flat", "IndexFlat"), ("hnsw", "IndexHNSWFlat"), ("ivf_flat", "IndexIVFFlat")],
+    )
+    def test_build_index_types(self, vectors, index_type, expected):
+        import faiss
+
+        index = build_index(vectors, index_type)
+
+        assert type(faiss.downcast_index(index)).__name__ == expected
+        assert index.ntotal == len(vectors)
+
+    def test_ivf_pq_falls_back_without_enough_training_data(self, monkeypatch):
+        """Com poucos vetores, IVF-PQ vira IVF-Flat em vez de treinar codebooks ruins."""
+        monkeypatch.setattr(settings, "faiss_pq_m", 8)
+        monkeypatch.setattr(settings, "faiss_pq_nbits", 8)
+
+        enough = MIN_POINTS_PER_CENTROID * 2**8
+        assert index_factory_string(32, "ivf_pq", enough - 1).endswith(",Flat")
+        assert index_factory_string(32, "ivf_pq", enough).endswith(",PQ8x8")
+
+    def test_ivf_pq_requires_divisible_dimension(self, monkeypatch):
+        monkeypatch.setattr(settings, "faiss_pq_m", 5)
+
+        with pytest.raises(IndexingError):
+            index_factory_string(32, "ivf_pq", 100_000)
+
+    def test_unknown_index_type(self, vectors):
+        with pytest.raises(IndexingError):
+            build_index(vectors, "lsh")
+
+    def test_effective_nlist_is_bounded_by_training_data(self):
+        assert effective_nlist(100_000, 1024) == 1024
+        assert effective_nlist(600, 1024) == 600 // MIN_POINTS_PER_CENTROID
+        assert effective_nlist(10, 1024) == 1
+
+    def test_default_type_comes_from_settings(self, vectors, monkeypatch):
+        import faiss
+
+        monkeypatch.setattr(settings, "faiss_index_type", "hnsw")
+
+        index = build_index(vectors)
+        assert isinstance(faiss.downcast_index(index), faiss.IndexHNSWFlat)
+
+
+class TestRebuildAndBenchmark:
+    """Testes da conversão de índices e do relatório de recall/latência."""
+
+    def test_rebuild_preserves_vector_order(self, vectors):
+        """O i-ésimo vetor continua com ID i (mapeamento do docstore LangChain)."""
+        flat = build_index(vectors, "flat")
+        hnsw = rebuild_index(flat, "hnsw")
+
+        _, ids = hnsw.search(vectors[:5], 1)
+        assert ids[:, 0].tolist() == [0, 1, 2, 3, 4]
+
+    def test_configure_search_params(self, vectors):
+        import faiss
+
+        hnsw = build_index(vectors, "hnsw")
+        ivf = build_index(vectors, "ivf_flat")
+
+        configure_search_params(hnsw, ef_search=128)
+        configure_search_params(ivf, nprobe=3)
+
+        assert faiss.downcast_index(hnsw).hnsw.efSearch == 128
+        assert faiss.extract_index_ivf(ivf).nprobe == 3
+
+    def test_benchmark_flat_has_perfect_recall(self, vectors):
+        report = benchmark_index(build_index(vectors, "flat"), vectors, k=5, n_queries=20)
+
+        assert report["recall_at_k"] == 1.0
+        assert report["n_queries"] == 20
+        assert report["ntotal"] == len(vectors)
+        assert report["index_ms_p50"] >= 0
+
+    def test_benchmark_hnsw_recall(self, vectors):
+        report = benchmark_index(build_index(vectors, "hnsw"), vectors, k=5, n_queries=50)
+
+        assert report["recall_at_k"] >= 0.9
+        assert report["index"].startswith("IndexHNSWFlat")
+
+
+class TestInnerProduct:
+    """Testes do modo produto interno (cosseno) de ponta a ponta."""
+
+    @pytest.fixture
+    def normalized(self, vectors):
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat"])
+    def test_build_ip_index(self, normalized, index_type):
+        index = build_index(normalized, index_type, metric="ip")
+
+        assert metric_of(index) == "ip"
+        scores, ids = index.search(normalized[:3], 1)
+        assert ids[:, 0].tolist() == [0, 1, 2]
+        np.testing.assert_allclose(scores[:, 0], 1.0, atol=1e-5)
+
+    def test_rebuild_l2_to_ip_keeps_ranking(self, normalized):
+        """Com vetores normalizados, L2 e produto interno ordenam os vizinhos igual."""
+        flat_l2 = build_index(normalized, "flat", metric="l2")
+        flat_ip = rebuild_index(flat_l2, "flat", metric="ip")
+
+        _, ids_l2 = flat_l2.search(normalized[:10], 5)
+        _, ids_ip = flat_ip.search(normalized[:10], 5)
+        assert (ids_l2 == ids_ip).all()
+
+    def test_benchmark_uses_index_metric(self, normalized):
+        report = benchmark_index(build_index(normalized, "flat", metric="ip"), normalized, k=5)
+
+        assert report["recall_at_k"] == 1.0
+        assert "(ip" in report["index"]
+
+    def test_cosine_relevance_score(self):
+        assert cosine_relevance_score(0.83) == pytest.approx(0.83)
+        assert cosine_relevance_score(-0.2) == 0.0
+        assert cosine_relevance_score(1.0000001) == 1.0
+
+    def test_vector_store_scores_are_cosine(self):
+        """Scores do `similarity_score_threshold` são a similaridade de cosseno."""
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.embeddings import Embeddings
+
+        class UnitEmbeddings(Embeddings):
+            table = {"a": [1.0, 0.0], "b": [0.6, 0.8], "c": [0.0, 1.0]}
+
+            def embed_documents(self, texts):
+                return [self.table[t] for t in texts]
+
+            def embed_query(self, text):
+                return self.table[text]
+
+        store = FAISS.from_texts(["a", "b", "c"], UnitEmbeddings())
+        store.index = rebuild_index(store.index, "flat", metric="ip")
+        configure_vector_store(store)
+
+        results = store.similarity_search_with_relevance_scores("a", k=3)
+        assert [(doc.page_content, round(score, 4)) for doc, score in results] == [
+            ("a", 1.0),
+            ("b", 0.6),
+            ("c", 0.0),
+        ]
+
+        retriever = store.as_retriever(
+            search_type="similarity_score_threshold",
+            search_kwargs={"k": 3, "score_threshold": 0.5},
+        )
+        assert [doc.page_content for doc in retriever.invoke("a")] == ["a", "b"]
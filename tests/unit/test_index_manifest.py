@@ -0,0 +1,169 @@
+"""
+Testes unitários para o manifesto de indexação incremental (amldo.pipeline.indexer.manifest).
+"""
+
+import importlib.util
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from amldo.core.config import settings
+from amldo.pipeline.indexer.factory import configure_search_params, rebuild_index
+from amldo.pipeline.indexer.manifest import (
+    MANIFEST_FILE,
+    IndexManifest,
+    apply_file_chunks,
+    delete_documents,
+    file_sha256,
+    plan,
+    remove_file,
+)
+
+pytestmark = pytest.mark.skipif(
+    importlib.util.find_spec("faiss") is None, reason="faiss não instalado"
+)
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Embedding falso que conta quantos textos foram codificados."""
+
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def store():
+    embeddings = CountingEmbeddings(size=16)
+    vector_db = FAISS.from_texts(["Art. 1º Lei original."], embeddings, metadatas=[{"lei": "L1"}])
+    embeddings.calls = 0
+    return vector_db
+
+
+def _docs(name, texts):
+    return [
+        Document(page_content=text, metadata={"file": name, "chunk_idx": idx})
+        for idx, text in enumerate(texts)
+    ]
+
+
+def _contents(vector_db):
+    return sorted(
+        vector_db.docstore.search(doc_id).page_content
+        for doc_id in vector_db.index_to_docstore_id.values()
+    )
+
+
+class TestPlan:
+    """Testes da classificação dos PDFs contra o manifesto."""
+
+    def test_plan(self, temp_dir):
+        (temp_dir / "a.pdf").write_bytes(b"a")
+        (temp_dir / "b.pdf").write_bytes(b"b-novo")
+        manifest = IndexManifest(
+            {
+                "a.pdf": {"sha256": file_sha256(temp_dir / "a.pdf"), "size": 1, "chunks": []},
+                "b.pdf": {"sha256": "antigo", "size": 1, "chunks": []},
+                "c.pdf": {"sha256": "apagado", "size": 1, "chunks": []},
+            }
+        )
+
+        changes = plan(manifest, sorted(temp_dir.glob("*.pdf")))
+
+        assert changes.unchanged == ["a.pdf"]
+        assert list(changes.changed) == ["b.pdf"]
+        assert changes.deleted == ["c.pdf"]
+
+    def test_save_and_load(self, temp_dir):
+        manifest = IndexManifest({"a.pdf": {"sha256": "x", "size": 1, "chunks": []}})
+        manifest.save(temp_dir)
+
+        assert IndexManifest.load(temp_dir).files == manifest.files
+
+    def test_corrupted_manifest_is_empty(self, temp_dir):
+        (temp_dir / MANIFEST_FILE).write_text("{nao é json", encoding="utf-8")
+
+        assert IndexManifest.load(temp_dir).files == {}
+
+
+class TestApplyFileChunks:
+    """Testes da substituição incremental dos chunks de um arquivo."""
+
+    def test_reprocessing_same_file_embeds_nothing(self, store):
+        manifest = IndexManifest()
+        docs = _docs("a.pdf", ["chunk 0", "chunk 1"])
+
+        apply_file_chunks(store, manifest, "a.pdf", "h1", 10, docs)
+        stats = apply_file_chunks(store, manifest, "a.pdf", "h2", 10, docs)
+
+        assert stats == {"added": 0, "reused": 2, "removed": 0}
+        assert store.embeddings.calls == 2
+        assert store.index.ntotal == 3
+
+    def test_changed_chunks_replace_old_vectors(self, store):
+        manifest = IndexManifest()
+        apply_file_chunks(store, manifest, "a.pdf", "h1", 10, _docs("a.pdf", ["c0", "c1", "c2"]))
+
+        stats = apply_file_chunks(store, manifest, "a.pdf", "h2", 10, _docs("a.pdf", ["c0", "X"]))
+
+        assert stats == {"added": 1, "reused": 1, "removed": 2}
+        assert _contents(store) == ["Art. 1º Lei original.", "X", "c0"]
+        assert [c["id"] for c in manifest.files["a.pdf"]["chunks"]] == manifest.chunk_ids("a.pdf")
+        assert set(manifest.chunk_ids("a.pdf")) <= set(store.index_to_docstore_id.values())
+
+    def test_remove_file(self, store):
+        manifest = IndexManifest()
+        apply_file_chunks(store, manifest, "a.pdf", "h1", 10, _docs("a.pdf", ["c0", "c1"]))
+
+        assert remove_file(store, manifest, "a.pdf") == 2
+        assert _contents(store) == ["Art. 1º Lei original."]
+        assert "a.pdf" not in manifest.files
+
+    def test_reconcile_replaces_untracked_duplicates(self, store):
+        """Chunks duplicados por versões antigas do /api/process são substituídos."""
+        docs = _docs("a.pdf", ["c0", "c1"])
+        store.add_documents(docs)
+        store.add_documents(docs)
+
+        manifest = IndexManifest()
+        manifest.reconcile(store)
+        apply_file_chunks(store, manifest, "a.pdf", "h1", 10, docs)
+
+        assert _contents(store) == ["Art. 1º Lei original.", "c0", "c1"]
+
+
+class TestDeleteDocuments:
+    """Testes da remoção de vetores por tipo de índice."""
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+    def test_delete_keeps_remaining_mapping(self, index_type):
+        texts = [f"documento {i}" for i in range(6)]
+        vector_db = FAISS.from_texts(texts, DeterministicFakeEmbedding(size=16))
+        vector_db.index = rebuild_index(vector_db.index, index_type, "l2")
+        ids = list(vector_db.index_to_docstore_id.values())
+
+        delete_documents(vector_db, [ids[1], ids[4]])
+
+        assert vector_db.index.ntotal == 4
+        for text in ("documento 0", "documento 5"):
+            assert vector_db.similarity_search(text, k=1)[0].page_content == text
+
+    def test_delete_from_ivf_renumbers_positions(self, monkeypatch):
+        """IVF mantém os IDs após `remove_ids`; a remoção precisa recriar o índice."""
+        monkeypatch.setattr(settings, "faiss_ivf_nlist", 2)
+        texts = [f"documento {i}" for i in range(100)]
+        vector_db = FAISS.from_texts(texts, DeterministicFakeEmbedding(size=16))
+        vector_db.index = rebuild_index(vector_db.index, "ivf_flat", "l2")
+        configure_search_params(vector_db.index, nprobe=2)
+        ids = list(vector_db.index_to_docstore_id.values())
+
+        delete_documents(vector_db, ids[:3])
+
+        assert vector_db.index.ntotal == 97
+        assert sorted(vector_db.index_to_docstore_id) == list(range(97))
+        for text in ("documento 3", "documento 99"):
+            assert vector_db.similarity_search(text, k=1)[0].page_content == text
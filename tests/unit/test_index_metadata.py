@@ -0,0 +1,58 @@
+"""
+Testes unitários para os metadados SQLite do indexador (amldo.pipeline.indexer.metadata).
+"""
+
+import json
+
+import pytest
+
+from amldo.core.exceptions import IndexingError
+from amldo.pipeline.indexer.indexer import save_metadata
+from amldo.pipeline.indexer.metadata import (
+    MetadataWriter,
+    NormasMetadata,
+    convert_json_metadata,
+)
+
+ARTIGOS = [{"id": f"L1-art-{i}", "text": f"Art. {i}º Texto.", "lei": "L1"} for i in range(5)]
+
+
+class TestNormasMetadata:
+    """Testes de gravação e acesso por posição no índice."""
+
+    def test_random_access_by_position(self, temp_dir):
+        path = save_metadata([a["id"] for a in ARTIGOS], ARTIGOS, str(temp_dir / "meta.sqlite"))
+        metadata = NormasMetadata(path)
+
+        assert len(metadata) == 5
+        assert metadata[3] == ARTIGOS[3]
+        # Ordem dos resultados da busca preservada; -1 (sem resultado) vira None
+        assert metadata.get_many([4, 0, -1, 4]) == [ARTIGOS[4], ARTIGOS[0], None, ARTIGOS[4]]
+        assert metadata.get_by_id("L1-art-2") == ARTIGOS[2]
+        with pytest.raises(KeyError):
+            metadata[5]
+
+    def test_truncate_discards_uncheckpointed_rows(self, temp_dir):
+        path = temp_dir / "meta.sqlite"
+        with MetadataWriter(path) as writer:
+            writer.append(ARTIGOS[:3])
+            writer.commit()
+        with MetadataWriter(path) as writer:
+            assert writer.count == 3
+            writer.truncate(2)
+            writer.append(ARTIGOS[2:])
+
+        assert NormasMetadata(path).get_many(range(5)) == ARTIGOS
+
+    def test_convert_legacy_json(self, temp_dir):
+        legacy = temp_dir / "normas_metadata.json"
+        legacy.write_text(
+            json.dumps({"ids": [a["id"] for a in ARTIGOS], "artigos": ARTIGOS}, indent=2),
+            encoding="utf-8",
+        )
+
+        path = convert_json_metadata(legacy, temp_dir / "normas_metadata.sqlite")
+
+        assert NormasMetadata(path)[4] == ARTIGOS[4]
+        with pytest.raises(IndexingError):
+            NormasMetadata(temp_dir / "nao-existe.sqlite")
@@ -0,0 +1,124 @@
+"""
+Testes unitários para a indexação em streaming (amldo.pipeline.indexer.streaming).
+"""
+
+import importlib.util
+import json
+
+import numpy as np
+import pytest
+
+from amldo.core.config import settings
+from amldo.core.exceptions import IndexingError
+from amldo.pipeline.indexer.metadata import NormasMetadata
+from amldo.pipeline.indexer.streaming import index_jsonl_streaming, iter_jsonl_batches
+
+pytestmark = pytest.mark.skipif(
+    importlib.util.find_spec("faiss") is None, reason="faiss não instalado"
+)
+
+
+class FakeEmbedding:
+    """Embedding determinístico; falha depois de `fail_after` textos (se definido)."""
+
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def __call__(self, texts):
+        if self.fail_after is not None and self.calls + len(texts) > self.fail_after:
+            raise RuntimeError("interrompido")
+        self.calls += len(texts)
+        return np.stack(
+            [np.random.default_rng(len(t) * 7919 + ord(t[-1])).random(8) for t in texts]
+        ).astype(np.float32)
+
+
+@pytest.fixture
+def corpus(temp_dir):
+    path = temp_dir / "artigos.jsonl"
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(100):
+            f.write(json.dumps({"id": f"art-{i}", "text": "Art. " * (i + 1) + str(i)}) + "\n")
+            if i % 10 == 0:
+                f.write("\n")
+    return path
+
+
+def _build(corpus, temp_dir, embedding_fn, **kwargs):
+    kwargs.setdefault("index_type", "flat")
+    return index_jsonl_streaming(
+        str(corpus),
+        embedding_fn,
+        str(temp_dir / "out" / "normas.index"),
+        str(temp_dir / "out" / "normas_metadata.sqlite"),
+        batch_size=16,
+        checkpoint_every=2,
+        **kwargs,
+    )
+
+
+class TestStreamingIndexer:
+    """Testes do pipeline em lotes e da retomada por checkpoint."""
+
+    def test_batches_resume_from_offset(self, corpus):
+        batches = list(iter_jsonl_batches(corpus, 30))
+        assert [len(b) for b, _ in batches] == [30, 30, 30, 10]
+
+        rest = list(iter_jsonl_batches(corpus, 30, offset=batches[1][1]))
+        assert rest[0][0][0]["id"] == "art-60"
+
+    def test_matches_in_memory_index(self, corpus, temp_dir):
+        import faiss
+
+        idx_path, meta_path = _build(corpus, temp_dir, FakeEmbedding())
+
+        index = faiss.read_index(idx_path)
+        metadata = NormasMetadata(meta_path)
+        artigos = [json.loads(line) for line in corpus.read_text("utf-8").splitlines() if line]
+
+        assert metadata.get_many(range(len(artigos))) == artigos
+        expected = FakeEmbedding()([a["text"] for a in artigos])
+        assert np.allclose(index.reconstruct_n(0, index.ntotal), expected)
+        assert sorted(p.name for p in (temp_dir / "out").iterdir()) == [
+            "normas.index",
+            "normas_metadata.sqlite",
+        ]
+
+    def test_resume_after_interruption(self, corpus, temp_dir):
+        import faiss
+
+        with pytest.raises(IndexingError):
+            _build(corpus, temp_dir, FakeEmbedding(fail_after=75))
+        assert (temp_dir / "out" / "normas.index.checkpoint.json").exists()
+
+        embedding = FakeEmbedding()
+        idx_path, meta_path = _build(corpus, temp_dir, embedding)
+
+        # Checkpoint após 4 lotes (64 artigos): só o restante é reprocessado
+        assert embedding.calls == 36
+        metadata = NormasMetadata(meta_path)
+        assert [a["id"] for a in metadata.get_many(range(100))] == [f"art-{i}" for i in range(100)]
+        assert faiss.read_index(idx_path).ntotal == 100
+
+    def test_changed_source_restarts(self, corpus, temp_dir):
+        with pytest.raises(IndexingError):
+            _build(corpus, temp_dir, FakeEmbedding(fail_after=75))
+        with corpus.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "art-100", "text": "Art. novo"}) + "\n")
+
+        embedding = FakeEmbedding()
+        _build(corpus, temp_dir, embedding)
+
+        assert embedding.calls == 101
+
+    def test_ivf_trained_on_leading_sample(self, corpus, temp_dir, monkeypatch):
+        import faiss
+
+        monkeypatch.setattr(settings, "faiss_ivf_nlist", 1)  # amostra de treino: 39 vetores
+
+        idx_path, _ = _build(corpus, temp_dir, FakeEmbedding(), index_type="ivf_flat")
+
+        index = faiss.read_index(idx_path)
+        assert index.is_trained
+        assert index.ntotal == 100
@@ -0,0 +1,160 @@
+"""
+Testes unitários para a fila de jobs de processamento (amldo.utils.jobs, amldo.pipeline.worker).
+"""
+
+import importlib.util
+import tomllib
+from pathlib import Path
+
+import pytest
+
+from amldo.core.config import settings
+from amldo.pipeline.processing import ProcessingProgress
+from amldo.utils.jobs import JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobQueue
+
+DEAD_PID = 2**22 + 12345
+
+
+@pytest.fixture
+def queue(temp_dir):
+    return JobQueue(temp_dir / "jobs.db")
+
+
+class TestJobQueue:
+    """Testes da fila SQLite."""
+
+    def test_submit_reuses_queued_job(self, queue):
+        first = queue.submit()
+        second = queue.submit()
+
+        assert first["status"] == JOB_QUEUED
+        assert second["id"] == first["id"]
+
+    def test_only_one_running_job(self, queue):
+        first = queue.submit()
+        claimed = queue.claim()
+        second = queue.submit()
+
+        assert claimed["id"] == first["id"]
+        assert claimed["status"] == JOB_RUNNING
+        assert second["id"] != first["id"]
+        assert queue.claim() is None
+
+    def test_job_of_dead_worker_is_requeued(self, queue):
+        job = queue.submit()
+        queue.claim(worker_pid=DEAD_PID)
+
+        reclaimed = queue.claim()
+
+        assert reclaimed["id"] == job["id"]
+        assert reclaimed["worker_pid"] != DEAD_PID
+
+    def test_progress_and_result(self, queue):
+        job = queue.submit()
+        queue.claim()
+
+        queue.update_progress(job["id"], {"phase": "embedding", "chunks_embedded": 10})
+        assert queue.get(job["id"])["progress"]["chunks_embedded"] == 10
+
+        queue.complete(job["id"], {"processed": 1, "total_chunks": 10})
+        done = queue.get(job["id"])
+        assert done["status"] == JOB_DONE
+        assert done["result"]["processed"] == 1
+        assert done["finished_at"] >= done["started_at"]
+
+    def test_unknown_job(self, queue):
+        assert queue.get("nao-existe") is None
+
+
+class TestProcessingProgress:
+    """Testes do acompanhamento (throughput e ETA)."""
+
+    def test_eta_estimates_unextracted_files_by_size(self, monkeypatch):
+        clock = iter([0.0, 10.0])
+        monkeypatch.setattr("amldo.pipeline.processing.time.monotonic", lambda: next(clock))
+        progress = ProcessingProgress()
+        progress.add_file("a.pdf", "pending", size=1000)
+        progress.add_file("b.pdf", "pending", size=500)
+        progress.add_file("c.pdf", "unchanged")
+
+        progress.files["a.pdf"].update(status="embedding", chunks_total=100)
+        progress.chunks_embedded = 50
+        progress.files["a.pdf"]["chunks_done"] = 50
+
+        snapshot = progress.snapshot()
+        # 5 chunks/s; faltam 50 de a.pdf + ~50 estimados para b.pdf (metade dos bytes)
+        assert snapshot["chunks_per_second"] == 5.0
+        assert snapshot["eta_seconds"] == 20.0
+        assert snapshot["files_done"] == 1
+
+    def test_no_eta_without_throughput(self):
+        progress = ProcessingProgress()
+        progress.add_file("a.pdf", "pending", size=1000)
+
+        assert progress.snapshot()["eta_seconds"] is None
+
+
+class TestWorker:
+    """Testes de execução de jobs pelo worker."""
+
+    def test_run_worker_processes_pdfs(self, queue, temp_dir, monkeypatch):
+        fitz = pytest.importorskip("fitz")
+        pytest.importorskip("faiss")
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+
+        from amldo.pipeline import worker
+
+        raw_dir = temp_dir / "raw"
+        raw_dir.mkdir()
+        pdf = fitz.open()
+        pdf.new_page().insert_text((72, 72), "Art. 1º Texto da lei de teste.")
+        pdf.save(str(raw_dir / "lei.pdf"))
+
+        monkeypatch.setattr(settings, "vector_db_path", str(temp_dir / "vdb"))
+        monkeypatch.setattr(settings, "process_embed_batch_size", 1)
+        monkeypatch.setattr(settings, "artigos_0_index_path", str(temp_dir / "artigos_0.json"))
+        monkeypatch.setattr(settings, "article_index_path", str(temp_dir / "artigos_index.json"))
+        runtime = type("Runtime", (), {"embeddings": DeterministicFakeEmbedding(size=8)})()
+        monkeypatch.setattr("amldo.rag.runtime.get_rag_runtime", lambda: runtime)
+        monkeypatch.setattr("amldo.utils.metrics.track_processing_metrics", lambda **kw: 0)
+
+        job = queue.submit()
+        worker.run_worker(queue, once=True, raw_dir=raw_dir)
+
+        done = queue.get(job["id"])
+        assert done["status"] == JOB_DONE, done["error"]
+        assert done["result"]["processed"] == 1
+        assert done["progress"]["phase"] == "done"
+        assert done["progress"]["files"][0]["status"] == "indexed"
+        assert (temp_dir / "vdb" / "manifest.json").exists()
+        # JSONs derivados (fora do git) são gerados pelo processamento
+        assert (temp_dir / "artigos_0.json").exists()
+        assert (temp_dir / "artigos_index.json").exists()
+
+    def test_script_entry_points_are_packaged(self):
+        """`amldo-worker` e os demais scripts apontam para módulos do pacote."""
+        pyproject = Path(__file__).parents[2] / "pyproject.toml"
+        scripts = tomllib.loads(pyproject.read_text(encoding="utf-8"))["project"]["scripts"]
+
+        targets = [t.split(":")[0] for t in scripts.values() if t.startswith("amldo.scripts.")]
+        assert "amldo.scripts.process_worker" in targets
+        for module in targets:
+            assert importlib.util.find_spec(module) is not None, module
+
+    def test_failed_job_records_error(self, queue, temp_dir, monkeypatch):
+        from amldo.pipeline import worker
+
+        runtime = type("Runtime", (), {"embeddings": None})()
+        monkeypatch.setattr("amldo.rag.runtime.get_rag_runtime", lambda: runtime)
+
+        def boom(*args, **kwargs):
+            raise RuntimeError("falhou")
+
+        monkeypatch.setattr("amldo.pipeline.processing.process_raw_documents", boom)
+
+        job = queue.submit()
+        worker.run_job(queue.claim(), queue, temp_dir)
+
+        failed = queue.get(job["id"])
+        assert failed["status"] == JOB_FAILED
+        assert failed["error"] == "falhou"
@@ -0,0 +1,167 @@
+"""
+Testes unitários para a busca lexical BM25 e a busca híbrida (amldo.rag.lexical).
+"""
+
+import importlib.util
+import math
+import os
+from collections import Counter
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from amldo.rag.lexical import (
+    BM25_B,
+    BM25_K1,
+    LEXICAL_FILE,
+    BM25Index,
+    HybridRetriever,
+    load_lexical_index,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+from amldo.rag.retrieval_cache import RetrievalCache
+from amldo.rag.vector_store import load_vector_store, save_vector_store
+
+pytestmark = pytest.mark.skipif(
+    importlib.util.find_spec("faiss") is None, reason="faiss não instalado"
+)
+
+TEXTS = [
+    "Art. 75. É dispensável a licitação para contratação que envolva valores inferiores a "
+    "R$ 50.000,00 (cinquenta mil reais), no caso de outros serviços e compras.",
+    "Art. 76. A alienação de bens da Administração Pública será precedida de avaliação.",
+    "Art. 74. É inexigível a licitação quando inviável a competição, em especial nos casos:",
+    "O tratamento de dados pessoais somente poderá ser realizado nas hipóteses do art. 7º.",
+    "Art. 28. São modalidades de licitação: I - pregão; II - concorrência; III - concurso.",
+    "§ 2º Os valores referidos no inciso II do caput serão duplicados para compras.",
+]
+
+
+def _reference_bm25(texts, query):
+    """Scores BM25 calculados diretamente (referência)."""
+    docs = [Counter(tokenize(t)) for t in texts]
+    avg = sum(sum(d.values()) for d in docs) / len(docs)
+    scores = []
+    for doc in docs:
+        length = sum(doc.values())
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(1 for d in docs if term in d)
+            if not doc.get(term):
+                continue
+            idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+            tf = doc[term]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg)
+            score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scores.append(score)
+    return np.array(scores)
+
+
+@pytest.fixture
+def saved_store(temp_dir):
+    metadatas = [{"lei": "L14133", "artigo": f"artigo_{i}.txt"} for i in range(len(TEXTS))]
+    metadatas[3] = {"lei": "L13709", "artigo": "artigo_7.txt"}
+    store = FAISS.from_texts(TEXTS, DeterministicFakeEmbedding(size=16), metadatas=metadatas)
+    save_vector_store(store, temp_dir)
+    return store
+
+
+class TestTokenize:
+    """Testes da normalização dos termos."""
+
+    def test_legal_tokens(self):
+        terms = tokenize("Art. 75, inciso II, até R$ 50.000,00 da Lei nº 14.133 (§ 2º)")
+
+        assert {"art_75", "75", "ii", "50000", "14133", "par_2", "lei"} <= set(terms)
+        assert "da" not in terms and "art_14133" not in terms
+
+    def test_accents_and_ordinals(self):
+        assert tokenize("Licitação do artigo 1º") == ["licitacao", "artigo", "1", "art_1"]
+
+
+class TestBM25Index:
+    """Testes do índice invertido."""
+
+    def test_scores_match_reference(self):
+        index = BM25Index.build(TEXTS)
+        query = "dispensa de licitação até R$ 50.000 no art. 75"
+
+        positions, scores = index.search(query)
+        expected = _reference_bm25(TEXTS, query)
+
+        assert positions[0] == 0
+        assert np.allclose(scores, expected[positions], rtol=1e-5)
+        assert set(positions) == set(np.flatnonzero(expected))
+
+    def test_exact_article_beats_neighbours(self):
+        index = BM25Index.build(TEXTS)
+
+        assert index.search("o que diz o art. 76?", n=1)[0].tolist() == [1]
+        assert index.search("artigo 74", n=1)[0].tolist() == [2]
+
+    def test_mask_and_unknown_terms(self):
+        index = BM25Index.build(TEXTS)
+        mask = np.ones(len(TEXTS), dtype=bool)
+        mask[0] = False
+
+        assert 0 not in index.search("art. 75", mask=mask)[0]
+        assert len(index.search("xyzzy")[0]) == 0
+
+    def test_save_load_roundtrip(self, temp_dir):
+        index = BM25Index.build(TEXTS)
+        index.save(temp_dir / LEXICAL_FILE)
+        loaded = BM25Index.load(temp_dir / LEXICAL_FILE)
+
+        for query in ("art. 75", "licitação concorrência", "dados pessoais"):
+            assert np.array_equal(loaded.search(query)[0], index.search(query)[0])
+
+
+class TestHybridRetrieval:
+    """Testes da fusão densa + lexical."""
+
+    def test_reciprocal_rank_fusion(self):
+        a, b, c = (Document(id=x, page_content=x) for x in "abc")
+
+        fused = reciprocal_rank_fusion([[a, b, c], [b, c]], k=2, rrf_k=60)
+
+        assert [d.id for d in fused] == ["b", "c"]
+
+    def test_load_builds_and_refreshes(self, saved_store, temp_dir):
+        lexical = load_lexical_index(temp_dir)
+        assert (temp_dir / LEXICAL_FILE).exists()
+        assert lexical.search("art. 75", 1)[0].page_content == TEXTS[0]
+
+        # Docstore regravado depois do bm25.npz: o índice é refeito
+        saved_store.add_texts(["Art. 99. Texto novo sobre garantia contratual."])
+        save_vector_store(saved_store, temp_dir)
+        stat = (temp_dir / "docstore.sqlite").stat()
+        os.utime(temp_dir / LEXICAL_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns - 1))
+
+        assert load_lexical_index(temp_dir).bm25.size == len(TEXTS) + 1
+
+    def test_hybrid_retriever_with_filter(self, saved_store, temp_dir):
+        db = load_vector_store(temp_dir, saved_store.embeddings)
+        lexical = load_lexical_index(temp_dir)
+        retriever = HybridRetriever(
+            vector_db=db, lexical=lexical, k=3, fetch_k=3, search_filter={"lei": "L14133"}
+        )
+
+        docs = retriever.invoke("dispensa até R$ 50.000,00 art. 75")
+
+        assert len(docs) == 3
+        assert TEXTS[0] in [d.page_content for d in docs]
+        assert all(d.metadata["lei"] == "L14133" for d in docs)
+        filtered = lexical.search("dados pessoais art. 7", 2, {"lei": "L14133"})
+        assert TEXTS[3] not in [d.page_content for d in filtered]
+
+    def test_cache_key_includes_terms(self):
+        key = RetrievalCache.make_key([1.0, 0.0], 12, "hybrid", None, "xml", "fp", ["art_75"])
+
+        assert key != RetrievalCache.make_key(
+            [1.0, 0.0], 12, "hybrid", None, "xml", "fp", ["art_76"]
+        )
+        assert RetrievalCache.make_key([1.0, 0.0], 12, "mmr", None, "xml", "fp") != key
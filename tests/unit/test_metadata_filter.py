@@ -0,0 +1,134 @@
+"""
+Testes unitários para o pré-filtro de metadados (amldo.rag.metadata_filter).
+"""
+
+import importlib.util
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from amldo.pipeline.indexer.factory import rebuild_index
+from amldo.rag.metadata_filter import MAX_CACHED_SELECTORS, MetadataIndex
+from amldo.rag.vector_store import load_vector_store, save_vector_store
+
+pytestmark = pytest.mark.skipif(
+    importlib.util.find_spec("faiss") is None, reason="faiss não instalado"
+)
+
+EXCLUDE_ART_0 = {"artigo": {"$nin": ["artigo_0.txt"]}}
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=16)
+
+
+@pytest.fixture
+def saved_store(embeddings, temp_dir):
+    """Store em que a maioria dos chunks é artigo 0 (muito excluído pelo filtro)."""
+    texts, metadatas = [], []
+    for i in range(60):
+        artigo = "artigo_0.txt" if i % 6 else f"artigo_{i}.txt"
+        lei = "L14133" if i % 4 == 0 else "L13709"
+        texts.append(f"Texto {i}")
+        metadatas.append(
+            {"lei": lei, "titulo": "TITULO_I", "capitulo": "CAPITULO_I", "artigo": artigo}
+        )
+    store = FAISS.from_texts(texts, embeddings, metadatas=metadatas)
+    save_vector_store(store, temp_dir)
+    return store
+
+
+def _allowed_results(store, query, k, search_filter):
+    """Busca exata restrita aos documentos que passam no filtro (referência)."""
+    keep = FAISS._create_filter_func(search_filter)
+    vector = np.array([store.embeddings.embed_query(query)], dtype=np.float32)
+    distances, ids = store.index.search(vector, store.index.ntotal)
+    docs = [store.docstore.search(store.index_to_docstore_id[i]) for i in ids[0]]
+    return [doc.page_content for doc in docs if keep(doc.metadata)][:k]
+
+
+class TestMetadataIndex:
+    """Testes da conversão de filtros em posições."""
+
+    @pytest.mark.parametrize(
+        "search_filter",
+        [
+            EXCLUDE_ART_0,
+            {"lei": "L14133"},
+            {"lei": ["L14133", "L9999"]},
+            {"lei": {"$neq": "L14133"}, "artigo": {"$in": ["artigo_0.txt", "artigo_6.txt"]}},
+        ],
+    )
+    def test_mask_matches_langchain_filter(self, saved_store, search_filter):
+        index = MetadataIndex.from_vector_store(saved_store)
+        keep = FAISS._create_filter_func(search_filter)
+
+        expected = [
+            keep(saved_store.docstore.search(saved_store.index_to_docstore_id[pos]).metadata)
+            for pos in range(saved_store.index.ntotal)
+        ]
+        assert index.mask(search_filter).tolist() == expected
+
+    def test_unsupported_filter(self, saved_store):
+        index = MetadataIndex.from_vector_store(saved_store)
+
+        assert index.mask({"$or": [{"lei": "L14133"}]}) is None
+        assert index.mask({"chunk_idx": 0}) is None
+        assert index.mask({"lei": {"$gt": "L1"}}) is None
+
+    def test_selector_outlives_cache_eviction(self, saved_store):
+        """O bitmap acompanha o seletor mesmo depois de sair do cache."""
+        import faiss
+
+        index = MetadataIndex.from_vector_store(saved_store)
+        selector, count = index.selector(EXCLUDE_ART_0)
+        for i in range(MAX_CACHED_SELECTORS + 1):
+            index.selector({"artigo": f"artigo_{i}.txt"})
+
+        allowed = index.mask(EXCLUDE_ART_0)
+        assert count == int(allowed.sum())
+        assert [selector.is_member(pos) for pos in range(index.size)] == allowed.tolist()
+        assert isinstance(selector, faiss.IDSelectorBitmap)
+
+
+class TestPrefilteredSearch:
+    """Testes da busca com seletor de IDs."""
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+    def test_returns_k_allowed_results(self, saved_store, embeddings, temp_dir, index_type):
+        db = load_vector_store(temp_dir, embeddings)
+        db.index = rebuild_index(db.index, index_type)
+
+        docs = db.similarity_search("consulta", k=8, filter=EXCLUDE_ART_0, fetch_k=8)
+
+        assert len(docs) == 8
+        assert all(doc.metadata["artigo"] != "artigo_0.txt" for doc in docs)
+        assert [d.page_content for d in docs] == _allowed_results(
+            saved_store, "consulta", 8, EXCLUDE_ART_0
+        )
+        # O pós-filtro do LangChain perde resultados com o mesmo fetch_k
+        post = saved_store.similarity_search("consulta", k=8, filter=EXCLUDE_ART_0, fetch_k=8)
+        assert len(post) < 8
+
+    def test_mmr_and_threshold_respect_filter(self, saved_store, embeddings, temp_dir):
+        db = load_vector_store(temp_dir, embeddings)
+        only_lei = {"lei": "L14133", "artigo": {"$nin": ["artigo_0.txt"]}}
+
+        mmr = db.max_marginal_relevance_search("consulta", k=3, fetch_k=5, filter=only_lei)
+        scored = db.similarity_search_with_relevance_scores("consulta", k=4, filter=only_lei)
+
+        assert len(mmr) == 3
+        assert all(d.metadata["lei"] == "L14133" for d in mmr + [d for d, _ in scored])
+        assert db.similarity_search("consulta", k=3, filter={"lei": "L0000"}) == []
+
+    def test_index_refreshed_after_add(self, embeddings, temp_dir, saved_store):
+        db = load_vector_store(temp_dir, embeddings, mmap=False)
+        assert db.similarity_search("consulta", k=3, filter={"lei": "L8666"}) == []
+
+        db.add_texts(["Texto novo"], metadatas=[{"lei": "L8666", "artigo": "artigo_1.txt"}])
+
+        docs = db.similarity_search("consulta", k=3, filter={"lei": "L8666"})
+        assert [d.page_content for d in docs] == ["Texto novo"]
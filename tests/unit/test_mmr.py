@@ -0,0 +1,132 @@
+"""
+Testes unitários para o MMR vetorizado (amldo.rag.mmr).
+"""
+
+import importlib.util
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores import utils as langchain_utils
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from amldo.core.config import Settings
+from amldo.rag.mmr import (
+    benchmark_mmr,
+    maximal_marginal_relevance,
+    mmr_search_kwargs,
+    mmr_search_with_score_by_vector,
+)
+from amldo.rag.vector_store import load_vector_store, save_vector_store
+
+pytestmark = pytest.mark.skipif(
+    importlib.util.find_spec("faiss") is None, reason="faiss não instalado"
+)
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=16)
+
+
+@pytest.fixture
+def store(embeddings):
+    metadatas = [{"lei": "L14133" if i % 3 else "L13709"} for i in range(80)]
+    return FAISS.from_texts([f"Texto {i}" for i in range(80)], embeddings, metadatas=metadatas)
+
+
+class TestMaximalMarginalRelevance:
+    """Testes da seleção vetorizada."""
+
+    @pytest.mark.parametrize("lambda_mult", [0.0, 0.3, 0.7, 1.0])
+    @pytest.mark.parametrize("k", [1, 4, 12, 50])
+    def test_matches_langchain(self, k, lambda_mult):
+        rng = np.random.default_rng(k)
+        query = rng.normal(size=(1, 32)).astype(np.float32)
+        candidates = rng.normal(size=(60, 32)).astype(np.float32)
+
+        expected = langchain_utils.maximal_marginal_relevance(
+            query, list(candidates), lambda_mult=lambda_mult, k=k
+        )
+
+        assert maximal_marginal_relevance(query, candidates, k, lambda_mult) == expected
+
+    def test_edge_cases(self):
+        candidates = np.array([[1.0, 0.0], [0.0, 0.0], [0.9, 0.1]], dtype=np.float32)
+
+        assert maximal_marginal_relevance([1.0, 0.0], candidates, k=0) == []
+        assert maximal_marginal_relevance([1.0, 0.0], np.empty((0, 2)), k=3) == []
+        assert sorted(maximal_marginal_relevance([1.0, 0.0], candidates, k=10)) == [0, 1, 2]
+
+    def test_search_kwargs_from_settings(self):
+        config = Settings(mmr_diversity_score=0.3, mmr_fetch_k=30)
+
+        assert mmr_search_kwargs(config) == {"fetch_k": 30, "lambda_mult": pytest.approx(0.7)}
+
+
+class TestMMRSearch:
+    """Testes da busca MMR no vector store."""
+
+    @pytest.mark.parametrize("k, fetch_k", [(4, 20), (12, 20), (25, 10)])
+    def test_matches_langchain_search(self, store, embeddings, k, fetch_k):
+        vector = embeddings.embed_query("consulta")
+
+        expected = FAISS.max_marginal_relevance_search_with_score_by_vector(
+            store, vector, k=k, fetch_k=max(fetch_k, k), lambda_mult=0.7
+        )
+        results = mmr_search_with_score_by_vector(store, vector, k, fetch_k, lambda_mult=0.7)
+
+        assert [d.id for d, _ in results] == [d.id for d, _ in expected]
+        assert [s for _, s in results] == pytest.approx([float(s) for _, s in expected])
+
+    def test_unfiltered_search_reads_only_selected_documents(self, store, embeddings, monkeypatch):
+        lookups = []
+        search = store.docstore.search
+
+        def counting_search(_id):
+            lookups.append(_id)
+            return search(_id)
+
+        monkeypatch.setattr(store.docstore, "search", counting_search)
+        results = mmr_search_with_score_by_vector(
+            store, embeddings.embed_query("consulta"), k=4, fetch_k=40
+        )
+
+        assert lookups == [d.id for d, _ in results]
+
+    def test_prefiltered_store_uses_vectorized_mmr(self, store, embeddings, temp_dir, monkeypatch):
+        from amldo.rag import metadata_filter
+
+        calls = []
+
+        def spy(*args, **kwargs):
+            calls.append(kwargs.get("filter"))
+            return mmr_search_with_score_by_vector(*args, **kwargs)
+
+        monkeypatch.setattr(metadata_filter, "mmr_search_with_score_by_vector", spy)
+        save_vector_store(store, temp_dir)
+        db = load_vector_store(temp_dir, embeddings)
+
+        def only_lei(metadata):
+            return metadata["lei"] == "L13709"
+
+        docs = db.max_marginal_relevance_search("consulta", k=5, filter={"lei": "L13709"})
+        scored = db.max_marginal_relevance_search_with_score_by_vector(
+            embeddings.embed_query("consulta"), k=5, filter=only_lei
+        )
+
+        # Pré-filtro já aplicado ao índice; callable segue pelo pós-filtro
+        assert calls == [None, only_lei]
+        for selected in (docs, [d for d, _ in scored]):
+            assert len(selected) == 5
+            assert all(d.metadata["lei"] == "L13709" for d in selected)
+
+    def test_benchmark_report(self, store):
+        queries = np.random.default_rng(0).normal(size=(5, 16)).astype(np.float32)
+
+        report = benchmark_mmr(store, queries, k_values=(4, 50), fetch_k=20)
+
+        assert [row["k"] for row in report] == [4, 50]
+        assert [row["fetch_k"] for row in report] == [20, 50]
+        assert all(row["agreement"] == 1.0 for row in report)
+        assert all(row["vectorized_ms"] > 0 and row["langchain_ms"] > 0 for row in report)
@@ -0,0 +1,115 @@
+"""
+Testes unitários para a extração paralela de PDFs (amldo.pipeline.ingestion.parallel).
+"""
+
+import importlib.util
+import multiprocessing
+
+import pytest
+
+from amldo.core.exceptions import IngestionError
+from amldo.pipeline.ingestion.parallel import (
+    extract_page_range,
+    extract_pdf_text,
+    extract_pdfs,
+    plan_tasks,
+)
+
+pytestmark = pytest.mark.skipif(
+    importlib.util.find_spec("fitz") is None, reason="PyMuPDF (fitz) não instalado"
+)
+
+
+def _make_pdf(path, pages):
+    import fitz
+
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Art. {i + 1}. Pagina {i + 1} de {path.stem}.")
+    doc.save(str(path))
+    return path
+
+
+@pytest.fixture
+def pdfs(temp_dir):
+    return [
+        _make_pdf(temp_dir / "grande.pdf", 7),
+        _make_pdf(temp_dir / "pequeno.pdf", 1),
+        _make_pdf(temp_dir / "medio.pdf", 3),
+    ]
+
+
+def _sequential(path, backend="pymupdf"):
+    import fitz
+
+    with fitz.open(str(path)) as doc:
+        pages = doc.page_count
+    return "\n".join(extract_page_range(str(path), 0, pages, backend))
+
+
+def _extract_in_daemon(paths, results):
+    try:
+        extracted = extract_pdfs(paths, max_workers=2, pages_per_task=2)
+        results.put({str(r.path): (r.text, r.error) for r in extracted})
+    except BaseException as e:  # AssertionError: daemonic processes are not allowed...
+        results.put(repr(e))
+
+
+class TestParallelExtraction:
+    """Testes da divisão em tarefas e da remontagem em ordem de página."""
+
+    def test_plan_tasks_splits_large_files(self, temp_dir):
+        tasks = plan_tasks({temp_dir / "a.pdf": 5, temp_dir / "b.pdf": 1}, pages_per_task=2)
+
+        assert sorted((p.name, start, stop) for p, start, stop in tasks) == [
+            ("a.pdf", 0, 2),
+            ("a.pdf", 2, 4),
+            ("a.pdf", 4, 5),
+            ("b.pdf", 0, 1),
+        ]
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_text_matches_sequential_extraction(self, pdfs, max_workers):
+        results = {
+            r.path: r for r in extract_pdfs(pdfs, max_workers=max_workers, pages_per_task=2)
+        }
+
+        assert set(results) == set(pdfs)
+        for path in pdfs:
+            assert results[path].error is None
+            assert results[path].text == _sequential(path)
+        assert results[pdfs[0]].pages == 7
+
+    def test_pypdf2_backend(self, pdfs):
+        pytest.importorskip("PyPDF2")
+        text = extract_pdf_text(pdfs[0], backend="pypdf2", max_workers=1, pages_per_task=3)
+
+        assert text == _sequential(pdfs[0], "pypdf2")
+        assert text.index("Pagina 1 ") < text.index("Pagina 7 ")
+
+    def test_invalid_file_reports_error(self, pdfs, temp_dir):
+        broken = temp_dir / "quebrado.pdf"
+        broken.write_bytes(b"isto nao e um pdf")
+
+        results = {r.path.name: r for r in extract_pdfs([broken, pdfs[1]], max_workers=1)}
+
+        assert results["quebrado.pdf"].error
+        assert results["pequeno.pdf"].text == _sequential(pdfs[1])
+        with pytest.raises(IngestionError):
+            extract_pdf_text(broken)
+
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(), reason="requer fork"
+    )
+    def test_daemon_process_extracts_serially(self, pdfs):
+        """Dentro de um processo daemon (ex: worker embutido), não abre o pool."""
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        process = context.Process(target=_extract_in_daemon, args=(pdfs, results), daemon=True)
+        process.start()
+        extracted = results.get(timeout=60)
+        process.join(10)
+
+        assert isinstance(extracted, dict), extracted
+        for path in pdfs:
+            assert extracted[str(path)] == (_sequential(path), None)
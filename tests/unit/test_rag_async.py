@@ -0,0 +1,118 @@
+"""
+Testes unitários para o pipeline RAG assíncrono (v1, v2 e v3).
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from amldo.core.config import settings
+from amldo.core.exceptions import LLMError, RetrievalError
+from amldo.rag.v1 import tools as v1_tools
+from amldo.rag.v2 import tools as v2_tools
+from amldo.rag.v3 import tools as v3_tools
+
+
+ALL_VERSIONS = [v1_tools, v2_tools, v3_tools]
+
+
+class TestRagAnswerAsync:
+    """Testes de `_rag_answer_async` e `consultar_base_rag_async`."""
+
+    @pytest.mark.parametrize("tools", ALL_VERSIONS)
+    def test_async_matches_sync(self, tools, fake_rag_runtime):
+        """A versão assíncrona produz a mesma resposta da síncrona."""
+        sync_answer = tools._rag_answer("O que é licitação?", search_type="similarity", k=2)
+        async_answer = asyncio.run(
+            tools._rag_answer_async("O que é licitação?", search_type="similarity", k=2)
+        )
+        assert async_answer == sync_answer == "resposta fake"
+
+    @pytest.mark.parametrize("tools", ALL_VERSIONS)
+    def test_consultar_base_rag_async(self, tools, fake_rag_runtime):
+        """A ferramenta pública assíncrona usa o runtime compartilhado."""
+        assert asyncio.run(tools.consultar_base_rag_async("Pregão")) == "resposta fake"
+
+    def test_concurrent_queries(self, fake_rag_runtime):
+        """Várias consultas simultâneas são atendidas no mesmo event loop."""
+        async def main():
+            return await asyncio.gather(
+                *(v2_tools.consultar_base_rag_async(f"Pergunta {i}") for i in range(8))
+            )
+
+        assert asyncio.run(main()) == ["resposta fake"] * 8
+
+    def test_context_contains_hierarchy(self, fake_rag_runtime):
+        """O contexto v2 recuperado é estruturado por lei/título/capítulo."""
+        context = v2_tools._retrieve_context("licitação", search_type="similarity", k=4)
+        assert "<LEI L14133>" in context
+        assert "<ARTIGO: artigo_1>" in context
+
+    @pytest.mark.parametrize("tools", ALL_VERSIONS)
+    def test_retrieval_error(self, tools, fake_rag_runtime, monkeypatch):
+        """Falhas na busca viram RetrievalError."""
+        def broken(*args, **kwargs):
+            raise RuntimeError("índice corrompido")
+
+        monkeypatch.setattr(fake_rag_runtime.vector_db, "as_retriever", broken)
+        with pytest.raises(RetrievalError):
+            asyncio.run(tools._rag_answer_async("Teste"))
+
+    @pytest.mark.parametrize("tools", ALL_VERSIONS)
+    def test_llm_error(self, tools, fake_rag_runtime, monkeypatch):
+        """Falhas do LLM viram LLMError."""
+        async def broken(*args, **kwargs):
+            raise RuntimeError("quota excedida")
+
+        monkeypatch.setattr(type(fake_rag_runtime.llm), "ainvoke", broken)
+        with pytest.raises(LLMError):
+            asyncio.run(tools._rag_answer_async("Teste", search_type="similarity", k=2))
+
+
+    def test_v1_score_threshold_retriever(self, fake_rag_runtime):
+        """similarity_score_threshold recebe o score mínimo configurado."""
+        retriever = v1_tools._get_retriever(search_type="similarity_score_threshold")
+
+        assert retriever.search_kwargs["score_threshold"] == settings.search_score_threshold
+
+
+class TestRagAnswerStream:
+    """Testes do streaming v2 (`consultar_base_rag_stream` e `/api/ask/stream`)."""
+
+    def test_stream_sources_then_tokens(self, fake_rag_runtime):
+        """Fontes são emitidas antes dos tokens, que recompõem a resposta."""
+        async def main():
+            return [e async for e in v2_tools.consultar_base_rag_stream("licitação")]
+
+        events = asyncio.run(main())
+
+        assert events[0]["event"] == "sources"
+        assert {"lei", "titulo", "capitulo", "artigo"} <= set(events[0]["data"][0])
+        assert all(not s["artigo"].endswith(".txt") for s in events[0]["data"])
+
+        tokens = [e["data"] for e in events[1:]]
+        assert all(e["event"] == "token" for e in events[1:])
+        assert "".join(tokens) == "resposta fake"
+
+    def test_stream_endpoint(self, api_client, fake_rag_runtime):
+        """/api/ask/stream responde text/event-stream com sources, token e done."""
+        with patch("amldo.interfaces.api.routers.query.track_query_metrics"):
+            response = api_client.post("/api/ask/stream", json={"question": "Pregão"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        body = response.text
+        assert body.index("event: sources") < body.index("event: token") < body.index("event: done")
+
+    def test_stream_endpoint_retrieval_error(self, api_client, fake_rag_runtime, monkeypatch):
+        """Falha na recuperação vira HTTP 500 antes do stream começar."""
+        def broken(*args, **kwargs):
+            raise RuntimeError("índice corrompido")
+
+        monkeypatch.setattr(fake_rag_runtime.vector_db, "as_retriever", broken)
+        with patch("amldo.interfaces.api.routers.query.track_query_metrics"):
+            response = api_client.post("/api/ask/stream", json={"question": "Pregão"})
+
+        assert response.status_code == 500
@@ -0,0 +1,134 @@
+"""
+Testes unitários para o runtime RAG compartilhado (amldo.rag.runtime).
+"""
+
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from amldo.core.config import settings
+from amldo.rag.runtime import RAGRuntime, get_rag_runtime, reset_rag_runtime
+
+
+@pytest.fixture
+def runtime():
+    """Runtime isolado com construtores mockados."""
+    rt = RAGRuntime()
+    with patch.object(RAGRuntime, "_build_embeddings", return_value=Mock(name="emb")) as emb, \
+         patch.object(RAGRuntime, "_load_vector_db", return_value=Mock(name="vdb")) as vdb, \
+         patch.object(RAGRuntime, "_build_llm", return_value=Mock(name="llm")) as llm:
+        rt.builders = {"embeddings": emb, "vector_db": vdb, "llm": llm}
+        yield rt
+
+
+class TestRAGRuntimeLazy:
+    """Testes de inicialização preguiçosa."""
+
+    def test_nothing_loaded_on_init(self, runtime):
+        """Criar o runtime não deve carregar nenhum recurso."""
+        for builder in runtime.builders.values():
+            builder.assert_not_called()
+        assert "loaded=[]" in repr(runtime)
+
+    def test_resources_built_once(self, runtime):
+        """Cada recurso é construído uma única vez."""
+        first = runtime.vector_db
+        second = runtime.vector_db
+        assert first is second
+        runtime.builders["vector_db"].assert_called_once()
+
+        assert runtime.llm is runtime.llm
+        runtime.builders["llm"].assert_called_once()
+
+    def test_concurrent_access_builds_once(self, runtime):
+        """Acessos concorrentes não duplicam a construção."""
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(runtime.embeddings)) for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len({id(r) for r in results}) == 1
+        runtime.builders["embeddings"].assert_called_once()
+
+    def test_reload_vector_db(self, runtime):
+        """reload_vector_db força nova leitura do índice."""
+        first = runtime.vector_db
+        runtime.reload_vector_db()
+        second = runtime.vector_db
+        assert first is not None and second is not None
+        assert runtime.builders["vector_db"].call_count == 2
+
+    def test_replaced_index_is_reloaded(self, runtime, temp_dir, monkeypatch):
+        """Índice substituído em disco (ex: pelo worker de processamento) é relido."""
+        monkeypatch.setattr(runtime.settings, "vector_db_path", str(temp_dir))
+        (temp_dir / "index.faiss").write_bytes(b"v1")
+
+        first = runtime.vector_db
+        assert runtime.vector_db is first
+        assert runtime.builders["vector_db"].call_count == 1
+
+        (temp_dir / "novo.faiss").write_bytes(b"v2-maior")
+        (temp_dir / "novo.faiss").replace(temp_dir / "index.faiss")
+        reloaded = runtime.vector_db
+        assert reloaded is not None
+        assert runtime.builders["vector_db"].call_count == 2
+
+
+    def test_fingerprint_follows_rewritten_index(self, runtime, temp_dir, monkeypatch):
+        """Fingerprint muda com o índice em disco, sem ler vector_db nem reload_vector_db."""
+        monkeypatch.setattr(runtime.settings, "vector_db_path", str(temp_dir))
+        (temp_dir / "index.faiss").write_bytes(b"v1")
+        loaded = runtime.vector_db
+        before = runtime.index_fingerprint
+        assert runtime.index_fingerprint == before
+
+        (temp_dir / "novo.faiss").write_bytes(b"v2-maior")
+        (temp_dir / "novo.faiss").replace(temp_dir / "index.faiss")
+
+        assert runtime.index_fingerprint != before
+        # O store antigo é descartado junto com o fingerprint
+        assert runtime._vector_db is None
+        assert loaded is not None
+
+
+class TestRAGRuntimeSingleton:
+    """Testes do singleton."""
+
+    def test_singleton_shared(self):
+        """get_rag_runtime retorna sempre a mesma instância."""
+        reset_rag_runtime()
+        assert get_rag_runtime() is get_rag_runtime()
+
+    def test_reset_creates_new_instance(self):
+        """reset_rag_runtime descarta a instância atual."""
+        first = get_rag_runtime()
+        reset_rag_runtime()
+        assert get_rag_runtime() is not first
+
+
+class TestRAGRuntimeData:
+    """Testes com os arquivos de dados do repositório."""
+
+    @pytest.mark.requires_vector_db
+    def test_count_indexed_chunks_without_embeddings(self):
+        """Conta vetores do índice sem carregar o modelo de embedding."""
+        if not settings.vector_db_path_absolute.exists():
+            pytest.skip("Vector DB não encontrado")
+
+        rt = RAGRuntime()
+        with patch.object(RAGRuntime, "_build_embeddings") as emb:
+            assert rt.count_indexed_chunks() > 0
+            emb.assert_not_called()
+
+    def test_df_art_0_loaded_from_csv(self):
+        """Tabela de artigos 0 é carregada do CSV configurado."""
+        if not settings.artigos_0_csv_path_absolute.exists():
+            pytest.skip("CSV de artigos 0 não encontrado")
+
+        df = RAGRuntime().df_art_0
+        assert {"lei", "titulo", "capitulo", "texto"} <= set(df.columns)
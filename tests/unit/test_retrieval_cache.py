@@ -0,0 +1,99 @@
+"""
+Testes unitários para o cache de recuperação v2/v3 (amldo.rag.retrieval_cache).
+"""
+
+from unittest.mock import patch
+
+from amldo.rag.retrieval_cache import (
+    CachedRetrieval,
+    RetrievalCache,
+    embedding_bucket,
+    get_retrieval_cache,
+)
+from amldo.rag.v2 import tools as v2_tools
+from amldo.rag.v3 import tools as v3_tools
+
+
+FILTER = {"artigo": {"$nin": ["artigo_0.txt"]}}
+
+
+class TestRetrievalCache:
+    """Testes do RetrievalCache."""
+
+    def test_bucket_ignores_tiny_differences(self):
+        """Vetores praticamente iguais caem no mesmo bucket."""
+        assert embedding_bucket([0.6, 0.8]) == embedding_bucket([0.6, 0.8 + 1e-7])
+        assert embedding_bucket([0.6, 0.8]) == embedding_bucket([1.2, 1.6])
+        assert embedding_bucket([0.6, 0.8]) != embedding_bucket([0.8, 0.6])
+
+    def test_key_depends_on_search_configuration(self):
+        """k, search_type, filtro, renderizador e fingerprint compõem a chave."""
+        base = RetrievalCache.make_key([1.0, 0.0], 12, "mmr", FILTER, "xml", "fp")
+        assert RetrievalCache.make_key([1.0, 0.0], 6, "mmr", FILTER, "xml", "fp") != base
+        assert RetrievalCache.make_key([1.0, 0.0], 12, "similarity", FILTER, "xml", "fp") != base
+        assert RetrievalCache.make_key([1.0, 0.0], 12, "mmr", None, "xml", "fp") != base
+        assert RetrievalCache.make_key([1.0, 0.0], 12, "mmr", FILTER, "txt", "fp") != base
+        assert RetrievalCache.make_key([1.0, 0.0], 12, "mmr", FILTER, "xml", "novo") != base
+
+    def test_lru_eviction(self):
+        """Acima de max_entries, a entrada menos usada é descartada."""
+        cache = RetrievalCache(max_entries=1)
+        cache.put("a", CachedRetrieval(("1",), "ctx a"))
+        cache.put("b", CachedRetrieval(("2",), "ctx b"))
+
+        assert cache.get("a") is None
+        assert cache.get("b").context == "ctx b"
+
+
+class TestCachedRetrievalIntegration:
+    """Testes da integração com v2 e v3."""
+
+    def test_repeated_question_skips_faiss(self, fake_rag_runtime):
+        """A segunda recuperação igual não consulta o FAISS."""
+        first = v2_tools._retrieve_context("pregão", search_type="similarity", k=2)
+
+        with patch.object(v2_tools, "_get_retriever") as retriever:
+            second = v2_tools._retrieve_context("pregão", search_type="similarity", k=2)
+
+        retriever.assert_not_called()
+        assert first == second
+
+    def test_shared_between_v2_and_v3(self, fake_rag_runtime):
+        """v2 e v3 com a mesma configuração de busca compartilham o contexto."""
+        context_v2 = v2_tools._retrieve_context("licitação", search_type="similarity", k=3)
+
+        with patch.object(v3_tools, "_get_retriever") as retriever:
+            context_v3 = v3_tools._retrieve_context("licitação", search_type="similarity", k=3)
+
+        retriever.assert_not_called()
+        assert context_v3 == context_v2
+        assert get_retrieval_cache().stats()["hits"] == 1
+
+    def test_rewritten_index_misses(self, fake_rag_runtime, temp_dir, monkeypatch):
+        """Índice regravado em disco (sem reload_vector_db) não reutiliza o contexto antigo."""
+        monkeypatch.setattr(fake_rag_runtime.settings, "vector_db_path", str(temp_dir))
+        (temp_dir / "index.faiss").write_bytes(b"v1")
+        v2_tools._retrieve_context("pregão", search_type="similarity", k=2)
+
+        (temp_dir / "novo.faiss").write_bytes(b"v2-maior")
+        (temp_dir / "novo.faiss").replace(temp_dir / "index.faiss")
+        v2_tools._retrieve_context("pregão", search_type="similarity", k=2)
+
+        assert get_retrieval_cache().stats()["hits"] == 0
+        assert len(get_retrieval_cache()._entries) == 2
+
+    def test_chunk_ids_and_sources_stored(self, fake_rag_runtime):
+        """A entrada guarda os IDs dos chunks e as fontes."""
+        v2_tools._retrieve_context_and_sources("licitação", search_type="similarity", k=2)
+
+        (entry,) = get_retrieval_cache()._entries.values()
+        assert len(entry.chunk_ids) == 2
+        assert all(source["lei"] for source in entry.sources)
+
+    def test_disabled(self, fake_rag_runtime, monkeypatch):
+        """Com RETRIEVAL_CACHE_SIZE=0, toda consulta vai ao FAISS."""
+        from amldo.core.config import settings
+
+        monkeypatch.setattr(settings, "retrieval_cache_size", 0)
+        assert get_retrieval_cache() is None
+        assert v2_tools._retrieve_context("pregão", search_type="similarity", k=2)
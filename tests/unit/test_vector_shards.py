@@ -0,0 +1,155 @@
+"""
+Testes unitários para o vector store particionado por lei (amldo.rag.shards).
+"""
+
+import importlib.util
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from amldo.core.exceptions import VectorStoreError
+from amldo.rag.shards import (
+    ShardedVectorStore,
+    load_sharded_vector_store,
+    route_question,
+    shard_key,
+    split_law_filter,
+    write_shards,
+)
+
+pytestmark = pytest.mark.skipif(
+    importlib.util.find_spec("faiss") is None, reason="faiss não instalado"
+)
+
+LAWS = ["D10024", "L13709", "L14133", "Lcp123"]
+EXCLUDE_ART_0 = {"artigo": {"$nin": ["artigo_0.txt"]}}
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=16)
+
+
+@pytest.fixture
+def full_store(embeddings):
+    """Store único com as quatro leis (chunks de notebook e de PDF)."""
+    texts, metadatas = [], []
+    for i in range(80):
+        law = LAWS[i % 4]
+        texts.append(f"Texto {i}")
+        if i % 5 == 0:
+            metadatas.append({"file": f"{law}.pdf", "chunk_idx": i})
+        else:
+            metadatas.append({"lei": law, "artigo": f"artigo_{i % 3}.txt"})
+    return FAISS.from_texts(texts, embeddings, metadatas=metadatas)
+
+
+@pytest.fixture
+def sharded(full_store, embeddings, temp_dir):
+    write_shards(full_store, temp_dir, index_type="flat")
+    return load_sharded_vector_store(temp_dir, embeddings)
+
+
+class TestRouting:
+    """Testes do roteamento por filtro e por pergunta."""
+
+    @pytest.mark.parametrize(
+        "question, expected",
+        [
+            ("O que diz o art. 75 da Lei 14.133/2021?", ["L14133"]),
+            ("Prazos do Decreto nº 10024 e da LC nº 123", ["D10024", "Lcp123"]),
+            ("Quais as bases legais da LGPD?", ["L13709"]),
+            ("Quais são as hipóteses de dispensa? (art. 123)", []),
+        ],
+    )
+    def test_route_question(self, question, expected):
+        assert route_question(question, LAWS) == expected
+
+    def test_split_law_filter(self):
+        assert split_law_filter({"lei": "L14133", "titulo": "T"}, LAWS) == (
+            ["L14133"],
+            {"titulo": "T"},
+        )
+        assert split_law_filter({"lei": {"$nin": ["L14133"]}}, LAWS) == (
+            ["D10024", "L13709", "Lcp123"],
+            None,
+        )
+        assert split_law_filter(EXCLUDE_ART_0, LAWS) == (None, EXCLUDE_ART_0)
+
+    def test_shard_key(self):
+        assert shard_key({"lei": "L14133", "file": "x.pdf"}) == "L14133"
+        assert shard_key({"file": "Lcp123.pdf"}) == "Lcp123"
+        assert shard_key({}) == "outros"
+
+
+class TestShardedSearch:
+    """Testes da busca combinada entre partições."""
+
+    def test_write_shards_groups_by_law(self, sharded):
+        assert sharded.laws == LAWS
+        assert sharded.ntotal == 80
+        for law, shard in sharded.shards.items():
+            docs = [shard.docstore.search(i) for i in range(shard.index.ntotal)]
+            assert {shard_key(doc.metadata) for doc in docs} == {law}
+
+    def test_merged_top_k_matches_single_store(self, full_store, sharded):
+        expected = full_store.similarity_search_with_score("consulta", k=10)
+        results = sharded.similarity_search_with_score("consulta", k=10)
+
+        assert [d.page_content for d, _ in results] == [d.page_content for d, _ in expected]
+        assert [s for _, s in results] == pytest.approx([s for _, s in expected])
+
+    def test_question_routes_to_cited_law(self, sharded):
+        docs = sharded.similarity_search("Prazo na Lei 14.133", k=5, filter=EXCLUDE_ART_0)
+
+        assert len(docs) == 5
+        assert {shard_key(d.metadata) for d in docs} == {"L14133"}
+        assert all(d.metadata.get("artigo") != "artigo_0.txt" for d in docs)
+
+    def test_filter_routes_without_question(self, sharded):
+        excluded = {"lei": {"$nin": ["L14133", "L13709"]}}
+        docs = sharded.similarity_search("Lei 14.133", k=6, filter=excluded)
+
+        assert {shard_key(d.metadata) for d in docs} <= {"D10024", "Lcp123"}
+        assert sharded.similarity_search("consulta", k=3, filter={"lei": "L8666"}) == []
+
+    def test_mmr_and_retriever(self, sharded):
+        mmr = sharded.max_marginal_relevance_search(
+            "consulta", k=4, fetch_k=12, filter=EXCLUDE_ART_0
+        )
+        retriever = sharded.as_retriever(search_kwargs={"k": 4, "filter": {"lei": "L13709"}})
+
+        assert len(mmr) == 4
+        assert len({d.page_content for d in mmr}) == 4
+        assert all(d.metadata.get("artigo") != "artigo_0.txt" for d in mmr)
+        assert [shard_key(d.metadata) for d in retriever.invoke("consulta")] == ["L13709"] * 4
+
+    def test_partial_write_keeps_other_shards(self, full_store, embeddings, temp_dir, sharded):
+        before = {law: (temp_dir / law / "index.faiss").stat().st_mtime_ns for law in LAWS}
+
+        full_store.add_texts(["Lei nova"], metadatas=[{"lei": "L8666"}])
+        written = write_shards(full_store, temp_dir, laws=["L8666"], index_type="flat")
+
+        assert written == {"L8666": 1}
+        assert {law: (temp_dir / law / "index.faiss").stat().st_mtime_ns for law in LAWS} == before
+        reloaded = load_sharded_vector_store(temp_dir, embeddings)
+        assert reloaded.laws == sorted(LAWS + ["L8666"])
+
+    def test_from_texts_matches_written_shards(self, full_store, sharded, embeddings):
+        docs = [full_store.docstore.search(i) for i in full_store.index_to_docstore_id.values()]
+
+        store = ShardedVectorStore.from_texts(
+            [d.page_content for d in docs], embeddings, metadatas=[d.metadata for d in docs]
+        )
+
+        assert store.laws == LAWS
+        assert store.ntotal == 80
+        query = "Prazo na Lei 14.133"
+        assert [d.page_content for d in store.similarity_search(query, k=5)] == [
+            d.page_content for d in sharded.similarity_search(query, k=5)
+        ]
+
+    def test_requires_shards(self, embeddings):
+        with pytest.raises(VectorStoreError):
+            ShardedVectorStore({}, embeddings)
@@ -0,0 +1,247 @@
+"""
+Testes unitários para o formato em disco do vector store (amldo.rag.vector_store).
+"""
+
+import importlib.util
+import os
+import threading
+from pathlib import Path
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from amldo.core.exceptions import VectorStoreError
+from amldo.rag.vector_store import (
+    DOCSTORE_FILE,
+    PICKLE_FILE,
+    SQLiteDocstore,
+    ensure_docstore,
+    load_vector_store,
+    migrate_docstores,
+    save_vector_store,
+    write_index_atomic,
+)
+
+pytestmark = pytest.mark.skipif(
+    importlib.util.find_spec("faiss") is None, reason="faiss não instalado"
+)
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=32)
+
+
+@pytest.fixture
+def store(sample_articles_df, embeddings):
+    metadatas = sample_articles_df.drop(columns=["texto"]).to_dict("records")
+    return FAISS.from_texts(sample_articles_df["texto"].tolist(), embeddings, metadatas=metadatas)
+
+
+def _results(vector_db, search_type, search_kwargs, query="licitação"):
+    retriever = vector_db.as_retriever(search_type=search_type, search_kwargs=search_kwargs)
+    return [(doc.id, doc.page_content, doc.metadata) for doc in retriever.invoke(query)]
+
+
+class TestLoadVectorStore:
+    """Testes do modo de servir (índice mmap + docstore SQLite)."""
+
+    @pytest.mark.parametrize(
+        "search_type,search_kwargs",
+        [
+            ("similarity", {"k": 3}),
+            ("mmr", {"k": 2, "fetch_k": 4}),
+            ("similarity", {"k": 3, "filter": {"artigo": {"$nin": ["artigo_1.txt"]}}}),
+        ],
+    )
+    def test_matches_in_memory_store(self, store, embeddings, temp_dir, search_type, search_kwargs):
+        """Resultados idênticos aos do store original em memória."""
+        save_vector_store(store, temp_dir)
+
+        mmap_db = load_vector_store(temp_dir, embeddings)
+
+        assert _results(mmap_db, search_type, search_kwargs) == (
+            _results(store, search_type, search_kwargs)
+        )
+
+    def test_save_writes_no_pickle(self, store, temp_dir):
+        """Só index.faiss e docstore.sqlite; um index.pkl legado é removido."""
+        store.save_local(str(temp_dir))
+        save_vector_store(store, temp_dir)
+
+        assert sorted(os.listdir(temp_dir)) == sorted(["index.faiss", DOCSTORE_FILE])
+
+    def test_load_does_not_need_pickle(self, store, embeddings, temp_dir, monkeypatch):
+        save_vector_store(store, temp_dir)
+        monkeypatch.setattr(
+            "amldo.rag.vector_store.pickle.load",
+            lambda *a, **kw: pytest.fail("pickle não deve ser lido"),
+        )
+
+        for mmap in (True, False):
+            vector_db = load_vector_store(temp_dir, embeddings, mmap=mmap)
+            assert len(vector_db.similarity_search("licitação", k=2)) == 2
+
+    def test_writable_roundtrip(self, store, embeddings, temp_dir):
+        """mmap=False permite add_documents; o resultado regravado é servido em mmap."""
+        save_vector_store(store, temp_dir)
+
+        vector_db = load_vector_store(temp_dir, embeddings, mmap=False)
+        vector_db.add_texts(["Art. 99. Texto novo."], metadatas=[{"artigo": "artigo_99.txt"}])
+        save_vector_store(vector_db, temp_dir)
+
+        served = load_vector_store(temp_dir, embeddings)
+        assert served.index.ntotal == len(store.index_to_docstore_id) + 1
+        assert served.similarity_search("Art. 99. Texto novo.", k=1)[0].metadata == {
+            "artigo": "artigo_99.txt"
+        }
+
+    def test_hits_keep_docstore_ids(self, store, embeddings, temp_dir):
+        save_vector_store(store, temp_dir)
+
+        served = load_vector_store(temp_dir, embeddings)
+        ids = {doc.id for doc in served.similarity_search("licitação", k=4)}
+        assert ids == set(store.index_to_docstore_id.values())
+
+    def test_docstore_is_generated_from_pickle(self, store, embeddings, temp_dir):
+        """Vector stores antigos (só index.pkl) ganham o docstore.sqlite na migração."""
+        store.save_local(str(temp_dir))
+        assert not (temp_dir / DOCSTORE_FILE).exists()
+
+        assert migrate_docstores(temp_dir, allow_dangerous_deserialization=True) == [
+            temp_dir / DOCSTORE_FILE
+        ]
+        vector_db = load_vector_store(temp_dir, embeddings)
+
+        assert len(vector_db.docstore) == len(store.index_to_docstore_id)
+
+    def test_load_never_reads_pickle(self, store, embeddings, temp_dir, monkeypatch):
+        """O caminho de servir exige docstore.sqlite, mesmo com um index.pkl presente."""
+        import pickle
+
+        store.save_local(str(temp_dir))
+        monkeypatch.setattr(pickle, "load", lambda *a, **kw: pytest.fail("pickle lido"))
+
+        with pytest.raises(VectorStoreError, match="amldo-migrate-docstore"):
+            load_vector_store(temp_dir, embeddings)
+
+    def test_migrate_includes_shards(self, store, temp_dir):
+        from amldo.rag.shards import SHARDS_DIR
+
+        store.save_local(str(temp_dir))
+        store.save_local(str(temp_dir / SHARDS_DIR / "L14133"))
+
+        migrated = migrate_docstores(temp_dir, allow_dangerous_deserialization=True)
+
+        assert migrated == [
+            temp_dir / DOCSTORE_FILE,
+            temp_dir / SHARDS_DIR / "L14133" / DOCSTORE_FILE,
+        ]
+
+    def test_stale_docstore_is_regenerated(self, store, sample_articles_df, temp_dir):
+        """index.pkl regravado por `save_local` (ex: notebook) é migrado de novo."""
+        save_vector_store(store, temp_dir)
+        store.add_texts(["Art. 99. Texto novo."], metadatas=[{"artigo": "artigo_99.txt"}])
+        store.save_local(str(temp_dir))
+        stat = (temp_dir / PICKLE_FILE).stat()
+        os.utime(temp_dir / DOCSTORE_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+
+        ensure_docstore(temp_dir, allow_dangerous_deserialization=True)
+
+        assert len(SQLiteDocstore(temp_dir / DOCSTORE_FILE)) == len(sample_articles_df) + 1
+
+    def test_pickle_not_allowed(self, store, temp_dir):
+        store.save_local(str(temp_dir))
+
+        with pytest.raises(VectorStoreError):
+            migrate_docstores(temp_dir, allow_dangerous_deserialization=False)
+
+    def test_missing_index(self, embeddings, temp_dir):
+        with pytest.raises(VectorStoreError):
+            load_vector_store(temp_dir, embeddings)
+
+    def test_save_swaps_docstore_before_index(self, store, temp_dir, monkeypatch):
+        from amldo.rag import vector_store
+
+        replaced = []
+        real_replace = os.replace
+
+        def spy(src, dst):
+            replaced.append(Path(dst).name)
+            real_replace(src, dst)
+
+        monkeypatch.setattr(vector_store.os, "replace", spy)
+        save_vector_store(store, temp_dir)
+
+        assert replaced[-2:] == [DOCSTORE_FILE, "index.faiss"]
+
+    @pytest.mark.parametrize("mmap", [True, False])
+    def test_load_between_swaps_retries(self, store, embeddings, temp_dir, monkeypatch, mmap):
+        """Docstore novo com índice antigo (gravação em andamento): recarrega uma vez."""
+        from amldo.rag import vector_store
+
+        old, new = temp_dir / "old", temp_dir / "new"
+        save_vector_store(store, old)
+        store.add_texts(["Art. 99. Texto novo."], metadatas=[{"artigo": "artigo_99.txt"}])
+        save_vector_store(store, new)
+        os.replace(new / DOCSTORE_FILE, old / DOCSTORE_FILE)
+
+        # A gravação termina (troca do índice) durante a espera
+        monkeypatch.setattr(
+            vector_store.time,
+            "sleep",
+            lambda _: os.replace(new / "index.faiss", old / "index.faiss"),
+        )
+        vector_db = load_vector_store(old, embeddings, mmap=mmap)
+
+        assert vector_db.index.ntotal == len(store.index_to_docstore_id)
+
+    def test_load_inconsistent_store(self, store, embeddings, temp_dir, monkeypatch):
+        from amldo.rag import vector_store
+
+        save_vector_store(store, temp_dir / "old")
+        store.add_texts(["Art. 99. Texto novo."], metadatas=[{"artigo": "artigo_99.txt"}])
+        save_vector_store(store, temp_dir / "new")
+        os.replace(temp_dir / "new" / DOCSTORE_FILE, temp_dir / "old" / DOCSTORE_FILE)
+        monkeypatch.setattr(vector_store.time, "sleep", lambda _: None)
+
+        with pytest.raises(VectorStoreError, match="inconsistente"):
+            load_vector_store(temp_dir / "old", embeddings)
+
+    def test_write_index_atomic_keeps_mapped_file(self, store, embeddings, temp_dir):
+        """O índice novo é um arquivo novo; o mapeado antes continua intacto."""
+        save_vector_store(store, temp_dir)
+        db = load_vector_store(temp_dir, embeddings)
+        inode = (temp_dir / "index.faiss").stat().st_ino
+
+        write_index_atomic(store.index, temp_dir / "index.faiss")
+
+        assert (temp_dir / "index.faiss").stat().st_ino != inode
+        assert db.similarity_search("Texto 1", k=1)
+        assert [p.name for p in temp_dir.iterdir() if p.name.startswith(".")] == []
+
+    def test_loaded_store_keeps_its_docstore_after_save(self, sample_articles_df, embeddings, temp_dir):
+        """Threads novas leem o docstore carregado, não um de mesmo tamanho gravado depois."""
+        metadatas = sample_articles_df.drop(columns=["texto"]).to_dict("records")
+        texts = sample_articles_df["texto"].tolist()
+        save_vector_store(FAISS.from_texts(texts, embeddings, metadatas=metadatas), temp_dir)
+        db = load_vector_store(temp_dir, embeddings)
+        expected = [doc.page_content for doc in db.similarity_search(texts[0], k=3)]
+
+        rewritten = [f"{text} (alterado)" for text in reversed(texts)]
+        save_vector_store(FAISS.from_texts(rewritten, embeddings, metadatas=metadatas), temp_dir)
+
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(db.similarity_search(texts[0], k=3))
+        )
+        thread.start()
+        thread.join()
+
+        assert [doc.page_content for doc in results[0]] == expected
+
+    def test_docstore_unknown_id(self, store, temp_dir):
+        save_vector_store(store, temp_dir)
+
+        assert isinstance(SQLiteDocstore(temp_dir / DOCSTORE_FILE).search("nao-existe"), str)